@@ -0,0 +1,36 @@
+"""Add generated latitude/longitude columns to POIs and accommodations.
+
+The columns are STORED generated columns computed from ``coordinates``,
+so they always match the geometry and can be read without ST_X/ST_Y or a
+WKB decode per row. Existing rows are filled by PostgreSQL when the
+columns are added.
+
+Revision ID: 031_add_generated_lat_lon
+Revises: 030_add_segment_estimated_cost
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '031_add_generated_lat_lon'
+down_revision = '030_add_segment_estimated_cost'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('pois', 'accommodations'):
+        op.add_column(table, sa.Column(
+            'latitude', sa.Float(), sa.Computed('ST_Y(coordinates)', persisted=True), nullable=True
+        ))
+        op.add_column(table, sa.Column(
+            'longitude', sa.Float(), sa.Computed('ST_X(coordinates)', persisted=True), nullable=True
+        ))
+
+
+def downgrade() -> None:
+    for table in ('accommodations', 'pois'):
+        op.drop_column(table, 'longitude')
+        op.drop_column(table, 'latitude')
@@ -0,0 +1,25 @@
+"""Enable pg_trgm for fuzzy POI name matching.
+
+Used by GeospatialService.match_existing_pois to spot suggested places
+that are already on a destination under a slightly different name.
+Purely additive.
+
+Revision ID: 032_enable_pg_trgm
+Revises: 031_add_generated_lat_lon
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+# revision identifiers
+revision = "032_enable_pg_trgm"
+down_revision = "031_add_generated_lat_lon"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+
+
+def downgrade() -> None:
+    op.execute("DROP EXTENSION IF EXISTS pg_trgm;")
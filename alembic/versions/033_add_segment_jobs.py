@@ -0,0 +1,55 @@
+"""Add segment_jobs table for background segment recalculation.
+
+Destination edits enqueue a job instead of fetching routes inside the
+request. The partial unique index keeps at most one pending job per
+trip so repeated edits are debounced into a single recalculation.
+
+Revision ID: 033_add_segment_jobs
+Revises: 032_enable_pg_trgm
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '033_add_segment_jobs'
+down_revision = '032_enable_pg_trgm'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'segment_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('trip_id', sa.Integer(), sa.ForeignKey('trips.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('first_requested_at', sa.DateTime(), nullable=False),
+        sa.Column('request_count', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('segments_total', sa.Integer(), nullable=True),
+        sa.Column('segments_done', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('segment_ids', sa.JSON(), nullable=True),
+        sa.Column('worker', sa.String(100), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_segment_jobs_id', 'segment_jobs', ['id'])
+    op.create_index('ix_segment_jobs_trip_id', 'segment_jobs', ['trip_id'])
+    op.create_index('ix_segment_jobs_status_run_after', 'segment_jobs', ['status', 'run_after'])
+    op.create_index(
+        'uq_segment_jobs_trip_pending', 'segment_jobs', ['trip_id'],
+        unique=True, postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_segment_jobs_trip_pending', table_name='segment_jobs')
+    op.drop_index('ix_segment_jobs_status_run_after', table_name='segment_jobs')
+    op.drop_index('ix_segment_jobs_trip_id', table_name='segment_jobs')
+    op.drop_index('ix_segment_jobs_id', table_name='segment_jobs')
+    op.drop_table('segment_jobs')
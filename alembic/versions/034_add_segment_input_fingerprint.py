@@ -0,0 +1,31 @@
+"""Add routing input fingerprints to travel segments.
+
+``input_fingerprint`` hashes what a segment's route was built from
+(endpoints, mode, waypoints, stops, routing preference) so trip
+recalculation can skip segments whose inputs did not change. Existing
+rows have no fingerprint and are rebuilt on their next recalculation.
+``segment_jobs.segments_reused`` records how many a job skipped.
+
+Revision ID: 034_add_segment_fingerprint
+Revises: 033_add_segment_jobs
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '034_add_segment_fingerprint'
+down_revision = '033_add_segment_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('travel_segments', sa.Column('input_fingerprint', sa.String(length=64), nullable=True))
+    op.add_column('segment_jobs', sa.Column('segments_reused', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('segment_jobs', 'segments_reused')
+    op.drop_column('travel_segments', 'input_fingerprint')
@@ -0,0 +1,55 @@
+"""Add per-user notification counters and a keyset index for the feed.
+
+``notification_counters`` keeps each user's unread and total
+notification counts, updated in the same transaction as the
+notifications themselves, so the unread badge and the feed header no
+longer count rows. It is backfilled here; users without a row have no
+notifications. The feed index gains ``id`` so cursor pages on
+``(created_at, id)`` are served from the index.
+
+Revision ID: 035_add_notification_counters
+Revises: 034_add_segment_fingerprint
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '035_add_notification_counters'
+down_revision = '034_add_segment_fingerprint'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'notification_counters',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, unique=True),
+        sa.Column('unread_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_notification_counters_id', 'notification_counters', ['id'])
+
+    op.execute("""
+        INSERT INTO notification_counters (user_id, unread_count, total_count, created_at, updated_at)
+        SELECT user_id,
+               count(*) FILTER (WHERE NOT is_read),
+               count(*),
+               now() AT TIME ZONE 'utc',
+               now() AT TIME ZONE 'utc'
+        FROM notifications
+        GROUP BY user_id
+    """)
+
+    op.drop_index('ix_notifications_user_created', table_name='notifications')
+    op.create_index('ix_notifications_user_created_id', 'notifications', ['user_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_user_created_id', table_name='notifications')
+    op.create_index('ix_notifications_user_created', 'notifications', ['user_id', 'created_at'])
+    op.drop_table('notification_counters')
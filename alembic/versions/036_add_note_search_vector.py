@@ -0,0 +1,47 @@
+"""Add a full-text search vector and search indexes to notes.
+
+``search_vector`` is a STORED generated tsvector over the title (weight
+A) and the tag-stripped content (weight B), indexed with GIN so
+NoteService.search_notes can match and rank with ``@@``/``ts_rank``
+instead of scanning every note with ILIKE. A pg_trgm GIN index on
+titles (pg_trgm is enabled by 032) serves the short-query fallback.
+PostgreSQL fills the column for existing rows when it is added.
+
+Revision ID: 036_add_note_search_vector
+Revises: 035_add_notification_counters
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '036_add_note_search_vector'
+down_revision = '035_add_notification_counters'
+branch_labels = None
+depends_on = None
+
+# Same expression as app.models.note.NOTE_SEARCH_VECTOR_SQL at this revision
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', "
+    "coalesce(regexp_replace(content, '<[^>]*>', ' ', 'g'), '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.add_column('notes', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True
+    ))
+    op.create_index('ix_notes_search_vector', 'notes', ['search_vector'], postgresql_using='gin')
+    op.create_index(
+        'ix_notes_title_trgm', 'notes', ['title'],
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notes_title_trgm', table_name='notes')
+    op.drop_index('ix_notes_search_vector', table_name='notes')
+    op.drop_column('notes', 'search_vector')
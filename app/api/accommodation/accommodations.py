@@ -4,7 +4,7 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from geoalchemy2.functions import ST_SetSRID, ST_MakePoint, ST_X, ST_Y
+from geoalchemy2.functions import ST_SetSRID, ST_MakePoint
 
 from app.core.database import get_db
 from app.models import Accommodation, Destination
@@ -13,7 +13,7 @@ from app.api.deps import PaginationParams, get_current_user
 from app.models.user import User
 from app.services.geocoding_service import GeocodingService
 from app.services.activity_service import log_activity
-from app.api.permissions import check_trip_membership
+from app.api.permissions import check_destination_membership, check_trip_membership
 
 logger = logging.getLogger(__name__)
 
@@ -74,16 +74,16 @@ def check_overlap(
     return overlaps
 
 
-def accommodation_to_response(acc: Accommodation, latitude: float | None = None, longitude: float | None = None) -> dict:
-    """Convert Accommodation model to response dict with explicit lat/lng"""
+def accommodation_to_response(acc: Accommodation) -> dict:
+    """Convert Accommodation model to response dict (lat/lng from its generated columns)"""
     return {
         "id": acc.id,
         "destination_id": acc.destination_id,
         "name": acc.name,
         "type": acc.type,
         "address": acc.address,
-        "latitude": latitude if latitude is not None else acc.latitude,
-        "longitude": longitude if longitude is not None else acc.longitude,
+        "latitude": acc.latitude,
+        "longitude": acc.longitude,
         "check_in_date": acc.check_in_date,
         "check_out_date": acc.check_out_date,
         "booking_reference": acc.booking_reference,
@@ -165,7 +165,7 @@ async def create_accommodation(
 
     # Create accommodation
     acc_data = accommodation.model_dump()
-    # Remove latitude/longitude as they're not direct model fields
+    # latitude/longitude are generated from coordinates, not written directly
     latitude = acc_data.pop("latitude", None)
     longitude = acc_data.pop("longitude", None)
 
@@ -189,19 +189,7 @@ async def create_accommodation(
         )
 
     db.add(db_accommodation)
-    await db.flush()
-
-    # Re-query to get the coordinates properly extracted
-    result = await db.execute(
-        select(
-            Accommodation,
-            ST_Y(Accommodation.coordinates).label('latitude'),
-            ST_X(Accommodation.coordinates).label('longitude')
-        )
-        .where(Accommodation.id == db_accommodation.id)
-    )
-    row = result.one()
-    created_acc, lat, lng = row
+    await db.flush()  # Generated latitude/longitude come back from the INSERT
 
     await log_activity(
         db,
@@ -209,11 +197,11 @@ async def create_accommodation(
         user_id=current_user.id,
         action="created",
         entity_type="accommodation",
-        entity_id=created_acc.id,
-        entity_name=created_acc.name,
+        entity_id=db_accommodation.id,
+        entity_name=db_accommodation.name,
     )
 
-    return accommodation_to_response(created_acc, lat, lng)
+    return accommodation_to_response(db_accommodation)
 
 
 @router.get("/destinations/{destination_id}/accommodations", response_model=PaginatedResponse[AccommodationResponse])
@@ -244,22 +232,17 @@ async def list_accommodations_by_destination(
     )
     total = count_result.scalar()
 
-    # Get accommodations ordered by check-in date, with explicit lat/lng extraction and pagination
+    # Get accommodations ordered by check-in date, with pagination
     result = await db.execute(
-        select(
-            Accommodation,
-            ST_Y(Accommodation.coordinates).label('latitude'),
-            ST_X(Accommodation.coordinates).label('longitude')
-        )
+        select(Accommodation)
         .where(Accommodation.destination_id == destination_id)
         .order_by(Accommodation.check_in_date.asc(), Accommodation.created_at.asc())
         .offset(pagination.skip)
         .limit(pagination.limit)
     )
-    rows = result.all()
 
     return PaginatedResponse(
-        items=[accommodation_to_response(row[0], row[1], row[2]) for row in rows],
+        items=[accommodation_to_response(acc) for acc in result.scalars().all()],
         total=total,
         skip=pagination.skip,
         limit=pagination.limit,
@@ -275,32 +258,19 @@ async def get_accommodation(
 ):
     """Get a specific accommodation by ID"""
     response.headers["Cache-Control"] = "no-cache, must-revalidate"
-    result = await db.execute(
-        select(
-            Accommodation,
-            ST_Y(Accommodation.coordinates).label('latitude'),
-            ST_X(Accommodation.coordinates).label('longitude')
-        )
-        .where(Accommodation.id == id)
-    )
-    row = result.one_or_none()
+    result = await db.execute(select(Accommodation).where(Accommodation.id == id))
+    acc = result.scalar_one_or_none()
 
-    if not row:
+    if not acc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Accommodation with id {id} not found"
         )
 
-    acc, lat, lng = row
-
     # Resolve trip membership for this accommodation
-    dest_result = await db.execute(select(Destination).where(Destination.id == acc.destination_id))
-    destination = dest_result.scalar_one_or_none()
-    if not destination:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot verify resource ownership")
-    await check_trip_membership(db, destination.trip_id, current_user, "viewer")
+    await check_destination_membership(db, acc.destination_id, current_user, "viewer")
 
-    return accommodation_to_response(acc, lat, lng)
+    return accommodation_to_response(acc)
 
 
 @router.put("/accommodations/{id}", response_model=AccommodationResponse)
@@ -408,20 +378,9 @@ async def update_accommodation(
             4326
         )
 
+    # Generated latitude/longitude are returned by the UPDATE itself
     await db.flush()
 
-    # Re-query to get the coordinates properly extracted
-    result = await db.execute(
-        select(
-            Accommodation,
-            ST_Y(Accommodation.coordinates).label('latitude'),
-            ST_X(Accommodation.coordinates).label('longitude')
-        )
-        .where(Accommodation.id == id)
-    )
-    row = result.one()
-    updated_acc, lat, lng = row
-
     if destination:
         await log_activity(
             db,
@@ -429,11 +388,11 @@ async def update_accommodation(
             user_id=current_user.id,
             action="updated",
             entity_type="accommodation",
-            entity_id=updated_acc.id,
-            entity_name=updated_acc.name,
+            entity_id=db_accommodation.id,
+            entity_name=db_accommodation.name,
         )
 
-    return accommodation_to_response(updated_acc, lat, lng)
+    return accommodation_to_response(db_accommodation)
 
 
 @router.delete("/accommodations/{id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -454,24 +413,18 @@ async def delete_accommodation(
 
     acc_id = db_accommodation.id
     acc_name = db_accommodation.name
-    dest_result = await db.execute(select(Destination).where(Destination.id == db_accommodation.destination_id))
-    destination = dest_result.scalar_one_or_none()
-
-    if not destination:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot verify resource ownership")
-    await check_trip_membership(db, destination.trip_id, current_user, "owner")
+    trip_id = await check_destination_membership(db, db_accommodation.destination_id, current_user, "owner")
 
     await db.delete(db_accommodation)
 
-    if destination:
-        await log_activity(
-            db,
-            trip_id=destination.trip_id,
-            user_id=current_user.id,
-            action="deleted",
-            entity_type="accommodation",
-            entity_id=acc_id,
-            entity_name=acc_name,
-        )
+    await log_activity(
+        db,
+        trip_id=trip_id,
+        user_id=current_user.id,
+        action="deleted",
+        entity_type="accommodation",
+        entity_id=acc_id,
+        entity_name=acc_name,
+    )
 
     return None
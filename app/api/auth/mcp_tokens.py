@@ -21,6 +21,7 @@ from pydantic import BaseModel
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_cache import record_revocation
 from app.core.config import settings
 from app.core.database import get_db
 from app.api.deps import get_current_user
@@ -336,6 +337,7 @@ async def revoke_mcp_token(
     )
     db.add(revoked)
     await db.flush()
+    record_revocation(db, jti, user.id, expires_at=expires_at)
 
     return MessageResponse(message="Token revoked successfully")
 
@@ -375,6 +377,7 @@ async def revoke_all_mcp_tokens(
     )
     db.add(revoked)
     await db.flush()
+    record_revocation(db, marker_jti, user.id, revoked_at=now, expires_at=revoked.expires_at)
 
     return RevokeAllResponse(
         revoked_count=1,
@@ -28,6 +28,7 @@ from app.schemas.note import (
     NoteTypeEnum,
     NoteSearchRequest,
     NoteSearchResponse,
+    NoteSearchResult,
     NoteExportRequest,
 )
 
@@ -153,7 +154,13 @@ async def search_trip_notes(
     current_user: User = Depends(get_current_user),
     _: User = Depends(require_viewer),
 ):
-    """Search notes within a trip"""
+    """
+    Search notes within a trip.
+
+    Query words match the start of words in the title or content, so
+    "paint" finds "painting" but not "repainting" in content. Titles also
+    match the query anywhere inside them.
+    """
     # Verify trip exists
     result = await db.execute(select(Trip).where(Trip.id == trip_id))
     trip = result.scalar_one_or_none()
@@ -163,7 +170,7 @@ async def search_trip_notes(
             detail=f"Trip with id {trip_id} not found"
         )
 
-    notes = await NoteService.search_notes(
+    hits = await NoteService.search_notes(
         db,
         query=search_request.query,
         trip_id=trip_id,
@@ -173,8 +180,15 @@ async def search_trip_notes(
     )
 
     return NoteSearchResponse(
-        notes=notes,
-        count=len(notes),
+        notes=[
+            NoteSearchResult(
+                **NoteResponse.model_validate(hit.note).model_dump(),
+                rank=hit.rank,
+                snippet=hit.snippet,
+            )
+            for hit in hits
+        ],
+        count=len(hits),
         query=search_request.query
     )
 
@@ -1,3 +1,5 @@
+import base64
+import json
 import os
 from hmac import compare_digest
 from typing import Optional
@@ -5,9 +7,9 @@ from typing import Optional
 from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, ExpiredSignatureError
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_cache import get_principal_cache
 from app.core.config import settings
 from app.core.database import get_db
 from app.models.user import User
@@ -28,6 +30,48 @@ class PaginationParams:
         self.skip = skip
         self.limit = limit
 
+
+def encode_cursor(values: list) -> str:
+    """Encode the sort key of the last returned row as an opaque cursor."""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, length: int) -> list:
+    """Decode a cursor from encode_cursor. Raises 400 if it is malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != length:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def parse_bbox(bbox: Optional[str]) -> Optional[tuple[float, float, float, float]]:
+    """
+    Parse a "min_lon,min_lat,max_lon,max_lat" query value. Raises 400 if it is malformed.
+
+    min_lon may exceed max_lon for boxes crossing the antimeridian.
+    """
+    if bbox is None:
+        return None
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        min_lon = min_lat = max_lon = max_lat = None
+    if (
+        min_lon is None
+        or not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180)
+        or not (-90 <= min_lat <= max_lat <= 90)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid bbox, expected min_lon,min_lat,max_lon,max_lat",
+        )
+    return min_lon, min_lat, max_lon, max_lat
+
+
 security = HTTPBearer(auto_error=False)
 
 
@@ -66,10 +110,8 @@ async def get_current_user(
                 raise ValueError
         except (ValueError, OverflowError):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user ID")
-        stmt = select(User).where(User.id == uid, User.is_active == True)
-        result = await db.execute(stmt)
-        user = result.scalar_one_or_none()
-        if not user:
+        user = await get_principal_cache().load(db, uid)
+        if not user or not user.is_active:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
         return user
 
@@ -77,10 +119,8 @@ async def get_current_user(
     token = credentials.credentials if credentials else request.cookies.get("access_token")
     if not token:
         if not settings.AUTH_ENABLED:
-            stmt = select(User).where(User.id == _DEV_USER_ID, User.is_active == True)
-            result = await db.execute(stmt)
-            user = result.scalar_one_or_none()
-            if user:
+            user = await get_principal_cache().load(db, _DEV_USER_ID)
+            if user and user.is_active:
                 return user
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
     try:
@@ -97,9 +137,7 @@ async def get_current_user(
     if payload.get("type") != "access":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
 
-    stmt = select(User).where(User.id == int(user_id))
-    result = await db.execute(stmt)
-    user = result.scalar_one_or_none()
+    user = await get_principal_cache().load(db, int(user_id))
 
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
@@ -125,6 +163,5 @@ async def get_optional_user(
     if not user_id:
         return None
 
-    stmt = select(User).where(User.id == int(user_id), User.is_active == True)
-    result = await db.execute(stmt)
-    return result.scalar_one_or_none()
+    user = await get_principal_cache().load(db, int(user_id))
+    return user if user and user.is_active else None
@@ -1,8 +1,12 @@
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_cache import get_trip_role_cache
 from app.core.database import get_db
+from app.models.destination import Destination
 from app.models.user import User
 from app.models.trip_member import TripMember
 from app.api.deps import get_current_user
@@ -10,6 +14,22 @@ from app.api.deps import get_current_user
 ROLE_HIERARCHY = {"viewer": 0, "editor": 1, "owner": 2}
 
 
+def _require_role(role: Optional[str], min_level: int) -> None:
+    """Raise 403 unless ``role`` is at least ``min_level``."""
+    if role is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this trip")
+
+    user_level = ROLE_HIERARCHY.get(role, -1)
+    if user_level < min_level:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+
+
+async def get_trip_role(db: AsyncSession, trip_id: int, user_id: int) -> Optional[str]:
+    """Role of an accepted member on a trip (cached per trip), or None."""
+    roles = await get_trip_role_cache().load(db, trip_id)
+    return roles.role_for(user_id) if roles else None
+
+
 class TripPermission:
     """Dependency that checks the user has at least `min_role` on a trip."""
 
@@ -22,21 +42,7 @@ class TripPermission:
         user: User = Depends(get_current_user),
         db: AsyncSession = Depends(get_db),
     ) -> User:
-        stmt = select(TripMember).where(
-            TripMember.trip_id == trip_id,
-            TripMember.user_id == user.id,
-            TripMember.status == "accepted",
-        )
-        result = await db.execute(stmt)
-        member = result.scalar_one_or_none()
-
-        if not member:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this trip")
-
-        user_level = ROLE_HIERARCHY.get(member.role, -1)
-        if user_level < self.min_level:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
-
+        _require_role(await get_trip_role(db, trip_id, user.id), self.min_level)
         return user
 
 
@@ -52,17 +58,46 @@ async def check_trip_membership(
     min_role: str = "viewer",
 ) -> None:
     """Imperatively verify trip membership for endpoints without trip_id in the URL path."""
-    stmt = select(TripMember).where(
-        TripMember.trip_id == trip_id,
-        TripMember.user_id == user.id,
-        TripMember.status == "accepted",
+    _require_role(await get_trip_role(db, trip_id, user.id), ROLE_HIERARCHY[min_role])
+
+
+async def resolve_trip_role(
+    db: AsyncSession,
+    user_id: int,
+    destination_id: int,
+) -> tuple[Optional[int], Optional[str]]:
+    """Resolve a destination's trip and the user's role on it in one round trip.
+
+    Joins Destination -> accepted TripMember in a single query.
+
+    Returns (trip_id, role); trip_id is None if the destination does not
+    exist, role is None if the user is not an accepted member.
+    """
+    stmt = (
+        select(Destination.trip_id, TripMember.role)
+        .outerjoin(
+            TripMember,
+            and_(
+                TripMember.trip_id == Destination.trip_id,
+                TripMember.user_id == user_id,
+                TripMember.status == "accepted",
+            ),
+        )
+        .where(Destination.id == destination_id)
     )
-    result = await db.execute(stmt)
-    member = result.scalar_one_or_none()
+    row = (await db.execute(stmt)).one_or_none()
+    return (row.trip_id, row.role) if row else (None, None)
 
-    if not member:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this trip")
 
-    user_level = ROLE_HIERARCHY.get(member.role, -1)
-    if user_level < ROLE_HIERARCHY[min_role]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+async def check_destination_membership(
+    db: AsyncSession,
+    destination_id: int,
+    user: User,
+    min_role: str = "viewer",
+) -> int:
+    """Verify membership through a destination in one query and return its trip_id."""
+    trip_id, role = await resolve_trip_role(db, user.id, destination_id)
+    if trip_id is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot verify resource ownership")
+    _require_role(role, ROLE_HIERARCHY[min_role])
+    return trip_id
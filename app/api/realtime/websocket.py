@@ -8,6 +8,7 @@ from app.core.database import AsyncSessionLocal
 from app.models.user import User
 from app.models.trip_member import TripMember
 from app.services.auth_service import decode_token
+from app.services import notification_service
 from app.services.connection_manager import manager
 
 logger = logging.getLogger(__name__)
@@ -48,23 +49,27 @@ async def trip_websocket(
         if not member:
             await websocket.close(code=4003, reason="Not a member of this trip")
             return
+        unread, _ = await notification_service.get_counts(db, user_id)
 
     await manager.connect(trip_id, user_id, websocket)
+    # Later changes arrive as unread_count messages, so clients need not poll
+    await manager.send_to_user(trip_id, user_id, {"type": "unread_count", "count": unread})
 
     try:
         while True:
             try:
                 data = await websocket.receive_json()
             except (ValueError, TypeError):
-                await websocket.send_json({"type": "error", "detail": "Invalid JSON"})
+                await manager.send_to_user(trip_id, user_id, {"type": "error", "detail": "Invalid JSON"})
                 continue
             if not isinstance(data, dict):
-                await websocket.send_json({"type": "error", "detail": "Expected JSON object"})
+                await manager.send_to_user(trip_id, user_id, {"type": "error", "detail": "Expected JSON object"})
                 continue
-            # Handle incoming messages (e.g., typing indicators)
+            # Handle incoming messages (e.g., typing indicators); replies go
+            # through the socket's writer so sends never interleave
             if data.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
+                await manager.send_to_user(trip_id, user_id, {"type": "pong"})
     except WebSocketDisconnect:
-        await manager.disconnect(trip_id, user_id)
+        await manager.disconnect(trip_id, user_id, websocket)
     except Exception:
-        await manager.disconnect(trip_id, user_id)
+        await manager.disconnect(trip_id, user_id, websocket)
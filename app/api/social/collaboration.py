@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_cache import invalidate_trip_roles
 from app.core.database import get_db
 from app.models.user import User
 from app.models.trip import Trip
@@ -71,6 +72,8 @@ async def invite_member(
         await db.flush()
         await db.refresh(member)
 
+    invalidate_trip_roles(db, trip_id)
+
     # Create notification for invitee (after flush so member.id is available)
     trip = await db.get(Trip, trip_id)
     notification = Notification(
@@ -150,6 +153,7 @@ async def update_member_role(
     member.role = data.role
     await db.flush()
     await db.refresh(member)
+    invalidate_trip_roles(db, trip_id)
 
     target_user = await db.get(User, user_id)
     return TripMemberResponse(
@@ -187,6 +191,7 @@ async def remove_member(
 
     await db.delete(member)
     await db.flush()
+    invalidate_trip_roles(db, trip_id)
 
 
 @router.post("/invitations/{member_id}/accept", response_model=TripMemberResponse)
@@ -207,6 +212,7 @@ async def accept_invitation(
     member.accepted_at = datetime.utcnow()
     await db.flush()
     await db.refresh(member)
+    invalidate_trip_roles(db, member.trip_id)
 
     return TripMemberResponse(
         id=member.id,
@@ -237,6 +243,7 @@ async def reject_invitation(
     member.status = "rejected"
     await db.flush()
     await db.refresh(member)
+    invalidate_trip_roles(db, member.trip_id)
 
     return TripMemberResponse(
         id=member.id,
@@ -1,15 +1,16 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import select, func, update
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.models.user import User
 from app.models.notification import Notification
 from app.schemas.notification import NotificationResponse, NotificationList, UnreadCount
-from app.api.deps import get_current_user
+from app.api.deps import decode_cursor, encode_cursor, get_current_user
+from app.services import notification_service
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
@@ -18,31 +19,38 @@ router = APIRouter(prefix="/notifications", tags=["notifications"])
 async def list_notifications(
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces offset"),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    stmt = (
-        select(Notification)
-        .where(Notification.user_id == user.id)
-        .order_by(Notification.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-    )
-    result = await db.execute(stmt)
-    notifications = result.scalars().all()
+    """Newest notifications first, with the user's unread and total counts.
 
-    count_stmt = select(func.count(Notification.id)).where(Notification.user_id == user.id)
-    total = (await db.execute(count_stmt)).scalar()
+    Pages can be walked with ``offset`` or with the returned ``next_cursor``
+    (keyset pagination, no OFFSET scan). Counts come from the user's
+    notification counter rather than counting rows.
+    """
+    before = None
+    if cursor:
+        created_at, notification_id = decode_cursor(cursor, 2)
+        try:
+            before = (datetime.fromisoformat(created_at), int(notification_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
 
-    unread_stmt = select(func.count(Notification.id)).where(
-        Notification.user_id == user.id, Notification.is_read == False
+    # One extra row tells whether there is a next page
+    notifications = await notification_service.list_notifications(
+        db, user.id, limit=limit + 1, offset=offset, before=before,
     )
-    unread = (await db.execute(unread_stmt)).scalar()
+    has_more = len(notifications) > limit
+    notifications = notifications[:limit]
+    unread, total = await notification_service.get_counts(db, user.id)
 
+    last = notifications[-1] if notifications else None
     return NotificationList(
         notifications=[NotificationResponse.model_validate(n) for n in notifications],
         total=total,
         unread_count=unread,
+        next_cursor=encode_cursor([last.created_at.isoformat(), last.id]) if has_more else None,
     )
 
 
@@ -60,6 +68,7 @@ async def mark_as_read(
     if not notification:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
 
+    # The flush also decrements the user's unread counter
     notification.is_read = True
     notification.read_at = datetime.utcnow()
     await db.flush()
@@ -72,12 +81,7 @@ async def mark_all_as_read(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    stmt = (
-        update(Notification)
-        .where(Notification.user_id == user.id, Notification.is_read == False)
-        .values(is_read=True, read_at=datetime.utcnow())
-    )
-    await db.execute(stmt)
+    await notification_service.mark_all_read(db, user.id)
 
 
 @router.get("/unread-count", response_model=UnreadCount)
@@ -85,8 +89,7 @@ async def unread_count(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    stmt = select(func.count(Notification.id)).where(
-        Notification.user_id == user.id, Notification.is_read == False
-    )
-    count = (await db.execute(stmt)).scalar()
-    return UnreadCount(count=count)
+    """Unread notifications of the user. Open trip WebSockets also receive
+    ``unread_count`` messages whenever it changes."""
+    unread, _ = await notification_service.get_counts(db, user.id)
+    return UnreadCount(count=unread)
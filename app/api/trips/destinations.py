@@ -11,6 +11,7 @@ from app.schemas import DestinationCreate, DestinationUpdate, DestinationRespons
 from app.api.deps import PaginationParams, get_current_user
 from app.models.user import User
 from app.services.travel_segment_service import TravelSegmentService
+from app.services.segment_job_queue import enqueue_trip
 from app.services.activity_service import log_activity
 from app.api.permissions import require_viewer, require_editor, require_owner, check_trip_membership
 
@@ -192,7 +193,8 @@ async def update_destination(
     await db.refresh(db_destination)
 
     if coordinates_changed:
-        await TravelSegmentService.recalculate_trip_segments(db, db_destination.trip_id)
+        # Routes are fetched by the segment job runner once this commits
+        await enqueue_trip(db, db_destination.trip_id)
 
     await log_activity(
         db,
@@ -321,6 +323,7 @@ async def reorder_destinations(
 
     # Invalidate origin/return segments (reorder may change first/last destination)
     await TravelSegmentService.invalidate_origin_return_segments(db, trip_id)
+    await enqueue_trip(db, trip_id)
 
     # Refresh all destinations and return in new order
     reordered = []
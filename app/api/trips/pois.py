@@ -1,14 +1,16 @@
 import logging
 from typing import List, Optional
-from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, func
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from geoalchemy2.functions import ST_SetSRID, ST_MakePoint, ST_X, ST_Y
 
+from app.core.cache import delete_cached, get_cached, set_cached
 from app.core.database import get_db
-from app.api.deps import PaginationParams, get_current_user, get_optional_user
-from app.api.permissions import check_trip_membership
+from app.api.deps import PaginationParams, decode_cursor, encode_cursor, get_current_user, get_optional_user
+from app.api.permissions import check_destination_membership, check_trip_membership
 
 logger = logging.getLogger(__name__)
 from app.models import POI, Destination, Accommodation
@@ -30,13 +32,14 @@ from app.services.poi_optimization_service import get_poi_optimization_service,
 from app.services.google_places_service import GooglePlacesService
 from app.services.openrouteservice import get_ors_service, ORSServiceError
 from app.services.activity_service import log_activity
-import math
+from app.services.geospatial_service import GeospatialService, PlaceCandidate
+from app.core.geodesic import travel_matrix
 
 router = APIRouter()
 
 
-def poi_to_response(poi: POI, latitude: float | None = None, longitude: float | None = None) -> dict:
-    """Convert POI model to response dict with explicit lat/lng"""
+def poi_to_response(poi: POI) -> dict:
+    """Convert POI model to response dict (lat/lng from its generated columns)"""
     return {
         "id": poi.id,
         "destination_id": poi.destination_id,
@@ -44,8 +47,8 @@ def poi_to_response(poi: POI, latitude: float | None = None, longitude: float |
         "category": poi.category,
         "description": poi.description,
         "address": poi.address,
-        "latitude": latitude if latitude is not None else poi.latitude,
-        "longitude": longitude if longitude is not None else poi.longitude,
+        "latitude": poi.latitude,
+        "longitude": poi.longitude,
         "estimated_cost": poi.estimated_cost,
         "actual_cost": poi.actual_cost,
         "currency": poi.currency,
@@ -66,6 +69,48 @@ def poi_to_response(poi: POI, latitude: float | None = None, longitude: float |
     }
 
 
+# Listing order; the category prefix is served by ix_pois_destination_category
+# and id makes the order total so it can be used as a keyset.
+_POI_LIST_ORDER = (POI.category.asc(), POI.priority.desc(), POI.created_at.asc(), POI.id.asc())
+POI_COUNT_TTL = 60  # seconds a destination's POI total is reused across cursor pages
+
+
+def _poi_count_key(destination_id: int) -> str:
+    return f"poi_count:{destination_id}"
+
+
+def _poi_list_query(destination_id: int, after: Optional[list] = None):
+    """POIs of a destination in listing order, optionally after a cursor's sort key."""
+    stmt = (
+        select(POI)
+        .where(POI.destination_id == destination_id)
+        .order_by(*_POI_LIST_ORDER)
+    )
+    if after is not None:
+        category, priority, created_at, poi_id = after
+        try:
+            created_at = datetime.fromisoformat(created_at)
+            priority, poi_id = int(priority), int(poi_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        same_category = POI.category == category
+        same_priority = and_(same_category, POI.priority == priority)
+        stmt = stmt.where(
+            POI.category >= category,
+            or_(
+                POI.category > category,
+                and_(same_category, POI.priority < priority),
+                and_(same_priority, POI.created_at > created_at),
+                and_(same_priority, POI.created_at == created_at, POI.id > poi_id),
+            ),
+        )
+    return stmt
+
+
+def _poi_cursor(poi: POI) -> str:
+    return encode_cursor([poi.category, poi.priority, poi.created_at.isoformat(), poi.id])
+
+
 @router.post("/pois", response_model=POIResponse, status_code=status.HTTP_201_CREATED)
 async def create_poi(
     poi: POICreate,
@@ -87,7 +132,7 @@ async def create_poi(
 
     # Create POI
     poi_data = poi.model_dump()
-    # Remove latitude/longitude as they're not direct model fields
+    # latitude/longitude are generated from coordinates, not written directly
     latitude = poi_data.pop("latitude", None)
     longitude = poi_data.pop("longitude", None)
 
@@ -101,19 +146,8 @@ async def create_poi(
         )
 
     db.add(db_poi)
-    await db.flush()
-
-    # Re-query to get the coordinates properly extracted
-    result = await db.execute(
-        select(
-            POI,
-            ST_Y(POI.coordinates).label('latitude'),
-            ST_X(POI.coordinates).label('longitude')
-        )
-        .where(POI.id == db_poi.id)
-    )
-    row = result.one()
-    created_poi, lat, lng = row
+    await db.flush()  # Generated latitude/longitude come back from the INSERT
+    await delete_cached(_poi_count_key(poi.destination_id))
 
     await log_activity(
         db,
@@ -121,22 +155,14 @@ async def create_poi(
         user_id=current_user.id,
         action="created",
         entity_type="poi",
-        entity_id=created_poi.id,
-        entity_name=created_poi.name,
+        entity_id=db_poi.id,
+        entity_name=db_poi.name,
     )
 
-    return poi_to_response(created_poi, lat, lng)
+    return poi_to_response(db_poi)
 
 
-@router.get("/destinations/{destination_id}/pois", response_model=PaginatedPOIsByCategoryResponse)
-async def list_pois_by_destination(
-    destination_id: int,
-    pagination: PaginationParams = Depends(),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """Get POIs for a specific destination, grouped by category, with pagination"""
-    # Verify that the destination exists
+async def _get_listable_destination(db: AsyncSession, destination_id: int, current_user: User) -> Destination:
     dest_result = await db.execute(select(Destination).where(Destination.id == destination_id))
     destination = dest_result.scalar_one_or_none()
 
@@ -147,42 +173,49 @@ async def list_pois_by_destination(
         )
 
     await check_trip_membership(db, destination.trip_id, current_user, "viewer")
+    return destination
 
-    # Get total count
-    count_result = await db.execute(
-        select(func.count()).select_from(POI).where(POI.destination_id == destination_id)
-    )
-    total = count_result.scalar()
 
-    # Get POIs ordered by category and priority, with explicit lat/lng extraction and pagination
-    result = await db.execute(
-        select(
-            POI,
-            ST_Y(POI.coordinates).label('latitude'),
-            ST_X(POI.coordinates).label('longitude')
+@router.get("/destinations/{destination_id}/pois", response_model=PaginatedPOIsByCategoryResponse)
+async def list_pois_by_destination(
+    destination_id: int,
+    pagination: PaginationParams = Depends(),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces skip"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Get POIs for a specific destination, grouped by category, with pagination
+
+    Pages can be walked with ``skip`` or, for large destinations, with the
+    returned ``next_cursor`` (keyset pagination, no OFFSET scan). Cursor
+    pages reuse the total counted for the first page for up to
+    POI_COUNT_TTL seconds, so it may lag concurrent changes.
+    """
+    await _get_listable_destination(db, destination_id, current_user)
+
+    after = decode_cursor(cursor, 4) if cursor else None
+
+    total = await get_cached(_poi_count_key(destination_id)) if after is not None else None
+    if total is None:
+        count_result = await db.execute(
+            select(func.count()).select_from(POI).where(POI.destination_id == destination_id)
         )
-        .where(POI.destination_id == destination_id)
-        .order_by(POI.category.asc(), POI.priority.desc(), POI.created_at.asc())
-        .offset(pagination.skip)
-        .limit(pagination.limit)
-    )
-    rows = result.all()
+        total = count_result.scalar()
+        await set_cached(_poi_count_key(destination_id), total, ttl=POI_COUNT_TTL)
+
+    # One extra row tells whether there is a next page
+    stmt = _poi_list_query(destination_id, after).limit(pagination.limit + 1)
+    if after is None:
+        stmt = stmt.offset(pagination.skip)
+    pois = (await db.execute(stmt)).scalars().all()
+    has_more = len(pois) > pagination.limit
+    pois = pois[:pagination.limit]
 
     # Group POIs by category
     categories_dict: dict[str, list] = {}
-    for row in rows:
-        poi = row[0]
-        lat = row[1]
-        lng = row[2]
-
-        if poi.category not in categories_dict:
-            categories_dict[poi.category] = []
+    for poi in pois:
+        categories_dict.setdefault(poi.category, []).append(poi_to_response(poi))
 
-        # Create response dict with explicit coordinates
-        poi_response = poi_to_response(poi, lat, lng)
-        categories_dict[poi.category].append(poi_response)
-
-    # Convert to list of POIsByCategory
     grouped_pois = [
         {"category": category, "pois": pois_list}
         for category, pois_list in categories_dict.items()
@@ -191,11 +224,52 @@ async def list_pois_by_destination(
     return PaginatedPOIsByCategoryResponse(
         items=grouped_pois,
         total=total,
-        skip=pagination.skip,
+        skip=0 if after is not None else pagination.skip,
         limit=pagination.limit,
+        next_cursor=_poi_cursor(pois[-1]) if has_more else None,
     )
 
 
+@router.get("/destinations/{destination_id}/pois/stream")
+async def stream_pois_by_destination(
+    destination_id: int,
+    batch_size: int = Query(500, ge=1, le=2000, description="POIs read per query and per emitted line"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream all POIs of a destination as NDJSON category groups
+
+    Each line is a ``POIsByCategory`` object, emitted as soon as its
+    category is complete or holds ``batch_size`` POIs; a large category
+    therefore spans consecutive lines with the same ``category``. POIs are
+    read in keyset batches, so memory stays bounded by ``batch_size``.
+    The generator keeps using ``db``, which FastAPI (0.118+) closes only
+    after the response has been sent.
+    """
+    await _get_listable_destination(db, destination_id, current_user)
+
+    async def lines():
+        after = None
+        category, pois = None, []
+        while True:
+            rows = (await db.execute(_poi_list_query(destination_id, after).limit(batch_size))).scalars().all()
+            for poi in rows:
+                if pois and (poi.category != category or len(pois) >= batch_size):
+                    yield POIsByCategory(category=category, pois=pois).model_dump_json() + "\n"
+                    pois = []
+                category = poi.category
+                pois.append(poi_to_response(poi))
+            if len(rows) < batch_size:
+                break
+            last = rows[-1]
+            after = [last.category, last.priority, last.created_at.isoformat(), last.id]
+            db.expunge_all()
+        if pois:
+            yield POIsByCategory(category=category, pois=pois).model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.get("/pois/{id}", response_model=POIResponse)
 async def get_poi(
     id: int,
@@ -203,32 +277,19 @@ async def get_poi(
     current_user: User = Depends(get_current_user),
 ):
     """Get a specific POI by ID"""
-    result = await db.execute(
-        select(
-            POI,
-            ST_Y(POI.coordinates).label('latitude'),
-            ST_X(POI.coordinates).label('longitude')
-        )
-        .where(POI.id == id)
-    )
-    row = result.one_or_none()
+    result = await db.execute(select(POI).where(POI.id == id))
+    poi = result.scalar_one_or_none()
 
-    if not row:
+    if not poi:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"POI with id {id} not found"
         )
 
-    poi, lat, lng = row
-
     # Resolve trip membership through destination
-    dest_result = await db.execute(select(Destination).where(Destination.id == poi.destination_id))
-    destination = dest_result.scalar_one_or_none()
-    if not destination:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot verify resource ownership")
-    await check_trip_membership(db, destination.trip_id, current_user, "viewer")
+    await check_destination_membership(db, poi.destination_id, current_user, "viewer")
 
-    return poi_to_response(poi, lat, lng)
+    return poi_to_response(poi)
 
 
 @router.put("/pois/{id}", response_model=POIResponse)
@@ -249,11 +310,7 @@ async def update_poi(
         )
 
     # Resolve trip membership through destination
-    dest_result = await db.execute(select(Destination).where(Destination.id == db_poi.destination_id))
-    _dest = dest_result.scalar_one_or_none()
-    if not _dest:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot verify resource ownership")
-    await check_trip_membership(db, _dest.trip_id, current_user, "editor")
+    await check_destination_membership(db, db_poi.destination_id, current_user, "editor")
 
     # Update fields
     update_data = poi_update.model_dump(exclude_unset=True)
@@ -272,21 +329,10 @@ async def update_poi(
             4326
         )
 
+    # Generated latitude/longitude are returned by the UPDATE itself
     await db.flush()
 
-    # Re-query to get the coordinates properly extracted
-    result = await db.execute(
-        select(
-            POI,
-            ST_Y(POI.coordinates).label('latitude'),
-            ST_X(POI.coordinates).label('longitude')
-        )
-        .where(POI.id == id)
-    )
-    row = result.one()
-    updated_poi, lat, lng = row
-
-    dest_result = await db.execute(select(Destination).where(Destination.id == updated_poi.destination_id))
+    dest_result = await db.execute(select(Destination).where(Destination.id == db_poi.destination_id))
     destination = dest_result.scalar_one_or_none()
     if destination:
         await log_activity(
@@ -295,11 +341,11 @@ async def update_poi(
             user_id=current_user.id,
             action="updated",
             entity_type="poi",
-            entity_id=updated_poi.id,
-            entity_name=updated_poi.name,
+            entity_id=db_poi.id,
+            entity_name=db_poi.name,
         )
 
-    return poi_to_response(updated_poi, lat, lng)
+    return poi_to_response(db_poi)
 
 
 @router.delete("/pois/{id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -320,25 +366,20 @@ async def delete_poi(
 
     poi_id = db_poi.id
     poi_name = db_poi.name
-    dest_result = await db.execute(select(Destination).where(Destination.id == db_poi.destination_id))
-    destination = dest_result.scalar_one_or_none()
-
-    if not destination:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot verify resource ownership")
-    await check_trip_membership(db, destination.trip_id, current_user, "owner")
+    trip_id = await check_destination_membership(db, db_poi.destination_id, current_user, "owner")
 
     await db.delete(db_poi)
+    await delete_cached(_poi_count_key(db_poi.destination_id))
 
-    if destination:
-        await log_activity(
-            db,
-            trip_id=destination.trip_id,
-            user_id=current_user.id,
-            action="deleted",
-            entity_type="poi",
-            entity_id=poi_id,
-            entity_name=poi_name,
-        )
+    await log_activity(
+        db,
+        trip_id=trip_id,
+        user_id=current_user.id,
+        action="deleted",
+        entity_type="poi",
+        entity_id=poi_id,
+        entity_name=poi_name,
+    )
 
     return None
 
@@ -464,48 +505,14 @@ async def bulk_update_poi_schedule(
 
     await db.flush()
 
-    # Re-query all updated POIs with coordinates
+    # Re-query all updated POIs in schedule order
     result = await db.execute(
-        select(
-            POI,
-            ST_Y(POI.coordinates).label('latitude'),
-            ST_X(POI.coordinates).label('longitude')
-        )
+        select(POI)
         .where(POI.id.in_(poi_ids))
         .order_by(POI.scheduled_date.nulls_last(), POI.day_order)
     )
-    rows = result.all()
-
-    return [poi_to_response(row[0], row[1], row[2]) for row in rows]
-
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Calculate haversine distance between two points in meters."""
-    R = 6371000  # Earth radius in meters
-
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-
-    a = (math.sin(delta_lat / 2) ** 2 +
-         math.cos(lat1_rad) * math.cos(lat2_rad) *
-         math.sin(delta_lon / 2) ** 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-    return R * c
-
-
-def estimate_travel_time(distance_meters: float, profile: str) -> float:
-    """Estimate travel time in seconds based on distance and profile."""
-    # Average speeds in m/s
-    speeds = {
-        "foot-walking": 1.4,      # ~5 km/h
-        "cycling-regular": 4.2,   # ~15 km/h
-        "driving-car": 8.3,       # ~30 km/h (urban average)
-    }
-    speed = speeds.get(profile, 1.4)
-    return distance_meters / speed
+    return [poi_to_response(poi) for poi in result.scalars().all()]
 
 
 @router.post("/destinations/{destination_id}/travel-matrix", response_model=TravelMatrixResponse)
@@ -519,7 +526,10 @@ async def get_travel_matrix(
     Compute travel time matrix for Smart Scheduler.
 
     Uses ORS Matrix API when available, falls back to Haversine estimation.
-    Max 3500 matrix entries (locations^2) on ORS free tier.
+    Pairwise results are cached per profile, so only cells for new locations
+    are requested from ORS. Matrices above the 3500-entry ORS free-tier limit
+    are split into tiles; cells of a failed tile are estimated with Haversine
+    and listed in estimated_cells.
     """
     # Verify destination exists
     dest_result = await db.execute(select(Destination).where(Destination.id == destination_id))
@@ -552,7 +562,11 @@ async def get_travel_matrix(
 
     if ors_service.is_available():
         try:
-            matrix_result = await ors_service.get_matrix(coordinates, profile)
+            matrix_result = await ors_service.get_cached_matrix(coordinates, profile)
+
+            # Cells whose ORS tile failed are estimated instead of dropping the matrix
+            failed_cells = set(matrix_result.failed_cells)
+            estimate = travel_matrix(coordinates, profile, dtype=float) if failed_cells else None
 
             # Transform to indexed dict format
             durations = {}
@@ -563,6 +577,11 @@ async def get_travel_matrix(
                 distances[source.id] = {}
 
                 for j, dest in enumerate(valid_locations):
+                    if (i, j) in failed_cells:
+                        durations[source.id][dest.id] = float(estimate.durations[i, j])
+                        distances[source.id][dest.id] = float(estimate.distances[i, j])
+                        continue
+
                     dur = matrix_result.durations[i][j]
                     dist = matrix_result.distances[i][j]
 
@@ -576,29 +595,19 @@ async def get_travel_matrix(
                 durations=durations,
                 distances=distances,
                 fallback_used=False,
+                estimated_cells=[
+                    [valid_locations[i].id, valid_locations[j].id]
+                    for i, j in matrix_result.failed_cells
+                ],
             )
 
         except ORSServiceError as e:
             logger.warning(f"ORS Matrix API failed, using fallback: {e}")
             fallback_used = True
 
-    # Fallback: Haversine estimation
-    durations = {}
-    distances = {}
-
-    for source in valid_locations:
-        durations[source.id] = {}
-        distances[source.id] = {}
-
-        for dest in valid_locations:
-            if source.id == dest.id:
-                durations[source.id][dest.id] = 0.0
-                distances[source.id][dest.id] = 0.0
-            else:
-                dist = haversine_distance(source.lat, source.lon, dest.lat, dest.lon)
-                dur = estimate_travel_time(dist, profile)
-                durations[source.id][dest.id] = dur
-                distances[source.id][dest.id] = dist
+    # Fallback: Haversine estimation over the whole matrix at once
+    estimate = travel_matrix(coordinates, profile, dtype=float)
+    durations, distances = estimate.to_nested([loc.id for loc in valid_locations])
 
     return TravelMatrixResponse(
         profile=request.profile,
@@ -645,18 +654,14 @@ async def optimize_day_route(
 
     # Get POIs scheduled for this day
     result = await db.execute(
-        select(
-            POI,
-            ST_Y(POI.coordinates).label('latitude'),
-            ST_X(POI.coordinates).label('longitude')
-        )
+        select(POI)
         .where(POI.destination_id == destination_id)
         .where(POI.scheduled_date == target_date)
         .order_by(POI.day_order.nulls_last())
     )
-    rows = result.all()
+    day_pois = result.scalars().all()
 
-    if not rows:
+    if not day_pois:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"No POIs scheduled for day {request.day_number}"
@@ -665,14 +670,13 @@ async def optimize_day_route(
     # Build POI data for optimization
     pois_data = []
     original_order = []
-    for row in rows:
-        poi, lat, lng = row
-        if lat is None or lng is None:
+    for poi in day_pois:
+        if poi.latitude is None or poi.longitude is None:
             continue  # Skip POIs without coordinates
         pois_data.append({
             'id': poi.id,
-            'latitude': lat,
-            'longitude': lng,
+            'latitude': poi.latitude,
+            'longitude': poi.longitude,
             'dwell_time': poi.dwell_time or 30,  # Default 30 minutes
         })
         original_order.append(poi.id)
@@ -695,7 +699,8 @@ async def optimize_day_route(
         result = await service.optimize_route(
             pois=pois_data,
             start_location=start_location,
-            profile="foot-walking"
+            profile="foot-walking",
+            return_to_start=request.return_to_start,
         )
     except POIOptimizationError as e:
         raise HTTPException(
@@ -704,12 +709,10 @@ async def optimize_day_route(
         )
 
     # Build POI responses in optimized order
-    poi_map = {row[0].id: (row[0], row[1], row[2]) for row in rows}
-    optimized_pois = []
-    for poi_id in result.optimized_order:
-        if poi_id in poi_map:
-            poi, lat, lng = poi_map[poi_id]
-            optimized_pois.append(poi_to_response(poi, lat, lng))
+    poi_map = {poi.id: poi for poi in day_pois}
+    optimized_pois = [
+        poi_to_response(poi_map[poi_id]) for poi_id in result.optimized_order if poi_id in poi_map
+    ]
 
     # Calculate estimated visit times
     schedule = []
@@ -718,8 +721,10 @@ async def optimize_day_route(
     hours, minutes = map(int, start_time.split(':'))
     current_minutes = hours * 60 + minutes
 
-    # Calculate travel time per POI (distribute total travel time across segments)
+    # Travel time per POI: per-leg when the optimizer reports it, otherwise
+    # distribute total travel time across segments
     num_pois = len(result.optimized_order)
+    leg_durations = result.leg_durations_minutes
     if num_pois > 1:
         travel_time_per_segment = result.total_duration_minutes / num_pois
     else:
@@ -729,12 +734,15 @@ async def optimize_day_route(
         if poi_id not in poi_map:
             continue
 
-        poi, lat, lng = poi_map[poi_id]
+        poi = poi_map[poi_id]
         dwell_time = poi.dwell_time or 30  # Default 30 minutes
 
         # Add travel time (except for first POI)
         if i > 0:
-            current_minutes += int(travel_time_per_segment)
+            if leg_durations and i < len(leg_durations):
+                current_minutes += int(round(leg_durations[i]))
+            else:
+                current_minutes += int(travel_time_per_segment)
 
         arrival_hours = int(current_minutes // 60) % 24
         arrival_mins = int(current_minutes % 60)
@@ -751,8 +759,8 @@ async def optimize_day_route(
             id=poi.id,
             name=poi.name,
             category=poi.category,
-            latitude=lat,
-            longitude=lng,
+            latitude=poi.latitude,
+            longitude=poi.longitude,
             dwell_time=dwell_time,
             estimated_arrival=arrival_time,
             estimated_departure=departure_time
@@ -762,6 +770,8 @@ async def optimize_day_route(
         optimized_order=result.optimized_order,
         total_distance_km=result.total_distance_km,
         total_duration_minutes=result.total_duration_minutes,
+        total_dwell_minutes=result.total_dwell_minutes,
+        leg_durations_minutes=result.leg_durations_minutes,
         route_geometry=result.route_geometry,
         original_order=original_order,
         pois=optimized_pois,
@@ -816,19 +826,14 @@ async def get_accommodation_for_day(
     # Find accommodation that covers this night
     # (check_in_date <= target_night < check_out_date)
     acc_result = await db.execute(
-        select(
-            Accommodation,
-            ST_Y(Accommodation.coordinates).label('acc_lat'),
-            ST_X(Accommodation.coordinates).label('acc_lon')
-        )
+        select(Accommodation)
         .where(Accommodation.destination_id == destination_id)
         .where(Accommodation.check_in_date <= target_night)
         .where(Accommodation.check_out_date > target_night)
     )
-    acc_row = acc_result.first()
+    accommodation = acc_result.scalars().first()
 
-    if acc_row:
-        accommodation, acc_lat, acc_lon = acc_row
+    if accommodation:
         return {
             "has_accommodation": True,
             "accommodation": {
@@ -838,8 +843,8 @@ async def get_accommodation_for_day(
                 "address": accommodation.address,
             },
             "start_location": {
-                "lat": acc_lat,
-                "lon": acc_lon
+                "lat": accommodation.latitude,
+                "lon": accommodation.longitude
             }
         }
 
@@ -864,6 +869,27 @@ async def get_accommodation_for_day(
     }
 
 
+def _place_candidate(suggestion: dict) -> PlaceCandidate:
+    """Duplicate-check candidate for a GooglePlacesService suggestion dict."""
+    return PlaceCandidate(
+        name=suggestion["name"],
+        latitude=suggestion.get("latitude"),
+        longitude=suggestion.get("longitude"),
+        external_id=suggestion.get("external_id"),
+    )
+
+
+def _place_candidate_from_details(place_id: str, details: dict) -> PlaceCandidate:
+    """Duplicate-check candidate for a Google Place Details result."""
+    location = details.get("geometry", {}).get("location", {})
+    return PlaceCandidate(
+        name=details.get("name") or "",
+        latitude=location.get("lat"),
+        longitude=location.get("lng"),
+        external_id=place_id,
+    )
+
+
 @router.get("/destinations/{destination_id}/pois/suggestions", response_model=POISuggestionsResponse)
 async def get_poi_suggestions(
     destination_id: int,
@@ -871,6 +897,7 @@ async def get_poi_suggestions(
     category_filter: str | None = None,
     trip_type: str | None = None,
     max_results: int = 20,
+    exclude_existing: bool = False,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -882,6 +909,9 @@ async def get_poi_suggestions(
     - User ratings and reviews
     - Category variety (temples, food, nature, etc.)
     - Optional trip type tags (romantic, adventure, family, etc.)
+
+    Each suggestion is annotated with ``existing_poi_id`` when the place is
+    already on the destination; ``exclude_existing`` drops those instead.
     """
     # Verify destination exists and get coordinates
     dest_result = await db.execute(
@@ -935,22 +965,13 @@ async def get_poi_suggestions(
             detail=f"Failed to fetch suggestions: {str(e)}"
         )
 
-    # Calculate distance for each suggestion
-    def calculate_distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        """Calculate haversine distance between two points in km"""
-        R = 6371  # Earth radius in km
-
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
-
-        a = (math.sin(delta_lat / 2) ** 2 +
-             math.cos(lat1_rad) * math.cos(lat2_rad) *
-             math.sin(delta_lon / 2) ** 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-        return R * c
+    # Distances and already-added POIs for every suggestion in one query
+    matches = await GeospatialService.match_existing_pois(
+        db,
+        destination_id,
+        [_place_candidate(item) for item in suggestions_data],
+        origin=(latitude, longitude),
+    )
 
     # Estimate cost and dwell time based on category and price level
     def estimate_cost(price_level: int | None) -> float | None:
@@ -977,16 +998,11 @@ async def get_poi_suggestions(
 
     # Transform to POISuggestion format
     suggestions = []
-    for suggestion_data in suggestions_data:
+    for suggestion_data, match in zip(suggestions_data, matches):
+        if exclude_existing and match.is_duplicate:
+            continue
         metadata_json = suggestion_data.get("metadata_json", {})
-
-        # Calculate distance
-        distance = None
-        if suggestion_data.get("latitude") is not None and suggestion_data.get("longitude") is not None:
-            distance = calculate_distance_km(
-                latitude, longitude,
-                suggestion_data["latitude"], suggestion_data["longitude"]
-            )
+        distance = match.distance_km
 
         # Transform photos
         photos = [
@@ -1017,6 +1033,7 @@ async def get_poi_suggestions(
                 opening_hours=metadata_json.get("opening_hours"),
             ),
             distance_km=round(distance, 2) if distance else None,
+            existing_poi_id=match.existing_poi_id,
             estimated_cost=estimate_cost(metadata_json.get("price_level")),
             suggested_dwell_time=estimate_dwell_time(suggestion_data["category"]),
         )
@@ -1030,6 +1047,7 @@ async def get_poi_suggestions(
             "radius": radius,
             "category_filter": category_filter,
             "trip_type": trip_type,
+            "exclude_existing": exclude_existing,
         }
     )
 
@@ -1067,9 +1085,26 @@ async def bulk_add_suggested_pois(
             detail="Failed to fetch details for any POIs from Google Places API"
         )
 
-    # Create all POIs from fetched details, then flush and re-query in batch
+    # Skip places already on the destination, or already earlier in this
+    # request (same place ID, or a nearby place with a similar name),
+    # checked for the whole batch in one query
+    matches = await GeospatialService.match_existing_pois(
+        db,
+        destination_id,
+        [_place_candidate_from_details(place_id, details) for place_id, details in details_map.items()],
+        within_batch=True,
+    )
+    new_places = [
+        (place_id, details)
+        for (place_id, details), match in zip(details_map.items(), matches)
+        if not match.is_duplicate and match.earlier_candidate is None
+    ]
+    if not new_places:
+        return []
+
+    # Create all new POIs from fetched details, then flush once
     db_pois = []
-    for place_id, place_details in details_map.items():
+    for place_id, place_details in new_places:
         try:
             # Extract coordinates
             geometry = place_details.get("geometry", {})
@@ -1124,28 +1159,11 @@ async def bulk_add_suggested_pois(
             detail="Failed to add any POIs"
         )
 
-    # Single flush for all POIs
+    # Single flush for all POIs; generated latitude/longitude come back with it
     await db.flush()
+    await delete_cached(_poi_count_key(destination_id))
 
-    # Single batch re-query to get coordinates for all created POIs
-    created_poi_ids = [poi.id for poi in db_pois]
-    result = await db.execute(
-        select(
-            POI,
-            ST_Y(POI.coordinates).label('latitude'),
-            ST_X(POI.coordinates).label('longitude')
-        )
-        .where(POI.id.in_(created_poi_ids))
-    )
-    rows = result.all()
-
-    created_pois = [poi_to_response(row[0], row[1], row[2]) for row in rows]
-
-    if not created_pois:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to add any POIs"
-        )
+    created_pois = [poi_to_response(poi) for poi in db_pois]
 
     await log_activity(
         db,
@@ -7,7 +7,7 @@ from app.api.deps import get_current_user
 from app.api.permissions import check_trip_membership
 from app.models.user import User
 from app.services import api_key_service
-from app.schemas.routing import RoutingRequest, RoutingResponse
+from app.schemas.routing import RoutingRequest, RoutingResponse, RoutingCacheStatsResponse
 from app.schemas.route import RouteRequest, RouteResponse
 from app.schemas.mapbox import (
     MapboxRouteRequest,
@@ -39,6 +39,8 @@ from app.schemas.openrouteservice import (
     ORSSegment,
     ORSServiceStatus,
 )
+from app.core.cache import get_cache_stats
+from app.core.resilience import get_coalescing_stats
 from app.services.route_service import RouteService
 from app.services.mapbox_service import (
     MapboxService,
@@ -134,6 +136,20 @@ async def delete_route(
     return {"message": f"Delete route {route_id}", "data": None}
 
 
+@router.get("/routes/cache/stats", response_model=RoutingCacheStatsResponse)
+async def get_routing_cache_stats(current_user: User = Depends(get_current_user)):
+    """
+    Get external routing cache and request coalescing statistics.
+
+    Counters are per worker process; ``coalescing.*.coalesced`` is the number
+    of upstream calls saved by sharing in-flight requests.
+    """
+    return RoutingCacheStatsResponse(
+        cache=get_cache_stats(),
+        coalescing=get_coalescing_stats(),
+    )
+
+
 @router.post("/routes/mapbox", response_model=MapboxRouteResponse)
 async def get_mapbox_route(
     request: MapboxRouteRequest,
@@ -1,11 +1,12 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pydantic import BaseModel
 
 from app.core.database import get_db
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, parse_bbox
+from app.core.config import settings
 from app.api.permissions import TripPermission, check_trip_membership, ROLE_HIERARCHY
 from app.models.user import User
 from app.models.trip import Trip
@@ -13,13 +14,27 @@ from app.models.destination import Destination
 from app.models.travel_segment import TravelSegment
 from app.models.trip_member import TripMember
 from app.schemas.travel_segment import (
+    GeometryFormat,
+    OriginReturnSegment,
+    SegmentGeometry,
+    SegmentJobResponse,
     TravelMode,
     TravelSegmentResponse,
     TravelSegmentCalculateRequest,
     TripTravelSegmentsResponse,
     TripTravelSegmentsWithOriginReturnResponse,
+    TripGeometryResponse,
 )
 from app.services.travel_segment_service import TravelSegmentService
+from app.services import segment_job_queue
+from app.services.google_maps_routes_service import encode_polyline
+from app.services.route_geometry import (
+    format_route_legs,
+    geometry_polyline,
+    polyline_geojson,
+    quantize_tolerance,
+    tolerance_for_zoom,
+)
 
 require_viewer = TripPermission("viewer")
 require_editor = TripPermission("editor")
@@ -30,10 +45,64 @@ class RecalculateAllResponse(BaseModel):
     """Response model for bulk recalculation endpoint."""
     trips_processed: int
     total_segments_recalculated: int
+    segments_reused: int = 0
+    segments_rebuilt: int = 0
     message: str
 
 router = APIRouter()
 
+FORCE_RECALCULATE_QUERY = Query(
+    False,
+    description="Route every segment again, even those whose inputs are unchanged",
+)
+
+GEOMETRY_FORMAT_QUERY = Query(
+    GeometryFormat.GEOJSON,
+    description="Route geometry as GeoJSON, or as encoded polylines (route_polyline and leg polylines)",
+)
+
+
+def segment_to_response(segment: TravelSegment, geometry_format: GeometryFormat = GeometryFormat.GEOJSON) -> dict:
+    """Convert TravelSegment model to response dict with geometry in the requested format"""
+    as_polyline = geometry_format == GeometryFormat.POLYLINE
+    return {
+        "id": segment.id,
+        "segment_type": segment.segment_type,
+        "from_destination_id": segment.from_destination_id,
+        "to_destination_id": segment.to_destination_id,
+        "from_name": segment.from_name,
+        "from_latitude": segment.from_latitude,
+        "from_longitude": segment.from_longitude,
+        "to_name": segment.to_name,
+        "to_latitude": segment.to_latitude,
+        "to_longitude": segment.to_longitude,
+        "travel_mode": segment.travel_mode,
+        "distance_km": segment.distance_km,
+        "duration_minutes": segment.duration_minutes,
+        "route_geometry": None if as_polyline else segment.route_geometry,
+        "route_polyline": geometry_polyline(segment.geometry) if as_polyline else None,
+        "is_fallback": segment.is_fallback,
+        "route_legs": format_route_legs(segment.route_legs, geometry_format),
+        "estimated_cost": segment.estimated_cost,
+        "cost_currency": segment.cost_currency,
+        "created_at": segment.created_at,
+        "updated_at": segment.updated_at,
+    }
+
+
+def _origin_return_in_format(
+    segment: Optional[OriginReturnSegment],
+    geometry_format: GeometryFormat,
+) -> Optional[OriginReturnSegment]:
+    """Swap an origin/return segment's GeoJSON for a polyline when requested"""
+    if segment is None or geometry_format != GeometryFormat.POLYLINE:
+        return segment
+    coordinates = (segment.route_geometry or {}).get("coordinates") or []
+    return segment.model_copy(update={
+        "route_geometry": None,
+        "route_polyline": encode_polyline(coordinates) if coordinates else None,
+    })
+
 
 @router.post(
     "/destinations/{from_id}/travel-segment/{to_id}",
@@ -44,6 +113,7 @@ async def calculate_travel_segment(
     from_id: int,
     to_id: int,
     request: TravelSegmentCalculateRequest,
+    geometry_format: GeometryFormat = GEOMETRY_FORMAT_QUERY,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -63,7 +133,7 @@ async def calculate_travel_segment(
             db, from_id, to_id, request.travel_mode
         )
         await db.commit()
-        return segment
+        return segment_to_response(segment, geometry_format)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -78,6 +148,7 @@ async def calculate_travel_segment(
 async def get_travel_segment(
     from_id: int,
     to_id: int,
+    geometry_format: GeometryFormat = GEOMETRY_FORMAT_QUERY,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -96,7 +167,7 @@ async def get_travel_segment(
             detail=f"No travel segment found between destinations {from_id} and {to_id}"
         )
 
-    return segment
+    return segment_to_response(segment, geometry_format)
 
 
 @router.get(
@@ -106,6 +177,7 @@ async def get_travel_segment(
 async def get_trip_travel_segments(
     trip_id: int,
     include_origin_return: bool = True,
+    geometry_format: GeometryFormat = GEOMETRY_FORMAT_QUERY,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
     _: User = Depends(require_viewer),
@@ -117,6 +189,7 @@ async def get_trip_travel_segments(
         trip_id: The trip ID
         include_origin_return: If True, includes origin and return segments calculated
                               from the trip's origin/return points (default: True)
+        geometry_format: "geojson" (default) or "polyline" for encoded polylines
     """
     segments = await TravelSegmentService.get_trip_segments(db, trip_id)
 
@@ -140,9 +213,59 @@ async def get_trip_travel_segments(
             await db.commit()
 
     return TripTravelSegmentsWithOriginReturnResponse(
-        segments=segments,
-        origin_segment=origin_segment,
-        return_segment=return_segment
+        segments=[segment_to_response(s, geometry_format) for s in segments],
+        origin_segment=_origin_return_in_format(origin_segment, geometry_format),
+        return_segment=_origin_return_in_format(return_segment, geometry_format),
+    )
+
+
+@router.get(
+    "/trips/{trip_id}/travel-segments/geometry",
+    response_model=TripGeometryResponse
+)
+async def get_trip_geometry(
+    trip_id: int,
+    zoom: Optional[float] = Query(None, ge=0, le=24, description="Map zoom level; simplify to about one pixel"),
+    tolerance: Optional[float] = Query(None, ge=0, le=1, description="Simplification tolerance in degrees (overrides zoom)"),
+    bbox: Optional[str] = Query(None, description="Only segments crossing min_lon,min_lat,max_lon,max_lat"),
+    geometry_format: GeometryFormat = GEOMETRY_FORMAT_QUERY,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    _: User = Depends(require_viewer),
+):
+    """
+    Get simplified route geometry for a trip's map at a given level of detail.
+
+    Geometry is simplified to ``tolerance`` degrees, or to one screen pixel at
+    ``zoom``; without either the stored resolution is returned. Results are
+    cached per segment and tolerance.
+    """
+    bounds = parse_bbox(bbox)
+    if tolerance is None:
+        tolerance = tolerance_for_zoom(zoom) if zoom is not None else settings.ROUTE_SIMPLIFY_TOLERANCE_DEG
+    tolerance = quantize_tolerance(tolerance)
+
+    segments = await TravelSegmentService.get_trip_geometry(db, trip_id, tolerance, bounds)
+
+    as_polyline = geometry_format == GeometryFormat.POLYLINE
+    return TripGeometryResponse(
+        trip_id=trip_id,
+        tolerance=tolerance,
+        segments=[
+            SegmentGeometry(
+                id=segment["id"],
+                segment_type=segment["segment_type"],
+                from_destination_id=segment["from_destination_id"],
+                to_destination_id=segment["to_destination_id"],
+                travel_mode=segment["travel_mode"],
+                is_fallback=segment["is_fallback"],
+                route_polyline=segment["polyline"] if as_polyline else None,
+                route_geometry=polyline_geojson(segment["polyline"])
+                if segment["polyline"] and not as_polyline else None,
+                route_legs=format_route_legs(segment["legs"], geometry_format),
+            )
+            for segment in segments
+        ],
     )
 
 
@@ -152,17 +275,90 @@ async def get_trip_travel_segments(
 )
 async def recalculate_trip_travel_segments(
     trip_id: int,
+    geometry_format: GeometryFormat = GEOMETRY_FORMAT_QUERY,
+    force: bool = FORCE_RECALCULATE_QUERY,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
     _: User = Depends(require_editor),
 ):
     """
     Recalculate all travel segments for a trip.
-    Call this after reordering destinations.
+    Call this after reordering destinations. Segments whose inputs are
+    unchanged keep their stored route unless ``force`` is set.
     """
-    segments = await TravelSegmentService.recalculate_trip_segments(db, trip_id)
+    recalculation = await TravelSegmentService.recalculate_trip_segments(db, trip_id, force=force)
+    # Queued recalculations are covered by this one
+    await segment_job_queue.cancel_pending(db, trip_id)
     await db.commit()
-    return TripTravelSegmentsResponse(segments=segments)
+    return TripTravelSegmentsResponse(
+        segments=[segment_to_response(s, geometry_format) for s in recalculation.segments],
+        segments_reused=recalculation.reused,
+        segments_rebuilt=recalculation.rebuilt,
+    )
+
+
+@router.post(
+    "/trips/{trip_id}/travel-segments/jobs",
+    response_model=SegmentJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def enqueue_trip_travel_segments(
+    trip_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    _: User = Depends(require_editor),
+):
+    """
+    Queue a background recalculation of all travel segments for a trip.
+
+    Repeated requests while the job is pending are folded into it. Progress
+    is available from the job status endpoint, and a ``segments_recalculated``
+    message is sent on the trip WebSocket when it finishes.
+    """
+    job_id = await segment_job_queue.enqueue_trip(db, trip_id)
+    await db.commit()
+    return await segment_job_queue.get_job(db, trip_id, job_id)
+
+
+@router.get(
+    "/trips/{trip_id}/travel-segments/jobs/latest",
+    response_model=SegmentJobResponse
+)
+async def get_latest_segment_job(
+    trip_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    _: User = Depends(require_viewer),
+):
+    """Get the most recent segment recalculation job for a trip"""
+    job = await segment_job_queue.get_job(db, trip_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No segment recalculation jobs for trip {trip_id}"
+        )
+    return job
+
+
+@router.get(
+    "/trips/{trip_id}/travel-segments/jobs/{job_id}",
+    response_model=SegmentJobResponse
+)
+async def get_segment_job(
+    trip_id: int,
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    _: User = Depends(require_viewer),
+):
+    """Get the status and progress of a segment recalculation job"""
+    job = await segment_job_queue.get_job(db, trip_id, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Segment job {job_id} not found for trip {trip_id}"
+        )
+    return job
 
 
 @router.delete(
@@ -199,12 +395,17 @@ async def delete_travel_segment(
     response_model=RecalculateAllResponse
 )
 async def recalculate_all_travel_segments(
+    force: bool = Query(
+        True,
+        description="Route every segment again; pass false to keep segments whose inputs are unchanged",
+    ),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
     Recalculate all travel segments for trips the user has editor access to.
-    Useful after updating routing service configuration or API keys.
+    Useful after updating routing service configuration or API keys, so
+    every segment is routed again unless ``force`` is false.
     """
     # Only recalculate trips where user has at least editor access
     editor_roles = [r for r, lvl in ROLE_HIERARCHY.items() if lvl >= ROLE_HIERARCHY["editor"]]
@@ -221,17 +422,26 @@ async def recalculate_all_travel_segments(
 
     trips_processed = 0
     total_segments = 0
+    reused = 0
+    rebuilt = 0
 
     for trip in trips:
-        segments = await TravelSegmentService.recalculate_trip_segments(db, trip.id)
-        if segments:
+        recalculation = await TravelSegmentService.recalculate_trip_segments(db, trip.id, force=force)
+        if recalculation.segments:
             trips_processed += 1
-            total_segments += len(segments)
+            total_segments += len(recalculation.segments)
+            reused += recalculation.reused
+            rebuilt += recalculation.rebuilt
 
     await db.commit()
 
     return RecalculateAllResponse(
         trips_processed=trips_processed,
         total_segments_recalculated=total_segments,
-        message=f"Successfully recalculated {total_segments} segments across {trips_processed} trips"
+        segments_reused=reused,
+        segments_rebuilt=rebuilt,
+        message=(
+            f"Successfully recalculated {total_segments} segments across {trips_processed} trips "
+            f"({rebuilt} rebuilt, {reused} unchanged)"
+        ),
     )
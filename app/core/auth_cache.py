@@ -0,0 +1,492 @@
+"""
+Authentication caches shared by the backend and the MCP server.
+
+- PrincipalCache: short-TTL per-process cache of user rows keyed by user id
+  (the token ``sub``), so authenticating a request does not need a
+  ``SELECT`` on ``users`` every time. Entries are plain column snapshots
+  that are re-attached to the request's session without a query.
+- TripRoleCache: accepted member roles per trip, loaded with one query
+  per trip and invalidated by the collaboration endpoints.
+- RevocationSet: in-memory view of ``revoked_tokens`` (per-jti revocations
+  and per-user revoke-all markers), refreshed incrementally at most every
+  ``refresh_seconds`` instead of being queried on every token check.
+
+All three are per process. Membership changes call
+``invalidate_trip_roles(db, trip_id)``: the trip is dropped from this
+process's caches right away and again once the transaction commits, when
+the invalidation is also published on the realtime broker
+(``app.core.pubsub``) so every backend worker and the MCP server drop it
+too. A load that raced with an invalidation is not cached. User changes
+(``invalidate_principal``) and token revocations (``record_revocation``)
+are relayed the same way; a process that misses the message still picks
+them up when the TTL expires or on its next revocation refresh.
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import and_, event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.models.revoked_token import RevokedToken
+from app.models.trip import Trip
+from app.models.trip_member import TripMember
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+REVOKE_ALL_PREFIX = "revoke-all-"
+
+# Broker channel carrying {"trip_ids": [...]} membership invalidations
+TRIP_ROLES_CHANNEL = "auth:trip-roles"
+# Broker channel carrying {"user_ids": [...]} user changes
+PRINCIPALS_CHANNEL = "auth:principals"
+# Broker channel carrying {"revocations": [...]} new revoked_tokens rows
+REVOCATIONS_CHANNEL = "auth:revocations"
+# Session.info keys: what to invalidate or publish when the transaction commits
+TRIP_ROLES_PENDING_KEY = "trip_roles_invalidate"
+PRINCIPALS_PENDING_KEY = "principals_invalidate"
+REVOCATIONS_PENDING_KEY = "revocations_publish"
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes (as stored by the DB) as UTC."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class TTLCache:
+    """Bounded per-process LRU with a fixed per-entry TTL (0 disables)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._generation = 0  # Bumped by invalidate(); see set_if_current()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def set_if_current(self, key: Hashable, value: Any, generation: int) -> None:
+        """Cache a value loaded after reading ``generation``, unless an invalidation happened since."""
+        if generation == self._generation:
+            self.set(key, value)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or everything."""
+        self._generation += 1
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class PrincipalCache(TTLCache):
+    """
+    User column snapshots keyed by user id.
+
+    User changes must call ``invalidate_principal(db, user_id)``.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000):
+        super().__init__(ttl_seconds, max_entries)
+        _principal_caches.add(self)
+
+    def put(self, user: User) -> None:
+        """Cache a loaded user's column values."""
+        self.set(user.id, {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+
+    async def load(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        """
+        Get a user by id, active or not, from the cache or the database.
+
+        Cached users are attached to ``db`` as persistent instances without
+        a query, so callers can use them like freshly loaded rows.
+        """
+        values = self.get(user_id)
+        if values is not None:
+            user = User(**values)
+            make_transient_to_detached(user)
+            return await db.merge(user, load=False)
+
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is not None:
+            self.put(user)
+        return user
+
+
+@dataclass(frozen=True)
+class TripRoles:
+    """Accepted member roles of one trip, plus its legacy owner column."""
+    owner_id: Optional[int]  # Trip.user_id
+    roles: dict[int, str]  # user_id -> role, accepted members only
+
+    def role_for(self, user_id: int, include_legacy_owner: bool = False) -> Optional[str]:
+        role = self.roles.get(user_id)
+        if role is None and include_legacy_owner and self.owner_id == user_id:
+            return "owner"
+        return role
+
+
+class TripRoleCache(TTLCache):
+    """
+    Trip membership keyed by trip id, filled with one query per trip.
+
+    Collaboration changes must call ``invalidate_trip_roles(db, trip_id)``.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000):
+        super().__init__(ttl_seconds, max_entries)
+        _trip_role_caches.add(self)
+
+    async def load(self, db: AsyncSession, trip_id: int) -> Optional[TripRoles]:
+        """Get a trip's roles from the cache or the database (None if no such trip)."""
+        roles = self.get(trip_id)
+        if roles is not None:
+            return roles
+
+        generation = self._generation
+        result = await db.execute(
+            select(Trip.user_id.label("owner_id"), TripMember.user_id, TripMember.role)
+            .select_from(Trip)
+            .outerjoin(
+                TripMember,
+                and_(TripMember.trip_id == Trip.id, TripMember.status == "accepted"),
+            )
+            .where(Trip.id == trip_id)
+        )
+        rows = result.all()
+        if not rows:
+            return None
+        roles = TripRoles(
+            owner_id=rows[0].owner_id,
+            roles={row.user_id: row.role for row in rows if row.user_id is not None},
+        )
+        # An invalidation during the query may mean these rows are already stale
+        self.set_if_current(trip_id, roles, generation)
+        return roles
+
+
+class RevocationSet:
+    """
+    In-memory revoked-token index, refreshed incrementally from the DB.
+
+    Each refresh reads only rows created since the last one (with an
+    overlap window for late commits), and every ``full_reload_seconds``
+    the set is rebuilt so rows removed by cleanup are dropped too.
+    """
+
+    def __init__(
+        self,
+        refresh_seconds: float = 5.0,
+        full_reload_seconds: float = 600.0,
+        overlap_seconds: float = 60.0,
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.full_reload_seconds = full_reload_seconds
+        self.overlap_seconds = overlap_seconds
+        self._jtis: dict[str, datetime] = {}  # jti -> expires_at
+        self._revoke_all: dict[int, datetime] = {}  # user_id -> latest revoked_at
+        self._watermark: Optional[datetime] = None  # Latest created_at seen
+        self._refreshed_at: Optional[float] = None
+        self._reloaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        _revocation_sets.add(self)
+
+    def is_due(self) -> bool:
+        return self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+
+    def add(
+        self,
+        jti: str,
+        user_id: int,
+        revoked_at: Optional[datetime] = None,
+        expires_at: Optional[datetime] = None,
+    ) -> None:
+        """Record a revocation (from a refresh, or right after revoking in-process)."""
+        now = datetime.now(timezone.utc)
+        expires = _as_utc(expires_at) if expires_at else now + timedelta(days=365)
+        if jti.startswith(REVOKE_ALL_PREFIX):
+            revoked = _as_utc(revoked_at) if revoked_at else now
+            latest = self._revoke_all.get(user_id)
+            if latest is None or revoked > latest:
+                self._revoke_all[user_id] = revoked
+        else:
+            self._jtis[jti] = expires
+
+    def is_revoked(self, payload: dict, user_id: int) -> bool:
+        """Check a decoded token against direct and revoke-all revocations."""
+        jti = payload.get("jti")
+        if jti and jti in self._jtis:
+            return True
+
+        marker = self._revoke_all.get(user_id)
+        token_iat = payload.get("iat")
+        if marker and token_iat:
+            # Tokens issued before the latest revoke-all marker are rejected
+            if datetime.fromtimestamp(token_iat, tz=timezone.utc) < marker:
+                return True
+        return False
+
+    async def refresh(self, db: AsyncSession, force: bool = False) -> int:
+        """
+        Load revocations created since the last refresh if one is due.
+
+        Returns:
+            Number of rows read
+        """
+        async with self._lock:
+            if not force and not self.is_due():
+                return 0
+            now = time.monotonic()
+            full = self._reloaded_at is None or now - self._reloaded_at >= self.full_reload_seconds
+
+            stmt = select(
+                RevokedToken.jti,
+                RevokedToken.user_id,
+                RevokedToken.revoked_at,
+                RevokedToken.expires_at,
+                RevokedToken.created_at,
+            )
+            if not full and self._watermark is not None:
+                stmt = stmt.where(
+                    RevokedToken.created_at >= self._watermark - timedelta(seconds=self.overlap_seconds)
+                )
+            rows = (await db.execute(stmt)).all()
+
+            if full:
+                self._jtis.clear()
+                self._revoke_all.clear()
+                self._reloaded_at = now
+            for row in rows:
+                self.add(row.jti, row.user_id, row.revoked_at, row.expires_at)
+                if row.created_at and (self._watermark is None or row.created_at > self._watermark):
+                    self._watermark = row.created_at
+
+            expired_before = datetime.now(timezone.utc)
+            for jti in [j for j, expires in self._jtis.items() if expires < expired_before]:
+                del self._jtis[jti]
+
+            self._refreshed_at = now
+            return len(rows)
+
+
+_principal_cache: Optional[PrincipalCache] = None
+_trip_role_cache: Optional[TripRoleCache] = None
+# Every cache of this process (the backend's and the MCP server's)
+_principal_caches: "weakref.WeakSet[PrincipalCache]" = weakref.WeakSet()
+_trip_role_caches: "weakref.WeakSet[TripRoleCache]" = weakref.WeakSet()
+_revocation_sets: "weakref.WeakSet[RevocationSet]" = weakref.WeakSet()
+_invalidation_broker = None
+_publish_tasks: set[asyncio.Task] = set()
+
+
+def get_principal_cache() -> PrincipalCache:
+    """Get the backend's principal cache (configured from settings)."""
+    global _principal_cache
+    if _principal_cache is None:
+        from app.core.config import settings
+
+        _principal_cache = PrincipalCache(
+            ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+            max_entries=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+        )
+    return _principal_cache
+
+
+def get_trip_role_cache() -> TripRoleCache:
+    """Get the backend's trip membership cache (configured from settings)."""
+    global _trip_role_cache
+    if _trip_role_cache is None:
+        from app.core.config import settings
+
+        _trip_role_cache = TripRoleCache(
+            ttl_seconds=settings.AUTH_TRIP_ROLE_CACHE_TTL_SECONDS,
+            max_entries=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+        )
+    return _trip_role_cache
+
+
+def _invalidate_local(trip_ids) -> None:
+    for cache in list(_trip_role_caches):
+        for trip_id in trip_ids:
+            cache.invalidate(trip_id)
+
+
+def _invalidate_principals_local(user_ids) -> None:
+    for cache in list(_principal_caches):
+        for user_id in user_ids:
+            cache.invalidate(user_id)
+
+
+def _revoke_local(revocations: list[dict]) -> None:
+    for revocation in revocations:
+        revoked_at, expires_at = revocation.get("revoked_at"), revocation.get("expires_at")
+        for revocation_set in list(_revocation_sets):
+            revocation_set.add(
+                revocation["jti"],
+                revocation["user_id"],
+                revoked_at=datetime.fromisoformat(revoked_at) if revoked_at else None,
+                expires_at=datetime.fromisoformat(expires_at) if expires_at else None,
+            )
+    _invalidate_principals_local({revocation["user_id"] for revocation in revocations})
+
+
+def invalidate_trip_roles(db: AsyncSession, trip_id: int) -> None:
+    """
+    Forget a trip's cached membership after changing it in ``db``.
+
+    Takes effect in this process immediately, and in this and every other
+    process once the transaction commits, so a concurrent request cannot
+    re-cache the roles that were committed before the change.
+    """
+    _invalidate_local([trip_id])
+    db.info.setdefault(TRIP_ROLES_PENDING_KEY, set()).add(trip_id)
+
+
+def invalidate_principal(db: AsyncSession, user_id: int) -> None:
+    """
+    Forget a user's cached row after changing it in ``db``.
+
+    Like ``invalidate_trip_roles``: immediate in this process, and again
+    in every process once the transaction commits.
+    """
+    _invalidate_principals_local([user_id])
+    db.info.setdefault(PRINCIPALS_PENDING_KEY, set()).add(user_id)
+
+
+def record_revocation(
+    db: AsyncSession,
+    jti: str,
+    user_id: int,
+    revoked_at: Optional[datetime] = None,
+    expires_at: Optional[datetime] = None,
+) -> None:
+    """
+    Apply a revocation added to ``db`` to every ``RevocationSet`` on commit.
+
+    Once the transaction commits, the revocation is added to this and every
+    other process's set and the user's cached row is dropped, without
+    waiting for the next refresh.
+    """
+    revoked_at = revoked_at or datetime.now(timezone.utc)
+    db.info.setdefault(REVOCATIONS_PENDING_KEY, []).append({
+        "jti": jti,
+        "user_id": user_id,
+        "revoked_at": _as_utc(revoked_at).isoformat(),
+        "expires_at": _as_utc(expires_at).isoformat() if expires_at else None,
+    })
+
+
+async def _publish_invalidation(channel: str, message: dict) -> None:
+    broker = _invalidation_broker
+    if broker is None:
+        return
+    try:
+        await broker.publish(channel, message)
+    except Exception as e:
+        logger.warning(f"Failed to publish {channel} invalidation {message}: {e}")
+
+
+async def _on_invalidation(channel: str, message: dict) -> None:
+    if channel == TRIP_ROLES_CHANNEL:
+        _invalidate_local(message.get("trip_ids") or [])
+    elif channel == PRINCIPALS_CHANNEL:
+        _invalidate_principals_local(message.get("user_ids") or [])
+    elif channel == REVOCATIONS_CHANNEL:
+        _revoke_local(message.get("revocations") or [])
+
+
+_RELAYED_CHANNELS = (TRIP_ROLES_CHANNEL, PRINCIPALS_CHANNEL, REVOCATIONS_CHANNEL)
+
+
+async def start_invalidation_relay(broker) -> None:
+    """Share cache invalidations and revocations with other processes through ``broker`` (on startup)."""
+    global _invalidation_broker
+    _invalidation_broker = broker
+    for channel in _RELAYED_CHANNELS:
+        try:
+            await broker.subscribe(channel, _on_invalidation)
+        except Exception as e:
+            logger.warning(f"Failed to subscribe to {channel}: {e}")
+
+
+async def stop_invalidation_relay() -> None:
+    """Stop relaying invalidations (on shutdown, before the broker is closed)."""
+    global _invalidation_broker
+    broker, _invalidation_broker = _invalidation_broker, None
+    if broker is None:
+        return
+    for channel in _RELAYED_CHANNELS:
+        try:
+            await broker.unsubscribe(channel, _on_invalidation)
+        except Exception as e:
+            logger.warning(f"Failed to unsubscribe from {channel}: {e}")
+
+
+def _publish_after_commit(channel: str, message: dict) -> None:
+    if _invalidation_broker is None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(_publish_invalidation(channel, message))
+    _publish_tasks.add(task)
+    task.add_done_callback(_publish_tasks.discard)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    trip_ids = session.info.pop(TRIP_ROLES_PENDING_KEY, None)
+    if trip_ids:
+        trip_ids = sorted(trip_ids)
+        _invalidate_local(trip_ids)
+        _publish_after_commit(TRIP_ROLES_CHANNEL, {"trip_ids": trip_ids})
+
+    user_ids = session.info.pop(PRINCIPALS_PENDING_KEY, None)
+    if user_ids:
+        user_ids = sorted(user_ids)
+        _invalidate_principals_local(user_ids)
+        _publish_after_commit(PRINCIPALS_CHANNEL, {"user_ids": user_ids})
+
+    revocations = session.info.pop(REVOCATIONS_PENDING_KEY, None)
+    if revocations:
+        _revoke_local(revocations)
+        _publish_after_commit(REVOCATIONS_CHANNEL, {"revocations": revocations})
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session: Session, previous_transaction) -> None:
+    if previous_transaction.nested:
+        return
+    for key in (TRIP_ROLES_PENDING_KEY, PRINCIPALS_PENDING_KEY, REVOCATIONS_PENDING_KEY):
+        session.info.pop(key, None)
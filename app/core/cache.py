@@ -1,21 +1,37 @@
 """
 Cache configuration for external API calls.
 
-Provides a simple in-memory cache for expensive external API calls to:
+Provides a two-tier cache for expensive external API calls to:
 - Reduce API quota/costs
 - Improve response times
 - Reduce load on external services
 
-For production with multiple workers, consider using Redis backend.
+Tiers:
+- L1: bounded per-process in-memory LRU (always on)
+- L2: optional shared Redis-protocol cache (CACHE_BACKEND=redis), so every
+  uvicorn worker, the MCP server and the orchestrator share one warm copy
+
+Concurrent misses for the same key are coalesced (single-flight) through
+``get_or_set`` so only one upstream call is made per process; Google Places
+lookups use it. Routing providers coalesce through their own per-provider
+``RequestCoalescer`` (app.core.resilience), which also caps concurrency.
 """
 
 import hashlib
 import json
-from typing import Any, Optional
-from functools import wraps
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Optional
 
 from aiocache import Cache
-from aiocache.serializers import JsonSerializer
+from aiocache.serializers import StringSerializer
+
+from app.core.config import settings
+from app.core.resilience import RequestCoalescer
+
+logger = logging.getLogger(__name__)
 
 
 # Default TTL values in seconds
@@ -23,15 +39,254 @@ TTL_PLACE_DETAILS = 86400  # 24 hours - place details rarely change
 TTL_AUTOCOMPLETE = 3600  # 1 hour - autocomplete results can change
 TTL_NEARBY_SEARCH = 3600  # 1 hour - nearby places can change
 TTL_ROUTE = 1800  # 30 minutes - routes/traffic can change
+TTL_TRAVEL_MATRIX = 604800  # 7 days - matrix cells are profile averages, not live traffic
+
+DEFAULT_TTL = 3600  # 1 hour default
+CACHE_NAMESPACE = "travel_ruter:"
+
+
+@dataclass
+class NamespaceStats:
+    """Hit/miss/latency counters for one key namespace (e.g. ``mapbox_route``)."""
+    l1_hits: int = 0
+    l2_hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    errors: int = 0
+    coalesced: int = 0
+    loads: int = 0
+    l2_latency_ms: float = 0.0
+    load_latency_ms: float = 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        lookups = self.l1_hits + self.l2_hits + self.misses
+        data["hit_rate"] = round((self.l1_hits + self.l2_hits) / lookups, 4) if lookups else 0.0
+        l2_lookups = self.l2_hits + self.misses
+        data["avg_l2_latency_ms"] = round(self.l2_latency_ms / l2_lookups, 3) if l2_lookups else 0.0
+        data["avg_load_latency_ms"] = round(self.load_latency_ms / self.loads, 3) if self.loads else 0.0
+        data["l2_latency_ms"] = round(self.l2_latency_ms, 3)
+        data["load_latency_ms"] = round(self.load_latency_ms, 3)
+        return data
+
+
+def _namespace_of(key: str) -> str:
+    """Namespace is the key prefix before the first colon (``mapbox_route:...``)."""
+    return key.split(":", 1)[0] if ":" in key else "default"
+
+
+class LRUMemoryCache:
+    """Bounded in-memory LRU with per-entry expiry (L1 tier).
+
+    Values are stored as serialized strings so callers always receive a fresh
+    copy, matching the behaviour of a serializing backend.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, raw = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return raw
+
+    def set(self, key: str, raw: str, ttl: float) -> None:
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, raw)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self, prefix: Optional[str] = None) -> None:
+        if prefix is None:
+            self._data.clear()
+            return
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Per-process L1 in front of an optional shared L2.
+
+    Args:
+        l2: aiocache backend shared across processes (Redis in production,
+            any aiocache instance as a local stand-in), or None for L1 only
+        l1_max_entries: Maximum number of entries held in the per-process L1
+        l1_ttl: Upper bound for L1 entry lifetime when an L2 is configured,
+            limiting how stale one worker can be after another invalidates
+    """
+
+    def __init__(
+        self,
+        l2: Optional[Any] = None,
+        l1_max_entries: int = 2048,
+        l1_ttl: Optional[int] = None,
+    ):
+        self.l1 = LRUMemoryCache(l1_max_entries)
+        self.l2 = l2
+        self.l1_ttl = l1_ttl
+        self._coalescer = RequestCoalescer("cache")
+        self._stats: dict[str, NamespaceStats] = {}
+
+    @property
+    def backend(self) -> str:
+        return "tiered" if self.l2 is not None else "memory"
+
+    def _ns(self, key: str) -> NamespaceStats:
+        namespace = _namespace_of(key)
+        stats = self._stats.get(namespace)
+        if stats is None:
+            stats = self._stats[namespace] = NamespaceStats()
+        return stats
 
-# In-memory cache for simple deployments
-# For production with multiple workers, use Redis:
-# cache = Cache(Cache.REDIS, endpoint="localhost", port=6379, ...)
-cache = Cache(
-    Cache.MEMORY,
-    serializer=JsonSerializer(),
-    namespace="travel_ruter",
-    ttl=3600,  # 1 hour default
+    def _l1_ttl_for(self, ttl: float) -> float:
+        if self.l2 is not None and self.l1_ttl is not None:
+            return min(ttl, self.l1_ttl)
+        return ttl
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a value, checking L1 then L2 (promoting L2 hits into L1)."""
+        stats = self._ns(key)
+
+        raw = self.l1.get(key)
+        if raw is not None:
+            stats.l1_hits += 1
+            return json.loads(raw)
+
+        if self.l2 is not None:
+            started = time.perf_counter()
+            try:
+                raw = await self.l2.get(key)
+            except Exception as e:
+                stats.errors += 1
+                logger.warning(f"Shared cache read failed for {_namespace_of(key)}: {e}")
+                raw = None
+            finally:
+                stats.l2_latency_ms += (time.perf_counter() - started) * 1000
+            if raw is not None:
+                stats.l2_hits += 1
+                self.l1.set(key, raw, self._l1_ttl_for(self.l1_ttl or DEFAULT_TTL))
+                return json.loads(raw)
+
+        stats.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Write a value through both tiers."""
+        stats = self._ns(key)
+        ttl = ttl or DEFAULT_TTL
+        raw = json.dumps(value)
+        stats.sets += 1
+        self.l1.set(key, raw, self._l1_ttl_for(ttl))
+        if self.l2 is not None:
+            try:
+                await self.l2.set(key, raw, ttl=ttl)
+            except Exception as e:
+                stats.errors += 1
+                logger.warning(f"Shared cache write failed for {_namespace_of(key)}: {e}")
+
+    async def delete(self, key: str) -> None:
+        self.l1.delete(key)
+        if self.l2 is not None:
+            await self.l2.delete(key)
+
+    async def clear(self, namespace: Optional[str] = None) -> None:
+        """Clear L1 entries for a key prefix and the matching L2 namespace."""
+        self.l1.clear(namespace)
+        if self.l2 is not None:
+            # L2 keys carry the backend namespace as a prefix; never flush the
+            # whole db. Redis matches "<prefix>:*", so drop a trailing colon.
+            prefix = f"{self.l2.namespace or ''}{namespace or ''}".rstrip(":")
+            if prefix:
+                await self.l2.clear(namespace=prefix)
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """
+        Return the cached value for ``key`` or load it exactly once.
+
+        Concurrent callers missing on the same key wait on the first caller's
+        load instead of issuing their own upstream request. Loader exceptions
+        propagate to every waiter and nothing is cached. ``None`` results are
+        returned but not cached.
+        """
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+
+        stats = self._ns(key)
+        if self._coalescer.is_inflight(key):
+            stats.coalesced += 1
+
+        async def load() -> Any:
+            started = time.perf_counter()
+            try:
+                value = await loader()
+            finally:
+                stats.loads += 1
+                stats.load_latency_ms += (time.perf_counter() - started) * 1000
+            if value is not None:
+                await self.set(key, value, ttl=ttl)
+            return value
+
+        return await self._coalescer.run(key, load)
+
+    def stats(self) -> dict:
+        """Per-namespace counters plus tier sizes."""
+        return {
+            "backend": self.backend,
+            "l1_entries": len(self.l1),
+            "l1_max_entries": self.l1.max_entries,
+            "inflight": self._coalescer.stats()["inflight"],
+            "namespaces": {ns: s.to_dict() for ns, s in sorted(self._stats.items())},
+        }
+
+    def reset_stats(self) -> None:
+        self._stats.clear()
+
+
+def _build_l2() -> Optional[Any]:
+    """Build the shared L2 from settings, or None for per-process caching only."""
+    backend = settings.CACHE_BACKEND.lower()
+    if backend == "memory":
+        return None
+    if backend != "redis":
+        logger.warning(f"Unknown CACHE_BACKEND={settings.CACHE_BACKEND!r}; using in-memory cache")
+        return None
+    try:
+        l2 = Cache.from_url(settings.CACHE_REDIS_URL)
+    except Exception as e:
+        # redis client library not installed or malformed URL
+        logger.warning(f"Shared cache unavailable ({e}); using in-memory cache")
+        return None
+    l2.serializer = StringSerializer()
+    l2.namespace = CACHE_NAMESPACE
+    return l2
+
+
+cache = TieredCache(
+    l2=_build_l2(),
+    l1_max_entries=settings.CACHE_L1_MAX_ENTRIES,
+    l1_ttl=settings.CACHE_L1_TTL_SECONDS,
 )
 
 
@@ -84,6 +339,15 @@ async def set_cached(key: str, value: Any, ttl: Optional[int] = None) -> None:
         pass  # Silently fail - caching is optional
 
 
+async def get_or_set_cached(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: Optional[int] = None,
+) -> Any:
+    """Get a value from cache, loading it once (single-flight) on a miss."""
+    return await cache.get_or_set(key, loader, ttl=ttl)
+
+
 async def delete_cached(key: str) -> None:
     """Delete a value from cache."""
     try:
@@ -94,12 +358,16 @@ async def delete_cached(key: str) -> None:
 
 async def clear_namespace(pattern: str) -> None:
     """
-    Clear all cache entries matching a pattern.
+    Clear all cache entries matching a key prefix.
 
-    Note: This is a simple implementation for in-memory cache.
-    For Redis, you would use SCAN with pattern matching.
+    L1 entries are dropped by prefix; the shared L2 clears its namespace.
     """
     try:
         await cache.clear(namespace=pattern)
     except Exception:
         pass
+
+
+def get_cache_stats() -> dict:
+    """Get hit/miss/latency counters per namespace for this process."""
+    return cache.stats()
@@ -49,6 +49,10 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Per-process cache of authenticated users (0 disables)
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_TRIP_ROLE_CACHE_TTL_SECONDS: int = 30  # Trip membership roles (0 disables)
 
     # OAuth
     GOOGLE_CLIENT_ID: Optional[str] = None
@@ -93,6 +97,44 @@ class Settings(BaseSettings):
     AMADEUS_CLIENT_SECRET: Optional[str] = None
     AMADEUS_BASE_URL: str = "https://test.api.amadeus.com"
 
+    # External API cache: "memory" keeps a per-process LRU only, "redis" adds a
+    # shared L2 so all workers, the MCP server and the orchestrator share results
+    CACHE_BACKEND: str = "memory"
+    CACHE_REDIS_URL: str = "redis://redis:6379/0"
+    CACHE_L1_MAX_ENTRIES: int = 2048
+    CACHE_L1_TTL_SECONDS: int = 60  # L1 lifetime cap when a shared L2 is configured
+
+    # WebSocket fan-out: "memory" only reaches sockets held by this process,
+    # "redis" relays trip broadcasts, presence and notifications over Redis
+    # pub/sub so they reach every uvicorn worker
+    REALTIME_BROKER: str = "memory"
+    REALTIME_REDIS_URL: Optional[str] = None  # Defaults to CACHE_REDIS_URL
+    # Per-socket outbound queue: a client that falls this many messages
+    # behind, or takes longer than the timeout for one send, is disconnected
+    WS_SEND_QUEUE_SIZE: int = 256
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0
+    # Each process re-announces its users per trip every heartbeat; another
+    # process's users are dropped from presence if not re-announced within
+    # the TTL (a worker that dies never announces its empty list)
+    WS_PRESENCE_HEARTBEAT_SECONDS: float = 30.0
+    WS_PRESENCE_TTL_SECONDS: float = 90.0
+
+    # Douglas-Peucker tolerance (degrees, ~1e-5 = 1 m) applied to route
+    # geometries before they are stored; 0 keeps every provider point
+    ROUTE_SIMPLIFY_TOLERANCE_DEG: float = 1e-5
+
+    # Background segment recalculation: each API process runs
+    # SEGMENT_JOB_WORKERS job runners; set 0 and start `python -m app.worker`
+    # to process jobs in a separate process instead
+    SEGMENT_JOB_WORKERS: int = 1
+    SEGMENT_JOB_DEBOUNCE_SECONDS: float = 2.0  # Quiet period after the last edit of a trip
+    SEGMENT_JOB_MAX_DELAY_SECONDS: float = 30.0  # Upper bound on debouncing for busy trips
+    SEGMENT_JOB_POLL_SECONDS: float = 2.0
+    SEGMENT_JOB_TIMEOUT_SECONDS: int = 600  # Running jobs older than this are marked failed
+
+    # Offline POI route optimization (used when the ORS Optimization API is unavailable)
+    POI_OPTIMIZATION_TIME_BUDGET_MS: int = 200
+
     # Geocoding Cache
     GEOCODING_CACHE_TTL_HOURS: int = 24
     GEOCODING_CACHE_MAX_SIZE: int = 1000
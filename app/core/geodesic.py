@@ -0,0 +1,244 @@
+"""
+Geodesic helpers shared by the backend and the MCP server.
+
+Great-circle (haversine) distances on a spherical Earth plus simple
+per-profile speed models, used wherever a routing provider is not
+available or too expensive to call. Matrix functions work on whole
+coordinate arrays with NumPy broadcasting instead of per-pair Python
+loops, and return compact ``float32`` arrays by default.
+"""
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Hashable, Iterable, Optional, Sequence
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+EARTH_RADIUS_M = EARTH_RADIUS_KM * 1000.0
+
+
+@dataclass(frozen=True)
+class SpeedModel:
+    """Straight-line travel time estimate for a transport profile."""
+    speed_mps: float
+    detour_factor: float = 1.0  # Network distance / great-circle distance
+    overhead_seconds: float = 0.0
+
+    def seconds(self, distance_meters):
+        """Estimate travel time in seconds (scalar or array)."""
+        return distance_meters * self.detour_factor / self.speed_mps + self.overhead_seconds
+
+    def max_distance_m(self, seconds: float) -> float:
+        """Longest straight-line distance reachable within ``seconds`` (inverse of ``seconds``)."""
+        return max(0.0, (seconds - self.overhead_seconds) * self.speed_mps / self.detour_factor)
+
+
+# Average urban speeds per ORS profile
+SPEED_MODELS: dict[str, SpeedModel] = {
+    "foot-walking": SpeedModel(speed_mps=1.4),      # ~5 km/h
+    "cycling-regular": SpeedModel(speed_mps=4.2),   # ~15 km/h
+    "driving-car": SpeedModel(speed_mps=8.3),       # ~30 km/h (urban average)
+}
+DEFAULT_PROFILE = "foot-walking"
+
+
+def get_speed_model(profile: Optional[str]) -> SpeedModel:
+    """Get the speed model for a profile, falling back to walking."""
+    return SPEED_MODELS.get(profile or DEFAULT_PROFILE, SPEED_MODELS[DEFAULT_PROFILE])
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculate great-circle distance between two points in km."""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat / 2) ** 2 +
+         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculate great-circle distance between two points in meters."""
+    return haversine_km(lat1, lon1, lat2, lon2) * 1000.0
+
+
+def estimate_travel_seconds(distance_meters: float, profile: Optional[str] = DEFAULT_PROFILE) -> float:
+    """Estimate travel time in seconds for a distance and transport profile."""
+    return float(get_speed_model(profile).seconds(distance_meters))
+
+
+def as_coordinates(points: Iterable[Sequence[float]]) -> np.ndarray:
+    """
+    Convert (lat, lon) pairs to an ``(n, 2)`` float64 array.
+
+    Accepts any iterable of pairs, or an existing array of that shape.
+    """
+    coords = np.asarray(
+        points if isinstance(points, np.ndarray) else list(points),
+        dtype=np.float64,
+    )
+    if coords.size == 0:
+        return coords.reshape(0, 2)
+    if coords.ndim != 2 or coords.shape[1] != 2:
+        raise ValueError("Expected a sequence of (lat, lon) pairs")
+    return coords
+
+
+def _haversine_rad(lat1, lon1, lat2, lon2, radius: float) -> np.ndarray:
+    """Broadcasting haversine on inputs already in radians."""
+    a = (np.sin((lat2 - lat1) / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * radius * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def distances_from_km(lat: float, lon: float, points: Iterable[Sequence[float]]) -> np.ndarray:
+    """Distances in km from one point to each of ``points``."""
+    coords = np.radians(as_coordinates(points))
+    return _haversine_rad(
+        math.radians(lat), math.radians(lon), coords[:, 0], coords[:, 1], EARTH_RADIUS_KM
+    )
+
+
+def path_leg_distances_km(points: Iterable[Sequence[float]]) -> np.ndarray:
+    """Distances in km between consecutive points of a path (length n-1)."""
+    coords = np.radians(as_coordinates(points))
+    if len(coords) < 2:
+        return np.zeros(0, dtype=np.float64)
+    return _haversine_rad(
+        coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1], EARTH_RADIUS_KM
+    )
+
+
+def distance_matrix_m(
+    origins: Iterable[Sequence[float]],
+    destinations: Optional[Iterable[Sequence[float]]] = None,
+    dtype=np.float32,
+) -> np.ndarray:
+    """
+    Pairwise great-circle distances in meters.
+
+    Args:
+        origins: (lat, lon) pairs for the rows
+        destinations: (lat, lon) pairs for the columns (defaults to origins)
+        dtype: Output dtype; float32 keeps large matrices compact
+
+    Returns:
+        ``(len(origins), len(destinations))`` array with an exact zero
+        diagonal when destinations default to origins
+    """
+    src = np.radians(as_coordinates(origins))
+    dst = src if destinations is None else np.radians(as_coordinates(destinations))
+    matrix = _haversine_rad(
+        src[:, 0, None], src[:, 1, None], dst[None, :, 0], dst[None, :, 1], EARTH_RADIUS_M
+    )
+    if destinations is None:
+        np.fill_diagonal(matrix, 0.0)
+    return matrix.astype(dtype, copy=False)
+
+
+def distance_matrix_km(
+    origins: Iterable[Sequence[float]],
+    destinations: Optional[Iterable[Sequence[float]]] = None,
+    dtype=np.float32,
+) -> np.ndarray:
+    """Pairwise great-circle distances in km (see ``distance_matrix_m``)."""
+    return (distance_matrix_m(origins, destinations, dtype=np.float64) / 1000.0).astype(dtype, copy=False)
+
+
+@dataclass
+class TravelMatrix:
+    """Estimated distance (m) and duration (s) matrices for a set of points."""
+    distances: np.ndarray
+    durations: np.ndarray
+    profile: str
+
+    def to_nested(self, ids: Sequence[Hashable]) -> tuple[dict, dict]:
+        """
+        Convert to ``{from_id: {to_id: value}}`` dicts (durations, distances).
+
+        Args:
+            ids: Row/column identifiers, in matrix order
+        """
+        durations = self.durations.tolist()
+        distances = self.distances.tolist()
+        return (
+            {src: dict(zip(ids, row)) for src, row in zip(ids, durations)},
+            {src: dict(zip(ids, row)) for src, row in zip(ids, distances)},
+        )
+
+
+def travel_matrix(
+    points: Iterable[Sequence[float]],
+    profile: Optional[str] = DEFAULT_PROFILE,
+    destinations: Optional[Iterable[Sequence[float]]] = None,
+    dtype=np.float32,
+) -> TravelMatrix:
+    """
+    Estimate a full travel matrix from straight-line distances.
+
+    Args:
+        points: (lat, lon) pairs for the rows
+        profile: ORS-style profile name (foot-walking, cycling-regular, driving-car)
+        destinations: Optional (lat, lon) pairs for the columns (defaults to points)
+        dtype: Output dtype for both matrices
+
+    Returns:
+        TravelMatrix with zero travel time between identical points
+    """
+    distances = distance_matrix_m(points, destinations, dtype=np.float64)
+    durations = get_speed_model(profile).seconds(distances)
+    durations[distances == 0.0] = 0.0
+    return TravelMatrix(
+        distances=distances.astype(dtype, copy=False),
+        durations=durations.astype(dtype, copy=False),
+        profile=profile or DEFAULT_PROFILE,
+    )
+
+
+class NeighbourGrid:
+    """
+    Fixed-radius neighbour index over points on the sphere.
+
+    Points are bucketed into a uniform grid of cubes on their 3D
+    (Earth-centred) positions, with the cube edge equal to the chord of
+    ``radius_m``. Every point within ``radius_m`` of a point therefore lies
+    in one of the 27 surrounding cells, so a query touches a handful of
+    candidates instead of all n points. The grid has no projection
+    distortion near the poles or across the antimeridian.
+    """
+
+    def __init__(self, points: Iterable[Sequence[float]], radius_m: float):
+        coords = np.radians(as_coordinates(points))
+        cos_lat = np.cos(coords[:, 0])
+        xyz = EARTH_RADIUS_M * np.column_stack((
+            cos_lat * np.cos(coords[:, 1]),
+            cos_lat * np.sin(coords[:, 1]),
+            np.sin(coords[:, 0]),
+        ))
+        half_angle = min(max(radius_m, 0.0) / (2 * EARTH_RADIUS_M), math.pi / 2)
+        chord = 2 * EARTH_RADIUS_M * math.sin(half_angle)
+        # Pad against float error so boundary points are never missed
+        self.cell_size = max(chord * (1 + 1e-9), 1e-3)
+        self._keys = [tuple(key) for key in np.floor(xyz / self.cell_size).astype(np.int64).tolist()]
+        self._cells: dict[tuple, list[int]] = defaultdict(list)
+        for i, key in enumerate(self._keys):
+            self._cells[key].append(i)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def candidates(self, index: int) -> list[int]:
+        """
+        Indices (ascending, including ``index``) of points that may lie
+        within the radius of point ``index``. Callers apply the exact test.
+        """
+        x, y, z = self._keys[index]
+        found: list[int] = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    found.extend(self._cells.get((x + dx, y + dy, z + dz), ()))
+        found.sort()
+        return found
@@ -0,0 +1,205 @@
+"""
+Pub/sub brokers used to fan WebSocket messages out across processes.
+
+- InProcessBroker: delivers to subscribers in this process only. It is
+  the default (a single uvicorn worker has nobody else to reach) and lets
+  tests run several connection managers against one bus.
+- RedisBroker: Redis-protocol PUBLISH/SUBSCRIBE over one connection per
+  process, so every uvicorn worker and ``python -m app.worker`` share
+  trip broadcasts, presence and notifications.
+
+Messages are JSON objects. A broker only reads channels that have at
+least one local handler, so a process subscribes to the trips it holds
+sockets for and nothing else. Delivery is at-most-once: messages
+published while a subscriber is disconnected are lost.
+"""
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[str, dict[str, Any]], Awaitable[None]]
+
+
+class PubSubBroker(ABC):
+    """Interface shared by the broker backends."""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        ...
+
+    @abstractmethod
+    async def unsubscribe(self, channel: str, handler: MessageHandler) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class _HandlerRegistry:
+    """Handlers per channel; knows when a channel gains its first or loses its last handler."""
+
+    def __init__(self):
+        self._handlers: dict[str, list[MessageHandler]] = {}
+
+    def add(self, channel: str, handler: MessageHandler) -> bool:
+        """Register a handler. Returns True if the channel was not subscribed before."""
+        handlers = self._handlers.setdefault(channel, [])
+        if handler not in handlers:
+            handlers.append(handler)
+        return len(handlers) == 1
+
+    def remove(self, channel: str, handler: MessageHandler) -> bool:
+        """Drop a handler. Returns True if the channel has no handlers left."""
+        handlers = self._handlers.get(channel)
+        if not handlers:
+            return False
+        if handler in handlers:
+            handlers.remove(handler)
+        if handlers:
+            return False
+        del self._handlers[channel]
+        return True
+
+    def channels(self) -> list[str]:
+        return list(self._handlers)
+
+    async def dispatch(self, channel: str, message: dict[str, Any]) -> None:
+        for handler in list(self._handlers.get(channel, ())):
+            try:
+                await handler(channel, message)
+            except Exception:
+                logger.exception(f"Pub/sub handler failed for channel {channel}")
+
+
+class InProcessBroker(PubSubBroker):
+    """
+    Broker whose subscribers all live in this process.
+
+    ``publish`` awaits every handler before returning. Messages go
+    through a JSON round trip so handlers see what a Redis subscriber
+    would.
+    """
+
+    def __init__(self):
+        self._registry = _HandlerRegistry()
+
+    async def publish(self, channel: str, message: dict[str, Any]) -> None:
+        await self._registry.dispatch(channel, json.loads(json.dumps(message)))
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._registry.add(channel, handler)
+
+    async def unsubscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._registry.remove(channel, handler)
+
+    def channels(self) -> list[str]:
+        return self._registry.channels()
+
+
+class RedisBroker(PubSubBroker):
+    """
+    Broker backed by Redis-protocol pub/sub.
+
+    One client publishes and one pub/sub connection carries every
+    subscription of this process; a reader task dispatches incoming
+    messages to the channel's handlers. The client reconnects and
+    re-subscribes by itself after connection errors.
+    """
+
+    def __init__(self, url: str, poll_timeout: float = 1.0):
+        self.url = url
+        self.poll_timeout = poll_timeout
+        self._registry = _HandlerRegistry()
+        self._client = None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            from redis.asyncio import Redis
+
+            # RESP2 works with every Redis-protocol server, old or not
+            self._client = Redis.from_url(self.url, decode_responses=True, protocol=2)
+        return self._client
+
+    async def publish(self, channel: str, message: dict[str, Any]) -> None:
+        await self._get_client().publish(channel, json.dumps(message, separators=(",", ":")))
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        async with self._lock:
+            if not self._registry.add(channel, handler):
+                return
+            if self._pubsub is None:
+                self._pubsub = self._get_client().pubsub()
+            await self._pubsub.subscribe(channel)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+
+    async def unsubscribe(self, channel: str, handler: MessageHandler) -> None:
+        async with self._lock:
+            if self._registry.remove(channel, handler) and self._pubsub is not None:
+                await self._pubsub.unsubscribe(channel)
+
+    async def _read(self) -> None:
+        backoff = 0.5
+        while True:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=self.poll_timeout
+                )
+                backoff = 0.5
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Pub/sub connection error ({e}); retrying in {backoff:.1f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            try:
+                data = json.loads(message["data"])
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring malformed pub/sub message on {message.get('channel')}")
+                continue
+            await self._registry.dispatch(message["channel"], data)
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def build_broker() -> PubSubBroker:
+    """Build the broker selected by ``settings.REALTIME_BROKER``."""
+    backend = settings.REALTIME_BROKER.lower()
+    if backend == "memory":
+        return InProcessBroker()
+    if backend != "redis":
+        logger.warning(f"Unknown REALTIME_BROKER={settings.REALTIME_BROKER!r}; using in-process broker")
+        return InProcessBroker()
+    try:
+        import redis.asyncio  # noqa: F401
+    except ImportError as e:
+        logger.warning(f"Redis pub/sub unavailable ({e}); using in-process broker")
+        return InProcessBroker()
+    return RedisBroker(settings.REALTIME_REDIS_URL or settings.CACHE_REDIS_URL)
@@ -1,15 +1,16 @@
 """
 Resilience utilities for external API calls.
 
-Provides retry logic with exponential backoff and circuit breaker pattern
-to handle transient failures gracefully.
+Provides retry logic with exponential backoff, circuit breaker pattern
+and request coalescing to handle transient failures and duplicate
+concurrent requests gracefully.
 """
 import asyncio
 import logging
 import time
 from enum import Enum
 from functools import wraps
-from typing import Callable, TypeVar, ParamSpec
+from typing import Awaitable, Callable, Optional, TypeVar, ParamSpec
 
 import httpx
 from tenacity import (
@@ -267,6 +268,111 @@ def with_circuit_breaker(breaker: CircuitBreaker):
     return decorator
 
 
+class _LeaderCancelled(Exception):
+    """Set on a shared request whose leading caller was cancelled."""
+
+
+class RequestCoalescer:
+    """
+    In-flight request registry (single-flight) for an external service.
+
+    Concurrent calls with the same key share one upstream request: the first
+    caller runs it and later callers await the same future. Errors propagate
+    to every waiter and nothing is remembered once the request completes, so
+    this only deduplicates requests that overlap in time (caching is separate).
+    If the leading caller is cancelled, its waiters retry and the first of
+    them issues the request again.
+
+    Example:
+        mapbox_coalescer = RequestCoalescer("mapbox")
+
+        async def get_route(...):
+            return await mapbox_coalescer.run(cache_key, lambda: fetch(...))
+    """
+
+    def __init__(self, service_name: str, max_concurrency: Optional[int] = None):
+        """
+        Initialize request coalescer.
+
+        Args:
+            service_name: Name of the service (for stats)
+            max_concurrency: Max upstream requests running at once in this
+                process (None for unbounded); duplicates never take a slot
+        """
+        self.service_name = service_name
+        self.max_concurrency = max_concurrency
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._upstream_calls = 0
+        self._coalesced = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _limiter(self) -> Optional[asyncio.Semaphore]:
+        """Get the concurrency semaphore for the running event loop."""
+        if self.max_concurrency is None:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def is_inflight(self, key: str) -> bool:
+        """Check whether a request for this key is currently running."""
+        return key in self._inflight
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` for ``key`` unless an identical request is already in flight."""
+        while (pending := self._inflight.get(key)) is not None:
+            self._coalesced += 1
+            try:
+                # Shield so one cancelled waiter does not cancel the shared request
+                return await asyncio.shield(pending)
+            except _LeaderCancelled:
+                # The entry is gone by now, so the first waiter back leads
+                self._coalesced -= 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._upstream_calls += 1
+        try:
+            limiter = self._limiter()
+            if limiter is None:
+                result = await fn()
+            else:
+                async with limiter:
+                    result = await fn()
+        except asyncio.CancelledError:
+            # Only the leader was cancelled; tell waiters to retry instead
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure does not log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        """Get upstream/coalesced counters (coalesced = upstream calls saved)."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "upstream_calls": self._upstream_calls,
+            "coalesced": self._coalesced,
+            "inflight": len(self._inflight),
+        }
+
+    def reset(self) -> None:
+        """Reset counters (for testing/admin)."""
+        self._upstream_calls = 0
+        self._coalesced = 0
+
+
 # Pre-configured circuit breakers for each external service
 mapbox_circuit_breaker = CircuitBreaker(
     "mapbox",
@@ -297,3 +403,18 @@ navitime_circuit_breaker = CircuitBreaker(
     failure_threshold=5,
     reset_timeout=60.0,
 )
+
+
+# Pre-configured request coalescers for routing services, with per-provider
+# caps on concurrent upstream requests (ORS free tier is the most restrictive)
+mapbox_coalescer = RequestCoalescer("mapbox", max_concurrency=8)
+google_maps_routes_coalescer = RequestCoalescer("google_maps_routes", max_concurrency=6)
+openrouteservice_coalescer = RequestCoalescer("openrouteservice", max_concurrency=4)
+
+
+def get_coalescing_stats() -> dict:
+    """Get request coalescing counters for every routing service."""
+    return {
+        c.service_name: c.stats()
+        for c in (mapbox_coalescer, google_maps_routes_coalescer, openrouteservice_coalescer)
+    }
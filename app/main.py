@@ -6,8 +6,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi.responses import JSONResponse
+from app.core.auth_cache import start_invalidation_relay, stop_invalidation_relay
 from app.core.config import settings
 from app.core.http_client import close_http_client
+from app.services.connection_manager import manager
+from app.services.segment_job_queue import get_segment_job_runner
 from app.core.exceptions import (
     TravelRuterException,
     ExternalAPIError,
@@ -34,8 +37,16 @@ async def lifespan(app: FastAPI):
         "set" if settings.FERNET_KEY else "unset",
         "set" if getattr(settings, "INTERNAL_SERVICE_KEY", None) else "unset",
     )
+    segment_jobs = get_segment_job_runner()
+    if settings.SEGMENT_JOB_WORKERS > 0:
+        segment_jobs.start(settings.SEGMENT_JOB_WORKERS)
+    # Trip membership changes made by any worker evict this worker's role cache
+    await start_invalidation_relay(manager.broker)
     yield
     # Shutdown
+    await stop_invalidation_relay()
+    await segment_jobs.stop()
+    await manager.close()
     await close_http_client()
 
 
@@ -12,12 +12,14 @@ from app.models.note import Note, NoteType
 from app.models.user import User
 from app.models.trip_member import TripMember
 from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
 from app.models.trip_api_key import TripApiKey
 from app.models.poi_vote import POIVote
 from app.models.activity_log import ActivityLog
 from app.models.comment import Comment
 from app.models.conversation import Conversation
 from app.models.revoked_token import RevokedToken
+from app.models.segment_job import SegmentJob
 
 __all__ = [
     "BaseModel",
@@ -36,10 +38,12 @@ __all__ = [
     "User",
     "TripMember",
     "Notification",
+    "NotificationCounter",
     "TripApiKey",
     "POIVote",
     "ActivityLog",
     "Comment",
     "Conversation",
     "RevokedToken",
+    "SegmentJob",
 ]
@@ -1,7 +1,6 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Numeric, Date, Text, JSON, Boolean, Index
+from sqlalchemy import Column, Computed, Float, String, Integer, ForeignKey, Numeric, Date, Text, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geometry
-from geoalchemy2.shape import to_shape
 from app.models.base import BaseModel
 
 
@@ -14,27 +13,10 @@ class Accommodation(BaseModel):
     address = Column(String(500), nullable=True)
     coordinates = Column(Geometry('POINT', srid=4326), nullable=True)
 
-    @property
-    def latitude(self):
-        """Extract latitude from PostGIS coordinates"""
-        if self.coordinates is not None:
-            try:
-                point = to_shape(self.coordinates)
-                return point.y
-            except Exception:
-                return None
-        return None
-
-    @property
-    def longitude(self):
-        """Extract longitude from PostGIS coordinates"""
-        if self.coordinates is not None:
-            try:
-                point = to_shape(self.coordinates)
-                return point.x
-            except Exception:
-                return None
-        return None
+    # Generated by the database from coordinates (migration 031), so reads
+    # need no WKB decoding; written only through coordinates
+    latitude = Column(Float, Computed("ST_Y(coordinates)", persisted=True), nullable=True)
+    longitude = Column(Float, Computed("ST_X(coordinates)", persisted=True), nullable=True)
 
     # Booking details
     check_in_date = Column(Date, nullable=False, index=True)
@@ -64,6 +46,8 @@ class Accommodation(BaseModel):
     __table_args__ = (
         Index('ix_accommodations_dest_dates', 'destination_id', 'check_in_date', 'check_out_date'),
     )
+    # Fetch the generated latitude/longitude with RETURNING on INSERT/UPDATE
+    __mapper_args__ = {"eager_defaults": True}
 
     def __repr__(self):
         return f"<Accommodation(id={self.id}, name='{self.name}', type='{self.type}', check_in={self.check_in_date})>"
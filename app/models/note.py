@@ -1,9 +1,20 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, Boolean, Float, Index, CheckConstraint
-from sqlalchemy.orm import relationship, validates
-from sqlalchemy.dialects.postgresql import ARRAY, JSON
+from sqlalchemy import Column, Computed, String, Integer, ForeignKey, Text, Boolean, Float, Index, CheckConstraint
+from sqlalchemy.orm import deferred, relationship, validates
+from sqlalchemy.dialects.postgresql import ARRAY, JSON, TSVECTOR
 import enum
 from app.models.base import BaseModel
 
+# Text search configuration for notes. 'simple' lowercases without
+# stemming or stop words, since notes are written in any language.
+NOTE_SEARCH_CONFIG = "simple"
+
+# Title outranks content; HTML tags in rich-text content are not indexed
+NOTE_SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{NOTE_SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{NOTE_SEARCH_CONFIG}', "
+    f"coalesce(regexp_replace(content, '<[^>]*>', ' ', 'g'), '')), 'B')"
+)
+
 
 class NoteType(str, enum.Enum):
     GENERAL = "general"
@@ -65,6 +76,9 @@ class Note(BaseModel):
     # Media attachments (stored as JSON array of file paths/metadata)
     media_files = Column(JSON, nullable=True, default=[], comment="Array of media file paths and metadata")
 
+    # Full-text search document, maintained by PostgreSQL (see NoteService.search_notes)
+    search_vector = deferred(Column(TSVECTOR, Computed(NOTE_SEARCH_VECTOR_SQL, persisted=True), nullable=True))
+
     # Relationships
     trip = relationship("Trip", backref="trip_notes")
     destination = relationship("Destination", backref="destination_notes")
@@ -91,6 +105,9 @@ class Note(BaseModel):
         Index('ix_notes_destination_day', 'destination_id', 'day_number'),
         Index('ix_notes_trip_pinned', 'trip_id', 'is_pinned'),
         Index('ix_notes_dest_poi', 'destination_id', 'poi_id'),
+        Index('ix_notes_search_vector', 'search_vector', postgresql_using='gin'),
+        # Short-query fallback (pg_trgm similarity / substring match on titles)
+        Index('ix_notes_title_trgm', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}),
     )
 
     @validates('day_number')
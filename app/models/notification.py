@@ -17,7 +17,8 @@ class Notification(BaseModel):
 
     __table_args__ = (
         Index("ix_notifications_user_read", "user_id", "is_read"),
-        Index("ix_notifications_user_created", "user_id", "created_at"),
+        # Keyset order of the notification feed
+        Index("ix_notifications_user_created_id", "user_id", "created_at", "id"),
     )
 
     def __repr__(self):
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from app.models.base import BaseModel
+
+
+class NotificationCounter(BaseModel):
+    """Per-user notification totals, kept in step with the notifications table.
+
+    Maintained by app.services.notification_service; a user without a row
+    has no notifications.
+    """
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True)
+    unread_count = Column(Integer, nullable=False, default=0)
+    total_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<NotificationCounter(user_id={self.user_id}, unread={self.unread_count}, total={self.total_count})>"
@@ -1,7 +1,6 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Numeric, Text, JSON, Index, Date, Boolean, Time
+from sqlalchemy import Column, Computed, Float, String, Integer, ForeignKey, Numeric, Text, JSON, Index, Date, Boolean, Time
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geometry
-from geoalchemy2.shape import to_shape
 from app.models.base import BaseModel
 
 
@@ -15,27 +14,10 @@ class POI(BaseModel):
     coordinates = Column(Geometry('POINT', srid=4326), nullable=True)
     address = Column(String(500), nullable=True)
 
-    @property
-    def latitude(self):
-        """Extract latitude from PostGIS coordinates"""
-        if self.coordinates is not None:
-            try:
-                point = to_shape(self.coordinates)
-                return point.y
-            except Exception:
-                return None
-        return None
-
-    @property
-    def longitude(self):
-        """Extract longitude from PostGIS coordinates"""
-        if self.coordinates is not None:
-            try:
-                point = to_shape(self.coordinates)
-                return point.x
-            except Exception:
-                return None
-        return None
+    # Generated by the database from coordinates (migration 031), so reads
+    # need no WKB decoding; written only through coordinates
+    latitude = Column(Float, Computed("ST_Y(coordinates)", persisted=True), nullable=True)
+    longitude = Column(Float, Computed("ST_X(coordinates)", persisted=True), nullable=True)
 
     # Cost and time
     estimated_cost = Column(Numeric(10, 2), nullable=True)
@@ -73,6 +55,8 @@ class POI(BaseModel):
         Index('ix_pois_destination_priority', 'destination_id', 'priority'),
         Index('ix_pois_destination_scheduled', 'destination_id', 'scheduled_date', 'day_order'),
     )
+    # Fetch the generated latitude/longitude with RETURNING on INSERT/UPDATE
+    __mapper_args__ = {"eager_defaults": True}
 
     def __repr__(self):
         return f"<POI(id={self.id}, name='{self.name}', category='{self.category}', likes={self.likes}, vetoes={self.vetoes})>"
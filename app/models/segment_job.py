@@ -0,0 +1,53 @@
+"""
+SegmentJob model for background travel segment recalculation.
+
+One row per recalculation request. Requests for a trip that already has a
+pending job are folded into it (at most one pending job per trip), and
+workers in any process claim due jobs with ``FOR UPDATE SKIP LOCKED``.
+"""
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, String, Text, text
+
+from app.models.base import BaseModel
+
+
+class SegmentJob(BaseModel):
+    __tablename__ = "segment_jobs"
+
+    trip_id = Column(
+        Integer,
+        ForeignKey("trips.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    status = Column(
+        String(20),
+        nullable=False,
+        default="pending",
+        server_default="pending",
+        comment="pending, running, completed, failed, or cancelled",
+    )
+    run_after = Column(DateTime, nullable=False, comment="Debounce deadline; pushed back by repeat requests")
+    first_requested_at = Column(DateTime, nullable=False)
+    request_count = Column(Integer, nullable=False, default=1, server_default="1")
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    segments_total = Column(Integer, nullable=True)
+    segments_done = Column(Integer, nullable=False, default=0, server_default="0")
+    segments_reused = Column(Integer, nullable=True, comment="Segments whose inputs were unchanged")
+    segment_ids = Column(JSON, nullable=True, comment="Segments written by a completed job")
+    worker = Column(String(100), nullable=True)
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "uq_segment_jobs_trip_pending",
+            "trip_id",
+            unique=True,
+            postgresql_where=text("status = 'pending'"),
+        ),
+        Index("ix_segment_jobs_status_run_after", "status", "run_after"),
+    )
+
+    def __repr__(self):
+        return f"<SegmentJob(id={self.id}, trip_id={self.trip_id}, status='{self.status}')>"
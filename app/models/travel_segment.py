@@ -68,6 +68,11 @@ class TravelSegment(BaseModel):
     )
     estimated_cost = Column(Float, nullable=True, comment="Estimated cost for this travel segment")
     cost_currency = Column(String(3), nullable=True, comment="Currency for estimated_cost (e.g., EUR, USD)")
+    input_fingerprint = Column(
+        String(64),
+        nullable=True,
+        comment="Hash of the routing inputs the stored route was built from"
+    )
 
     # Relationships
     trip = relationship("Trip", foreign_keys=[trip_id])
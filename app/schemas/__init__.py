@@ -22,6 +22,7 @@ from app.schemas.accommodation import (
     AccommodationResponse,
 )
 from app.schemas.travel_segment import (
+    GeometryFormat,
     TravelMode,
     TravelSegmentCreate,
     TravelSegmentUpdate,
@@ -76,6 +77,7 @@ __all__ = [
     "AccommodationCreate",
     "AccommodationUpdate",
     "AccommodationResponse",
+    "GeometryFormat",
     "TravelMode",
     "TravelSegmentCreate",
     "TravelSegmentUpdate",
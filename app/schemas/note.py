@@ -130,16 +130,29 @@ class GroupedNotesResponse(BaseModel):
 
 class NoteSearchRequest(BaseModel):
     """Search parameters for notes"""
-    query: str = Field(..., min_length=1, description="Search query")
+    query: str = Field(
+        ...,
+        min_length=1,
+        description=(
+            "Search query. Every word must start a word of the title or content; "
+            "titles also match the query anywhere inside them"
+        ),
+    )
     trip_id: Optional[int] = Field(None, description="Filter by trip")
     destination_id: Optional[int] = Field(None, description="Filter by destination")
     note_type: Optional[NoteTypeEnum] = Field(None, description="Filter by note type")
     tags: Optional[List[str]] = Field(None, description="Filter by tags")
 
 
+class NoteSearchResult(NoteResponse):
+    """A note matched by a search"""
+    rank: float = Field(..., description="Relevance, higher first (ts_rank; title trigram similarity for short queries)")
+    snippet: Optional[str] = Field(None, description="Content excerpt with matches wrapped in <mark> (full-text queries only)")
+
+
 class NoteSearchResponse(BaseModel):
-    """Search results for notes"""
-    notes: List[NoteResponse]
+    """Search results for notes, most relevant first"""
+    notes: List[NoteSearchResult]
     count: int
     query: str
 
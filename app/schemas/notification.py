@@ -22,6 +22,7 @@ class NotificationList(BaseModel):
     notifications: list[NotificationResponse]
     total: int
     unread_count: int
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page")
 
 
 class UnreadCount(BaseModel):
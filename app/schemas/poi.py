@@ -86,6 +86,7 @@ class PaginatedPOIsByCategoryResponse(BaseModel):
     total: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page")
 
 
 class POIScheduleItem(BaseModel):
@@ -111,6 +112,7 @@ class POIOptimizationRequest(BaseModel):
     day_number: int = Field(..., ge=1, description="Day number to optimize (1-indexed)")
     start_location: StartLocation = Field(..., description="Starting location (accommodation)")
     start_time: str = Field(default="08:00", pattern=r"^\d{2}:\d{2}$", description="Start time in HH:MM format (default 08:00)")
+    return_to_start: bool = Field(default=True, description="Whether the route ends back at the start location")
 
 
 class OptimizedPOI(BaseModel):
@@ -130,6 +132,10 @@ class POIOptimizationResponse(BaseModel):
     optimized_order: List[int] = Field(..., description="POI IDs in optimal visiting order")
     total_distance_km: float = Field(..., description="Total route distance in kilometers")
     total_duration_minutes: int = Field(..., description="Total travel time in minutes (excluding dwell time)")
+    total_dwell_minutes: int = Field(0, description="Total time spent at the POIs in minutes")
+    leg_durations_minutes: Optional[List[float]] = Field(
+        None, description="Travel minutes from the previous stop to each POI, in visiting order"
+    )
     route_geometry: Optional[dict] = Field(None, description="GeoJSON geometry of the optimized route")
     original_order: List[int] = Field(..., description="Original POI order for comparison")
     pois: List[POIResponse] = Field(..., description="POIs in optimized order with full details")
@@ -60,6 +60,9 @@ class POISuggestion(BaseModel):
     external_source: str = Field(default="google_places")
     metadata: POISuggestionMetadata
     distance_km: Optional[float] = Field(None, description="Distance from destination in km")
+    existing_poi_id: Optional[int] = Field(
+        None, description="POI already on the destination for this place (same place ID, or nearby with a similar name)"
+    )
 
     # Quick-add helpers
     estimated_cost: Optional[float] = Field(None, description="Estimated cost based on price_level")
@@ -23,3 +23,7 @@ class RoutingResponse(BaseModel):
     origin: Coordinate
     destination: Coordinate
     geometry: dict = Field(..., description="GeoJSON LineString")
+
+class RoutingCacheStatsResponse(BaseModel):
+    cache: dict = Field(..., description="Per-namespace cache hit/miss/latency counters")
+    coalescing: dict = Field(..., description="Per-service upstream calls and requests coalesced")
@@ -44,3 +44,7 @@ class TravelMatrixResponse(BaseModel):
         default=False,
         description="True if ORS API failed and Haversine fallback was used"
     )
+    estimated_cells: List[List[str]] = Field(
+        default_factory=list,
+        description="[source_id, destination_id] cells estimated with Haversine because their ORS tile failed"
+    )
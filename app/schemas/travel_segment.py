@@ -14,6 +14,12 @@ class TravelMode(str, Enum):
     FERRY = "ferry"
 
 
+class GeometryFormat(str, Enum):
+    """How route geometry is returned by the API."""
+    GEOJSON = "geojson"
+    POLYLINE = "polyline"  # Google encoded polyline, precision 5
+
+
 class TravelSegmentBase(BaseModel):
     travel_mode: TravelMode = Field(..., description="Mode of transportation")
 
@@ -41,6 +47,7 @@ class TravelSegmentResponse(TravelSegmentBase):
     distance_km: Optional[float] = Field(None, description="Distance in kilometers")
     duration_minutes: Optional[int] = Field(None, description="Duration in minutes")
     route_geometry: Optional[dict[str, Any]] = Field(None, description="GeoJSON LineString geometry for the route")
+    route_polyline: Optional[str] = Field(None, description="Encoded polyline for the route (geometry_format=polyline)")
     is_fallback: bool = Field(False, description="True if route is from fallback service (car route when transit unavailable)")
     route_legs: Optional[list[dict[str, Any]]] = Field(None, description="Per-leg route data when stops have different travel modes")
     estimated_cost: Optional[float] = Field(None, description="Estimated cost for this travel segment")
@@ -65,6 +72,8 @@ class TravelSegmentWithDestinations(TravelSegmentResponse):
 class TripTravelSegmentsResponse(BaseModel):
     """Response containing all travel segments for a trip"""
     segments: list[TravelSegmentResponse]
+    segments_reused: Optional[int] = Field(None, description="Segments kept because their inputs were unchanged (recalculation only)")
+    segments_rebuilt: Optional[int] = Field(None, description="Segments routed again (recalculation only)")
 
 
 class OriginReturnSegment(BaseModel):
@@ -80,6 +89,7 @@ class OriginReturnSegment(BaseModel):
     distance_km: Optional[float] = Field(None, description="Distance in kilometers")
     duration_minutes: Optional[int] = Field(None, description="Duration in minutes")
     route_geometry: Optional[dict[str, Any]] = Field(None, description="GeoJSON LineString geometry")
+    route_polyline: Optional[str] = Field(None, description="Encoded polyline (geometry_format=polyline)")
     is_fallback: bool = Field(False, description="True if route is from fallback service")
 
 
@@ -88,3 +98,42 @@ class TripTravelSegmentsWithOriginReturnResponse(BaseModel):
     segments: list[TravelSegmentResponse] = Field(default_factory=list, description="Segments between destinations")
     origin_segment: Optional[OriginReturnSegment] = Field(None, description="Segment from origin to first destination")
     return_segment: Optional[OriginReturnSegment] = Field(None, description="Segment from last destination to return point")
+
+
+class SegmentGeometry(BaseModel):
+    """Simplified route geometry of one travel segment for map rendering"""
+    id: int
+    segment_type: str
+    from_destination_id: Optional[int] = None
+    to_destination_id: Optional[int] = None
+    travel_mode: TravelMode
+    is_fallback: bool = False
+    route_geometry: Optional[dict[str, Any]] = Field(None, description="GeoJSON LineString (geometry_format=geojson)")
+    route_polyline: Optional[str] = Field(None, description="Encoded polyline (geometry_format=polyline)")
+    route_legs: Optional[list[dict[str, Any]]] = Field(None, description="Per-leg travel mode and geometry")
+
+
+class TripGeometryResponse(BaseModel):
+    """Level-of-detail geometry for all travel segments of a trip"""
+    trip_id: int
+    tolerance: float = Field(..., description="Simplification tolerance applied, in degrees")
+    segments: list[SegmentGeometry] = Field(default_factory=list)
+
+
+class SegmentJobResponse(BaseModel):
+    """Status of a background segment recalculation job"""
+    id: int
+    trip_id: int
+    status: str = Field(..., description="pending, running, completed, failed, or cancelled")
+    request_count: int = Field(..., description="Recalculation requests folded into this job")
+    run_after: datetime = Field(..., description="Earliest start (debounced by further requests)")
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    segments_total: Optional[int] = Field(None, description="Segments to route, known once routing starts")
+    segments_done: int = 0
+    segments_reused: Optional[int] = Field(None, description="Segments a completed job kept because their inputs were unchanged")
+    segment_ids: Optional[list[int]] = Field(None, description="Segments written by a completed job")
+    error: Optional[str] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
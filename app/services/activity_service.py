@@ -1,12 +1,56 @@
+"""
+Trip activity log and the notifications it fans out to trip members.
+
+``log_activity`` only records the event on the session. Buffered events
+are written when the transaction commits (or by ``flush_activity``) with
+one multi-row ``INSERT ... RETURNING`` into ``activity_logs`` and one into
+``notifications``, however many events and members there are, plus one
+upsert of the members' notification counters. Actor names come from the
+per-process principal cache (``app.core.auth_cache``), loading whatever is
+not cached with a single query; trip members are always read with one
+query in the writing transaction. Realtime notification pushes are sent
+only after the commit succeeds, and a rollback discards both the buffer
+and the pushes.
+"""
+import asyncio
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Optional, Any
 
-from sqlalchemy import select, func
+from sqlalchemy import event, insert, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from app.core.auth_cache import get_principal_cache
 from app.models.activity_log import ActivityLog
 from app.models.notification import Notification
 from app.models.trip_member import TripMember
 from app.models.user import User
+from app.services.connection_manager import manager
+from app.services.notification_service import adjust_counters
+
+logger = logging.getLogger(__name__)
+
+# Session.info keys
+PENDING_KEY = "activity_pending"
+PUSH_KEY = "activity_push"
+
+_push_tasks: set[asyncio.Task] = set()
+
+
+@dataclass
+class ActivityEvent:
+    """An activity waiting to be written with its session's transaction."""
+    trip_id: int
+    user_id: int
+    action: str
+    entity_type: str
+    entity_id: Optional[int] = None
+    entity_name: Optional[str] = None
+    details: Optional[dict] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
 
 
 async def log_activity(
@@ -19,9 +63,9 @@ async def log_activity(
     entity_id: Optional[int] = None,
     entity_name: Optional[str] = None,
     details: Optional[dict] = None,
-) -> ActivityLog:
-    """Log an activity and create notifications for other trip members."""
-    entry = ActivityLog(
+) -> None:
+    """Record an activity; it and its notifications are written on commit."""
+    db.info.setdefault(PENDING_KEY, []).append(ActivityEvent(
         trip_id=trip_id,
         user_id=user_id,
         action=action,
@@ -29,38 +73,163 @@ async def log_activity(
         entity_id=entity_id,
         entity_name=entity_name,
         details=details,
-    )
-    db.add(entry)
-
-    # Create notifications for other accepted members
-    actor = await db.get(User, user_id)
-    actor_data = {
-        "actor_name": actor.name or actor.email if actor else None,
-        "actor_avatar_url": actor.avatar_url if actor else None,
+    ))
+
+
+async def flush_activity(db: AsyncSession) -> list[int]:
+    """Write buffered activities now. Returns the new activity ids in logging order."""
+    if not db.info.get(PENDING_KEY):
+        return []
+    return await db.run_sync(_write_pending)
+
+
+def _actor_display(session: Session, user_ids: set[int]) -> dict[int, dict[str, Any]]:
+    """Actor name/avatar per user id, from the principal cache where possible."""
+    cache = get_principal_cache()
+    snapshots: dict[int, dict[str, Any]] = {}
+    missing = []
+    for user_id in user_ids:
+        values = cache.get(user_id)
+        if values is None:
+            missing.append(user_id)
+        else:
+            snapshots[user_id] = values
+    if missing:
+        for user in session.execute(select(User).where(User.id.in_(missing))).scalars():
+            cache.put(user)
+            snapshots[user.id] = {"name": user.name, "email": user.email, "avatar_url": user.avatar_url}
+
+    return {
+        user_id: {
+            "actor_name": values.get("name") or values.get("email"),
+            "actor_avatar_url": values.get("avatar_url"),
+        }
+        for user_id, values in snapshots.items()
     }
 
-    stmt = select(TripMember.user_id).where(
-        TripMember.trip_id == trip_id,
-        TripMember.status == "accepted",
-        TripMember.user_id != user_id,
-    )
-    result = await db.execute(stmt)
-    member_ids = result.scalars().all()
 
-    for member_id in member_ids:
-        notification = Notification(
-            user_id=member_id,
-            trip_id=trip_id,
-            type="activity",
-            title=f"{entity_type.capitalize()} {action}",
-            message=f"{entity_name or entity_type} was {action}",
-            data={"activity_id": None, "entity_type": entity_type, "entity_id": entity_id, **actor_data},
-        )
-        db.add(notification)
+def _trip_members(session: Session, trip_ids: set[int]) -> dict[int, list[int]]:
+    """Accepted member ids per trip, read in the writing transaction.
+
+    Not taken from the trip role cache: a member removed by another worker
+    may still be cached there and would keep receiving notifications.
+    """
+    members: dict[int, list[int]] = {trip_id: [] for trip_id in trip_ids}
+    rows = session.execute(
+        select(TripMember.trip_id, TripMember.user_id)
+        .where(TripMember.trip_id.in_(trip_ids), TripMember.status == "accepted")
+    ).all()
+    for row in rows:
+        members[row.trip_id].append(row.user_id)
+    return members
+
 
-    await db.flush()
-    await db.refresh(entry)
-    return entry
+def _write_pending(session: Session) -> list[int]:
+    """Insert buffered activities and their notifications; queue pushes for after commit."""
+    events: list[ActivityEvent] = session.info.pop(PENDING_KEY, None) or []
+    if not events:
+        return []
+
+    actors = _actor_display(session, {e.user_id for e in events})
+    members = _trip_members(session, {e.trip_id for e in events})
+
+    activity_ids = session.execute(
+        insert(ActivityLog).returning(ActivityLog.id, sort_by_parameter_order=True),
+        [
+            {
+                "trip_id": e.trip_id,
+                "user_id": e.user_id,
+                "action": e.action,
+                "entity_type": e.entity_type,
+                "entity_id": e.entity_id,
+                "entity_name": e.entity_name,
+                "details": e.details,
+                "created_at": e.created_at,
+                "updated_at": e.created_at,
+            }
+            for e in events
+        ],
+    ).scalars().all()
+
+    notifications = []
+    for e, activity_id in zip(events, activity_ids):
+        actor = actors.get(e.user_id, {"actor_name": None, "actor_avatar_url": None})
+        for member_id in members.get(e.trip_id, ()):
+            if member_id == e.user_id:
+                continue
+            notifications.append({
+                "user_id": member_id,
+                "trip_id": e.trip_id,
+                "type": "activity",
+                "title": f"{e.entity_type.capitalize()} {e.action}",
+                "message": f"{e.entity_name or e.entity_type} was {e.action}",
+                "data": {"activity_id": activity_id, "entity_type": e.entity_type, "entity_id": e.entity_id, **actor},
+                "is_read": False,
+                "created_at": e.created_at,
+                "updated_at": e.created_at,
+            })
+
+    if notifications:
+        notification_ids = session.execute(
+            insert(Notification).returning(Notification.id, sort_by_parameter_order=True),
+            notifications,
+        ).scalars().all()
+        per_user = Counter(values["user_id"] for values in notifications)
+        adjust_counters(session, {user_id: (n, n) for user_id, n in per_user.items()})
+        pushes = session.info.setdefault(PUSH_KEY, [])
+        for notification_id, values in zip(notification_ids, notifications):
+            pushes.append((values["user_id"], {
+                "id": notification_id,
+                "user_id": values["user_id"],
+                "trip_id": values["trip_id"],
+                "type": values["type"],
+                "title": values["title"],
+                "message": values["message"],
+                "data": values["data"],
+                "is_read": False,
+                "read_at": None,
+                "created_at": values["created_at"].isoformat(),
+            }))
+
+    return list(activity_ids)
+
+
+async def _push_notifications(pushes: list[tuple[int, dict]]) -> None:
+    for user_id, payload in pushes:
+        try:
+            await manager.push_notification(user_id, payload)
+        except Exception:
+            logger.exception(f"Failed to push notification {payload.get('id')} to user {user_id}")
+
+
+@event.listens_for(Session, "before_commit")
+def _write_on_commit(session: Session) -> None:
+    # Runs inside the AsyncSession's greenlet, so sync execute() is allowed
+    if session.info.get(PENDING_KEY):
+        _write_pending(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _push_after_commit(session: Session) -> None:
+    pushes = session.info.pop(PUSH_KEY, None)
+    if not pushes:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(_push_notifications(pushes))
+    _push_tasks.add(task)
+    task.add_done_callback(_push_tasks.discard)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session: Session, previous_transaction) -> None:
+    # Also fires when the transaction never reached the database
+    if previous_transaction.nested:
+        return
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(PUSH_KEY, None)
 
 
 async def get_activity_feed(
@@ -72,6 +241,9 @@ async def get_activity_feed(
     entity_type: Optional[str] = None,
 ) -> tuple[list[ActivityLog], int]:
     """Get paginated activity feed for a trip."""
+    # Include activities logged earlier in this transaction
+    await flush_activity(db)
+
     stmt = select(ActivityLog).where(ActivityLog.trip_id == trip_id)
     count_stmt = select(func.count(ActivityLog.id)).where(ActivityLog.trip_id == trip_id)
 
@@ -7,6 +7,7 @@ from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_cache import invalidate_principal
 from app.core.config import settings
 from app.models.user import User
 
@@ -67,6 +68,7 @@ async def get_or_create_user(
         user.avatar_url = avatar_url or user.avatar_url
         await db.flush()
         await db.refresh(user)
+        invalidate_principal(db, user.id)
         return user
 
     # Check for duplicate email with different provider
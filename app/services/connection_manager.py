@@ -1,70 +1,431 @@
+"""
+WebSocket connections per trip, shared across processes through a broker.
+
+Each process holds its own sockets. Trip broadcasts, direct messages,
+presence and notifications are delivered to local sockets right away and
+published on a pub/sub broker (see ``app.core.pubsub``) for the other
+processes:
+
+- ``ws:trip:{id}``: broadcasts, direct messages and presence for a trip.
+  A process subscribes while it holds at least one socket for the trip.
+- ``ws:user:{id}``: notifications and unread counts for a user,
+  subscribed while the user has a socket in this process.
+
+Presence is the union of this process's users and the user lists other
+processes announce for the trip. A process that starts holding a trip
+asks the others to announce theirs (``sync``); a process that stops
+holding it announces an empty list. Every process also re-announces its
+users for each trip it holds every ``presence_heartbeat`` seconds, and
+another process's list expires after ``presence_ttl`` seconds without an
+announcement, so users of a process that died drop out of presence.
+Messages carry the publishing process's ``node_id`` so it ignores its own.
+
+Every socket has a ``SocketWriter``: a bounded outbound queue drained by
+its own task, so broadcasting only serializes the message once and
+enqueues the text, and a slow client never holds up the others. Presence
+snapshots are coalesced (a queued one is overwritten by the next) and
+dropped when the queue is full; any other message that does not fit
+disconnects the client, which then reconnects and resyncs.
+"""
+import asyncio
+import json
 import logging
-from typing import Optional
+import time
+import uuid
+from collections import deque
+from typing import Any, Optional
 
 from fastapi import WebSocket
 
+from app.core.config import settings
+from app.core.pubsub import PubSubBroker, build_broker
+
 logger = logging.getLogger(__name__)
 
+TRIP_CHANNEL_PREFIX = "ws:trip:"
+USER_CHANNEL_PREFIX = "ws:user:"
+
+
+def trip_channel(trip_id: int) -> str:
+    return f"{TRIP_CHANNEL_PREFIX}{trip_id}"
+
+
+def user_channel(user_id: int) -> str:
+    return f"{USER_CHANNEL_PREFIX}{user_id}"
+
+
+def dump_message(data: dict) -> str:
+    """Serialize a message the way ``WebSocket.send_json`` does."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+class SocketWriter:
+    """Bounded outbound queue and writer task for one WebSocket."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_queue: int = 256,
+        send_timeout: float = 10.0,
+        label: str = "",
+    ):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.label = label
+        self.closed = False
+        self.coalesced = 0  # Presence snapshots overwritten or dropped
+        # Cells are one-item lists so a queued presence snapshot can be
+        # replaced in place without losing its position
+        self._queue: deque[list[str]] = deque()
+        self._presence: Optional[list[str]] = None
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closer: Optional[asyncio.Task] = None
+        self._task = asyncio.create_task(self._run())
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def send(self, text: str) -> bool:
+        """Queue a message. Disconnects the client if its queue is full."""
+        if self.closed:
+            return False
+        if len(self._queue) >= self.max_queue:
+            logger.warning(f"Send queue full for {self.label}; disconnecting slow client")
+            self._abort(code=1013)
+            return False
+        self._put([text])
+        return True
+
+    def send_presence(self, text: str) -> None:
+        """Queue a presence snapshot, replacing one that is still queued."""
+        if self.closed:
+            return
+        if self._presence is not None:
+            self._presence[0] = text
+            self.coalesced += 1
+        elif len(self._queue) >= self.max_queue:
+            self.coalesced += 1
+        else:
+            self._presence = [text]
+            self._put(self._presence)
+
+    def _put(self, cell: list[str]) -> None:
+        self._queue.append(cell)
+        self._idle.clear()
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self.closed:
+            if not self._queue:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            cell = self._queue.popleft()
+            if cell is self._presence:
+                self._presence = None
+            try:
+                async with asyncio.timeout(self.send_timeout):
+                    await self.websocket.send_text(cell[0])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to send to {self.label} ({type(e).__name__}); disconnecting")
+                self._abort(code=1011)
+                return
+
+    def _abort(self, code: int) -> None:
+        """Stop writing and close the socket; the receive loop then disconnects it."""
+        self._stop()
+        self._closer = asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int) -> None:
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def _stop(self) -> None:
+        self.closed = True
+        self._queue.clear()
+        self._presence = None
+        self._idle.set()
+        self._wakeup.set()
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    async def join(self) -> None:
+        """Wait until everything queued so far has been sent (or the writer stopped)."""
+        await self._idle.wait()
+
+    async def close(self) -> None:
+        """Stop the writer task (the socket is already closed or being replaced)."""
+        self._stop()
+        await asyncio.gather(self._task, return_exceptions=True)
+
 
 class ConnectionManager:
     """Manages WebSocket connections per trip, tracking which users are connected."""
 
-    def __init__(self):
-        # {trip_id: {user_id: WebSocket}}
-        self._connections: dict[int, dict[int, WebSocket]] = {}
+    def __init__(
+        self,
+        broker: Optional[PubSubBroker] = None,
+        node_id: Optional[str] = None,
+        max_queue: int = settings.WS_SEND_QUEUE_SIZE,
+        send_timeout: float = settings.WS_SEND_TIMEOUT_SECONDS,
+        presence_heartbeat: float = settings.WS_PRESENCE_HEARTBEAT_SECONDS,
+        presence_ttl: float = settings.WS_PRESENCE_TTL_SECONDS,
+    ):
+        # {trip_id: {user_id: SocketWriter}}
+        self._connections: dict[int, dict[int, SocketWriter]] = {}
+        # Reverse index {user_id: {trip_id: SocketWriter}}
+        self._user_sockets: dict[int, dict[int, SocketWriter]] = {}
+        # Users connected to other processes: {trip_id: {node_id: (expires_at, [user_id])}}
+        self._remote_presence: dict[int, dict[str, tuple[float, list[int]]]] = {}
+        # None keeps every message in this process
+        self.broker = broker
+        self.node_id = node_id or uuid.uuid4().hex
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.presence_heartbeat = presence_heartbeat
+        self.presence_ttl = presence_ttl
+        self._heartbeat: Optional[asyncio.Task] = None
 
     async def connect(self, trip_id: int, user_id: int, websocket: WebSocket):
         await websocket.accept()
+        self._start_heartbeat()
+        first_for_user = user_id not in self._user_sockets
         if trip_id not in self._connections:
             self._connections[trip_id] = {}
-        self._connections[trip_id][user_id] = websocket
-        await self._broadcast_presence(trip_id)
+            await self._subscribe(trip_channel(trip_id))
+            # Ask the other processes which users they hold for this trip
+            await self._publish(trip_channel(trip_id), {"kind": "sync"})
+        writer = SocketWriter(
+            websocket, self.max_queue, self.send_timeout, label=f"user {user_id} in trip {trip_id}"
+        )
+        replaced = self._connections[trip_id].get(user_id)
+        self._connections[trip_id][user_id] = writer
+        self._user_sockets.setdefault(user_id, {})[trip_id] = writer
+        if replaced is not None:
+            await replaced.close()
+        if first_for_user:
+            await self._subscribe(user_channel(user_id))
+        await self._presence_changed(trip_id)
 
-    async def disconnect(self, trip_id: int, user_id: int):
+    async def disconnect(self, trip_id: int, user_id: int, websocket: Optional[WebSocket] = None):
+        """Forget a user's socket; with ``websocket``, only if it is still the current one."""
         if trip_id in self._connections:
+            writer = self._connections[trip_id].get(user_id)
+            if websocket is not None and writer is not None and writer.websocket is not websocket:
+                return
             self._connections[trip_id].pop(user_id, None)
+            if writer is not None:
+                sockets = self._user_sockets.get(user_id, {})
+                sockets.pop(trip_id, None)
+                if not sockets:
+                    self._user_sockets.pop(user_id, None)
+                    await self._unsubscribe(user_channel(user_id))
+                await writer.close()
             if not self._connections[trip_id]:
                 del self._connections[trip_id]
+                await self._publish(trip_channel(trip_id), {"kind": "presence", "users": []})
+                await self._unsubscribe(trip_channel(trip_id))
+                self._remote_presence.pop(trip_id, None)
             else:
-                await self._broadcast_presence(trip_id)
+                await self._presence_changed(trip_id)
 
     def get_online_users(self, trip_id: int) -> list[int]:
-        return list(self._connections.get(trip_id, {}).keys())
+        online = dict.fromkeys(self._connections.get(trip_id, {}))
+        now = time.monotonic()
+        for expires_at, users in self._remote_presence.get(trip_id, {}).values():
+            if expires_at > now:
+                online.update(dict.fromkeys(users))
+        return list(online)
 
     async def send_to_user(self, trip_id: int, user_id: int, data: dict):
-        ws = self._connections.get(trip_id, {}).get(user_id)
-        if ws:
-            try:
-                await ws.send_json(data)
-            except Exception:
-                logger.warning(f"Failed to send to user {user_id} in trip {trip_id}")
+        if user_id in self._connections.get(trip_id, {}):
+            await self._send_local(trip_id, user_id, data)
+        else:
+            await self._publish(trip_channel(trip_id), {"kind": "direct", "user_id": user_id, "data": data})
 
     async def broadcast_to_trip(self, trip_id: int, data: dict, exclude_user: Optional[int] = None):
-        connections = self._connections.get(trip_id, {})
-        for uid, ws in list(connections.items()):
-            if uid == exclude_user:
-                continue
-            try:
-                await ws.send_json(data)
-            except Exception:
-                logger.warning(f"Failed to broadcast to user {uid} in trip {trip_id}")
+        await self._broadcast_local(trip_id, data, exclude_user)
+        await self._publish(trip_channel(trip_id), {
+            "kind": "broadcast",
+            "data": data,
+            "exclude_user": exclude_user,
+        })
 
     async def _broadcast_presence(self, trip_id: int):
-        online = self.get_online_users(trip_id)
-        await self.broadcast_to_trip(trip_id, {
+        connections = self._connections.get(trip_id)
+        if not connections:
+            return
+        text = dump_message({
             "type": "presence",
-            "online_users": online,
+            "online_users": self.get_online_users(trip_id),
         })
+        for writer in connections.values():
+            writer.send_presence(text)
 
     async def push_notification(self, user_id: int, notification: dict):
         """Push notification to user across all their trip connections."""
+        await self.push_to_user(user_id, {"type": "notification", "data": notification})
+
+    async def push_to_user(self, user_id: int, data: dict):
+        """Send a message to every socket of a user, whichever trip it is open on."""
+        await self._user_local(user_id, data)
+        await self._publish(user_channel(user_id), {"kind": "user", "data": data})
+
+    async def flush(self) -> None:
+        """Wait until every queued message has been written."""
+        writers = [w for connections in self._connections.values() for w in connections.values()]
+        await asyncio.gather(*(w.join() for w in writers))
+
+    async def close(self) -> None:
+        """Stop the socket writers and release the broker connection (on shutdown)."""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        for connections in self._connections.values():
+            for writer in connections.values():
+                await writer.close()
+        if self.broker is not None:
+            await self.broker.close()
+
+    # --- Local delivery ---
+
+    async def _send_local(self, trip_id: int, user_id: int, data: dict):
+        writer = self._connections.get(trip_id, {}).get(user_id)
+        if writer:
+            writer.send(dump_message(data))
+
+    async def _broadcast_local(self, trip_id: int, data: dict, exclude_user: Optional[int] = None):
+        connections = self._connections.get(trip_id)
+        if not connections:
+            return
+        text = dump_message(data)
+        for uid, writer in list(connections.items()):
+            if uid != exclude_user:
+                writer.send(text)
+
+    async def _user_local(self, user_id: int, data: dict):
+        sockets = self._user_sockets.get(user_id)
+        if not sockets:
+            return
+        text = dump_message(data)
+        for writer in list(sockets.values()):
+            writer.send(text)
+
+    async def _presence_changed(self, trip_id: int):
+        """Announce this process's users for a trip and refresh local presence."""
+        await self._publish(trip_channel(trip_id), {
+            "kind": "presence",
+            "users": list(self._connections.get(trip_id, {})),
+        })
+        await self._broadcast_presence(trip_id)
+
+    # --- Presence heartbeat ---
+
+    def _start_heartbeat(self):
+        if self.broker is None or self.presence_heartbeat <= 0:
+            return
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.presence_heartbeat)
+            try:
+                await self._heartbeat_once()
+            except Exception:
+                logger.exception("Presence heartbeat failed")
+
+    async def _heartbeat_once(self):
+        """Re-announce this process's users and drop expired remote ones."""
         for trip_id, connections in list(self._connections.items()):
-            if user_id in connections:
-                await self.send_to_user(trip_id, user_id, {
-                    "type": "notification",
-                    "data": notification,
-                })
+            await self._publish(trip_channel(trip_id), {"kind": "presence", "users": list(connections)})
+
+        now = time.monotonic()
+        for trip_id, remote in list(self._remote_presence.items()):
+            expired = [node for node, (expires_at, _) in remote.items() if expires_at <= now]
+            if not expired:
+                continue
+            for node in expired:
+                del remote[node]
+            if not remote:
+                del self._remote_presence[trip_id]
+            await self._broadcast_presence(trip_id)
+
+    # --- Broker ---
+
+    async def _subscribe(self, channel: str):
+        if self.broker is None:
+            return
+        try:
+            await self.broker.subscribe(channel, self._on_message)
+        except Exception as e:
+            logger.warning(f"Failed to subscribe to {channel}: {e}")
+
+    async def _unsubscribe(self, channel: str):
+        if self.broker is None:
+            return
+        try:
+            await self.broker.unsubscribe(channel, self._on_message)
+        except Exception as e:
+            logger.warning(f"Failed to unsubscribe from {channel}: {e}")
+
+    async def _publish(self, channel: str, message: dict[str, Any]):
+        if self.broker is None:
+            return
+        try:
+            await self.broker.publish(channel, {**message, "origin": self.node_id})
+        except Exception as e:
+            logger.warning(f"Failed to publish to {channel}: {e}")
+
+    async def _on_message(self, channel: str, message: dict[str, Any]):
+        """Deliver a message published by another process."""
+        origin = message.get("origin")
+        if origin == self.node_id:
+            return
+        kind = message.get("kind")
+
+        if channel.startswith(USER_CHANNEL_PREFIX):
+            if kind == "user":
+                await self._user_local(int(channel[len(USER_CHANNEL_PREFIX):]), message["data"])
+            return
+
+        trip_id = int(channel[len(TRIP_CHANNEL_PREFIX):])
+        if trip_id not in self._connections:
+            return
+        if kind == "broadcast":
+            await self._broadcast_local(trip_id, message["data"], message.get("exclude_user"))
+        elif kind == "direct":
+            await self._send_local(trip_id, message["user_id"], message["data"])
+        elif kind == "sync":
+            await self._publish(trip_channel(trip_id), {
+                "kind": "presence",
+                "users": list(self._connections[trip_id]),
+            })
+        elif kind == "presence" and origin:
+            remote = self._remote_presence.setdefault(trip_id, {})
+            users = message.get("users") or []
+            now = time.monotonic()
+            previous = remote.get(origin)
+            if users:
+                remote[origin] = (now + self.presence_ttl, users)
+            else:
+                remote.pop(origin, None)
+            # A heartbeat repeating a live list only extends its expiry
+            if previous is not None and previous[0] > now and previous[1] == users:
+                return
+            if previous is None and not users:
+                return
+            await self._broadcast_presence(trip_id)
 
 
 # Global instance
-manager = ConnectionManager()
+manager = ConnectionManager(build_broker())
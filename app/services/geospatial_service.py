@@ -1,5 +1,7 @@
-from typing import List, Optional, Any
-from sqlalchemy import select, func, cast
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Any, Sequence
+from sqlalchemy import Float, Integer, String, and_, cast, column, func, or_, select, true, values
 from sqlalchemy.ext.asyncio import AsyncSession
 from geoalchemy2 import Geometry, Geography
 from geoalchemy2.functions import ST_SetSRID, ST_MakePoint, ST_Distance, ST_DWithin, ST_Buffer, ST_Transform, ST_Within
@@ -8,6 +10,35 @@ from geoalchemy2.elements import WKTElement
 from app.models.accommodation import Accommodation
 from app.models.poi import POI
 
+# Nearby existing POIs count as the same place within this radius when
+# their names are at least this trigram-similar (pg_trgm similarity)
+DUPLICATE_RADIUS_M = 100.0
+DUPLICATE_NAME_SIMILARITY = 0.4
+METERS_PER_DEGREE = 111_320.0
+
+
+@dataclass
+class PlaceCandidate:
+    """A place proposed for a destination (e.g. a Google Places result)."""
+    name: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    external_id: Optional[str] = None
+
+
+@dataclass
+class PlaceMatch:
+    """Where a candidate sits relative to a destination and its existing POIs."""
+    distance_km: Optional[float] = None  # From the destination point
+    existing_poi_id: Optional[int] = None
+    existing_distance_m: Optional[float] = None
+    earlier_candidate: Optional[int] = None  # Index of an earlier candidate for the same place
+
+    @property
+    def is_duplicate(self) -> bool:
+        return self.existing_poi_id is not None
+
+
 class GeospatialService:
     
     @staticmethod
@@ -140,3 +171,157 @@ class GeospatialService:
             
         result = await db.execute(query)
         return result.scalars().all()
+
+    @staticmethod
+    def match_candidates_query(
+        destination_id: int,
+        candidates: Sequence[PlaceCandidate],
+        origin: Optional[tuple[float, float]] = None,
+        radius_m: float = DUPLICATE_RADIUS_M,
+        min_similarity: float = DUPLICATE_NAME_SIMILARITY,
+        within_batch: bool = False,
+    ):
+        """
+        Build the single query behind match_existing_pois.
+
+        Candidates are sent as a VALUES list. Each one is matched to an
+        existing POI of the destination with the same external_id or,
+        failing that, to the nearest POI within ``radius_m`` whose name is
+        similar enough. The spatial lookup is a LATERAL ST_DWithin filter
+        with ``<->`` KNN ordering, so it is served by idx_pois_coordinates_gist.
+        With ``within_batch``, each candidate is also matched by the same
+        rules to the first earlier candidate in the list.
+        """
+        rows = []
+        for index, candidate in enumerate(candidates):
+            lat, lon = candidate.latitude, candidate.longitude
+            # Degrees covering radius_m along a parallel, a superset of the circle
+            degrees = None if lat is None else radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+            rows.append((index, candidate.external_id, candidate.name, lon, lat, degrees))
+
+        def candidate_values(name: str):
+            return values(
+                column("idx", Integer),
+                column("external_id", String),
+                column("name", String),
+                column("lon", Float),
+                column("lat", Float),
+                column("degrees", Float),
+                name=name,
+            ).data(rows)
+
+        def candidate_point(table):
+            # Casts keep the columns typed when every candidate lacks coordinates
+            return func.ST_SetSRID(func.ST_MakePoint(cast(table.c.lon, Float), cast(table.c.lat, Float)), 4326)
+
+        cands = candidate_values("candidates")
+        point = candidate_point(cands)
+
+        same_id = (
+            select(POI.id.label("poi_id"))
+            .where(
+                POI.destination_id == destination_id,
+                POI.external_id.isnot(None),
+                POI.external_id == cands.c.external_id,
+            )
+            .limit(1)
+            .lateral("same_id")
+        )
+        nearby = (
+            select(
+                POI.id.label("poi_id"),
+                func.ST_DistanceSphere(POI.coordinates, point).label("distance_m"),
+            )
+            .where(
+                POI.destination_id == destination_id,
+                func.ST_DWithin(POI.coordinates, point, cast(cands.c.degrees, Float)),
+                func.ST_DistanceSphere(POI.coordinates, point) <= radius_m,
+                func.similarity(func.lower(POI.name), func.lower(cands.c.name)) >= min_similarity,
+            )
+            .order_by(POI.coordinates.op("<->")(point))
+            .limit(1)
+            .lateral("nearby")
+        )
+
+        if origin is not None:
+            origin_point = func.ST_SetSRID(func.ST_MakePoint(origin[1], origin[0]), 4326)
+            distance_km = func.ST_DistanceSphere(point, origin_point) / 1000.0
+        else:
+            distance_km = cast(None, Float)
+
+        stmt = (
+            select(
+                cands.c.idx,
+                distance_km.label("distance_km"),
+                func.coalesce(same_id.c.poi_id, nearby.c.poi_id).label("existing_poi_id"),
+                nearby.c.distance_m.label("existing_distance_m"),
+            )
+            .select_from(cands)
+            .outerjoin(same_id, true())
+            .outerjoin(nearby, cands.c.lat.isnot(None))
+            .order_by(cands.c.idx)
+        )
+        if not within_batch:
+            return stmt
+
+        earlier = candidate_values("earlier_candidates")
+        earlier_point = candidate_point(earlier)
+        same_place = (
+            select(earlier.c.idx.label("candidate_idx"))
+            .where(
+                earlier.c.idx < cands.c.idx,
+                or_(
+                    and_(earlier.c.external_id.isnot(None), earlier.c.external_id == cands.c.external_id),
+                    and_(
+                        earlier.c.lat.isnot(None),
+                        cands.c.lat.isnot(None),
+                        func.ST_DistanceSphere(earlier_point, point) <= radius_m,
+                        func.similarity(func.lower(earlier.c.name), func.lower(cands.c.name)) >= min_similarity,
+                    ),
+                ),
+            )
+            .order_by(earlier.c.idx)
+            .limit(1)
+            .lateral("same_place")
+        )
+        return stmt.add_columns(same_place.c.candidate_idx.label("earlier_candidate")).outerjoin(same_place, true())
+
+    @staticmethod
+    async def match_existing_pois(
+        db: AsyncSession,
+        destination_id: int,
+        candidates: Sequence[PlaceCandidate],
+        origin: Optional[tuple[float, float]] = None,
+        radius_m: float = DUPLICATE_RADIUS_M,
+        min_similarity: float = DUPLICATE_NAME_SIMILARITY,
+        within_batch: bool = False,
+    ) -> List[PlaceMatch]:
+        """
+        Annotate candidate places against a destination in one query.
+
+        Args:
+            db: Database session
+            destination_id: Destination whose POIs are checked
+            candidates: Places to check
+            origin: Optional (lat, lon) to report each candidate's distance from
+            radius_m: Radius within which a similarly named POI is a duplicate
+            min_similarity: Minimum pg_trgm name similarity for a nearby duplicate
+            within_batch: Also report the first earlier candidate for the same place
+
+        Returns:
+            One PlaceMatch per candidate, in input order
+        """
+        if not candidates:
+            return []
+        stmt = GeospatialService.match_candidates_query(
+            destination_id, candidates, origin, radius_m, min_similarity, within_batch
+        )
+        matches = [PlaceMatch() for _ in candidates]
+        for row in (await db.execute(stmt)).all():
+            matches[row.idx] = PlaceMatch(
+                distance_km=row.distance_km,
+                existing_poi_id=row.existing_poi_id,
+                existing_distance_m=row.existing_distance_m,
+                earlier_candidate=row.earlier_candidate if within_batch else None,
+            )
+        return matches
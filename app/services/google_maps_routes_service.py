@@ -11,12 +11,15 @@ import httpx
 import base64
 import logging
 
+import numpy as np
+
 from app.core.config import settings
 from app.core.http_client import get_http_client
 from app.core.resilience import (
     with_retry,
     with_circuit_breaker,
     google_maps_routes_circuit_breaker,
+    google_maps_routes_coalescer,
 )
 from app.core.cache import get_cached, set_cached, make_cache_key, TTL_ROUTE
 
@@ -47,49 +50,80 @@ class GoogleMapsRoutesError(Exception):
     pass
 
 
-def decode_polyline(encoded: str) -> list[tuple[float, float]]:
+# A 64-bit zigzag value spans at most 13 five-bit chunks
+_POLYLINE_MAX_CHUNKS = 13
+
+
+def decode_polyline_array(encoded: str, precision: int = 5) -> np.ndarray:
     """
-    Decode a Google Maps encoded polyline string into a list of (lon, lat) coordinates.
+    Decode a Google Maps encoded polyline into an (n, 2) array of (lon, lat).
+
+    Works on the whole byte buffer at once: chunk terminators split the
+    buffer into values, each value is assembled with one ``reduceat``, and
+    the zigzag deltas are cumulated per column.
 
     Based on the algorithm described at:
     https://developers.google.com/maps/documentation/utilities/polylinealgorithm
+
+    Raises:
+        ValueError: If the string is not a well-formed polyline
+    """
+    if not encoded:
+        return np.empty((0, 2), dtype=np.float64)
+
+    chunks = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    if chunks.min() < 0 or chunks.max() > 0x3f:
+        raise ValueError("Invalid character in encoded polyline")
+    ends = chunks < 0x20
+    if not ends[-1]:
+        raise ValueError("Encoded polyline is truncated")
+
+    # Byte i belongs to value value_index[i], which starts at starts[value_index[i]]
+    after_end = np.concatenate(([True], ends[:-1]))
+    starts = np.flatnonzero(after_end)
+    if len(starts) % 2:
+        raise ValueError("Encoded polyline has an odd number of values")
+    value_index = np.cumsum(after_end) - 1
+    shifts = 5 * (np.arange(len(chunks)) - starts[value_index])
+    if shifts.max() >= 5 * _POLYLINE_MAX_CHUNKS:
+        raise ValueError("Encoded polyline value is too large")
+
+    values = np.add.reduceat((chunks & 0x1f) << shifts, starts)
+    deltas = (values >> 1) ^ -(values & 1)
+    lat_lng = np.cumsum(deltas.reshape(-1, 2), axis=0)
+    return lat_lng[:, ::-1] / 10 ** precision
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> list[tuple[float, float]]:
+    """Decode a Google Maps encoded polyline string into a list of (lon, lat) coordinates."""
+    return [(lon, lat) for lon, lat in decode_polyline_array(encoded, precision).tolist()]
+
+
+def encode_polyline(coordinates, precision: int = 5) -> str:
     """
-    coordinates = []
-    index = 0
-    lat = 0
-    lng = 0
-
-    while index < len(encoded):
-        # Decode latitude
-        shift = 0
-        result = 0
-        while True:
-            b = ord(encoded[index]) - 63
-            index += 1
-            result |= (b & 0x1f) << shift
-            shift += 5
-            if b < 0x20:
-                break
-        dlat = ~(result >> 1) if result & 1 else result >> 1
-        lat += dlat
-
-        # Decode longitude
-        shift = 0
-        result = 0
-        while True:
-            b = ord(encoded[index]) - 63
-            index += 1
-            result |= (b & 0x1f) << shift
-            shift += 5
-            if b < 0x20:
-                break
-        dlng = ~(result >> 1) if result & 1 else result >> 1
-        lng += dlng
-
-        # Convert to actual coordinates (lon, lat for GeoJSON)
-        coordinates.append((lng / 1e5, lat / 1e5))
-
-    return coordinates
+    Encode (lon, lat) coordinates as a Google Maps encoded polyline string.
+
+    Inverse of ``decode_polyline``; coordinates are rounded to ``precision``
+    decimal places (5 is ~1 m and what Google returns). Accepts any
+    sequence of pairs or an (n, 2) array and encodes all values at once.
+    """
+    coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    if not len(coords):
+        return ""
+
+    lat_lng = np.round(coords[:, ::-1] * 10 ** precision).astype(np.int64)
+    deltas = np.diff(lat_lng, axis=0, prepend=0).ravel()
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+
+    # One column per five-bit chunk, as many as the largest value needs
+    n_chunks = max(1, -(-int(values.max()).bit_length() // 5))
+    parts = values[:, None] >> (5 * np.arange(n_chunks))
+    present = parts > 0
+    present[:, 0] = True
+    continued = np.zeros_like(present)
+    continued[:, :-1] = present[:, 1:]
+    chars = (parts & 0x1f) + 0x20 * continued + 63
+    return chars[present].astype(np.uint8).tobytes().decode("ascii")
 
 
 class GoogleMapsRoutesService:
@@ -101,8 +135,6 @@ class GoogleMapsRoutesService:
         self.api_key = api_key or getattr(settings, 'GOOGLE_MAPS_API_KEY', None)
         self._has_api_key = bool(self.api_key)
 
-    @with_retry(max_attempts=3)
-    @with_circuit_breaker(google_maps_routes_circuit_breaker)
     async def get_route(
         self,
         origin: tuple[float, float],
@@ -123,6 +155,9 @@ class GoogleMapsRoutesService:
 
         Returns:
             GoogleMapsRouteResult with distance, duration, and geometry
+
+        Concurrent identical requests (same rounded cache key) share a single
+        upstream call.
         """
         if not self._has_api_key:
             raise GoogleMapsRoutesError(
@@ -145,6 +180,29 @@ class GoogleMapsRoutesService:
             if cached:
                 return GoogleMapsRouteResult(**cached)
 
+        # Time-sensitive transit requests only coalesce with the same departure
+        inflight_key = cache_key if use_cache else f"{cache_key}:{departure_time}"
+
+        return await google_maps_routes_coalescer.run(
+            inflight_key,
+            lambda: self._request_route(
+                origin, destination, travel_mode, waypoints, departure_time,
+                cache_key=cache_key if use_cache else None,
+            ),
+        )
+
+    @with_retry(max_attempts=3)
+    @with_circuit_breaker(google_maps_routes_circuit_breaker)
+    async def _request_route(
+        self,
+        origin: tuple[float, float],
+        destination: tuple[float, float],
+        travel_mode: GoogleMapsRouteTravelMode,
+        waypoints: Optional[list[tuple[float, float]]],
+        departure_time: Optional[str],
+        cache_key: Optional[str] = None,
+    ) -> GoogleMapsRouteResult:
+        """Call the Routes API and cache the result under ``cache_key``."""
         # Build request body
         body = {
             "origin": {
@@ -241,7 +299,7 @@ class GoogleMapsRoutesService:
 
             # Decode polyline to GeoJSON
             if encoded_polyline:
-                coordinates = decode_polyline(encoded_polyline)
+                coordinates = decode_polyline_array(encoded_polyline).tolist()
                 geometry = {
                     "type": "LineString",
                     "coordinates": coordinates,
@@ -275,7 +333,7 @@ class GoogleMapsRoutesService:
             )
 
             # Cache the result
-            if use_cache:
+            if cache_key:
                 await set_cached(cache_key, asdict(result), ttl=TTL_ROUTE)
 
             return result
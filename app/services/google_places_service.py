@@ -20,8 +20,7 @@ from app.core.resilience import (
     google_places_circuit_breaker,
 )
 from app.core.cache import (
-    get_cached,
-    set_cached,
+    get_or_set_cached,
     make_cache_key,
     TTL_PLACE_DETAILS,
     TTL_AUTOCOMPLETE,
@@ -134,12 +133,22 @@ class GooglePlacesService:
         if not self._has_api_key:
             return []
 
-        # Check cache first
         cache_key = f"autocomplete:{make_cache_key(query, location, radius, types)}"
-        cached = await get_cached(cache_key)
-        if cached:
-            return [GooglePlacesAutocompleteResult(**r) for r in cached]
+        # Concurrent identical searches share one request
+        cached = await get_or_set_cached(
+            cache_key,
+            lambda: self._fetch_autocomplete(query, location, radius, types),
+            ttl=TTL_AUTOCOMPLETE,
+        )
+        return [GooglePlacesAutocompleteResult(**r) for r in cached]
 
+    async def _fetch_autocomplete(
+        self,
+        query: str,
+        location: Optional[str],
+        radius: Optional[int],
+        types: Optional[str],
+    ) -> List[Dict[str, Any]]:
         params = {
             "input": query,
             "key": self.api_key,
@@ -168,13 +177,7 @@ class GooglePlacesService:
                 types=prediction.get("types", [])
             ))
 
-        # Cache the results
-        await set_cached(
-            cache_key,
-            [r.model_dump() for r in results],
-            ttl=TTL_AUTOCOMPLETE
-        )
-        return results
+        return [r.model_dump() for r in results]
 
     @with_retry(max_attempts=3)
     @with_circuit_breaker(google_places_circuit_breaker)
@@ -185,12 +188,14 @@ class GooglePlacesService:
         if not self._has_api_key:
             return None
 
-        # Check cache first
-        cache_key = f"place_details:{place_id}"
-        cached = await get_cached(cache_key)
-        if cached:
-            return GooglePlacesDetailResult(**cached)
+        cached = await get_or_set_cached(
+            f"place_details:{place_id}",
+            lambda: self._fetch_details(place_id),
+            ttl=TTL_PLACE_DETAILS,  # Place details rarely change
+        )
+        return GooglePlacesDetailResult(**cached) if cached else None
 
+    async def _fetch_details(self, place_id: str) -> Optional[Dict[str, Any]]:
         params = {
             "place_id": place_id,
             "key": self.api_key,
@@ -224,9 +229,7 @@ class GooglePlacesService:
             business_status=result.get("business_status")
         )
 
-        # Cache the result - place details rarely change
-        await set_cached(cache_key, detail_result.model_dump(), ttl=TTL_PLACE_DETAILS)
-        return detail_result
+        return detail_result.model_dump()
 
     # ==================== POI Suggestions Methods (Static) ====================
 
@@ -282,14 +285,27 @@ class GooglePlacesService:
         lng_rounded = round(longitude, 4)
         cache_key = f"nearby:{make_cache_key(lat_rounded, lng_rounded, radius, place_type, keyword)}"
 
-        cached = await get_cached(cache_key)
-        if cached:
-            # Apply post-fetch filters to cached results
-            results = cached
-            if min_rating is not None:
-                results = [r for r in results if r.get("metadata_json", {}).get("rating", 0) >= min_rating]
-            return results[:max_results]
+        # Full results are cached; filters are applied per call
+        pois = await get_or_set_cached(
+            cache_key,
+            lambda: GooglePlacesService._fetch_nearby(latitude, longitude, radius, place_type, keyword),
+            ttl=TTL_NEARBY_SEARCH,
+        )
+
+        # Apply post-fetch filters
+        if min_rating is not None:
+            pois = [p for p in pois if p.get("metadata_json", {}).get("rating", 0) >= min_rating]
+
+        return pois[:max_results]
 
+    @staticmethod
+    async def _fetch_nearby(
+        latitude: float,
+        longitude: float,
+        radius: int,
+        place_type: Optional[str],
+        keyword: Optional[str],
+    ) -> List[Dict[str, Any]]:
         params = {
             "location": f"{latitude},{longitude}",
             "radius": min(radius, 50000),  # Google API max is 50km
@@ -354,14 +370,7 @@ class GooglePlacesService:
             }
             pois.append(poi_data)
 
-        # Cache the full results before filtering
-        await set_cached(cache_key, pois, ttl=TTL_NEARBY_SEARCH)
-
-        # Apply post-fetch filters
-        if min_rating is not None:
-            pois = [p for p in pois if p.get("metadata_json", {}).get("rating", 0) >= min_rating]
-
-        return pois[:max_results]
+        return pois
 
     @staticmethod
     @with_retry(max_attempts=3)
@@ -378,12 +387,14 @@ class GooglePlacesService:
         if not settings.GOOGLE_MAPS_API_KEY:
             raise ValueError("Google Maps API key not configured")
 
-        # Check cache first
-        cache_key = f"poi_details:{place_id}"
-        cached = await get_cached(cache_key)
-        if cached:
-            return cached
+        return await get_or_set_cached(
+            f"poi_details:{place_id}",
+            lambda: GooglePlacesService._fetch_place_details_for_poi(place_id),
+            ttl=TTL_PLACE_DETAILS,  # Place details rarely change
+        )
 
+    @staticmethod
+    async def _fetch_place_details_for_poi(place_id: str) -> Dict[str, Any]:
         params = {
             "place_id": place_id,
             "fields": "name,formatted_address,geometry,rating,user_ratings_total,"
@@ -404,12 +415,7 @@ class GooglePlacesService:
             error_msg = data.get("error_message", data.get("status"))
             raise Exception(f"Google Places API error: {error_msg}")
 
-        result = data.get("result", {})
-
-        # Cache the result - place details rarely change
-        await set_cached(cache_key, result, ttl=TTL_PLACE_DETAILS)
-
-        return result
+        return data.get("result", {})
 
     # Alias for backwards compatibility
     get_place_details = get_place_details_for_poi
@@ -9,6 +9,7 @@ from app.core.resilience import (
     with_retry,
     with_circuit_breaker,
     mapbox_circuit_breaker,
+    mapbox_coalescer,
     CircuitBreakerOpen,
 )
 from app.core.cache import get_cached, set_cached, make_cache_key, TTL_ROUTE
@@ -49,8 +50,6 @@ class MapboxService:
         """Check if the service is available (has access token configured)."""
         return self._has_access_token
 
-    @with_retry(max_attempts=3)
-    @with_circuit_breaker(mapbox_circuit_breaker)
     async def get_route(
         self,
         origin: tuple[float, float],
@@ -77,6 +76,9 @@ class MapboxService:
 
         Returns:
             MapboxRouteResult with distance, duration, and geometry
+
+        Concurrent identical requests (same rounded cache key) share a single
+        upstream call.
         """
         if not self._has_access_token:
             raise MapboxServiceError("Mapbox access token is not configured")
@@ -91,11 +93,40 @@ class MapboxService:
         cache_key = f"mapbox_route:{make_cache_key(origin_rounded, dest_rounded, profile.value, waypoints_rounded)}"
 
         # Check cache first (skip for driving-traffic as it's time-sensitive)
-        if profile != MapboxRoutingProfile.DRIVING_TRAFFIC:
+        use_cache = profile != MapboxRoutingProfile.DRIVING_TRAFFIC
+        if use_cache:
             cached = await get_cached(cache_key)
             if cached:
                 return MapboxRouteResult(**cached)
 
+        # Response-shape options are not part of the cache key, so keep them
+        # apart when deduplicating in-flight requests
+        inflight_key = f"{cache_key}:{alternatives}:{geometries}:{overview}:{steps}"
+
+        return await mapbox_coalescer.run(
+            inflight_key,
+            lambda: self._request_route(
+                origin, destination, profile, waypoints,
+                alternatives, geometries, overview, steps,
+                cache_key=cache_key if use_cache else None,
+            ),
+        )
+
+    @with_retry(max_attempts=3)
+    @with_circuit_breaker(mapbox_circuit_breaker)
+    async def _request_route(
+        self,
+        origin: tuple[float, float],
+        destination: tuple[float, float],
+        profile: MapboxRoutingProfile,
+        waypoints: Optional[list[tuple[float, float]]],
+        alternatives: bool,
+        geometries: str,
+        overview: str,
+        steps: bool,
+        cache_key: Optional[str] = None,
+    ) -> MapboxRouteResult:
+        """Call the Directions API and cache the result under ``cache_key``."""
         # Build coordinates string: origin;waypoints;destination
         coords = [f"{origin[0]},{origin[1]}"]
         if waypoints:
@@ -145,7 +176,7 @@ class MapboxService:
             )
 
             # Cache result (skip for traffic-aware routing)
-            if profile != MapboxRoutingProfile.DRIVING_TRAFFIC:
+            if cache_key:
                 await set_cached(cache_key, asdict(result), ttl=TTL_ROUTE)
 
             return result
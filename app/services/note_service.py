@@ -1,15 +1,17 @@
 import os
+import re
 import uuid
 import json
 import aiofiles
+from dataclasses import dataclass
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from collections import defaultdict
-from sqlalchemy import select, or_, and_, func
+from sqlalchemy import Select, select, or_, and_, func, null
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models.note import Note, NoteType
+from app.models.note import Note, NoteType, NOTE_SEARCH_CONFIG
 from app.models.trip import Trip
 from app.models.destination import Destination
 from app.models.poi import POI
@@ -23,6 +25,23 @@ from app.schemas.note import (
 )
 from app.core.config import settings
 
+# Queries with fewer word characters than this skip full-text search: a one
+# or two letter prefix matches nearly every note and ranks them all alike,
+# so they are matched by title trigram similarity and substring instead
+SEARCH_MIN_FULLTEXT_LENGTH = 3
+SEARCH_MIN_TITLE_SIMILARITY = 0.3  # pg_trgm word_similarity for short queries
+SEARCH_SNIPPET_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MinWords=10, MaxWords=30, MaxFragments=2"
+
+_SEARCH_TERM_RE = re.compile(r"[^\W_]+")
+
+
+@dataclass
+class NoteSearchHit:
+    """A note matched by NoteService.search_notes."""
+    note: Note
+    rank: float
+    snippet: Optional[str] = None
+
 
 class NoteService:
     """Service for Note CRUD operations and related functionality"""
@@ -329,47 +348,113 @@ class NoteService:
         return note
 
     @staticmethod
-    async def search_notes(
-        db: AsyncSession,
+    def search_terms(query: str) -> List[str]:
+        """Lowercased words of a search query, without tsquery operators or punctuation."""
+        return _SEARCH_TERM_RE.findall(query.lower())
+
+    @staticmethod
+    def _snippet_text(content):
+        """
+        Note content as HTML-safe text for ts_headline.
+
+        Tags are stripped, then ``<`` and ``>`` left over from malformed
+        markup and bare ``&`` are escaped, so the only markup in a snippet
+        is the ``<mark>`` ts_headline adds. Entities already in the HTML
+        are kept as they are.
+        """
+        plain = func.regexp_replace(func.coalesce(content, ""), "<[^>]*>", " ", "g")
+        plain = func.regexp_replace(plain, "&(?!#?[a-z0-9]+;)", "&amp;", "gi")
+        return func.replace(func.replace(plain, "<", "&lt;"), ">", "&gt;")
+
+    @staticmethod
+    def build_search_query(
         query: str,
         trip_id: Optional[int] = None,
         destination_id: Optional[int] = None,
         note_type: Optional[str] = None,
         tags: Optional[List[str]] = None,
         limit: int = 50
-    ) -> List[Note]:
-        """Search notes by title and content"""
-        search_query = select(Note)
-
-        # Text search on title and content (case-insensitive)
-        search_pattern = f"%{query}%"
-        search_query = search_query.where(
-            or_(
-                Note.title.ilike(search_pattern),
-                Note.content.ilike(search_pattern)
-            )
-        )
-
+    ) -> Select:
+        """
+        Statement for search_notes, selecting (Note, rank, snippet) rows.
+
+        Every word of the query must match a word of the note as a prefix
+        (``rom paint`` finds "Rome painting"), through the GIN-indexed
+        ``search_vector``, ranked by ``ts_rank`` with title matches weighted
+        above content. Titles containing the query anywhere ("paint" in
+        "Repainting") also match, through the pg_trgm title index, and rank
+        after word matches; inside content only word prefixes match. Short
+        queries use pg_trgm title similarity or a substring match instead.
+        Snippets are only computed for the returned page.
+        """
+        filters = []
         if trip_id is not None:
-            search_query = search_query.where(Note.trip_id == trip_id)
-
+            filters.append(Note.trip_id == trip_id)
         if destination_id is not None:
-            search_query = search_query.where(Note.destination_id == destination_id)
-
+            filters.append(Note.destination_id == destination_id)
         if note_type is not None:
-            search_query = search_query.where(Note.note_type == note_type)
-
+            filters.append(Note.note_type == note_type)
         if tags:
-            # Filter notes that have any of the specified tags
-            search_query = search_query.where(Note.tags.overlap(tags))
+            # Notes that have any of the specified tags
+            filters.append(Note.tags.overlap(tags))
+
+        terms = NoteService.search_terms(query)
+        search_pattern = f"%{query.strip()}%"
+        tsquery = None
+        if sum(len(term) for term in terms) >= SEARCH_MIN_FULLTEXT_LENGTH:
+            tsquery = func.to_tsquery(NOTE_SEARCH_CONFIG, " & ".join(f"{term}:*" for term in terms))
+            rank = func.ts_rank(Note.search_vector, tsquery)
+            match = or_(
+                Note.search_vector.bool_op("@@")(tsquery),
+                Note.title.ilike(search_pattern),
+            )
+        else:
+            rank = func.word_similarity(query.strip(), Note.title)
+            match = or_(
+                Note.title.ilike(search_pattern),
+                Note.content.ilike(search_pattern),
+                rank >= SEARCH_MIN_TITLE_SIMILARITY,
+            )
 
-        search_query = search_query.order_by(
-            Note.is_pinned.desc(),
-            Note.updated_at.desc()
-        ).limit(limit)
+        ranked = (
+            select(Note.id, rank.label("rank"))
+            .where(match, *filters)
+            .order_by(rank.desc(), Note.is_pinned.desc(), Note.updated_at.desc())
+            .limit(limit)
+            .subquery()
+        )
+        if tsquery is not None:
+            snippet = func.ts_headline(
+                NOTE_SEARCH_CONFIG,
+                NoteService._snippet_text(Note.content),
+                tsquery,
+                SEARCH_SNIPPET_OPTIONS,
+            )
+        else:
+            snippet = null()
+        return (
+            select(Note, ranked.c.rank, snippet.label("snippet"))
+            .join(ranked, Note.id == ranked.c.id)
+            .order_by(ranked.c.rank.desc(), Note.is_pinned.desc(), Note.updated_at.desc())
+        )
 
-        result = await db.execute(search_query)
-        return list(result.scalars().all())
+    @staticmethod
+    async def search_notes(
+        db: AsyncSession,
+        query: str,
+        trip_id: Optional[int] = None,
+        destination_id: Optional[int] = None,
+        note_type: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        limit: int = 50
+    ) -> List[NoteSearchHit]:
+        """Search notes by title and content, most relevant first"""
+        stmt = NoteService.build_search_query(query, trip_id, destination_id, note_type, tags, limit)
+        result = await db.execute(stmt)
+        return [
+            NoteSearchHit(note=note, rank=float(rank or 0.0), snippet=snippet)
+            for note, rank, snippet in result.all()
+        ]
 
     @staticmethod
     async def add_media_to_note(
@@ -0,0 +1,224 @@
+"""
+Per-user notification counters and the notification feed.
+
+``notification_counters`` holds each user's unread and total notification
+counts, written in the same transaction as the notifications they count:
+
+- ORM changes to ``Notification`` rows (new rows, ``is_read`` flips,
+  deletes) are counted by a flush hook, so code that adds or edits
+  notifications needs nothing extra.
+- Bulk writes (activity fan-out, mark-all-read, trip deletion) adjust or
+  recount the counters themselves with the helpers below.
+
+A user without a counter row has no notifications. Every counter change
+is pushed to the user's WebSockets as an ``unread_count`` message once
+the transaction commits, so clients do not need to poll.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import event, func, inspect, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
+from app.services.connection_manager import manager
+
+logger = logging.getLogger(__name__)
+
+# Session.info key: user_id -> unread count to push after commit
+UNREAD_PUSH_KEY = "unread_push"
+
+_push_tasks: set[asyncio.Task] = set()
+
+
+def adjust_counters(session: Session, deltas: dict[int, tuple[int, int]]) -> None:
+    """Add ``(unread, total)`` deltas to users' counters in one statement."""
+    deltas = {user_id: d for user_id, d in deltas.items() if d != (0, 0)}
+    if not deltas:
+        return
+    now = datetime.utcnow()
+    stmt = insert(NotificationCounter).values([
+        {
+            "user_id": user_id,
+            "unread_count": unread,
+            "total_count": total,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for user_id, (unread, total) in sorted(deltas.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={
+            "unread_count": NotificationCounter.unread_count + stmt.excluded.unread_count,
+            "total_count": NotificationCounter.total_count + stmt.excluded.total_count,
+            "updated_at": now,
+        },
+    )
+    _queue_push(session, stmt)
+
+
+def set_counters(session: Session, counts: dict[int, tuple[Optional[int], Optional[int]]]) -> None:
+    """Overwrite users' ``(unread, total)`` counters; None keeps the stored value."""
+    if not counts:
+        return
+    now = datetime.utcnow()
+    # Grouped by which fields are set, since ON CONFLICT updates the same columns for every row
+    groups: dict[tuple[bool, bool], list[dict]] = defaultdict(list)
+    for user_id, (unread, total) in sorted(counts.items()):
+        groups[(unread is not None, total is not None)].append({
+            "user_id": user_id,
+            "unread_count": unread or 0,
+            "total_count": total or 0,
+            "created_at": now,
+            "updated_at": now,
+        })
+    for (has_unread, has_total), rows in groups.items():
+        stmt = insert(NotificationCounter).values(rows)
+        set_ = {"updated_at": now}
+        if has_unread:
+            set_["unread_count"] = stmt.excluded.unread_count
+        if has_total:
+            set_["total_count"] = stmt.excluded.total_count
+        _queue_push(session, stmt.on_conflict_do_update(index_elements=[NotificationCounter.user_id], set_=set_))
+
+
+def recount(session: Session, user_ids: Iterable[int]) -> None:
+    """Rebuild users' counters from the notifications table (after bulk deletes)."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    counts = {user_id: (0, 0) for user_id in user_ids}
+    rows = session.execute(
+        select(
+            Notification.user_id,
+            func.count().filter(Notification.is_read == False),  # noqa: E712
+            func.count(),
+        )
+        .where(Notification.user_id.in_(user_ids))
+        .group_by(Notification.user_id)
+    ).all()
+    for user_id, unread, total in rows:
+        counts[user_id] = (unread, total)
+    set_counters(session, counts)
+
+
+def _queue_push(session: Session, stmt) -> None:
+    rows = session.execute(stmt.returning(NotificationCounter.user_id, NotificationCounter.unread_count)).all()
+    session.info.setdefault(UNREAD_PUSH_KEY, {}).update({user_id: unread for user_id, unread in rows})
+
+
+async def get_counts(db: AsyncSession, user_id: int) -> tuple[int, int]:
+    """A user's ``(unread, total)`` notification counts."""
+    row = (await db.execute(
+        select(NotificationCounter.unread_count, NotificationCounter.total_count)
+        .where(NotificationCounter.user_id == user_id)
+    )).first()
+    return (row.unread_count, row.total_count) if row else (0, 0)
+
+
+async def list_notifications(
+    db: AsyncSession,
+    user_id: int,
+    *,
+    limit: int,
+    offset: int = 0,
+    before: Optional[tuple[datetime, int]] = None,
+) -> list[Notification]:
+    """
+    A user's notifications, newest first.
+
+    ``before`` is the ``(created_at, id)`` of the last row of the previous
+    page; it replaces ``offset`` and is served by
+    ix_notifications_user_created_id without an OFFSET scan.
+    """
+    stmt = (
+        select(Notification)
+        .where(Notification.user_id == user_id)
+        .order_by(Notification.created_at.desc(), Notification.id.desc())
+        .limit(limit)
+    )
+    if before is not None:
+        stmt = stmt.where(tuple_(Notification.created_at, Notification.id) < tuple_(*before))
+    elif offset:
+        stmt = stmt.offset(offset)
+    return list((await db.execute(stmt)).scalars().all())
+
+
+async def mark_all_read(db: AsyncSession, user_id: int) -> None:
+    """
+    Mark every unread notification of a user as read.
+
+    The counter is lowered by the rows actually updated rather than set to
+    0, so a notification committed concurrently keeps its increment.
+    """
+    result = await db.execute(
+        update(Notification)
+        .where(Notification.user_id == user_id, Notification.is_read == False)  # noqa: E712
+        .values(is_read=True, read_at=datetime.utcnow())
+    )
+    await db.run_sync(adjust_counters, {user_id: (-result.rowcount, 0)})
+
+
+async def recount_users(db: AsyncSession, user_ids: Iterable[int]) -> None:
+    """Rebuild counters after notifications were removed behind the ORM's back."""
+    await db.run_sync(recount, user_ids)
+
+
+async def _push_counts(counts: dict[int, int]) -> None:
+    for user_id, unread in counts.items():
+        try:
+            await manager.push_to_user(user_id, {"type": "unread_count", "count": unread})
+        except Exception:
+            logger.exception(f"Failed to push unread count to user {user_id}")
+
+
+@event.listens_for(Session, "after_flush")
+def _count_flushed_notifications(session: Session, flush_context) -> None:
+    deltas: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+    for obj in session.new:
+        if isinstance(obj, Notification):
+            delta = deltas[obj.user_id]
+            delta[0] += 0 if obj.is_read else 1
+            delta[1] += 1
+    for obj in session.dirty:
+        if isinstance(obj, Notification):
+            history = inspect(obj).attrs.is_read.history
+            if history.added and history.deleted:
+                was_read, is_read = bool(history.deleted[0]), bool(history.added[0])
+                if was_read != is_read:
+                    deltas[obj.user_id][0] += 1 if was_read else -1
+    for obj in session.deleted:
+        if isinstance(obj, Notification):
+            delta = deltas[obj.user_id]
+            delta[0] -= 0 if obj.is_read else 1
+            delta[1] -= 1
+    if deltas:
+        adjust_counters(session, {user_id: tuple(d) for user_id, d in deltas.items()})
+
+
+@event.listens_for(Session, "after_commit")
+def _push_after_commit(session: Session) -> None:
+    counts = session.info.pop(UNREAD_PUSH_KEY, None)
+    if not counts:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(_push_counts(counts))
+    _push_tasks.add(task)
+    task.add_done_callback(_push_tasks.discard)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session: Session, previous_transaction) -> None:
+    if previous_transaction.nested:
+        return
+    session.info.pop(UNREAD_PUSH_KEY, None)
@@ -7,7 +7,9 @@ Get API key at: https://openrouteservice.org/dev/#/signup
 """
 from enum import Enum
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import asyncio
+import logging
 import httpx
 
 from app.core.config import settings
@@ -16,7 +18,11 @@ from app.core.resilience import (
     with_retry,
     with_circuit_breaker,
     openrouteservice_circuit_breaker,
+    openrouteservice_coalescer,
 )
+from app.core.cache import get_cached, set_cached, make_cache_key, TTL_TRAVEL_MATRIX
+
+logger = logging.getLogger(__name__)
 
 
 class ORSRoutingProfile(str, Enum):
@@ -49,6 +55,11 @@ class ORSMatrixResult:
     distances: list[list[float]]  # matrix[source][dest] in meters
     sources: list[dict]  # resolved source locations
     destinations: list[dict]  # resolved destination locations
+    cached_entries: int = 0  # cells served from the matrix cache
+    fetched_entries: int = 0  # cells requested from ORS
+    # (source, destination) indices whose tile request failed; values are None
+    failed_cells: list[tuple[int, int]] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)  # one message per failed tile
 
 
 class ORSServiceError(Exception):
@@ -61,13 +72,16 @@ class OpenRouteServiceService:
 
     BASE_URL = "https://api.openrouteservice.org/v2"
 
+    # Free tier limit on sources x destinations per matrix request
+    MATRIX_MAX_ENTRIES = 3500
+    # Concurrent tile requests for matrices above the limit
+    MATRIX_MAX_CONCURRENCY = 3
+
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or getattr(settings, 'OPENROUTESERVICE_API_KEY', None)
         # Allow service to work without API key - will use fallback
         self._has_api_key = bool(self.api_key)
 
-    @with_retry(max_attempts=3)
-    @with_circuit_breaker(openrouteservice_circuit_breaker)
     async def get_route(
         self,
         origin: tuple[float, float],
@@ -86,10 +100,35 @@ class OpenRouteServiceService:
 
         Returns:
             ORSRouteResult with distance, duration, and geometry
+
+        Concurrent identical requests (coordinates rounded to ~11m) share a
+        single upstream call.
         """
         if not self._has_api_key:
             raise ORSServiceError("OpenRouteService API key not configured. Set OPENROUTESERVICE_API_KEY in environment.")
 
+        origin_rounded = (round(origin[0], 4), round(origin[1], 4))
+        dest_rounded = (round(destination[0], 4), round(destination[1], 4))
+        waypoints_rounded = None
+        if waypoints:
+            waypoints_rounded = [(round(wp[0], 4), round(wp[1], 4)) for wp in waypoints]
+        inflight_key = f"ors_route:{make_cache_key(origin_rounded, dest_rounded, profile.value, waypoints_rounded)}"
+
+        return await openrouteservice_coalescer.run(
+            inflight_key,
+            lambda: self._request_route(origin, destination, profile, waypoints),
+        )
+
+    @with_retry(max_attempts=3)
+    @with_circuit_breaker(openrouteservice_circuit_breaker)
+    async def _request_route(
+        self,
+        origin: tuple[float, float],
+        destination: tuple[float, float],
+        profile: ORSRoutingProfile,
+        waypoints: Optional[list[tuple[float, float]]],
+    ) -> ORSRouteResult:
+        """Call the Directions API."""
         # Build coordinates list: [origin, ...waypoints, destination]
         coordinates = [list(origin)]
         if waypoints:
@@ -185,6 +224,8 @@ class OpenRouteServiceService:
         self,
         locations: list[tuple[float, float]],
         profile: str = "foot-walking",
+        sources: Optional[list[int]] = None,
+        destinations: Optional[list[int]] = None,
     ) -> ORSMatrixResult:
         """
         Get travel time/distance matrix via ORS Matrix API.
@@ -192,9 +233,12 @@ class OpenRouteServiceService:
         Args:
             locations: List of (latitude, longitude) tuples
             profile: Routing profile (foot-walking, driving-car, cycling-regular)
+            sources: Optional indices into locations to use as rows (default all)
+            destinations: Optional indices into locations to use as columns (default all)
 
         Returns:
             ORSMatrixResult with duration and distance matrices
+            (len(sources) x len(destinations))
 
         Note:
             - Max 3500 matrix entries (locations^2) on free tier
@@ -219,6 +263,10 @@ class OpenRouteServiceService:
             "locations": ors_locations,
             "metrics": ["duration", "distance"],
         }
+        if sources is not None:
+            body["sources"] = sources
+        if destinations is not None:
+            body["destinations"] = destinations
 
         try:
             client = await get_http_client()
@@ -229,8 +277,10 @@ class OpenRouteServiceService:
             if response.status_code == 403:
                 raise ORSServiceError("OpenRouteService API rate limit exceeded or access denied")
             if response.status_code == 413:
+                n_rows = len(sources) if sources is not None else len(locations)
+                n_cols = len(destinations) if destinations is not None else len(locations)
                 raise ORSServiceError(
-                    f"Matrix too large: {len(locations)}x{len(locations)}={len(locations)**2} entries. "
+                    f"Matrix too large: {n_rows}x{n_cols}={n_rows * n_cols} entries. "
                     "ORS free tier allows max 3500 entries."
                 )
 
@@ -251,6 +301,244 @@ class OpenRouteServiceService:
         except httpx.RequestError as e:
             raise ORSServiceError(f"OpenRouteService Matrix API request failed: {str(e)}")
 
+    async def get_matrix_tiled(
+        self,
+        locations: list[tuple[float, float]],
+        profile: str = "foot-walking",
+        sources: Optional[list[int]] = None,
+        destinations: Optional[list[int]] = None,
+    ) -> ORSMatrixResult:
+        """
+        Get a matrix of any size by splitting it into tiles under the ORS limit.
+
+        Tiles are requested concurrently (at most MATRIX_MAX_CONCURRENCY at a
+        time), each sending only the locations it needs, and stitched back
+        into one matrix. A failed tile leaves its cells as None and lists
+        them in ``failed_cells`` instead of failing the whole matrix.
+
+        Args:
+            locations: List of (latitude, longitude) tuples
+            profile: Routing profile (foot-walking, driving-car, cycling-regular)
+            sources: Optional indices into locations to use as rows (default all)
+            destinations: Optional indices into locations to use as columns (default all)
+
+        Returns:
+            ORSMatrixResult (len(sources) x len(destinations)); sources and
+            destinations metadata is only populated for single-tile matrices
+
+        Raises:
+            ORSServiceError: If the matrix fits in one request and it fails,
+                or if every tile fails
+        """
+        src = sources if sources is not None else list(range(len(locations)))
+        dst = destinations if destinations is not None else list(range(len(locations)))
+        if len(src) * len(dst) <= self.MATRIX_MAX_ENTRIES:
+            return await self.get_matrix(locations, profile, sources=sources, destinations=destinations)
+
+        cols_per_tile = min(len(dst), self.MATRIX_MAX_ENTRIES)
+        rows_per_tile = max(1, self.MATRIX_MAX_ENTRIES // cols_per_tile)
+        tiles = [
+            (r, c)
+            for r in range(0, len(src), rows_per_tile)
+            for c in range(0, len(dst), cols_per_tile)
+        ]
+        semaphore = asyncio.Semaphore(self.MATRIX_MAX_CONCURRENCY)
+
+        async def fetch_tile(r: int, c: int) -> ORSMatrixResult:
+            tile_src = src[r:r + rows_per_tile]
+            tile_dst = dst[c:c + cols_per_tile]
+            # Send only this tile's locations, re-indexed locally
+            used = list(dict.fromkeys(tile_src + tile_dst))
+            local = {index: i for i, index in enumerate(used)}
+            async with semaphore:
+                return await self.get_matrix(
+                    [locations[index] for index in used],
+                    profile,
+                    sources=[local[index] for index in tile_src],
+                    destinations=[local[index] for index in tile_dst],
+                )
+
+        results = await asyncio.gather(
+            *[fetch_tile(r, c) for r, c in tiles], return_exceptions=True
+        )
+
+        durations: list[list[Optional[float]]] = [[None] * len(dst) for _ in src]
+        distances: list[list[Optional[float]]] = [[None] * len(dst) for _ in src]
+        failed_cells: list[tuple[int, int]] = []
+        errors: list[str] = []
+        for (r, c), result in zip(tiles, results):
+            n_rows = min(rows_per_tile, len(src) - r)
+            n_cols = min(cols_per_tile, len(dst) - c)
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                errors.append(f"rows {r}-{r + n_rows - 1}, cols {c}-{c + n_cols - 1}: {result}")
+                failed_cells.extend(
+                    (i, j) for i in range(r, r + n_rows) for j in range(c, c + n_cols)
+                )
+                continue
+            for i in range(n_rows):
+                durations[r + i][c:c + n_cols] = result.durations[i]
+                distances[r + i][c:c + n_cols] = result.distances[i]
+
+        if len(errors) == len(tiles):
+            raise ORSServiceError(f"All {len(tiles)} matrix tiles failed: {errors[0]}")
+        if errors:
+            logger.warning(
+                f"ORS matrix {profile}: {len(errors)}/{len(tiles)} tiles failed, "
+                f"{len(failed_cells)} cells missing"
+            )
+
+        return ORSMatrixResult(
+            durations=durations,
+            distances=distances,
+            sources=[],
+            destinations=[],
+            fetched_entries=len(src) * len(dst),
+            failed_cells=failed_cells,
+            errors=errors,
+        )
+
+    @staticmethod
+    def _matrix_point_key(lat: float, lon: float) -> str:
+        """Rounded coordinate key (~11m precision) for matrix cache rows/cells."""
+        return f"{round(lat, 4)},{round(lon, 4)}"
+
+    @staticmethod
+    def _matrix_row_cache_key(profile: str, point_key: str) -> str:
+        return f"ors_matrix:{profile}:{point_key}"
+
+    async def get_cached_matrix(
+        self,
+        locations: list[tuple[float, float]],
+        profile: str = "foot-walking",
+    ) -> ORSMatrixResult:
+        """
+        Get a travel matrix, fetching only cells missing from the shared cache.
+
+        Each source location's row ({destination key: [duration, distance]})
+        is cached per profile under its rounded coordinates. Missing cells
+        are covered by a small set of locations M and fetched with two
+        subset requests (M x all, rest x M), so adding one POI to a cached
+        set costs about 2N cells instead of N^2. Requests above the ORS
+        limit are tiled (see get_matrix_tiled); cells of failed tiles are
+        reported in ``failed_cells`` and not cached.
+
+        Args:
+            locations: List of (latitude, longitude) tuples
+            profile: Routing profile (foot-walking, driving-car, cycling-regular)
+
+        Returns:
+            ORSMatrixResult for all locations in request order (sources and
+            destinations metadata is not populated)
+        """
+        keys = [self._matrix_point_key(lat, lon) for lat, lon in locations]
+        unique_points: dict[str, tuple[float, float]] = {}
+        for key, point in zip(keys, locations):
+            unique_points.setdefault(key, point)
+        unique_keys = list(unique_points)
+
+        cached_rows = await asyncio.gather(
+            *[get_cached(self._matrix_row_cache_key(profile, key)) for key in unique_keys]
+        )
+        rows: dict[str, dict] = {
+            key: dict(row or {}) for key, row in zip(unique_keys, cached_rows)
+        }
+
+        missing = {(src, dst) for src in unique_keys for dst in unique_keys if dst not in rows[src]}
+        cached_entries = len(unique_keys) ** 2 - len(missing)
+        fetched_entries = 0
+        failed_pairs: set[tuple[str, str]] = set()
+        errors: list[str] = []
+
+        if missing:
+            if cached_entries == 0:
+                cover = set(unique_keys)  # Cold cache: one full request
+            else:
+                cover = self._matrix_cover(missing)
+            index = {key: i for i, key in enumerate(unique_keys)}
+            cover_idx = [index[key] for key in unique_keys if key in cover]
+            rest_idx = [index[key] for key in unique_keys if key not in cover]
+            points = [unique_points[key] for key in unique_keys]
+
+            blocks = [(cover_idx, None)]
+            if rest_idx:
+                blocks.append((rest_idx, cover_idx))
+            results = await asyncio.gather(*[
+                self.get_matrix_tiled(points, profile, sources=src, destinations=dst)
+                for src, dst in blocks
+            ], return_exceptions=True)
+            block_errors = [r for r in results if isinstance(r, BaseException)]
+            if len(block_errors) == len(blocks) or any(
+                not isinstance(e, Exception) for e in block_errors
+            ):
+                raise block_errors[0]
+
+            changed = set()
+            for (src_idx, dst_idx), result in zip(blocks, results):
+                dst_idx = dst_idx if dst_idx is not None else list(range(len(points)))
+                if isinstance(result, Exception):
+                    errors.append(str(result))
+                    failed_pairs.update(
+                        (unique_keys[i], unique_keys[j]) for i in src_idx for j in dst_idx
+                    )
+                    continue
+                failed = set(result.failed_cells)
+                for r, i in enumerate(src_idx):
+                    row = rows[unique_keys[i]]
+                    for c, j in enumerate(dst_idx):
+                        if (r, c) in failed:
+                            failed_pairs.add((unique_keys[i], unique_keys[j]))
+                            continue
+                        row[unique_keys[j]] = [result.durations[r][c], result.distances[r][c]]
+                    changed.add(unique_keys[i])
+                fetched_entries += len(src_idx) * len(dst_idx)
+                errors.extend(result.errors)
+
+            await asyncio.gather(*[
+                set_cached(self._matrix_row_cache_key(profile, key), rows[key], ttl=TTL_TRAVEL_MATRIX)
+                for key in changed
+            ])
+
+        logger.debug(
+            f"ORS matrix {profile}: {len(locations)} locations, "
+            f"{cached_entries} cached cells, {fetched_entries} fetched"
+        )
+
+        # Failed cells are not cached and come back as None
+        missing_cell = [None, None]
+        return ORSMatrixResult(
+            durations=[[rows[src].get(dst, missing_cell)[0] for dst in keys] for src in keys],
+            distances=[[rows[src].get(dst, missing_cell)[1] for dst in keys] for src in keys],
+            sources=[],
+            destinations=[],
+            cached_entries=cached_entries,
+            fetched_entries=fetched_entries,
+            failed_cells=[
+                (i, j)
+                for i, src in enumerate(keys)
+                for j, dst in enumerate(keys)
+                if (src, dst) in failed_pairs
+            ],
+            errors=errors,
+        )
+
+    @staticmethod
+    def _matrix_cover(missing: set[tuple[str, str]]) -> set[str]:
+        """Greedy set of locations touching every missing (source, destination) cell."""
+        remaining = set(missing)
+        cover: set[str] = set()
+        while remaining:
+            counts: dict[str, int] = {}
+            for src, dst in remaining:
+                counts[src] = counts.get(src, 0) + 1
+                if dst != src:
+                    counts[dst] = counts.get(dst, 0) + 1
+            best = max(counts, key=counts.get)
+            cover.add(best)
+            remaining = {cell for cell in remaining if best not in cell}
+        return cover
+
 
 # Singleton instance for convenience
 _ors_service: Optional[OpenRouteServiceService] = None
@@ -4,13 +4,15 @@ POI Route Optimization Service.
 Optimizes the order of POIs for a given day to minimize travel time,
 starting from the accommodation location.
 """
+import asyncio
 import logging
-import math
 from typing import Optional
 from dataclasses import dataclass
 import httpx
 
 from app.core.config import settings
+from app.core.geodesic import distance_matrix_km, get_speed_model
+from app.services.tsp_solver import solve_tour
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +24,9 @@ class OptimizedRoute:
     total_distance_km: float
     total_duration_minutes: int
     route_geometry: Optional[dict]  # GeoJSON geometry
+    # Travel minutes from the previous stop to each POI, in visiting order
+    leg_durations_minutes: Optional[list[float]] = None
+    total_dwell_minutes: int = 0
 
 
 class POIOptimizationError(Exception):
@@ -46,15 +51,18 @@ class POIOptimizationService:
         self,
         pois: list[dict],
         start_location: dict,
-        profile: str = "foot-walking"
+        profile: str = "foot-walking",
+        return_to_start: bool = True,
     ) -> OptimizedRoute:
         """
         Optimize the order of POIs starting from a given location.
 
         Args:
-            pois: List of POI dicts with 'id', 'latitude', 'longitude' keys
+            pois: List of POI dicts with 'id', 'latitude', 'longitude' and
+                optional 'dwell_time' (minutes) keys
             start_location: Dict with 'lat' and 'lon' keys for start point
             profile: ORS routing profile (foot-walking, driving-car, etc.)
+            return_to_start: Whether the route ends back at the start location
 
         Returns:
             OptimizedRoute with optimized order and route metrics
@@ -73,25 +81,32 @@ class POIOptimizationService:
                 optimized_order=[pois[0]['id']],
                 total_distance_km=0.0,
                 total_duration_minutes=0,
-                route_geometry=None
+                route_geometry=None,
+                total_dwell_minutes=pois[0].get('dwell_time', 30),
             )
 
         # Try ORS Optimization API first
         if self._has_api_key:
             try:
-                return await self._optimize_with_ors(pois, start_location, profile)
+                return await self._optimize_with_ors(
+                    pois, start_location, profile, return_to_start
+                )
             except POIOptimizationError:
                 # Fall back to TSP algorithm
                 pass
 
-        # Use TSP fallback
-        return self._optimize_with_tsp(pois, start_location)
+        # Use TSP fallback; the local search is CPU-bound for up to its time
+        # budget, so it runs off the event loop
+        return await asyncio.to_thread(
+            self._optimize_with_tsp, pois, start_location, profile, return_to_start
+        )
 
     async def _optimize_with_ors(
         self,
         pois: list[dict],
         start_location: dict,
-        profile: str
+        profile: str,
+        return_to_start: bool = True,
     ) -> OptimizedRoute:
         """Use ORS Optimization API (/v2/optimization) for route optimization."""
         url = f"{self.ORS_BASE_URL}/optimization"
@@ -111,12 +126,14 @@ class POIOptimizationService:
             })
 
         # Build vehicle (starting from accommodation)
-        vehicles = [{
+        vehicle = {
             "id": 0,
             "profile": profile,
             "start": [start_location['lon'], start_location['lat']],
-            "end": [start_location['lon'], start_location['lat']],  # Return to start (optional)
-        }]
+        }
+        if return_to_start:
+            vehicle["end"] = [start_location['lon'], start_location['lat']]
+        vehicles = [vehicle]
 
         body = {
             "jobs": jobs,
@@ -145,11 +162,18 @@ class POIOptimizationService:
                 route = routes[0]
                 steps = route.get("steps", [])
 
-                # Extract job order (filter out start/end steps)
+                # Extract job order and per-leg travel time (filter out start/end steps)
                 optimized_indices = []
+                leg_durations_minutes = []
+                previous_duration = 0
                 for step in steps:
                     if step.get("type") == "job":
                         optimized_indices.append(step.get("job"))
+                        # Step duration is cumulative travel time up to this step
+                        leg_durations_minutes.append(
+                            round((step.get("duration", 0) - previous_duration) / 60, 1)
+                        )
+                        previous_duration = step.get("duration", 0)
 
                 # Map indices back to POI IDs
                 optimized_order = [pois[idx]['id'] for idx in optimized_indices]
@@ -160,14 +184,16 @@ class POIOptimizationService:
 
                 # Get geometry if available
                 route_geometry = await self._get_route_geometry(
-                    pois, optimized_indices, start_location, profile
+                    pois, optimized_indices, start_location, profile, return_to_start
                 )
 
                 return OptimizedRoute(
                     optimized_order=optimized_order,
                     total_distance_km=round(total_distance_km, 2),
                     total_duration_minutes=total_duration_minutes,
-                    route_geometry=route_geometry
+                    route_geometry=route_geometry,
+                    leg_durations_minutes=leg_durations_minutes,
+                    total_dwell_minutes=sum(poi.get('dwell_time', 30) for poi in pois),
                 )
 
         except httpx.TimeoutException:
@@ -180,18 +206,20 @@ class POIOptimizationService:
         pois: list[dict],
         optimized_indices: list[int],
         start_location: dict,
-        profile: str
+        profile: str,
+        return_to_start: bool = True,
     ) -> Optional[dict]:
         """Get the actual route geometry for the optimized path."""
         if not self._has_api_key or not optimized_indices:
             return None
 
-        # Build coordinates list: start -> pois in order -> start
+        # Build coordinates list: start -> pois in order (-> start)
         coordinates = [[start_location['lon'], start_location['lat']]]
         for idx in optimized_indices:
             poi = pois[idx]
             coordinates.append([poi['longitude'], poi['latitude']])
-        coordinates.append([start_location['lon'], start_location['lat']])
+        if return_to_start:
+            coordinates.append([start_location['lon'], start_location['lat']])
 
         url = f"{self.ORS_BASE_URL}/v2/directions/{profile}"
         headers = {
@@ -221,93 +249,81 @@ class POIOptimizationService:
     def _optimize_with_tsp(
         self,
         pois: list[dict],
-        start_location: dict
+        start_location: dict,
+        profile: str = "foot-walking",
+        return_to_start: bool = True,
     ) -> OptimizedRoute:
         """
-        Fallback TSP optimization using nearest neighbor heuristic.
-        Simple but effective for small numbers of POIs.
+        Fallback TSP optimization on straight-line distances.
+
+        Seeds with nearest neighbour and improves with 2-opt/Or-opt within
+        POI_OPTIMIZATION_TIME_BUDGET_MS. Travel time uses the profile's
+        speed model; dwell times are added to the schedule, not the tour.
         """
+        dwell_minutes = sum(poi.get('dwell_time', 30) for poi in pois)
         if len(pois) <= 1:
             return OptimizedRoute(
                 optimized_order=[poi['id'] for poi in pois],
                 total_distance_km=0.0,
                 total_duration_minutes=0,
-                route_geometry=None
+                route_geometry=None,
+                total_dwell_minutes=dwell_minutes,
             )
 
-        # Build distance matrix
-        n = len(pois)
+        # Build distance matrix (row/column 0 is the start location)
         all_points = [(start_location['lat'], start_location['lon'])] + [
             (poi['latitude'], poi['longitude']) for poi in pois
         ]
+        dist_matrix = distance_matrix_km(all_points, dtype=float)
 
-        def haversine(lat1, lon1, lat2, lon2):
-            """Calculate haversine distance in km."""
-            R = 6371  # Earth's radius in km
-            lat1_rad, lat2_rad = math.radians(lat1), math.radians(lat2)
-            dlat = math.radians(lat2 - lat1)
-            dlon = math.radians(lon2 - lon1)
-            a = (math.sin(dlat / 2) ** 2 +
-                 math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2)
-            return 2 * R * math.asin(math.sqrt(a))
-
-        # Nearest neighbor algorithm starting from start_location
-        visited = [False] * n
-        order = []
-        total_distance = 0.0
-        current_point = all_points[0]  # Start location
-
-        for _ in range(n):
-            min_dist = float('inf')
-            nearest_idx = -1
-
-            for i in range(n):
-                if not visited[i]:
-                    poi_point = all_points[i + 1]  # +1 because start is at index 0
-                    dist = haversine(
-                        current_point[0], current_point[1],
-                        poi_point[0], poi_point[1]
-                    )
-                    if dist < min_dist:
-                        min_dist = dist
-                        nearest_idx = i
-
-            if nearest_idx >= 0:
-                visited[nearest_idx] = True
-                order.append(nearest_idx)
-                total_distance += min_dist
-                current_point = all_points[nearest_idx + 1]
+        tour = solve_tour(
+            dist_matrix,
+            start=0,
+            return_to_start=return_to_start,
+            time_budget_ms=settings.POI_OPTIMIZATION_TIME_BUDGET_MS,
+        )
+        order = [node - 1 for node in tour.order]  # -1 because start is at index 0
 
         # Map indices back to POI IDs
         optimized_order = [pois[idx]['id'] for idx in order]
 
-        # Estimate duration (assume average walking speed of 5 km/h)
-        walking_speed_kmh = 5.0
-        total_duration_minutes = int((total_distance / walking_speed_kmh) * 60)
+        # Estimate travel time per leg from the profile speed model
+        speed_model = get_speed_model(profile)
+        stops = [0, *tour.order]
+        leg_durations_minutes = [
+            round(speed_model.seconds(float(dist_matrix[a, b]) * 1000) / 60, 1)
+            for a, b in zip(stops[:-1], stops[1:])
+        ]
+        total_seconds = speed_model.seconds(tour.cost * 1000)
 
         # Build simple LineString geometry for visualization
-        route_geometry = self._build_simple_geometry(pois, order, start_location)
+        route_geometry = self._build_simple_geometry(
+            pois, order, start_location, return_to_start
+        )
 
         return OptimizedRoute(
             optimized_order=optimized_order,
-            total_distance_km=round(total_distance, 2),
-            total_duration_minutes=total_duration_minutes,
-            route_geometry=route_geometry
+            total_distance_km=round(tour.cost, 2),
+            total_duration_minutes=int(total_seconds / 60),
+            route_geometry=route_geometry,
+            leg_durations_minutes=leg_durations_minutes,
+            total_dwell_minutes=dwell_minutes,
         )
 
     def _build_simple_geometry(
         self,
         pois: list[dict],
         order: list[int],
-        start_location: dict
+        start_location: dict,
+        return_to_start: bool = True,
     ) -> dict:
         """Build a simple GeoJSON LineString for the route."""
         coordinates = [[start_location['lon'], start_location['lat']]]
         for idx in order:
             poi = pois[idx]
             coordinates.append([poi['longitude'], poi['latitude']])
-        # Return to start
-        coordinates.append([start_location['lon'], start_location['lat']])
+        if return_to_start:
+            coordinates.append([start_location['lon'], start_location['lat']])
 
         return {
             "type": "LineString",
@@ -0,0 +1,170 @@
+"""
+Route geometry helpers for travel segments.
+
+Routing providers return GeoJSON LineStrings that can hold tens of
+thousands of points. Before a route is stored it is simplified with
+Douglas-Peucker (Shapely) using ``settings.ROUTE_SIMPLIFY_TOLERANCE_DEG``
+and converted straight from the coordinate array to a PostGIS geometry,
+without building WKT strings. Per-leg geometries in ``route_legs`` are
+stored as encoded polylines and expanded back to GeoJSON for responses
+unless the client asks for polylines.
+
+Map views can ask for coarser geometry: ``tolerance_for_zoom`` maps a
+web map zoom level to the size of one screen pixel in degrees, and
+``quantize_tolerance`` keeps the number of distinct tolerances (and so
+cache entries per segment) small.
+"""
+from typing import Any, Optional, Sequence
+
+from geoalchemy2.elements import WKBElement
+from geoalchemy2.shape import from_shape, to_shape
+from shapely.geometry import LineString
+
+from app.core.config import settings
+from app.schemas.travel_segment import GeometryFormat
+from app.services.google_maps_routes_service import decode_polyline_array, encode_polyline
+
+
+# Web Mercator tiles are 256 px wide at zoom 0
+TILE_SIZE_PX = 256
+
+
+def tolerance_for_zoom(zoom: float) -> float:
+    """Degrees of longitude covered by one pixel at ``zoom``."""
+    return 360.0 / (TILE_SIZE_PX * 2 ** zoom)
+
+
+def quantize_tolerance(tolerance: float) -> float:
+    """Round a tolerance to two significant digits."""
+    return float(f"{tolerance:.2g}")
+
+
+def _tolerance(tolerance: Optional[float]) -> float:
+    return settings.ROUTE_SIMPLIFY_TOLERANCE_DEG if tolerance is None else tolerance
+
+
+def simplify_coordinates(
+    coordinates: Sequence[Sequence[float]],
+    tolerance: Optional[float] = None,
+) -> list[tuple[float, float]]:
+    """
+    Simplify (lon, lat) coordinates with Douglas-Peucker.
+
+    Endpoints are always kept. Lines with fewer than three points, or a
+    tolerance of 0, are returned unchanged.
+    """
+    coords = [(c[0], c[1]) for c in coordinates]
+    tolerance = _tolerance(tolerance)
+    if len(coords) < 3 or tolerance <= 0:
+        return coords
+    simplified = LineString(coords).simplify(tolerance, preserve_topology=False)
+    return list(simplified.coords)
+
+
+def route_linestring(
+    coordinates: Sequence[Sequence[float]],
+    tolerance: Optional[float] = None,
+) -> Optional[WKBElement]:
+    """Build a simplified SRID 4326 LINESTRING, or None for fewer than two points."""
+    if len(coordinates) < 2:
+        return None
+    return from_shape(LineString(simplify_coordinates(coordinates, tolerance)), srid=4326)
+
+
+def straight_linestring(
+    from_lon: float,
+    from_lat: float,
+    to_lon: float,
+    to_lat: float,
+) -> WKBElement:
+    """Two-point LINESTRING used when no routed geometry is available."""
+    return from_shape(LineString([(from_lon, from_lat), (to_lon, to_lat)]), srid=4326)
+
+
+def geojson_linestring(
+    geometry: Optional[dict[str, Any]],
+    tolerance: Optional[float] = None,
+) -> Optional[WKBElement]:
+    """Convert a GeoJSON LineString to a stored geometry (None if unusable)."""
+    if not geometry or geometry.get("type") != "LineString":
+        return None
+    return route_linestring(geometry.get("coordinates") or [], tolerance)
+
+
+def encode_leg_geometry(
+    geometry: Optional[dict[str, Any]],
+    tolerance: Optional[float] = None,
+) -> Optional[str]:
+    """Simplify a leg's GeoJSON LineString and encode it as a polyline."""
+    if not geometry or geometry.get("type") != "LineString":
+        return None
+    coordinates = geometry.get("coordinates") or []
+    if len(coordinates) < 2:
+        return None
+    return encode_polyline(simplify_coordinates(coordinates, tolerance))
+
+
+def geometry_polyline(geometry: Optional[WKBElement]) -> Optional[str]:
+    """Encode a stored LINESTRING as a polyline."""
+    if geometry is None:
+        return None
+    try:
+        return encode_polyline(to_shape(geometry).coords)
+    except Exception:
+        return None
+
+
+def linestring_geojson(geometry: WKBElement) -> dict[str, Any]:
+    """GeoJSON for a geometry built by ``route_linestring``."""
+    return {"type": "LineString", "coordinates": [list(c) for c in to_shape(geometry).coords]}
+
+
+def polyline_geojson(polyline: str) -> dict[str, Any]:
+    """Decode a polyline into a GeoJSON LineString."""
+    return {
+        "type": "LineString",
+        "coordinates": decode_polyline_array(polyline).tolist(),
+    }
+
+
+def format_route_legs(
+    route_legs: Optional[list[dict[str, Any]]],
+    geometry_format: GeometryFormat = GeometryFormat.GEOJSON,
+) -> Optional[list[dict[str, Any]]]:
+    """
+    Render stored legs for a response.
+
+    Legs carry either a ``polyline`` (current storage) or a GeoJSON
+    ``geometry`` (rows written before polylines were stored); the output
+    has only the key matching ``geometry_format``.
+    """
+    if route_legs is None:
+        return None
+
+    formatted = []
+    for leg in route_legs:
+        leg = dict(leg)
+        polyline = leg.pop("polyline", None)
+        geometry = leg.pop("geometry", None)
+        if geometry_format == GeometryFormat.POLYLINE:
+            if polyline is None and geometry:
+                polyline = encode_leg_geometry(geometry, tolerance=0)
+            leg["polyline"] = polyline
+        else:
+            if geometry is None and polyline:
+                geometry = polyline_geojson(polyline)
+            leg["geometry"] = geometry
+        formatted.append(leg)
+    return formatted
+
+
+def simplify_leg(leg: dict[str, Any], tolerance: float) -> dict[str, Any]:
+    """Travel mode and polyline of a stored leg, simplified to ``tolerance``."""
+    polyline = leg.get("polyline")
+    geometry = leg.get("geometry")
+    if polyline:
+        geometry = polyline_geojson(polyline)
+    return {
+        "travel_mode": leg.get("travel_mode"),
+        "polyline": encode_leg_geometry(geometry, tolerance),
+    }
@@ -5,7 +5,7 @@ from app.schemas.route import RouteRequest, RouteResponse, RouteLeg
 from typing import List, Optional
 from app.schemas.routing import RoutingRequest, RoutingResponse, TravelMode
 from pyproj import Geod
-import math
+from app.core.geodesic import haversine_km, path_leg_distances_km
 
 
 class RouteService:
@@ -70,14 +70,7 @@ class RouteService:
         lat1: float, lon1: float, lat2: float, lon2: float
     ) -> float:
         """Calculate the great circle distance between two points."""
-        R = 6371  # Earth radius in km
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = math.sin(dlat / 2) * math.sin(dlat / 2) + \
-            math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * \
-            math.sin(dlon / 2) * math.sin(dlon / 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
+        return haversine_km(lat1, lon1, lat2, lon2)
 
     @staticmethod
     def calculate_intra_city_route(request: RouteRequest) -> RouteResponse:
@@ -88,16 +81,14 @@ class RouteService:
         total_travel_time = 0.0
         total_dwell_time = sum(p.dwell_time for p in request.points)
         legs = []
+        leg_distances = path_leg_distances_km(
+            [(p.latitude, p.longitude) for p in request.points]
+        ).tolist()
 
-        for i in range(len(request.points) - 1):
+        for i, dist in enumerate(leg_distances):
             start = request.points[i]
             end = request.points[i+1]
 
-            dist = RouteService.calculate_haversine_distance(
-                start.latitude, start.longitude,
-                end.latitude, end.longitude
-            )
-
             travel_time = (dist / speed_kmh) * 60  # minutes
 
             leg = RouteLeg(
@@ -0,0 +1,278 @@
+"""
+Background queue for travel segment recalculation.
+
+Destination edits call ``enqueue_trip`` inside their own transaction, so a
+job only becomes visible to runners once the edit is committed. Requests
+for a trip that already has a pending job are folded into it and push its
+``run_after`` back by the debounce window (bounded by the max delay), so a
+burst of edits triggers a single recalculation.
+
+Runners claim due jobs with ``FOR UPDATE SKIP LOCKED`` and skip trips that
+are already being recalculated, so any number of them can share the table:
+inside each API process (started from the app lifespan) or in a separate
+``python -m app.worker`` process. Progress is written to the job row for
+the status endpoint, and the outcome is pushed to the trip's WebSockets as
+a ``segments_recalculated`` message (through the realtime broker, so it
+reaches sockets held by other processes too).
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.segment_job import SegmentJob
+from app.services.connection_manager import manager
+from app.services.travel_segment_service import TravelSegmentService
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+PROGRESS_WRITE_INTERVAL = 1.0  # Seconds between progress writes for one job
+EXPIRE_INTERVAL = 60.0  # Seconds between checks for abandoned running jobs
+
+
+async def enqueue_trip(db: AsyncSession, trip_id: int) -> int:
+    """
+    Request a background recalculation of a trip's segments.
+
+    Runs in the caller's transaction. If the trip already has a pending
+    job it is reused and debounced instead of adding another.
+
+    Returns:
+        Id of the trip's pending job
+    """
+    now = datetime.utcnow()
+    stmt = insert(SegmentJob).values(
+        trip_id=trip_id,
+        status=PENDING,
+        run_after=now + timedelta(seconds=settings.SEGMENT_JOB_DEBOUNCE_SECONDS),
+        first_requested_at=now,
+        request_count=1,
+        segments_done=0,
+        created_at=now,
+        updated_at=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SegmentJob.trip_id],
+        # Literal predicate so PostgreSQL can infer the partial unique index
+        index_where=text(f"status = '{PENDING}'"),
+        set_={
+            "run_after": func.least(
+                stmt.excluded.run_after,
+                SegmentJob.first_requested_at + timedelta(seconds=settings.SEGMENT_JOB_MAX_DELAY_SECONDS),
+            ),
+            "request_count": SegmentJob.request_count + 1,
+            "updated_at": now,
+        },
+    ).returning(SegmentJob.id)
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def cancel_pending(db: AsyncSession, trip_id: int) -> int:
+    """Cancel a trip's pending job (e.g. after recalculating it inline). Returns rows cancelled."""
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(SegmentJob)
+        .where(SegmentJob.trip_id == trip_id, SegmentJob.status == PENDING)
+        .values(status=CANCELLED, finished_at=now, updated_at=now)
+    )
+    return result.rowcount
+
+
+async def get_job(db: AsyncSession, trip_id: int, job_id: Optional[int] = None) -> Optional[SegmentJob]:
+    """Get one of a trip's jobs, or its most recent one when ``job_id`` is None."""
+    stmt = select(SegmentJob).where(SegmentJob.trip_id == trip_id)
+    if job_id is not None:
+        stmt = stmt.where(SegmentJob.id == job_id)
+    else:
+        stmt = stmt.order_by(SegmentJob.id.desc()).limit(1)
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+
+class SegmentJobRunner:
+    """Claims and runs due segment jobs in a few asyncio tasks."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        name: Optional[str] = None,
+    ):
+        self.session_factory = session_factory
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self._expired_at = 0.0
+
+    async def claim(self) -> Optional[tuple[int, int]]:
+        """Mark the next due job running. Returns (job_id, trip_id) or None."""
+        now = datetime.utcnow()
+        running_trips = select(SegmentJob.trip_id).where(SegmentJob.status == RUNNING)
+        candidate = (
+            select(SegmentJob.id)
+            .where(
+                SegmentJob.status == PENDING,
+                SegmentJob.run_after <= now,
+                SegmentJob.trip_id.not_in(running_trips),
+            )
+            .order_by(SegmentJob.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(SegmentJob)
+                .where(SegmentJob.id == candidate)
+                .values(status=RUNNING, started_at=now, worker=self.name, updated_at=now)
+                .returning(SegmentJob.id, SegmentJob.trip_id)
+            )
+            row = result.first()
+            await db.commit()
+        return (row.id, row.trip_id) if row else None
+
+    async def seconds_until_due(self) -> float:
+        """Time until the next pending job is due, capped at the poll interval."""
+        async with self.session_factory() as db:
+            next_run = (await db.execute(
+                select(func.min(SegmentJob.run_after)).where(SegmentJob.status == PENDING)
+            )).scalar_one_or_none()
+        if next_run is None:
+            return settings.SEGMENT_JOB_POLL_SECONDS
+        wait = (next_run - datetime.utcnow()).total_seconds()
+        return min(max(wait, 0.05), settings.SEGMENT_JOB_POLL_SECONDS)
+
+    async def expire_stale(self) -> int:
+        """Fail running jobs whose runner disappeared (older than the job timeout)."""
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(SegmentJob)
+                .where(
+                    SegmentJob.status == RUNNING,
+                    SegmentJob.started_at < now - timedelta(seconds=settings.SEGMENT_JOB_TIMEOUT_SECONDS),
+                )
+                .values(status=FAILED, error="Timed out", finished_at=now, updated_at=now)
+            )
+            await db.commit()
+        return result.rowcount
+
+    async def _update_job(self, job_id: int, **values: Any) -> None:
+        async with self.session_factory() as db:
+            await db.execute(
+                update(SegmentJob)
+                .where(SegmentJob.id == job_id)
+                .values(updated_at=datetime.utcnow(), **values)
+            )
+            await db.commit()
+
+    async def run_job(self, job_id: int, trip_id: int) -> str:
+        """Recalculate a claimed job's trip, record the outcome and notify the trip."""
+        last_write = 0.0
+
+        async def on_progress(done: int, total: int) -> None:
+            nonlocal last_write
+            now = time.monotonic()
+            if done < total and now - last_write < PROGRESS_WRITE_INTERVAL:
+                return
+            last_write = now
+            await self._update_job(job_id, segments_done=done, segments_total=total)
+
+        segment_ids: list[int] = []
+        reused = rebuilt = 0
+        try:
+            async with self.session_factory() as db:
+                recalculation = await TravelSegmentService.recalculate_trip_segments(
+                    db, trip_id, on_progress=on_progress
+                )
+                segment_ids = [segment.id for segment in recalculation.segments]
+                reused, rebuilt = recalculation.reused, recalculation.rebuilt
+                await db.commit()
+            status, error = COMPLETED, None
+            await self._update_job(
+                job_id,
+                status=status,
+                finished_at=datetime.utcnow(),
+                segments_total=len(segment_ids),
+                segments_done=len(segment_ids),
+                segments_reused=reused,
+                segment_ids=segment_ids,
+            )
+        except Exception as e:
+            logger.exception(f"Segment job {job_id} for trip {trip_id} failed")
+            status, error = FAILED, str(e)[:1000] or type(e).__name__
+            await self._update_job(job_id, status=status, finished_at=datetime.utcnow(), error=error)
+
+        await manager.broadcast_to_trip(trip_id, {
+            "type": "segments_recalculated",
+            "job_id": job_id,
+            "status": status,
+            "segment_ids": segment_ids,
+            "reused": reused,
+            "rebuilt": rebuilt,
+            "error": error,
+        })
+        return status
+
+    async def run_once(self) -> bool:
+        """Claim and run one due job. Returns False if none was due."""
+        claimed = await self.claim()
+        if claimed is None:
+            return False
+        await self.run_job(*claimed)
+        return True
+
+    async def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if await self.run_once():
+                    continue
+                if time.monotonic() - self._expired_at >= EXPIRE_INTERVAL:
+                    self._expired_at = time.monotonic()
+                    await self.expire_stale()
+                delay = await self.seconds_until_due()
+            except Exception:
+                logger.exception("Segment job runner error")
+                delay = settings.SEGMENT_JOB_POLL_SECONDS
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, concurrency: int = 1) -> None:
+        """Start ``concurrency`` runner tasks on the current event loop."""
+        self._stopping.clear()
+        for _ in range(concurrency):
+            self._tasks.append(asyncio.create_task(self._loop()))
+        logger.info(f"Segment job runner {self.name} started with {concurrency} task(s)")
+
+    async def stop(self) -> None:
+        """Stop after the jobs in progress finish."""
+        self._stopping.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+_runner: Optional[SegmentJobRunner] = None
+
+
+def get_segment_job_runner() -> SegmentJobRunner:
+    """Get this process's segment job runner."""
+    global _runner
+    if _runner is None:
+        _runner = SegmentJobRunner()
+    return _runner
@@ -1,11 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func, or_
 from sqlalchemy.orm import selectinload
-from typing import Optional
-from pyproj import Geod
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Optional, TypeVar
+import asyncio
+import hashlib
 import json
 import logging
 
+from app.core.cache import get_cached, set_cached
+from app.core.geodesic import haversine_km
 from app.models.travel_segment import TravelSegment
 from app.models.destination import Destination
 from app.models.route_waypoint import RouteWaypoint
@@ -24,9 +28,31 @@ from app.services.navitime_service import (
     NavitimeService,
     NavitimeError,
 )
+from app.services.route_geometry import (
+    encode_leg_geometry,
+    geojson_linestring,
+    geometry_polyline,
+    linestring_geojson,
+    route_linestring,
+    simplify_leg,
+    straight_linestring,
+)
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Decimal places of coordinates hashed into segment fingerprints (~0.1 m)
+FINGERPRINT_COORD_DIGITS = 6
+
+
+@dataclass
+class TripRecalculation:
+    """Segments of a trip after recalculation, with how many were re-routed."""
+    segments: list[TravelSegment]
+    reused: int = 0  # Inputs unchanged, stored route kept
+    rebuilt: int = 0  # Routed again
+
 
 class TravelSegmentService:
     """Service for calculating and managing travel segments between destinations"""
@@ -42,6 +68,88 @@ class TravelSegmentService:
     def get_routing_preference(cls) -> RoutingPreference:
         return cls._routing_preference
 
+    @classmethod
+    def input_fingerprint(
+        cls,
+        from_lat: float,
+        from_lng: float,
+        to_lat: float,
+        to_lng: float,
+        travel_mode: str,
+        route_waypoints: Iterable = (),
+        travel_stops: Iterable = (),
+    ) -> str:
+        """
+        Hash everything a segment's route is built from.
+
+        Covers the endpoints, travel mode, waypoints and stops (position,
+        order, per-leg mode and stop duration), the current routing
+        preference and which routing providers are configured, so adding an
+        API key invalidates every segment. A segment whose stored
+        ``input_fingerprint`` matches does not need to be routed again.
+        """
+        def point(lat: float, lng: float) -> list[float]:
+            return [round(lat, FINGERPRINT_COORD_DIGITS), round(lng, FINGERPRINT_COORD_DIGITS)]
+
+        payload = {
+            "from": point(from_lat, from_lng),
+            "to": point(to_lat, to_lng),
+            "mode": travel_mode,
+            "waypoints": [
+                [wp.order_index, *point(wp.latitude, wp.longitude)]
+                for wp in sorted(route_waypoints, key=lambda wp: wp.order_index)
+            ],
+            "stops": [
+                [stop.order_index, *point(stop.latitude, stop.longitude), stop.travel_mode, stop.duration_minutes]
+                for stop in sorted(travel_stops, key=lambda stop: stop.order_index)
+            ],
+            "preference": cls._routing_preference.value,
+            "providers": cls._available_providers(),
+        }
+        encoded = json.dumps(payload, separators=(",", ":"), sort_keys=True)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    @staticmethod
+    def _available_providers() -> list[str]:
+        """Names of the routing providers that have credentials configured."""
+        services = {
+            "google": GoogleMapsRoutesService(),
+            "mapbox": MapboxService(),
+            "navitime": NavitimeService(),
+            "ors": OpenRouteServiceService(),
+        }
+        return [name for name, service in services.items() if service.is_available()]
+
+    @classmethod
+    def _destination_fingerprint(
+        cls,
+        from_dest,
+        to_dest,
+        travel_mode: str,
+        route_waypoints: Iterable = (),
+        travel_stops: Iterable = (),
+    ) -> str:
+        return cls.input_fingerprint(
+            from_dest.latitude, from_dest.longitude,
+            to_dest.latitude, to_dest.longitude,
+            travel_mode, route_waypoints, travel_stops,
+        )
+
+    # Max routing lookups (segments or legs) in flight per fan-out; providers
+    # additionally cap their own concurrency (see app.core.resilience)
+    ROUTING_FAN_OUT_LIMIT = 6
+
+    @classmethod
+    async def _gather_bounded(cls, coros: list[Awaitable[T]]) -> list[T]:
+        """Await routing coroutines concurrently (bounded), returning results in order."""
+        semaphore = asyncio.Semaphore(cls.ROUTING_FAN_OUT_LIMIT)
+
+        async def run(coro: Awaitable[T]) -> T:
+            async with semaphore:
+                return await coro
+
+        return await asyncio.gather(*(run(c) for c in coros))
+
     # Speed estimates in km/h for different travel modes
     SPEED_ESTIMATES = {
         TravelMode.PLANE: 800,     # Commercial flight cruising speed
@@ -81,9 +189,7 @@ class TravelSegmentService:
         lat2: float, lon2: float
     ) -> float:
         """Calculate great circle distance between two points in km"""
-        geod = Geod(ellps='WGS84')
-        _, _, dist_meters = geod.inv(lon1, lat1, lon2, lat2)
-        return dist_meters / 1000.0
+        return haversine_km(lat1, lon1, lat2, lon2)
 
     @classmethod
     def calculate_travel_time(
@@ -153,6 +259,11 @@ class TravelSegmentService:
         """Check if the travel mode is public transport (train or bus)."""
         return mode in (TravelMode.TRAIN, TravelMode.BUS)
 
+    @classmethod
+    def _is_routable(cls, mode: TravelMode) -> bool:
+        """Check if routing providers can route the travel mode (not plane/ferry)."""
+        return mode not in (TravelMode.PLANE, TravelMode.FERRY)
+
     @classmethod
     async def _fetch_google_maps_route(
         cls,
@@ -500,6 +611,123 @@ class TravelSegmentService:
         )
         return list(result.scalars().all())
 
+    # Simplified map geometry is keyed by segment, updated_at and tolerance,
+    # so edits never serve stale entries; the TTL only bounds memory
+    GEOMETRY_CACHE_TTL = 3600
+
+    @staticmethod
+    def _geometry_cache_key(segment_id: int, updated_at, tolerance: float) -> str:
+        version = updated_at.timestamp() if updated_at else 0
+        return f"segment_lod:{segment_id}:{version}:{tolerance}"
+
+    @classmethod
+    async def get_trip_geometry(
+        cls,
+        db: AsyncSession,
+        trip_id: int,
+        tolerance: float,
+        bbox: Optional[tuple[float, float, float, float]] = None,
+    ) -> list[dict]:
+        """
+        Get a trip's segment geometries simplified to ``tolerance`` degrees.
+
+        Covers segments between the trip's destinations plus its persisted
+        origin/return segments. Only segments missing from the cache are
+        loaded and simplified (ST_Simplify for the route, Douglas-Peucker
+        for the legs).
+
+        Args:
+            db: Database session
+            trip_id: Trip to load
+            tolerance: Simplification tolerance in degrees
+            bbox: Optional (min_lon, min_lat, max_lon, max_lat); only segments
+                whose route intersects it are returned
+
+        Returns:
+            Dicts with segment metadata, ``polyline`` and ``legs`` (each leg's
+            ``travel_mode`` and ``polyline``, or None without per-leg data)
+        """
+        trip_destinations = select(Destination.id).where(Destination.trip_id == trip_id)
+        stmt = (
+            select(
+                TravelSegment.id,
+                TravelSegment.segment_type,
+                TravelSegment.from_destination_id,
+                TravelSegment.to_destination_id,
+                TravelSegment.travel_mode,
+                TravelSegment.is_fallback,
+                TravelSegment.updated_at,
+            )
+            .where(or_(
+                and_(
+                    TravelSegment.from_destination_id.in_(trip_destinations),
+                    TravelSegment.to_destination_id.in_(trip_destinations),
+                ),
+                and_(
+                    TravelSegment.trip_id == trip_id,
+                    TravelSegment.segment_type.in_(("origin", "return")),
+                ),
+            ))
+            .order_by(TravelSegment.id)
+        )
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            if min_lon <= max_lon:
+                envelopes = [(min_lon, max_lon)]
+            else:
+                # Box crosses the antimeridian: split it in two
+                envelopes = [(min_lon, 180.0), (-180.0, max_lon)]
+            stmt = stmt.where(or_(*(
+                func.ST_Intersects(
+                    TravelSegment.geometry,
+                    func.ST_MakeEnvelope(west, min_lat, east, max_lat, 4326),
+                )
+                for west, east in envelopes
+            )))
+        rows = (await db.execute(stmt)).all()
+
+        keys = [cls._geometry_cache_key(row.id, row.updated_at, tolerance) for row in rows]
+        geometries = dict(zip(
+            (row.id for row in rows),
+            await asyncio.gather(*(get_cached(key) for key in keys)),
+        ))
+
+        missing = [segment_id for segment_id, cached in geometries.items() if cached is None]
+        if missing:
+            result = await db.execute(
+                select(
+                    TravelSegment.id,
+                    # preserveCollapsed keeps very short routes as two-point lines
+                    func.ST_Simplify(TravelSegment.geometry, tolerance, True).label("geometry"),
+                    TravelSegment.route_legs,
+                )
+                .where(TravelSegment.id.in_(missing))
+            )
+            for row in result.all():
+                geometries[row.id] = {
+                    "polyline": geometry_polyline(row.geometry),
+                    "legs": [simplify_leg(leg, tolerance) for leg in row.route_legs]
+                    if row.route_legs else None,
+                }
+            await asyncio.gather(*(
+                set_cached(key, geometries[row.id], ttl=cls.GEOMETRY_CACHE_TTL)
+                for row, key in zip(rows, keys)
+                if row.id in missing
+            ))
+
+        return [
+            {
+                "id": row.id,
+                "segment_type": row.segment_type,
+                "from_destination_id": row.from_destination_id,
+                "to_destination_id": row.to_destination_id,
+                "travel_mode": row.travel_mode,
+                "is_fallback": row.is_fallback,
+                **(geometries[row.id] or {"polyline": None, "legs": None}),
+            }
+            for row in rows
+        ]
+
     @classmethod
     async def calculate_and_save_segment(
         cls,
@@ -544,18 +772,18 @@ class TravelSegmentService:
             routing_preference=cls._routing_preference,
         )
 
+        # Heuristic estimates for routable modes keep no fingerprint, so the
+        # next recalculation tries the providers again
+        fingerprint = None
         if route_geometry and api_distance_km is not None and api_duration_min is not None:
             # Use API results
             distance_km = api_distance_km
             duration_minutes = api_duration_min
-            # Convert GeoJSON geometry to WKT for PostGIS storage
-            if route_geometry.get("type") == "LineString":
-                coords = route_geometry.get("coordinates", [])
-                wkt_coords = ", ".join(f"{c[0]} {c[1]}" for c in coords)
-                geometry_wkt = f"LINESTRING({wkt_coords})"
-            else:
-                # Fallback to straight line
-                geometry_wkt = f"LINESTRING({from_dest.longitude} {from_dest.latitude}, {to_dest.longitude} {to_dest.latitude})"
+            # Simplify the routed line for PostGIS storage (straight line if unusable)
+            geometry = geojson_linestring(route_geometry) or straight_linestring(
+                from_dest.longitude, from_dest.latitude, to_dest.longitude, to_dest.latitude
+            )
+            fingerprint = cls._destination_fingerprint(from_dest, to_dest, mode.value)
         else:
             # Fallback to heuristic calculation
             distance_km, duration_minutes = cls.calculate_travel_time(
@@ -564,7 +792,13 @@ class TravelSegmentService:
                 mode
             )
             # Straight line geometry
-            geometry_wkt = f"LINESTRING({from_dest.longitude} {from_dest.latitude}, {to_dest.longitude} {to_dest.latitude})"
+            geometry = straight_linestring(
+                from_dest.longitude, from_dest.latitude, to_dest.longitude, to_dest.latitude
+            )
+            if cls._is_routable(mode):
+                is_fallback = True
+            else:
+                fingerprint = cls._destination_fingerprint(from_dest, to_dest, mode.value)
 
         # Check if segment already exists
         existing = await cls.get_segment(db, from_destination_id, to_destination_id)
@@ -589,9 +823,10 @@ class TravelSegmentService:
             existing.travel_mode = mode.value
             existing.distance_km = distance_km
             existing.duration_minutes = duration_minutes
-            existing.geometry = geometry_wkt
+            existing.geometry = geometry
             existing.is_fallback = is_fallback
             existing.route_legs = None
+            existing.input_fingerprint = fingerprint
             await db.flush()
             await db.refresh(existing)
             return existing
@@ -605,8 +840,9 @@ class TravelSegmentService:
                 travel_mode=mode.value,
                 distance_km=distance_km,
                 duration_minutes=duration_minutes,
-                geometry=geometry_wkt,
-                is_fallback=is_fallback
+                geometry=geometry,
+                is_fallback=is_fallback,
+                input_fingerprint=fingerprint,
             )
             db.add(segment)
             await db.flush()
@@ -630,11 +866,21 @@ class TravelSegmentService:
     async def recalculate_trip_segments(
         cls,
         db: AsyncSession,
-        trip_id: int
-    ) -> list[TravelSegment]:
+        trip_id: int,
+        on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+        force: bool = False,
+    ) -> TripRecalculation:
         """
         Recalculate all travel segments for a trip based on destination order.
         This should be called when destinations are reordered.
+
+        Waypoints and stops for every segment are loaded up front, and only
+        segments whose input fingerprint changed (or that have no stored
+        route, or only a heuristic estimate) are routed again; ``force``
+        re-routes all of them. Those routes are
+        fetched concurrently (bounded) and the results are written in a
+        single flush. ``on_progress(done, total)`` is awaited as each
+        segment finishes routing; reused segments count as done up front.
         """
         # Get destinations in order
         result = await db.execute(
@@ -645,12 +891,12 @@ class TravelSegmentService:
         destinations = list(result.scalars().all())
 
         if len(destinations) < 2:
-            return []
+            return TripRecalculation(segments=[])
 
         # Get existing segments to preserve travel modes
         existing_segments = await cls.get_trip_segments(db, trip_id)
-        segment_modes = {
-            (s.from_destination_id, s.to_destination_id): s.travel_mode
+        segments_by_pair = {
+            (s.from_destination_id, s.to_destination_id): s
             for s in existing_segments
         }
 
@@ -664,32 +910,110 @@ class TravelSegmentService:
             if pair not in valid_pairs:
                 await db.delete(segment)
 
-        # Create/update segments for consecutive destinations
-        segments = []
+        # Collect segments for consecutive destinations, creating missing ones
+        planned: list[tuple[TravelSegment, Destination, Destination]] = []
         for i in range(len(destinations) - 1):
             from_dest = destinations[i]
             to_dest = destinations[i + 1]
 
-            # Use existing mode or default to car
-            existing_mode = segment_modes.get((from_dest.id, to_dest.id))
-            mode = TravelMode(existing_mode) if existing_mode else TravelMode.CAR
-
             # Skip if coordinates missing
             if (from_dest.latitude is None or from_dest.longitude is None or
                     to_dest.latitude is None or to_dest.longitude is None):
                 continue
 
-            segment = await cls.calculate_and_save_segment(
-                db, from_dest.id, to_dest.id, mode
+            segment = segments_by_pair.get((from_dest.id, to_dest.id))
+            if segment is None:
+                # New pair defaults to car
+                segment = TravelSegment(
+                    trip_id=from_dest.trip_id,
+                    segment_type="inter_destination",
+                    from_destination_id=from_dest.id,
+                    to_destination_id=to_dest.id,
+                    travel_mode=TravelMode.CAR.value,
+                    is_fallback=False,
+                )
+            planned.append((segment, from_dest, to_dest))
+
+        if not planned:
+            await db.flush()
+            return TripRecalculation(segments=[])
+
+        # Load waypoints and stops for all existing segments in two queries
+        segment_ids = [seg.id for seg, _, _ in planned if seg.id is not None]
+        waypoints_by_segment: dict[int, list[RouteWaypoint]] = {}
+        stops_by_segment: dict[int, list[TravelStop]] = {}
+        if segment_ids:
+            waypoint_result = await db.execute(
+                select(RouteWaypoint)
+                .where(RouteWaypoint.travel_segment_id.in_(segment_ids))
+                .order_by(RouteWaypoint.order_index)
+            )
+            for wp in waypoint_result.scalars().all():
+                waypoints_by_segment.setdefault(wp.travel_segment_id, []).append(wp)
+
+            stop_result = await db.execute(
+                select(TravelStop)
+                .where(TravelStop.travel_segment_id.in_(segment_ids))
+                .order_by(TravelStop.order_index)
+            )
+            for stop in stop_result.scalars().all():
+                stops_by_segment.setdefault(stop.travel_segment_id, []).append(stop)
+
+        for segment, _, _ in planned:
+            if segment.id is None:
+                db.add(segment)
+
+        # Keep segments whose routing inputs are unchanged
+        stale = [
+            (segment, from_dest, to_dest)
+            for segment, from_dest, to_dest in planned
+            if force
+            or segment.geometry is None
+            or segment.input_fingerprint != cls._destination_fingerprint(
+                from_dest, to_dest, segment.travel_mode,
+                waypoints_by_segment.get(segment.id, []),
+                stops_by_segment.get(segment.id, []),
             )
+        ]
+        done = len(planned) - len(stale)
+
+        async def route(segment: TravelSegment, from_dest: Destination, to_dest: Destination) -> None:
+            nonlocal done
+            await cls._route_segment(
+                segment, from_dest, to_dest,
+                waypoints_by_segment.get(segment.id, []),
+                stops_by_segment.get(segment.id, []),
+            )
+            done += 1
+            if on_progress is not None:
+                await on_progress(done, len(planned))
+
+        # Route stale segments concurrently; this only touches segment
+        # attributes, never the session
+        await cls._gather_bounded([
+            route(segment, from_dest, to_dest)
+            for segment, from_dest, to_dest in stale
+        ])
+        logger.info(
+            f"Recalculated trip {trip_id}: {len(stale)} segments rebuilt, "
+            f"{len(planned) - len(stale)} reused"
+        )
 
-            # Recalculate the segment with waypoints and stops to ensure the route
-            # passes through all intermediate points
-            segment = await cls.recalculate_segment_with_waypoints(db, segment.id)
-            if segment:
-                segments.append(segment)
+        await db.flush()
 
-        return segments
+        # Reload once so geometry is returned as stored (WKB) for serialization
+        ids = [segment.id for segment, _, _ in planned]
+        reloaded = await db.execute(
+            select(TravelSegment)
+            .where(TravelSegment.id.in_(ids))
+            .execution_options(populate_existing=True)
+        )
+        by_id = {seg.id: seg for seg in reloaded.scalars().all()}
+        return TripRecalculation(
+            segments=[by_id[i] for i in ids if i in by_id],
+            reused=len(planned) - len(stale),
+            rebuilt=len(stale),
+        )
 
     @classmethod
     async def _fetch_route_with_waypoints(
@@ -827,6 +1151,31 @@ class TravelSegmentService:
         )
         travel_stops = list(stop_result.scalars().all())
 
+        await cls._route_segment(segment, from_dest, to_dest, route_waypoints, travel_stops)
+
+        await db.flush()
+        await db.refresh(segment)
+
+        logger.info(f"Recalculated segment {segment_id} with {len(route_waypoints)} waypoints and {len(travel_stops)} stops")
+        return segment
+
+    @classmethod
+    async def _route_segment(
+        cls,
+        segment: TravelSegment,
+        from_dest,
+        to_dest,
+        route_waypoints: list,
+        travel_stops: list,
+    ) -> None:
+        """
+        Route a segment through its waypoints/stops and set its route fields.
+
+        Does not use the DB session, so several segments can be routed
+        concurrently before a single flush. Segments that ended up with a
+        heuristic estimate get no input fingerprint, so they are routed
+        again next time instead of being reused.
+        """
         segment_mode = TravelMode(segment.travel_mode)
 
         # Check if any stop has a custom travel_mode (per-leg routing needed)
@@ -834,37 +1183,39 @@ class TravelSegmentService:
 
         if has_per_leg_modes and travel_stops:
             # Per-leg routing: each leg gets its own travel mode
-            await cls._recalculate_per_leg(
-                db, segment, from_dest, to_dest,
+            estimated = await cls._recalculate_per_leg(
+                segment, from_dest, to_dest,
                 route_waypoints, travel_stops, segment_mode
             )
         else:
             # Standard routing: single mode for the whole segment
-            await cls._recalculate_single_mode(
-                db, segment, from_dest, to_dest,
+            estimated = await cls._recalculate_single_mode(
+                segment, from_dest, to_dest,
                 route_waypoints, travel_stops, segment_mode
             )
             # Clear route_legs when not using per-leg routing
             segment.route_legs = None
 
-        await db.flush()
-        await db.refresh(segment)
-
-        logger.info(f"Recalculated segment {segment_id} with {len(route_waypoints)} waypoints and {len(travel_stops)} stops")
-        return segment
+        segment.input_fingerprint = None if estimated else cls._destination_fingerprint(
+            from_dest, to_dest, segment.travel_mode, route_waypoints, travel_stops
+        )
 
     @classmethod
     async def _recalculate_single_mode(
         cls,
-        db: AsyncSession,
         segment: TravelSegment,
         from_dest,
         to_dest,
         route_waypoints: list,
         travel_stops: list,
         mode: TravelMode
-    ) -> None:
-        """Recalculate segment with a single travel mode (original behavior)."""
+    ) -> bool:
+        """
+        Recalculate segment with a single travel mode (original behavior).
+
+        Returns True if no provider could route a routable mode and the
+        result is a heuristic estimate.
+        """
         # Combine all waypoint coordinates, interleaved by order_index
         all_points: list[tuple[int, float, float]] = []
         for wp in route_waypoints:
@@ -891,18 +1242,16 @@ class TravelSegmentService:
             )
 
         if route_geometry and distance_km is not None and duration_min is not None:
-            if route_geometry.get("type") == "LineString":
-                coords = route_geometry.get("coordinates", [])
-                wkt_coords = ", ".join(f"{c[0]} {c[1]}" for c in coords)
-                geometry_wkt = f"LINESTRING({wkt_coords})"
-            else:
-                geometry_wkt = f"LINESTRING({from_dest.longitude} {from_dest.latitude}, {to_dest.longitude} {to_dest.latitude})"
+            geometry = geojson_linestring(route_geometry) or straight_linestring(
+                from_dest.longitude, from_dest.latitude, to_dest.longitude, to_dest.latitude
+            )
 
             total_stop_duration = sum(stop.duration_minutes or 0 for stop in travel_stops)
             segment.distance_km = distance_km
             segment.duration_minutes = duration_min + total_stop_duration
-            segment.geometry = geometry_wkt
+            segment.geometry = geometry
             segment.is_fallback = is_fallback
+            return False
         else:
             distance_km, duration_minutes = cls.calculate_travel_time(
                 from_dest.latitude, from_dest.longitude,
@@ -914,32 +1263,33 @@ class TravelSegmentService:
             coords.extend(waypoint_coords)
             coords.append((to_dest.longitude, to_dest.latitude))
 
-            wkt_coords = ", ".join(f"{c[0]} {c[1]}" for c in coords)
-            geometry_wkt = f"LINESTRING({wkt_coords})"
-
             total_stop_duration = sum(stop.duration_minutes or 0 for stop in travel_stops)
             segment.distance_km = distance_km
             segment.duration_minutes = duration_minutes + total_stop_duration
-            segment.geometry = geometry_wkt
-            segment.is_fallback = is_fallback if is_fallback else cls._is_public_transport(mode)
+            # No simplification: these are user-placed waypoints, not provider points
+            segment.geometry = route_linestring(coords, tolerance=0)
+            segment.is_fallback = cls._is_routable(mode)
+            return cls._is_routable(mode)
 
     @classmethod
     async def _recalculate_per_leg(
         cls,
-        db: AsyncSession,
         segment: TravelSegment,
         from_dest,
         to_dest,
         route_waypoints: list,
         travel_stops: list,
         segment_mode: TravelMode
-    ) -> None:
+    ) -> bool:
         """
         Recalculate segment with per-leg travel modes.
 
         Each travel stop's travel_mode defines how to reach that stop.
         The segment's travel_mode defines the mode for the last leg (last stop → to_dest).
         Stops without a travel_mode inherit the segment's mode.
+
+        All legs are fetched concurrently and assembled in order. Returns
+        True if any routable leg fell back to a heuristic estimate.
         """
         # Build ordered list of legs: (from_lat, from_lon, to_lat, to_lon, mode)
         # The sorted stops define the intermediate points
@@ -963,34 +1313,39 @@ class TravelSegmentService:
         # Last leg uses segment's travel_mode
         leg_modes.append(segment_mode)
 
-        # Route each leg independently
+        # Route each leg independently, all legs in parallel
+        leg_results = await cls._gather_bounded([
+            cls._fetch_route_geometry(
+                points[i][0], points[i][1],
+                points[i + 1][0], points[i + 1][1],
+                leg_modes[i],
+                routing_preference=cls._routing_preference,
+            )
+            for i in range(len(points) - 1)
+        ])
+
         route_legs_data = []
         all_coordinates = []
         total_distance = 0.0
         total_duration = 0
         any_fallback = False
+        estimated = False
 
-        for i in range(len(points) - 1):
+        for i, leg_result in enumerate(leg_results):
             from_lat, from_lon = points[i]
             to_lat, to_lon = points[i + 1]
             leg_mode = leg_modes[i]
-
-            route_geometry, distance_km, duration_min, is_fallback = await cls._fetch_route_geometry(
-                from_lat, from_lon,
-                to_lat, to_lon,
-                leg_mode,
-                routing_preference=cls._routing_preference,
-            )
+            route_geometry, distance_km, duration_min, is_fallback = leg_result
 
             leg_data = {
                 "travel_mode": leg_mode.value,
-                "geometry": None,
+                "polyline": None,
                 "distance_km": 0.0,
                 "duration_minutes": 0,
             }
 
             if route_geometry and distance_km is not None and duration_min is not None:
-                leg_data["geometry"] = route_geometry
+                leg_data["polyline"] = encode_leg_geometry(route_geometry)
                 leg_data["distance_km"] = round(distance_km, 2)
                 leg_data["duration_minutes"] = duration_min
                 total_distance += distance_km
@@ -1011,16 +1366,16 @@ class TravelSegmentService:
                 h_distance, h_duration = cls.calculate_travel_time(
                     from_lat, from_lon, to_lat, to_lon, leg_mode
                 )
-                fallback_geom = {
+                leg_data["polyline"] = encode_leg_geometry({
                     "type": "LineString",
                     "coordinates": [[from_lon, from_lat], [to_lon, to_lat]]
-                }
-                leg_data["geometry"] = fallback_geom
+                })
                 leg_data["distance_km"] = round(h_distance, 2)
                 leg_data["duration_minutes"] = h_duration
                 total_distance += h_distance
                 total_duration += h_duration
                 any_fallback = True
+                estimated = estimated or cls._is_routable(leg_mode)
 
                 if all_coordinates:
                     all_coordinates.append([to_lon, to_lat])
@@ -1030,20 +1385,19 @@ class TravelSegmentService:
             route_legs_data.append(leg_data)
 
         # Build combined geometry for backward compatibility
-        if len(all_coordinates) >= 2:
-            wkt_coords = ", ".join(f"{c[0]} {c[1]}" for c in all_coordinates)
-            geometry_wkt = f"LINESTRING({wkt_coords})"
-        else:
-            geometry_wkt = f"LINESTRING({from_dest.longitude} {from_dest.latitude}, {to_dest.longitude} {to_dest.latitude})"
+        geometry = route_linestring(all_coordinates) or straight_linestring(
+            from_dest.longitude, from_dest.latitude, to_dest.longitude, to_dest.latitude
+        )
 
         # Add stop durations to total
         total_stop_duration = sum(stop.duration_minutes or 0 for stop in travel_stops)
 
         segment.distance_km = round(total_distance, 2)
         segment.duration_minutes = total_duration + total_stop_duration
-        segment.geometry = geometry_wkt
+        segment.geometry = geometry
         segment.is_fallback = any_fallback
         segment.route_legs = route_legs_data
+        return estimated
 
     @classmethod
     async def get_or_calculate_origin_return_segments(
@@ -1171,8 +1525,9 @@ class TravelSegmentService:
 
         return origin_segment, return_segment
 
-    @staticmethod
+    @classmethod
     def _is_origin_return_stale(
+        cls,
         segment: Optional[TravelSegment],
         from_lat: float,
         from_lng: float,
@@ -1184,6 +1539,12 @@ class TravelSegmentService:
         if segment is None:
             return True
 
+        if segment.input_fingerprint is not None:
+            return segment.input_fingerprint != cls.input_fingerprint(
+                from_lat, from_lng, to_lat, to_lng, travel_mode.value
+            )
+
+        # Rows written before fingerprints were stored
         # Compare coordinates (rounded to avoid float precision issues)
         if (
             round(segment.from_latitude or 0, 4) != round(from_lat, 4)
@@ -1262,18 +1623,13 @@ class TravelSegmentService:
             if is_fallback is None:
                 is_fallback = False
 
-        # Convert geometry to WKT for PostGIS
-        geometry_wkt = None
-        if route_geometry and route_geometry.get("type") == "LineString":
-            coords = route_geometry.get("coordinates", [])
-            if len(coords) >= 2:
-                wkt_coords = ", ".join(f"{c[0]} {c[1]}" for c in coords)
-                geometry_wkt = f"LINESTRING({wkt_coords})"
-
-        if not geometry_wkt:
-            geometry_wkt = f"LINESTRING({from_lng} {from_lat}, {to_lng} {to_lat})"
+        # Simplify the routed line for PostGIS storage
+        geometry = geojson_linestring(route_geometry) or straight_linestring(
+            from_lng, from_lat, to_lng, to_lat
+        )
 
         # Persist to DB
+        fingerprint = cls.input_fingerprint(from_lat, from_lng, to_lat, to_lng, travel_mode.value)
         if existing_segment:
             existing_segment.travel_mode = travel_mode.value
             existing_segment.from_name = from_name
@@ -1284,8 +1640,9 @@ class TravelSegmentService:
             existing_segment.to_longitude = to_lng
             existing_segment.distance_km = distance_km
             existing_segment.duration_minutes = duration_minutes
-            existing_segment.geometry = geometry_wkt
+            existing_segment.geometry = geometry
             existing_segment.is_fallback = is_fallback
+            existing_segment.input_fingerprint = fingerprint
             await db.flush()
         else:
             segment = TravelSegment(
@@ -1302,8 +1659,9 @@ class TravelSegmentService:
                 travel_mode=travel_mode.value,
                 distance_km=distance_km,
                 duration_minutes=duration_minutes,
-                geometry=geometry_wkt,
+                geometry=geometry,
                 is_fallback=is_fallback,
+                input_fingerprint=fingerprint,
             )
             db.add(segment)
             await db.flush()
@@ -1319,7 +1677,7 @@ class TravelSegmentService:
             travel_mode=travel_mode,
             distance_km=distance_km,
             duration_minutes=duration_minutes,
-            route_geometry=route_geometry,
+            route_geometry=linestring_geojson(geometry),
             is_fallback=is_fallback,
         )
 
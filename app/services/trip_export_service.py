@@ -0,0 +1,185 @@
+"""
+Batch loader for trip exports.
+
+Loads a trip and everything an export renders (destinations, POIs,
+accommodations, travel segments and optionally notes) with a fixed number
+of queries, one per table using IN batches, regardless of how many
+destinations the trip has. Export generators then work on the in-memory
+graph instead of querying per destination.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Collection, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.accommodation import Accommodation
+from app.models.destination import Destination
+from app.models.note import Note, NoteType
+from app.models.poi import POI
+from app.models.travel_segment import TravelSegment
+from app.models.trip import Trip
+from app.schemas.trip import BudgetSummary, DestinationBudget
+
+
+@dataclass
+class TripExportGraph:
+    """A trip and its export data, grouped by destination id."""
+    trip: Trip
+    destinations: List[Destination]
+    pois: Dict[int, List[POI]] = field(default_factory=dict)
+    accommodations: Dict[int, List[Accommodation]] = field(default_factory=dict)
+    segments: Dict[int, TravelSegment] = field(default_factory=dict)  # First segment leaving each destination
+    notes: Dict[int, List[Note]] = field(default_factory=dict)  # Non-draft notes
+    export_drafts: List[Note] = field(default_factory=list)
+
+    def pois_for(self, destination_id: int) -> List[POI]:
+        return self.pois.get(destination_id, [])
+
+    def accommodations_for(self, destination_id: int) -> List[Accommodation]:
+        return self.accommodations.get(destination_id, [])
+
+    def notes_for(self, destination_id: int) -> List[Note]:
+        return self.notes.get(destination_id, [])
+
+    def budget_summary(self) -> BudgetSummary:
+        """
+        Budget summary computed from the loaded rows.
+
+        Matches TripService.get_budget_summary without its aggregate
+        queries. Requires every destination's POIs and accommodations to be
+        loaded (no ``destination_ids`` filter).
+        """
+        zero = Decimal("0")
+        by_destination = []
+        poi_estimated = poi_actual = accommodation_total = zero
+        for dest in self.destinations:
+            pois = self.pois_for(dest.id)
+            d_poi_est = sum((Decimal(str(p.estimated_cost)) for p in pois if p.estimated_cost is not None), zero)
+            d_poi_act = sum((Decimal(str(p.actual_cost)) for p in pois if p.actual_cost is not None), zero)
+            d_acc = sum(
+                (Decimal(str(a.total_cost)) for a in self.accommodations_for(dest.id) if a.total_cost is not None),
+                zero,
+            )
+            poi_estimated += d_poi_est
+            poi_actual += d_poi_act
+            accommodation_total += d_acc
+            by_destination.append(DestinationBudget(
+                destination_id=dest.id,
+                city_name=dest.city_name or f"Destination {dest.id}",
+                poi_estimated=d_poi_est,
+                poi_actual=d_poi_act,
+                accommodation_total=d_acc,
+                subtotal=d_poi_est + d_acc,
+            ))
+
+        estimated_total = poi_estimated + accommodation_total
+        remaining_budget = None
+        budget_percentage = None
+        if self.trip.total_budget is not None and self.trip.total_budget > 0:
+            remaining_budget = self.trip.total_budget - estimated_total
+            budget_percentage = float((estimated_total / self.trip.total_budget) * 100)
+
+        return BudgetSummary(
+            total_budget=self.trip.total_budget,
+            estimated_total=estimated_total,
+            actual_total=poi_actual,
+            currency=self.trip.currency,
+            remaining_budget=remaining_budget,
+            budget_percentage=budget_percentage,
+            poi_estimated=poi_estimated,
+            poi_actual=poi_actual,
+            accommodation_total=accommodation_total,
+            by_destination=by_destination,
+        )
+
+
+def _group_by_destination(rows) -> Dict[int, list]:
+    """Group rows by destination_id, keeping query order."""
+    grouped: Dict[int, list] = defaultdict(list)
+    for row in rows:
+        grouped[row.destination_id].append(row)
+    return dict(grouped)
+
+
+class TripExportService:
+    """Loads trip export graphs"""
+
+    @staticmethod
+    async def load_graph(
+        db: AsyncSession,
+        trip_id: int,
+        include_notes: bool = False,
+        destination_ids: Optional[Collection[int]] = None,
+    ) -> Optional[TripExportGraph]:
+        """
+        Load a trip's export graph in at most six queries.
+
+        Args:
+            db: Database session
+            trip_id: Trip to load
+            include_notes: Also load the trip's notes (one extra query)
+            destination_ids: Only load POIs, accommodations and notes for
+                these destinations; all destinations are still returned
+
+        Returns:
+            TripExportGraph, or None if the trip does not exist
+        """
+        trip = await db.get(Trip, trip_id)
+        if not trip:
+            return None
+
+        dest_result = await db.execute(
+            select(Destination)
+            .where(Destination.trip_id == trip_id)
+            .order_by(Destination.order_index)
+        )
+        destinations = list(dest_result.scalars().all())
+        graph = TripExportGraph(trip=trip, destinations=destinations)
+
+        ids = [d.id for d in destinations]
+        if destination_ids is not None:
+            wanted = set(destination_ids)
+            ids = [i for i in ids if i in wanted]
+
+        if ids:
+            poi_result = await db.execute(
+                select(POI)
+                .where(POI.destination_id.in_(ids))
+                .order_by(POI.scheduled_date, POI.day_order)
+            )
+            graph.pois = _group_by_destination(poi_result.scalars().all())
+
+            acc_result = await db.execute(
+                select(Accommodation)
+                .where(Accommodation.destination_id.in_(ids))
+                .order_by(Accommodation.check_in_date)
+            )
+            graph.accommodations = _group_by_destination(acc_result.scalars().all())
+
+            seg_result = await db.execute(
+                select(TravelSegment)
+                .where(TravelSegment.from_destination_id.in_(ids))
+                .order_by(TravelSegment.id)
+            )
+            for segment in seg_result.scalars().all():
+                graph.segments.setdefault(segment.from_destination_id, segment)
+
+        if include_notes:
+            note_result = await db.execute(
+                select(Note)
+                .where(Note.trip_id == trip_id)
+                .order_by(Note.is_pinned.desc(), Note.created_at.desc())
+            )
+            notes = note_result.scalars().all()
+            graph.export_drafts = [n for n in notes if n.note_type == NoteType.EXPORT_DRAFT.value]
+            graph.notes = _group_by_destination(
+                n for n in notes
+                if n.note_type != NoteType.EXPORT_DRAFT.value
+                and n.destination_id is not None
+                and n.destination_id in ids
+            )
+
+        return graph
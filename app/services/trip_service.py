@@ -5,13 +5,16 @@ from sqlalchemy import select, func, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from geoalchemy2.elements import WKTElement
+from app.core.auth_cache import invalidate_trip_roles
 from app.models.trip import Trip
 from app.models.destination import Destination
 from app.models.poi import POI
 from app.models.accommodation import Accommodation
 from app.models.document import Document
 from app.models.trip_member import TripMember
+from app.models.notification import Notification
 from app.schemas.trip import TripCreate, TripUpdate, BudgetSummary, TripDuplicateRequest, DestinationBudget
+from app.services.notification_service import recount_users
 
 
 class TripService:
@@ -177,8 +180,16 @@ class TripService:
         if not trip:
             return False
 
+        # The trip's notifications go with it (ON DELETE CASCADE), so their
+        # recipients' counters are rebuilt afterwards
+        recipients = (await db.execute(
+            select(Notification.user_id).where(Notification.trip_id == trip_id).distinct()
+        )).scalars().all()
+
         await db.delete(trip)
         await db.flush()
+        await recount_users(db, recipients)
+        invalidate_trip_roles(db, trip_id)
         return True
 
     @staticmethod
@@ -202,6 +213,7 @@ class TripService:
         )
         db.add(member)
         await db.flush()
+        invalidate_trip_roles(db, trip_id)
         await db.refresh(trip)
         return trip
 
@@ -0,0 +1,164 @@
+"""
+Local-search TSP solver for day route optimization.
+
+Builds a nearest-neighbour tour from a fixed start node and improves it
+with 2-opt and Or-opt moves on a precomputed distance matrix until no
+move helps or the time budget runs out. Used as the offline fallback
+when the ORS Optimization API is unavailable.
+"""
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+# Ignore gains smaller than this to avoid cycling on float noise
+_EPSILON = 1e-9
+
+# Longest segment Or-opt tries to relocate
+OR_OPT_MAX_SEGMENT = 3
+
+
+@dataclass
+class TourResult:
+    """Result from solve_tour."""
+    order: list[int]  # Visited node indices (start node excluded)
+    cost: float  # Total cost, including the return leg for closed tours
+    seed_cost: float  # Cost of the nearest-neighbour seed
+    iterations: int  # Improvement passes run
+    timed_out: bool  # Whether the time budget stopped the search
+
+
+def nearest_neighbour_order(dist: np.ndarray, start: int = 0) -> list[int]:
+    """Greedy nearest-neighbour visiting order from ``start``."""
+    n = len(dist)
+    unvisited = np.ones(n, dtype=bool)
+    unvisited[start] = False
+    order = []
+    current = start
+    for _ in range(n - 1):
+        candidates = np.where(unvisited, dist[current], np.inf)
+        current = int(np.argmin(candidates))
+        unvisited[current] = False
+        order.append(current)
+    return order
+
+
+def path_cost(dist: np.ndarray, path: np.ndarray) -> float:
+    """Sum of consecutive edge costs along ``path``."""
+    return float(dist[path[:-1], path[1:]].sum())
+
+
+def _two_opt_pass(dist: np.ndarray, path: np.ndarray) -> bool:
+    """Apply the best 2-opt move for each position. Returns True if improved."""
+    improved = False
+    last = len(path) - 2  # Endpoints are fixed
+    for i in range(1, last):
+        j = np.arange(i + 1, last + 1)
+        a, b = path[i - 1], path[i]
+        c, d = path[j], path[j + 1]
+        delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+        k = int(np.argmin(delta))
+        if delta[k] < -_EPSILON:
+            jj = int(j[k])
+            path[i:jj + 1] = path[i:jj + 1][::-1].copy()
+            improved = True
+    return improved
+
+
+def _or_opt_pass(dist: np.ndarray, path: np.ndarray) -> bool:
+    """Relocate short segments (optionally reversed). Returns True if improved."""
+    improved = False
+    for size in range(1, OR_OPT_MAX_SEGMENT + 1):
+        i = 1
+        while i + size <= len(path) - 1:
+            prev, first = path[i - 1], path[i]
+            last, nxt = path[i + size - 1], path[i + size]
+            removal_gain = dist[prev, first] + dist[last, nxt] - dist[prev, nxt]
+            if removal_gain <= _EPSILON:
+                i += 1
+                continue
+
+            rest = np.concatenate((path[:i], path[i + size:]))
+            u, v = rest[:-1], rest[1:]
+            base = dist[u, v]
+            forward = dist[u, first] + dist[last, v] - base
+            backward = dist[u, last] + dist[first, v] - base
+            # Re-inserting at the removal point is a no-op
+            forward[i - 1] = np.inf
+            backward[i - 1] = np.inf
+
+            k_fwd, k_bwd = int(np.argmin(forward)), int(np.argmin(backward))
+            if forward[k_fwd] <= backward[k_bwd]:
+                k, cost, segment = k_fwd, forward[k_fwd], path[i:i + size].copy()
+            else:
+                k, cost, segment = k_bwd, backward[k_bwd], path[i:i + size][::-1].copy()
+
+            if cost - removal_gain < -_EPSILON:
+                path[:] = np.concatenate((rest[:k + 1], segment, rest[k + 1:]))
+                improved = True
+            else:
+                i += 1
+    return improved
+
+
+def solve_tour(
+    dist: np.ndarray,
+    start: int = 0,
+    return_to_start: bool = True,
+    time_budget_ms: float = 200,
+) -> TourResult:
+    """
+    Find a short tour through every node of a distance matrix.
+
+    Args:
+        dist: Square matrix of travel costs (distance or time)
+        start: Index of the fixed start node
+        return_to_start: Close the tour back at ``start``; otherwise the
+            path may end at any node
+        time_budget_ms: Wall-clock budget for the improvement stage
+
+    Returns:
+        TourResult with the visiting order (start excluded) and its cost
+    """
+    dist = np.asarray(dist, dtype=np.float64)
+    n = len(dist)
+    if n <= 1:
+        return TourResult(order=[], cost=0.0, seed_cost=0.0, iterations=0, timed_out=False)
+
+    if return_to_start:
+        end = start
+        work = dist
+    else:
+        # Free end: add a terminal node that every node reaches at no cost
+        end = n
+        work = np.zeros((n + 1, n + 1), dtype=np.float64)
+        work[:n, :n] = dist
+
+    seed = nearest_neighbour_order(dist, start)
+    path = np.array([start, *seed, end], dtype=np.intp)
+    seed_cost = path_cost(work, path)
+
+    deadline = time.perf_counter() + time_budget_ms / 1000.0
+    iterations = 0
+    timed_out = False
+    if n > 2:
+        while True:
+            if time.perf_counter() >= deadline:
+                timed_out = True
+                break
+            iterations += 1
+            improved = _two_opt_pass(work, path)
+            if time.perf_counter() >= deadline:
+                timed_out = True
+                break
+            improved = _or_opt_pass(work, path) or improved
+            if not improved:
+                break
+
+    return TourResult(
+        order=[int(node) for node in path[1:-1]],
+        cost=path_cost(work, path),
+        seed_cost=seed_cost,
+        iterations=iterations,
+        timed_out=timed_out,
+    )
@@ -60,6 +60,8 @@ async def test_engine():
     )
 
     async with engine.begin() as conn:
+        if "sqlite" not in TEST_DATABASE_URL:
+            await conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
         await conn.run_sync(Base.metadata.create_all)
 
     yield engine
@@ -70,6 +72,18 @@ async def test_engine():
     await engine.dispose()
 
 
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    """Forget cached users and trip roles between tests (rolled-back rows can reuse ids)."""
+    from app.core.auth_cache import get_principal_cache, get_trip_role_cache
+
+    get_principal_cache().invalidate()
+    get_trip_role_cache().invalidate()
+    yield
+    get_principal_cache().invalidate()
+    get_trip_role_cache().invalidate()
+
+
 @pytest.fixture
 async def db(test_engine) -> AsyncGenerator[AsyncSession, None]:
     """Create a test database session with rollback-based isolation."""
@@ -1,14 +1,28 @@
+from unittest.mock import patch
+
 import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.auth_cache import PrincipalCache, TripRoles, get_trip_role_cache
+from app.core.database import Base
+from app.models.activity_log import ActivityLog
+from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
 from app.models.trip_member import TripMember
-from app.services.activity_service import log_activity, get_activity_feed
+from app.models.user import User
+from app.services import activity_service
+from app.services.activity_service import log_activity, flush_activity, get_activity_feed
 
 
 class TestActivityFeed:
     async def test_activity_logged_on_create(self, db, created_user, trip_with_owner):
-        entry = await log_activity(
+        await log_activity(
             db, trip_id=trip_with_owner.id, user_id=created_user.id,
             action="created", entity_type="poi", entity_name="Eiffel Tower",
         )
+        ids = await flush_activity(db)
+        entry = await db.get(ActivityLog, ids[0])
         assert entry.id is not None
         assert entry.action == "created"
         assert entry.entity_type == "poi"
@@ -45,8 +59,7 @@ class TestActivityFeed:
             action="created", entity_type="poi", entity_name="New POI",
         )
 
-        from sqlalchemy import select
-        from app.models.notification import Notification
+        await flush_activity(db)
         stmt = select(Notification).where(Notification.user_id == second_user.id)
         result = await db.execute(stmt)
         notifications = result.scalars().all()
@@ -58,3 +71,169 @@ class TestActivityFeed:
             headers=second_auth_headers,
         )
         assert resp.status_code == 403
+
+
+class BufferedActivityDB:
+    """In-memory SQLite with just the tables the activity writer touches."""
+
+    def __init__(self):
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        self.statements: list[str] = []
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    async def __aenter__(self):
+        tables = [
+            User.__table__, TripMember.__table__, ActivityLog.__table__,
+            Notification.__table__, NotificationCounter.__table__,
+        ]
+        async with self.engine.begin() as conn:
+            await conn.run_sync(lambda c: Base.metadata.create_all(c, tables=tables))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.engine.dispose()
+
+    def session(self) -> AsyncSession:
+        return AsyncSession(self.engine, expire_on_commit=False)
+
+    def count(self, prefix: str) -> int:
+        return sum(1 for s in self.statements if s.lstrip().upper().startswith(prefix))
+
+
+@pytest.fixture
+def activity_caches():
+    """A fresh principal cache."""
+    principals = PrincipalCache(ttl_seconds=60)
+    with patch.object(activity_service, "get_principal_cache", new=lambda: principals):
+        yield principals
+
+
+@pytest.fixture
+def pushed():
+    """Notifications handed to the connection manager."""
+    sent = []
+
+    async def fake_push(user_id, payload):
+        sent.append((user_id, payload))
+
+    with patch.object(activity_service.manager, "push_notification", new=fake_push):
+        yield sent
+
+
+class TestBufferedActivityWrites:
+    """Activities are buffered on the session and written in batches on commit."""
+
+    async def _seed_user(self, store):
+        """Ann (1) and the members of trip 1: Ann, 2 and 3, plus a pending invite."""
+        async with store.session() as db:
+            db.add(User(id=1, email="ann@example.com", name="Ann", oauth_provider="google", oauth_id="ann"))
+            for user_id, role, status in ((1, "owner", "accepted"), (2, "editor", "accepted"),
+                                          (3, "viewer", "accepted"), (4, "viewer", "pending")):
+                db.add(TripMember(trip_id=1, user_id=user_id, role=role, status=status))
+            await db.commit()
+        store.statements.clear()
+
+    async def test_nothing_written_until_commit(self, activity_caches, pushed):
+        async with BufferedActivityDB() as store:
+            await self._seed_user(store)
+            async with store.session() as db:
+                await log_activity(db, trip_id=1, user_id=1, action="created", entity_type="poi")
+                assert store.statements == []
+                await db.commit()
+            assert store.count("INSERT INTO ACTIVITY_LOGS") >= 1
+
+    async def test_commit_writes_activities_and_notifications(self, activity_caches, pushed):
+        async with BufferedActivityDB() as store:
+            await self._seed_user(store)
+            async with store.session() as db:
+                for i in range(3):
+                    await log_activity(
+                        db, trip_id=1, user_id=1, action="created",
+                        entity_type="poi", entity_id=i, entity_name=f"POI {i}",
+                    )
+                await db.commit()
+            # One lookup for the actor and one for the members, no per-event queries
+            assert store.count("SELECT") == 2
+
+            async with store.session() as db:
+                activities = (await db.execute(select(ActivityLog).order_by(ActivityLog.id))).scalars().all()
+                notifications = (await db.execute(select(Notification))).scalars().all()
+
+            assert [a.entity_name for a in activities] == ["POI 0", "POI 1", "POI 2"]
+            # Members 2 and 3 hear about each event; the actor does not
+            assert len(notifications) == 6
+            assert {n.user_id for n in notifications} == {2, 3}
+            ids_by_entity = {a.entity_id: a.id for a in activities}
+            for n in notifications:
+                assert n.data["activity_id"] == ids_by_entity[n.data["entity_id"]]
+                assert n.data["actor_name"] == "Ann"
+
+    async def test_actor_served_from_principal_cache(self, activity_caches, pushed):
+        async with BufferedActivityDB() as store:
+            await self._seed_user(store)
+            activity_caches.set(1, {"name": "Cached Ann", "email": "ann@example.com", "avatar_url": None})
+            async with store.session() as db:
+                await log_activity(db, trip_id=1, user_id=1, action="updated", entity_type="trip")
+                await db.commit()
+            assert store.count("SELECT") == 1
+            assert pushed[0][1]["data"]["actor_name"] == "Cached Ann"
+
+    async def test_pushes_sent_after_commit(self, activity_caches, pushed):
+        async with BufferedActivityDB() as store:
+            await self._seed_user(store)
+            async with store.session() as db:
+                await log_activity(db, trip_id=1, user_id=1, action="deleted", entity_type="poi")
+                ids = await flush_activity(db)
+                assert len(ids) == 1
+                await activity_service.manager.flush()
+                assert pushed == []
+
+                await db.commit()
+                for task in list(activity_service._push_tasks):
+                    await task
+
+            assert sorted(user_id for user_id, _ in pushed) == [2, 3]
+            payload = pushed[0][1]
+            assert payload["type"] == "activity"
+            assert payload["is_read"] is False
+            assert payload["data"]["activity_id"] == ids[0]
+
+    async def test_recipients_ignore_stale_role_cache(self, activity_caches, pushed):
+        async with BufferedActivityDB() as store:
+            await self._seed_user(store)
+            async with store.session() as db:
+                member = (await db.execute(select(TripMember).where(TripMember.user_id == 3))).scalar_one()
+                await db.delete(member)
+                await db.commit()
+            # Member 3 is still cached, as if removed by a worker whose invalidation was missed
+            roles = get_trip_role_cache()
+            roles.set(1, TripRoles(owner_id=1, roles={1: "owner", 2: "editor", 3: "viewer"}))
+            try:
+                async with store.session() as db:
+                    await log_activity(db, trip_id=1, user_id=1, action="created", entity_type="poi")
+                    await db.commit()
+            finally:
+                roles.invalidate(1)
+
+            async with store.session() as db:
+                notifications = (await db.execute(select(Notification))).scalars().all()
+            assert [n.user_id for n in notifications] == [2]
+
+    async def test_rollback_discards_buffer_and_pushes(self, activity_caches, pushed):
+        async with BufferedActivityDB() as store:
+            await self._seed_user(store)
+            async with store.session() as db:
+                await log_activity(db, trip_id=1, user_id=1, action="created", entity_type="poi")
+                await db.rollback()
+                await log_activity(db, trip_id=1, user_id=1, action="updated", entity_type="poi")
+                await flush_activity(db)
+                await db.rollback()
+                await db.commit()
+
+            async with store.session() as db:
+                total = (await db.execute(select(ActivityLog))).scalars().all()
+            assert total == []
+            assert pushed == []
@@ -2,12 +2,15 @@
 Integration tests for POIs API endpoints.
 Tests CRUD operations, voting, category grouping, bulk schedule, and bulk add.
 """
+import json
+
 import pytest
 from datetime import date, timedelta
 from decimal import Decimal
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 from geoalchemy2.functions import ST_SetSRID, ST_MakePoint
+from unittest.mock import AsyncMock, patch
 
 from app.models.trip import Trip
 from app.models.destination import Destination
@@ -560,6 +563,79 @@ class TestPOIPriority:
         assert data["limit"] == 3
         assert data["total"] >= 10
 
+    @pytest.mark.asyncio
+    async def test_list_pois_cursor_pagination(
+        self,
+        client: AsyncClient,
+        db: AsyncSession,
+        created_destination: Destination
+    ):
+        """Test that next_cursor walks every POI once, in listing order."""
+        for i in range(7):
+            db.add(POI(
+                destination_id=created_destination.id,
+                name=f"Cursor POI {i}",
+                category=f"Category {i % 3}",
+                priority=i % 2,
+            ))
+        await db.flush()
+
+        url = f"/api/v1/destinations/{created_destination.id}/pois"
+        offset_data = (await client.get(f"{url}?limit=50")).json()
+        expected = [p["id"] for group in offset_data["items"] for p in group["pois"]]
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            response = await client.get(url, params=params)
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] == 7
+            seen += [p["id"] for group in data["items"] for p in group["pois"]]
+            pages += 1
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        assert pages == 3
+        assert seen == expected
+
+    @pytest.mark.asyncio
+    async def test_list_pois_invalid_cursor(
+        self,
+        client: AsyncClient,
+        created_destination: Destination
+    ):
+        """Test that a malformed cursor is rejected with 400."""
+        response = await client.get(
+            f"/api/v1/destinations/{created_destination.id}/pois?cursor=not-a-cursor"
+        )
+
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_stream_pois_ndjson_groups(
+        self,
+        client: AsyncClient,
+        db: AsyncSession,
+        created_destination: Destination
+    ):
+        """Test GET /api/v1/destinations/{destination_id}/pois/stream - NDJSON category groups."""
+        for i in range(5):
+            db.add(POI(destination_id=created_destination.id, name=f"Museum {i}", category="Museums"))
+        db.add(POI(destination_id=created_destination.id, name="Park", category="Parks"))
+        await db.flush()
+
+        response = await client.get(
+            f"/api/v1/destinations/{created_destination.id}/pois/stream?batch_size=2"
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        groups = [json.loads(line) for line in response.text.splitlines()]
+        assert [g["category"] for g in groups] == ["Museums", "Museums", "Museums", "Parks"]
+        assert [len(g["pois"]) for g in groups] == [2, 2, 1, 1]
+
 
 class TestPOIBulkSchedule:
     """Tests for bulk POI schedule update (N+1 fix)."""
@@ -792,3 +868,65 @@ class TestPOIBulkAdd:
         data2 = response2.json()
         assert data2["name"] == "Batch POI 2"
         assert abs(data2["latitude"] - 48.8584) < 0.001
+
+    @pytest.mark.asyncio
+    async def test_bulk_add_skips_places_already_on_destination(
+        self,
+        client: AsyncClient,
+        db: AsyncSession,
+        created_destination: Destination,
+    ):
+        """Test that bulk add skips existing place IDs and nearby near-duplicate names."""
+        db.add(POI(
+            destination_id=created_destination.id,
+            name="Musée du Louvre",
+            category="Museums",
+            coordinates=ST_SetSRID(ST_MakePoint(2.3376, 48.8606), 4326),
+        ))
+        await db.flush()
+
+        def details(name, lat, lng):
+            return {"name": name, "types": ["museum"], "geometry": {"location": {"lat": lat, "lng": lng}}}
+
+        fetched = {
+            "louvre": details("Musée du Louvre Museum", 48.8607, 2.3377),
+            "orsay": details("Musée d'Orsay", 48.8600, 2.3266),
+        }
+        with patch(
+            "app.services.google_places_service.GooglePlacesService.get_place_details_batch",
+            new=AsyncMock(return_value=fetched),
+        ):
+            response = await client.post(
+                f"/api/v1/destinations/{created_destination.id}/pois/suggestions/bulk-add",
+                json={"destination_id": created_destination.id, "place_ids": list(fetched)},
+            )
+
+        assert response.status_code == 200
+        assert [p["external_id"] for p in response.json()] == ["orsay"]
+
+    @pytest.mark.asyncio
+    async def test_bulk_add_skips_duplicates_within_the_request(
+        self,
+        client: AsyncClient,
+        created_destination: Destination,
+    ):
+        """Test that two similar nearby places in one request are added once."""
+        def details(name, lat, lng):
+            return {"name": name, "types": ["museum"], "geometry": {"location": {"lat": lat, "lng": lng}}}
+
+        fetched = {
+            "louvre": details("Musée du Louvre", 48.8606, 2.3376),
+            "louvre-pyramid": details("Musée du Louvre Pyramid", 48.8607, 2.3377),
+            "orsay": details("Musée d'Orsay", 48.8600, 2.3266),
+        }
+        with patch(
+            "app.services.google_places_service.GooglePlacesService.get_place_details_batch",
+            new=AsyncMock(return_value=fetched),
+        ):
+            response = await client.post(
+                f"/api/v1/destinations/{created_destination.id}/pois/suggestions/bulk-add",
+                json={"destination_id": created_destination.id, "place_ids": list(fetched)},
+            )
+
+        assert response.status_code == 200
+        assert [p["external_id"] for p in response.json()] == ["louvre", "orsay"]
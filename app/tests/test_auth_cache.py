@@ -0,0 +1,461 @@
+"""
+Tests for the principal and trip role caches, the in-memory revocation
+set and the MCP token verifier that uses them (no database required).
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from jose import jwt
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core import auth_cache
+from app.core.auth_cache import (
+    PRINCIPALS_CHANNEL,
+    REVOCATIONS_CHANNEL,
+    TRIP_ROLES_CHANNEL,
+    PrincipalCache,
+    RevocationSet,
+    TripRoleCache,
+    TripRoles,
+    invalidate_principal,
+    invalidate_trip_roles,
+    record_revocation,
+    start_invalidation_relay,
+    stop_invalidation_relay,
+)
+from app.core.pubsub import InProcessBroker
+from app.models.user import User
+
+SECRET = "test-secret-key-with-at-least-32-characters"
+
+
+def _user(user_id: int = 7, is_active: bool = True) -> User:
+    return User(
+        id=user_id, email=f"u{user_id}@example.com", name="U",
+        oauth_provider="google", oauth_id=str(user_id), is_active=is_active,
+    )
+
+
+def _row(jti, user_id=7, revoked_at=None, expires_in_days=30, created_at=None):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return SimpleNamespace(
+        jti=jti, user_id=user_id,
+        revoked_at=revoked_at or now,
+        expires_at=now + timedelta(days=expires_in_days),
+        created_at=created_at or now,
+    )
+
+
+class FakeRevocationDB:
+    """Session stand-in that returns revoked_tokens rows and counts queries."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        rows = self.rows
+        return SimpleNamespace(all=lambda: rows)
+
+
+class TestPrincipalCache:
+    """Tests for PrincipalCache."""
+
+    def test_put_get_and_invalidate(self):
+        """Test that snapshots are returned until invalidated."""
+        cache = PrincipalCache(ttl_seconds=60)
+        cache.put(_user())
+
+        assert cache.get(7)["email"] == "u7@example.com"
+        cache.invalidate(7)
+        assert cache.get(7) is None
+        assert cache.hits == 1 and cache.misses == 1
+
+    def test_entries_expire(self):
+        """Test that entries are dropped after the TTL."""
+        cache = PrincipalCache(ttl_seconds=60)
+        with patch("app.core.auth_cache.time.monotonic", return_value=1000.0):
+            cache.put(_user())
+        with patch("app.core.auth_cache.time.monotonic", return_value=1061.0):
+            assert cache.get(7) is None
+
+    def test_bounded_and_disableable(self):
+        """Test the LRU bound and that a zero TTL disables caching."""
+        cache = PrincipalCache(ttl_seconds=60, max_entries=2)
+        for user_id in (1, 2, 3):
+            cache.put(_user(user_id))
+        assert len(cache) == 2 and cache.get(1) is None
+
+        disabled = PrincipalCache(ttl_seconds=0)
+        disabled.put(_user())
+        assert disabled.get(7) is None
+
+    @pytest.mark.asyncio
+    async def test_load_attaches_cached_user_without_query(self):
+        """Test that a cache hit is merged into the session instead of selected."""
+        cache = PrincipalCache(ttl_seconds=60)
+        cache.put(_user())
+
+        class Session:
+            merged = None
+
+            async def merge(self, instance, load=True):
+                assert load is False
+                self.merged = instance
+                return instance
+
+            async def execute(self, stmt):  # pragma: no cover - must not be called
+                raise AssertionError("unexpected query")
+
+        session = Session()
+        user = await cache.load(session, 7)
+
+        assert user is session.merged
+        assert user.id == 7 and user.is_active
+
+
+class FakeMembershipDB:
+    """Session stand-in that returns (owner_id, user_id, role) join rows."""
+
+    def __init__(self, owner_id=1, members=None):
+        self.owner_id = owner_id
+        self.members = dict(members or {})
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        if self.owner_id is None:
+            rows = []
+        else:
+            rows = [
+                SimpleNamespace(owner_id=self.owner_id, user_id=uid, role=role)
+                for uid, role in self.members.items()
+            ] or [SimpleNamespace(owner_id=self.owner_id, user_id=None, role=None)]
+        return SimpleNamespace(all=lambda: rows)
+
+
+class TestTripRoleCache:
+    """Tests for TripRoleCache and TripRoles."""
+
+    def test_legacy_owner_fallback_is_opt_in(self):
+        """Test that Trip.user_id only counts as owner when asked to."""
+        roles = TripRoles(owner_id=1, roles={2: "editor"})
+
+        assert roles.role_for(2) == "editor"
+        assert roles.role_for(1) is None
+        assert roles.role_for(1, include_legacy_owner=True) == "owner"
+        assert roles.role_for(3, include_legacy_owner=True) is None
+
+    @pytest.mark.asyncio
+    async def test_one_query_per_trip_until_invalidated(self):
+        """Test that all members of a trip are served from a single load."""
+        cache = TripRoleCache(ttl_seconds=60)
+        db = FakeMembershipDB(members={1: "owner", 2: "viewer"})
+
+        for _ in range(3):
+            await cache.load(db, 10)
+        roles = await cache.load(db, 10)
+        assert db.queries == 1
+        assert roles.roles == {1: "owner", 2: "viewer"}
+
+        db.members[2] = "editor"
+        cache.invalidate(10)
+        assert (await cache.load(db, 10)).role_for(2) == "editor"
+        assert db.queries == 2
+
+    @pytest.mark.asyncio
+    async def test_trip_without_members_and_missing_trip(self):
+        """Test that memberless trips are cached and missing trips are not."""
+        cache = TripRoleCache(ttl_seconds=60)
+
+        empty = await cache.load(FakeMembershipDB(owner_id=4), 11)
+        assert empty == TripRoles(owner_id=4, roles={})
+
+        missing = FakeMembershipDB(owner_id=None)
+        assert await cache.load(missing, 12) is None
+        assert await cache.load(missing, 12) is None
+        assert missing.queries == 2
+
+    @pytest.mark.asyncio
+    async def test_mcp_verify_trip_access(self):
+        """Test MCP role checks, including legacy ownership, from the cache."""
+        from mcp_server import auth
+
+        db = FakeMembershipDB(owner_id=1, members={2: "viewer"})
+        with patch.object(auth, "_trip_roles", TripRoleCache(ttl_seconds=60)):
+            assert await auth.verify_trip_access(db, 10, 1, "owner")
+            assert await auth.verify_trip_access(db, 10, 2, "viewer")
+            assert not await auth.verify_trip_access(db, 10, 2, "editor")
+            assert not await auth.verify_trip_access(db, 10, 3)
+            assert db.queries == 1
+
+            auth._trip_roles.invalidate(10)
+            assert not await auth.verify_trip_access(FakeMembershipDB(owner_id=None), 10, 1)
+
+
+class TestTripRoleInvalidation:
+    """Tests for invalidate_trip_roles and the cross-process relay."""
+
+    @pytest.fixture
+    async def session(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with AsyncSession(engine) as session:
+            yield session
+        await engine.dispose()
+
+    @pytest.fixture
+    async def broker(self):
+        broker = InProcessBroker()
+        received = []
+
+        async def record(channel, message):
+            received.append(message)
+
+        for channel in (TRIP_ROLES_CHANNEL, PRINCIPALS_CHANNEL, REVOCATIONS_CHANNEL):
+            await broker.subscribe(channel, record)
+        await start_invalidation_relay(broker)
+        broker.received = received
+        yield broker
+        await stop_invalidation_relay()
+
+    async def _settle(self):
+        while auth_cache._publish_tasks:
+            await asyncio.gather(*auth_cache._publish_tasks)
+
+    @pytest.mark.asyncio
+    async def test_load_racing_an_invalidation_is_not_cached(self):
+        """Test that rows read before an invalidation do not outlive it."""
+        cache = TripRoleCache(ttl_seconds=60)
+        db = FakeMembershipDB(members={2: "editor"})
+        execute = db.execute
+
+        async def racing_execute(stmt):
+            result = await execute(stmt)
+            db.members.pop(2)
+            cache.invalidate(10)  # Membership committed while the query ran
+            return result
+
+        db.execute = racing_execute
+        assert (await cache.load(db, 10)).role_for(2) == "editor"
+        db.execute = execute
+        assert (await cache.load(db, 10)).role_for(2) is None
+        assert db.queries == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidated_again_after_commit_and_published(self, session, broker):
+        """Test that roles re-cached between flush and commit are dropped on commit."""
+        cache = TripRoleCache(ttl_seconds=60)
+        db = FakeMembershipDB(members={2: "editor"})
+        await cache.load(db, 10)
+
+        invalidate_trip_roles(session, 10)
+        assert cache.get(10) is None
+        await cache.load(db, 10)  # Another request still sees the uncommitted state
+        assert cache.get(10) is not None
+
+        await session.commit()
+        await self._settle()
+        assert cache.get(10) is None
+        assert broker.received == [{"trip_ids": [10]}]
+
+    @pytest.mark.asyncio
+    async def test_rollback_discards_pending_invalidation(self, session, broker):
+        """Test that nothing is published for a rolled back change."""
+        await session.execute(text("SELECT 1"))  # The membership change
+        invalidate_trip_roles(session, 10)
+        await session.rollback()
+        await session.commit()
+        await self._settle()
+
+        assert broker.received == []
+
+    @pytest.mark.asyncio
+    async def test_invalidation_from_another_process(self, broker):
+        """Test that a published invalidation drops the trip from every cache."""
+        backend, mcp = TripRoleCache(ttl_seconds=60), TripRoleCache(ttl_seconds=60)
+        for cache in (backend, mcp):
+            await cache.load(FakeMembershipDB(), 10)
+            await cache.load(FakeMembershipDB(), 11)
+
+        await broker.publish(TRIP_ROLES_CHANNEL, {"trip_ids": [10]})
+
+        assert backend.get(10) is None and mcp.get(10) is None
+        assert backend.get(11) is not None and mcp.get(11) is not None
+
+    @pytest.mark.asyncio
+    async def test_principal_invalidated_after_commit_and_published(self, session, broker):
+        """Test that a user change drops the cached row everywhere on commit."""
+        cache = PrincipalCache(ttl_seconds=60)
+        cache.put(_user(7))
+
+        invalidate_principal(session, 7)
+        assert cache.get(7) is None
+        cache.put(_user(7))  # Re-cached from the uncommitted state
+
+        await session.commit()
+        await self._settle()
+        assert cache.get(7) is None
+        assert broker.received == [{"user_ids": [7]}]
+
+    @pytest.mark.asyncio
+    async def test_revocation_applied_after_commit_and_published(self, session, broker):
+        """Test that a revoked token is rejected without waiting for a refresh."""
+        revocations, principals = RevocationSet(refresh_seconds=60), PrincipalCache(ttl_seconds=60)
+        principals.put(_user(7))
+        now = datetime.now(timezone.utc)
+        issued = int((now - timedelta(minutes=1)).timestamp())
+
+        await session.execute(text("SELECT 1"))  # The revoked_tokens insert
+        record_revocation(session, "tok-1", 7)
+        record_revocation(session, "revoke-all-8-1", 8, revoked_at=now)
+        assert not revocations.is_revoked({"jti": "tok-1"}, 7)
+
+        await session.commit()
+        await self._settle()
+        assert revocations.is_revoked({"jti": "tok-1"}, 7)
+        assert revocations.is_revoked({"jti": "tok-2", "iat": issued}, 8)
+        assert principals.get(7) is None
+        [message] = broker.received
+        assert [r["jti"] for r in message["revocations"]] == ["tok-1", "revoke-all-8-1"]
+
+    @pytest.mark.asyncio
+    async def test_rolled_back_revocation_is_not_applied(self, session, broker):
+        """Test that a revocation whose insert was rolled back is dropped."""
+        revocations = RevocationSet(refresh_seconds=60)
+        await session.execute(text("SELECT 1"))
+        record_revocation(session, "tok-1", 7)
+        await session.rollback()
+        await session.commit()
+        await self._settle()
+
+        assert not revocations.is_revoked({"jti": "tok-1"}, 7)
+        assert broker.received == []
+
+    @pytest.mark.asyncio
+    async def test_revocation_from_another_process(self, broker):
+        """Test that a published revocation reaches every set and drops the user."""
+        backend, mcp = RevocationSet(), RevocationSet()
+        principals = PrincipalCache(ttl_seconds=60)
+        principals.put(_user(7))
+        expires = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+
+        await broker.publish(REVOCATIONS_CHANNEL, {"revocations": [
+            {"jti": "tok-1", "user_id": 7, "revoked_at": None, "expires_at": expires},
+        ]})
+
+        assert backend.is_revoked({"jti": "tok-1"}, 7) and mcp.is_revoked({"jti": "tok-1"}, 7)
+        assert principals.get(7) is None
+
+
+class TestRevocationSet:
+    """Tests for RevocationSet."""
+
+    def test_jti_and_revoke_all(self):
+        """Test direct jti revocation and iat-based revoke-all."""
+        revocations = RevocationSet()
+        now = datetime.now(timezone.utc)
+        revocations.add("abc", 7)
+        revocations.add("revoke-all-7-1", 7, revoked_at=now.replace(tzinfo=None))
+
+        assert revocations.is_revoked({"jti": "abc"}, 8)
+        assert revocations.is_revoked({"iat": (now - timedelta(minutes=1)).timestamp()}, 7)
+        assert not revocations.is_revoked({"iat": (now + timedelta(minutes=1)).timestamp()}, 7)
+        assert not revocations.is_revoked({"jti": "other", "iat": now.timestamp()}, 8)
+
+    @pytest.mark.asyncio
+    async def test_refresh_is_throttled_and_incremental(self):
+        """Test one query per refresh interval and that new rows are picked up."""
+        revocations = RevocationSet(refresh_seconds=5)
+        db = FakeRevocationDB([_row("a")])
+
+        with patch("app.core.auth_cache.time.monotonic", return_value=100.0):
+            assert await revocations.refresh(db) == 1
+            assert await revocations.refresh(db) == 0
+        assert db.queries == 1
+
+        db.rows = [_row("a"), _row("b")]  # Overlap window re-reads "a"
+        with patch("app.core.auth_cache.time.monotonic", return_value=106.0):
+            await revocations.refresh(db)
+        assert db.queries == 2
+        assert revocations.is_revoked({"jti": "b"}, 7)
+
+    @pytest.mark.asyncio
+    async def test_expired_revocations_are_pruned(self):
+        """Test that revocations of already-expired tokens are dropped."""
+        revocations = RevocationSet()
+        await revocations.refresh(FakeRevocationDB([_row("old", expires_in_days=-1)]), force=True)
+
+        assert not revocations.is_revoked({"jti": "old"}, 7)
+
+
+class TestMCPTokenVerifier:
+    """Tests for TravelRuterTokenVerifier round trips."""
+
+    def _token(self, **claims):
+        now = datetime.now(timezone.utc)
+        payload = {"sub": "7", "scope": "mcp", "iat": now - timedelta(seconds=5),
+                   "exp": now + timedelta(hours=1), "jti": "tok-1"}
+        payload.update(claims)
+        return jwt.encode(payload, SECRET, algorithm="HS256")
+
+    @pytest.fixture
+    def verifier(self):
+        from mcp_server import auth
+        from mcp_server.config import mcp_settings
+
+        sessions = {"opened": 0}
+        db = FakeRevocationDB()
+
+        @asynccontextmanager
+        async def fake_session():
+            sessions["opened"] += 1
+            yield db
+
+        principals = PrincipalCache(ttl_seconds=30)
+        users = {7: _user(7)}
+
+        async def fake_load(db, user_id):
+            user = users.get(user_id)
+            if user is not None:
+                principals.put(user)
+            return user
+
+        with patch.object(mcp_settings, "JWT_SECRET_KEY", SECRET), \
+                patch.object(auth, "_principals", principals), \
+                patch.object(auth, "_revocations", RevocationSet(refresh_seconds=60)), \
+                patch.object(principals, "load", new=fake_load), \
+                patch("mcp_server.context.get_db_session", new=fake_session):
+            yield auth.TravelRuterTokenVerifier(), sessions, db, auth
+
+    @pytest.mark.asyncio
+    async def test_repeat_calls_skip_the_database(self, verifier):
+        """Test that only the first verification opens a session."""
+        token_verifier, sessions, _, _ = verifier
+        token = self._token()
+
+        for _ in range(5):
+            assert (await token_verifier.verify_token(token)).client_id == "7"
+        assert sessions["opened"] == 1
+
+    @pytest.mark.asyncio
+    async def test_revocation_after_refresh_and_explicit_invalidation(self, verifier):
+        """Test that revoked tokens and invalidated users are rejected."""
+        token_verifier, _, db, auth = verifier
+        token = self._token()
+        assert await token_verifier.verify_token(token)
+
+        db.rows = [_row("tok-1")]
+        await auth._revocations.refresh(db, force=True)
+        assert await token_verifier.verify_token(token) is None
+
+        other = self._token(jti="tok-2")
+        auth._principals.put(_user(7, is_active=False))
+        assert await token_verifier.verify_token(other) is None
+        auth._principals.invalidate(7)
+        assert await token_verifier.verify_token(other)
@@ -0,0 +1,229 @@
+"""
+Unit tests for the two-tier external API cache.
+Uses an in-process aiocache instance as a stand-in for the shared Redis L2.
+"""
+import asyncio
+from fnmatch import fnmatchcase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiocache import SimpleMemoryCache
+from aiocache.serializers import StringSerializer
+
+from app.core.cache import TieredCache, LRUMemoryCache, CACHE_NAMESPACE
+from app.services.google_places_service import GooglePlacesService
+
+
+class RedisPatternCache(SimpleMemoryCache):
+    """In-memory L2 that clears namespaces the way aiocache's Redis backend does."""
+
+    async def _clear(self, namespace=None, _conn=None):
+        if not namespace:
+            return await super()._clear(_conn=_conn)
+        for key in [k for k in self._cache if fnmatchcase(k, f"{namespace}:*")]:
+            await self._delete(key)
+        return True
+
+
+@pytest.fixture
+def shared_l2():
+    """Shared L2 stand-in (same serializer/namespace as the Redis backend)."""
+    return RedisPatternCache(serializer=StringSerializer(), namespace=CACHE_NAMESPACE)
+
+
+class TestLRUMemoryCache:
+    """Tests for the bounded L1 tier."""
+
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest untouched entry is evicted at capacity."""
+        l1 = LRUMemoryCache(max_entries=2)
+        l1.set("a", "1", ttl=60)
+        l1.set("b", "2", ttl=60)
+        assert l1.get("a") == "1"  # touch "a" so "b" becomes LRU
+        l1.set("c", "3", ttl=60)
+
+        assert len(l1) == 2
+        assert l1.get("b") is None
+        assert l1.get("a") == "1"
+        assert l1.get("c") == "3"
+
+    def test_expired_entry_is_dropped(self):
+        """Test that entries past their TTL are not returned."""
+        l1 = LRUMemoryCache(max_entries=10)
+        l1.set("a", "1", ttl=-1)
+        assert l1.get("a") is None
+
+    def test_clear_by_prefix(self):
+        """Test clearing only keys under one namespace prefix."""
+        l1 = LRUMemoryCache(max_entries=10)
+        l1.set("mapbox_route:x", "1", ttl=60)
+        l1.set("nearby:y", "2", ttl=60)
+        l1.clear("mapbox_route")
+        assert l1.get("mapbox_route:x") is None
+        assert l1.get("nearby:y") == "2"
+
+
+class TestTieredCache:
+    """Tests for L1/L2 interaction and counters."""
+
+    @pytest.mark.asyncio
+    async def test_memory_only_roundtrip(self):
+        """Test get/set without a shared tier."""
+        cache = TieredCache(l1_max_entries=10)
+        assert await cache.get("mapbox_route:a") is None
+        await cache.set("mapbox_route:a", {"distance_meters": 10.0})
+        assert await cache.get("mapbox_route:a") == {"distance_meters": 10.0}
+
+        stats = cache.stats()
+        assert stats["backend"] == "memory"
+        ns = stats["namespaces"]["mapbox_route"]
+        assert ns["misses"] == 1
+        assert ns["l1_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_returns_copies(self):
+        """Test that mutating a returned value does not corrupt the cache."""
+        cache = TieredCache(l1_max_entries=10)
+        await cache.set("k:1", {"coords": [1, 2]})
+        value = await cache.get("k:1")
+        value["coords"].append(3)
+        assert await cache.get("k:1") == {"coords": [1, 2]}
+
+    @pytest.mark.asyncio
+    async def test_workers_share_l2(self, shared_l2):
+        """Test that a value written by one worker is an L2 hit in another."""
+        worker_a = TieredCache(l2=shared_l2, l1_max_entries=10, l1_ttl=60)
+        worker_b = TieredCache(l2=shared_l2, l1_max_entries=10, l1_ttl=60)
+
+        await worker_a.set("gmaps_route:x", {"duration_seconds": 42}, ttl=1800)
+
+        assert await worker_b.get("gmaps_route:x") == {"duration_seconds": 42}
+        assert await worker_b.get("gmaps_route:x") == {"duration_seconds": 42}
+
+        ns = worker_b.stats()["namespaces"]["gmaps_route"]
+        assert ns["l2_hits"] == 1
+        assert ns["l1_hits"] == 1
+        assert ns["hit_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_clear_namespace_reaches_l2(self, shared_l2):
+        """Test that clearing a namespace drops it from both tiers."""
+        cache = TieredCache(l2=shared_l2, l1_max_entries=10, l1_ttl=60)
+        await cache.set("nearby:a", [1])
+        await cache.set("autocomplete:b", [2])
+
+        await cache.clear("nearby")
+
+        assert await cache.get("nearby:a") is None
+        assert await cache.get("autocomplete:b") == [2]
+
+    @pytest.mark.asyncio
+    async def test_full_clear_reaches_l2(self, shared_l2):
+        """Test that clearing without a namespace drops every app key from L2."""
+        cache = TieredCache(l2=shared_l2, l1_max_entries=10, l1_ttl=60)
+        await cache.set("nearby:a", [1])
+        await cache.set("autocomplete:b", [2])
+        await shared_l2.set("other_app", "x", namespace="")
+
+        await cache.clear()
+        other = TieredCache(l2=shared_l2, l1_max_entries=10)
+
+        assert await other.get("nearby:a") is None
+        assert await other.get("autocomplete:b") is None
+        assert await shared_l2.get("other_app", namespace="") == "x"
+
+    @pytest.mark.asyncio
+    async def test_l2_failure_degrades_to_miss(self):
+        """Test that an unreachable L2 counts an error and behaves as a miss."""
+
+        class BrokenL2:
+            namespace = CACHE_NAMESPACE
+
+            async def get(self, key):
+                raise ConnectionError("down")
+
+            async def set(self, key, value, ttl=None):
+                raise ConnectionError("down")
+
+        cache = TieredCache(l2=BrokenL2(), l1_max_entries=10, l1_ttl=60)
+        await cache.set("mapbox_route:a", {"v": 1})
+        cache.l1.clear()
+
+        assert await cache.get("mapbox_route:a") is None
+        assert cache.stats()["namespaces"]["mapbox_route"]["errors"] == 2
+
+
+class TestSingleFlight:
+    """Tests for get_or_set request coalescing."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_load_once(self):
+        """Test that concurrent misses for one key make a single upstream call."""
+        cache = TieredCache(l1_max_entries=10)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"distance_meters": 1.0}
+
+        results = await asyncio.gather(
+            *[cache.get_or_set("mapbox_route:a", loader, ttl=60) for _ in range(5)]
+        )
+
+        assert calls == 1
+        assert all(r == {"distance_meters": 1.0} for r in results)
+        ns = cache.stats()["namespaces"]["mapbox_route"]
+        assert ns["coalesced"] == 4
+        assert ns["loads"] == 1
+
+        # Subsequent call is a plain cache hit
+        assert await cache.get_or_set("mapbox_route:a", loader) == {"distance_meters": 1.0}
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_loader_error_propagates_and_is_not_cached(self):
+        """Test that a failed load reaches all waiters and a retry reloads."""
+        cache = TieredCache(l1_max_entries=10)
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(
+            *[cache.get_or_set("k:a", failing) for _ in range(3)],
+            return_exceptions=True,
+        )
+        assert calls == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        async def ok():
+            return 7
+
+        assert await cache.get_or_set("k:a", ok) == 7
+
+    @pytest.mark.asyncio
+    async def test_concurrent_place_lookups_share_one_request(self):
+        """Test that identical concurrent Places lookups make one HTTP request."""
+        requests = 0
+
+        async def fake_get(url, params=None):
+            nonlocal requests
+            requests += 1
+            await asyncio.sleep(0.01)
+            return MagicMock(json=lambda: {"status": "OK", "result": {"name": params["place_id"]}})
+
+        client = MagicMock(get=fake_get)
+        with patch("app.core.cache.cache", TieredCache(l1_max_entries=10)), \
+                patch("app.services.google_places_service.settings.GOOGLE_MAPS_API_KEY", "key"), \
+                patch("app.services.google_places_service.get_http_client", AsyncMock(return_value=client)):
+            results = await asyncio.gather(
+                *[GooglePlacesService.get_place_details_for_poi("abc") for _ in range(4)]
+            )
+
+        assert requests == 1
+        assert results == [{"name": "abc"}] * 4
@@ -0,0 +1,132 @@
+"""
+Unit tests for the shared geodesic helpers (no database required).
+"""
+import numpy as np
+import pytest
+
+from app.core.geodesic import (
+    SPEED_MODELS,
+    NeighbourGrid,
+    distance_matrix_km,
+    distance_matrix_m,
+    distances_from_km,
+    estimate_travel_seconds,
+    haversine_km,
+    path_leg_distances_km,
+    travel_matrix,
+)
+
+PARIS = (48.8566, 2.3522)
+LONDON = (51.5074, -0.1278)
+MADRID = (40.4168, -3.7038)
+EIFFEL = (48.8584, 2.2945)
+LOUVRE = (48.8606, 2.3376)
+
+
+class TestHaversine:
+    """Tests for scalar and vectorized distances."""
+
+    def test_scalar_known_distance(self):
+        """Test Paris-London is about 344 km."""
+        assert 340 < haversine_km(*PARIS, *LONDON) < 348
+
+    def test_same_point_is_zero(self):
+        """Test that identical points are exactly 0 apart."""
+        assert haversine_km(*PARIS, *PARIS) == 0.0
+
+    def test_matrix_matches_scalar(self):
+        """Test that every matrix cell matches the scalar formula."""
+        points = [PARIS, LONDON, MADRID, EIFFEL]
+        matrix = distance_matrix_km(points, dtype=np.float64)
+
+        assert matrix.shape == (4, 4)
+        for i, a in enumerate(points):
+            for j, b in enumerate(points):
+                assert matrix[i, j] == pytest.approx(haversine_km(*a, *b), rel=1e-9)
+
+    def test_matrix_is_compact_symmetric_with_zero_diagonal(self):
+        """Test default dtype, symmetry and exact zero diagonal."""
+        matrix = distance_matrix_m([PARIS, LONDON, MADRID])
+        assert matrix.dtype == np.float32
+        assert np.all(np.diag(matrix) == 0.0)
+        np.testing.assert_allclose(matrix, matrix.T)
+
+    def test_rectangular_matrix(self):
+        """Test separate origins and destinations."""
+        matrix = distance_matrix_km([PARIS], [LONDON, MADRID])
+        assert matrix.shape == (1, 2)
+        assert matrix[0, 0] == pytest.approx(haversine_km(*PARIS, *LONDON), rel=1e-6)
+
+    def test_distances_from_point(self):
+        """Test one-to-many distances."""
+        distances = distances_from_km(*PARIS, [LONDON, PARIS])
+        assert distances[0] == pytest.approx(haversine_km(*PARIS, *LONDON))
+        assert distances[1] == 0.0
+
+    def test_path_legs(self):
+        """Test consecutive leg distances along a path."""
+        legs = path_leg_distances_km([PARIS, LONDON, MADRID])
+        assert len(legs) == 2
+        assert legs[1] == pytest.approx(haversine_km(*LONDON, *MADRID))
+        assert len(path_leg_distances_km([PARIS])) == 0
+
+    def test_rejects_malformed_points(self):
+        """Test that non-pair input raises ValueError."""
+        with pytest.raises(ValueError):
+            distance_matrix_m([(1.0, 2.0, 3.0)])
+
+    def test_empty_input(self):
+        """Test that empty inputs give empty matrices."""
+        assert distance_matrix_m([]).shape == (0, 0)
+
+
+class TestTravelMatrix:
+    """Tests for speed models and the travel matrix."""
+
+    def test_profile_speeds(self):
+        """Test per-profile durations and walking fallback for unknown profiles."""
+        assert estimate_travel_seconds(1400, "foot-walking") == pytest.approx(1000)
+        assert estimate_travel_seconds(830, "driving-car") == pytest.approx(100)
+        assert estimate_travel_seconds(1400, "unknown") == pytest.approx(1000)
+
+    def test_durations_follow_profile(self):
+        """Test that durations are distances divided by the profile speed."""
+        estimate = travel_matrix([EIFFEL, LOUVRE], "cycling-regular", dtype=np.float64)
+        speed = SPEED_MODELS["cycling-regular"].speed_mps
+        assert estimate.durations[0, 1] == pytest.approx(estimate.distances[0, 1] / speed)
+        assert estimate.durations[0, 0] == 0.0
+
+    def test_to_nested(self):
+        """Test conversion to the id-keyed dict shape used by the API."""
+        estimate = travel_matrix([EIFFEL, LOUVRE], "foot-walking", dtype=np.float64)
+        durations, distances = estimate.to_nested(["a", "b"])
+
+        assert set(durations) == {"a", "b"}
+        assert durations["a"]["a"] == 0.0
+        assert distances["a"]["b"] == pytest.approx(haversine_km(*EIFFEL, *LOUVRE) * 1000)
+        assert isinstance(distances["a"]["b"], float)
+
+
+class TestNeighbourGrid:
+    """Tests for the fixed-radius neighbour index."""
+
+    def test_candidates_cover_every_neighbour(self):
+        """Test that no point within the radius is missed, including across the antimeridian."""
+        rng = np.random.default_rng(0)
+        points = np.column_stack((rng.uniform(-60, 60, 400), rng.uniform(-180, 180, 400)))
+        points[:2] = [(10.0, 179.999), (10.0, -179.999)]
+        radius = 500_000.0
+        grid = NeighbourGrid(points, radius)
+        exact = distance_matrix_m(points, dtype=np.float64) <= radius
+
+        for i in range(len(points)):
+            candidates = grid.candidates(i)
+            assert set(np.flatnonzero(exact[i])) <= set(candidates)
+            assert candidates == sorted(candidates)
+        assert 1 in grid.candidates(0)
+
+    def test_max_distance_inverts_speed_model(self):
+        """Test that the reachable distance matches the travel time estimate."""
+        model = SPEED_MODELS["foot-walking"]
+        assert model.seconds(model.max_distance_m(900)) == pytest.approx(900)
+        assert model.max_distance_m(-1) == 0.0
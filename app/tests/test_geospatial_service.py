@@ -8,7 +8,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from geoalchemy2.elements import WKTElement
 
-from app.services.geospatial_service import GeospatialService
+from app.services.geospatial_service import GeospatialService, PlaceCandidate
 from app.models.poi import POI
 from app.models.accommodation import Accommodation
 from app.models.destination import Destination
@@ -411,6 +411,57 @@ class TestWalkableRadius:
         assert pois == []
 
 
+class TestMatchExistingPOIs:
+    """Tests for GeospatialService.match_existing_pois."""
+
+    def test_single_statement_uses_spatial_index_operators(self):
+        """Test that the batch is one query using ST_DWithin, KNN ordering and trigram similarity."""
+        from sqlalchemy.dialects import postgresql
+
+        stmt = GeospatialService.match_candidates_query(
+            1, [PlaceCandidate("Louvre", 48.8606, 2.3376, "place-1"), PlaceCandidate("No location")],
+        )
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+        assert sql.count("VALUES") == 1
+        assert "ST_DWithin(pois.coordinates" in sql
+        assert "ORDER BY pois.coordinates <->" in sql
+        assert "similarity(lower(pois.name)" in sql
+
+    @pytest.fixture
+    async def destination(self, db: AsyncSession, created_trip: Trip):
+        dest = Destination(
+            trip_id=created_trip.id, city_name="Paris", country="France",
+            arrival_date=created_trip.start_date, departure_date=created_trip.end_date, order_index=0,
+        )
+        db.add(dest)
+        await db.flush()
+        db.add_all([
+            POI(destination_id=dest.id, name="Musée du Louvre", category="Museums",
+                coordinates=GeospatialService.create_point(48.8606, 2.3376)),
+            POI(destination_id=dest.id, name="Tour Eiffel", category="Sights", external_id="eiffel",
+                coordinates=GeospatialService.create_point(48.8584, 2.2945)),
+        ])
+        await db.flush()
+        return dest
+
+    @pytest.mark.asyncio
+    async def test_matches_by_place_id_and_by_nearby_similar_name(self, db: AsyncSession, destination):
+        """Test that duplicates are found by external_id or by location plus fuzzy name."""
+        matches = await GeospatialService.match_existing_pois(db, destination.id, [
+            PlaceCandidate("Eiffel Tower", 48.8584, 2.2945, "eiffel"),
+            PlaceCandidate("Musee du Louvre", 48.8607, 2.3377, "louvre-google"),
+            PlaceCandidate("Café Marly", 48.8607, 2.3377, "marly"),
+            PlaceCandidate("Musée du Louvre", 48.8738, 2.2950, "far-away"),
+            PlaceCandidate("Unlocated"),
+        ], origin=(48.8566, 2.3522))
+
+        assert [m.is_duplicate for m in matches] == [True, True, False, False, False]
+        assert matches[1].existing_distance_m < 50
+        assert matches[0].distance_km == pytest.approx(4.2, abs=0.3)
+        assert matches[4].distance_km is None
+
+
 class TestGeospatialRealWorldScenarios:
     """Tests with real-world coordinate scenarios."""
 
@@ -0,0 +1,152 @@
+"""
+Tests for the Google Maps encoded polyline codec.
+"""
+import gc
+import logging
+import random
+import time
+
+import numpy as np
+import pytest
+
+from app.services.google_maps_routes_service import (
+    decode_polyline,
+    decode_polyline_array,
+    encode_polyline,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _reference_decode(encoded: str) -> list[tuple[float, float]]:
+    """Character-by-character decoder (the original implementation)."""
+    coordinates = []
+    index = lat = lng = 0
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1f) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coordinates.append((lng / 1e5, lat / 1e5))
+    return coordinates
+
+
+def _reference_encode(coordinates) -> str:
+    """Per-value encoder matching the published algorithm."""
+    chunks = []
+    prev_lat = prev_lng = 0
+    for lng, lat in coordinates:
+        lat_i, lng_i = round(lat * 1e5), round(lng * 1e5)
+        for value in (lat_i - prev_lat, lng_i - prev_lng):
+            value = ~(value << 1) if value < 0 else value << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        prev_lat, prev_lng = lat_i, lng_i
+    return "".join(chunks)
+
+
+def _random_route(rng: random.Random, n_points: int) -> list[tuple[float, float]]:
+    """Random walk with small steps and occasional long jumps, in valid lon/lat ranges."""
+    lon, lat = rng.uniform(-180, 180), rng.uniform(-90, 90)
+    points = []
+    for _ in range(n_points):
+        step = 5.0 if rng.random() < 0.05 else 0.002
+        lon = min(180.0, max(-180.0, lon + rng.uniform(-step, step)))
+        lat = min(90.0, max(-90.0, lat + rng.uniform(-step, step)))
+        points.append((round(lon, 5), round(lat, 5)))
+    return points
+
+
+class TestPolylineCodec:
+    """Property tests against the reference implementation."""
+
+    def test_google_example(self):
+        """Test the example from the algorithm documentation."""
+        encoded = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+        coords = [(-120.2, 38.5), (-120.95, 40.7), (-126.453, 43.252)]
+
+        assert decode_polyline(encoded) == coords
+        assert encode_polyline(coords) == encoded
+        assert decode_polyline_array(encoded).shape == (3, 2)
+
+    @pytest.mark.parametrize("seed", range(25))
+    def test_matches_reference(self, seed):
+        """Test that random routes encode and decode exactly like the reference."""
+        rng = random.Random(seed)
+        route = _random_route(rng, rng.randint(1, 400))
+
+        encoded = encode_polyline(route)
+
+        assert encoded == _reference_encode(route)
+        assert decode_polyline(encoded) == _reference_decode(encoded)
+        assert decode_polyline_array(encoded).tolist() == [list(c) for c in route]
+
+    def test_extremes_and_arrays(self):
+        """Test boundary coordinates, repeated points and ndarray input."""
+        route = [(-180.0, -90.0), (180.0, 90.0), (180.0, 90.0), (0.0, 0.0), (1e-5, -1e-5)]
+
+        encoded = encode_polyline(np.array(route))
+
+        assert encoded == _reference_encode(route)
+        assert decode_polyline(encoded) == _reference_decode(encoded) == route
+
+    def test_empty(self):
+        """Test that empty input round-trips."""
+        assert encode_polyline([]) == ""
+        assert decode_polyline("") == []
+        assert decode_polyline_array("").shape == (0, 2)
+
+    @pytest.mark.parametrize("encoded", ["_p~iF~ps|U_", "_p~iF", "_p~iF ps|U", "_p~iF~ps|Ué"])
+    def test_malformed(self, encoded):
+        """Test that truncated or invalid strings raise ValueError."""
+        with pytest.raises(ValueError):
+            decode_polyline_array(encoded)
+
+
+@pytest.mark.slow
+class TestPolylineCodecBenchmark:
+    """Runtime against the reference implementation on a 50k-point route."""
+
+    def test_benchmark_50k_points(self):
+        """Test identical output; the timings are logged, not asserted."""
+        route = _random_route(random.Random(50), 50_000)
+        encoded = _reference_encode(route)
+        # Garbage from earlier tests would otherwise be collected mid-timing
+        gc.collect()
+
+        started = time.perf_counter()
+        reference = _reference_decode(encoded)
+        reference_decode = time.perf_counter() - started
+
+        started = time.perf_counter()
+        decoded = decode_polyline_array(encoded)
+        decode_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        _reference_encode(route)
+        reference_encode = time.perf_counter() - started
+
+        started = time.perf_counter()
+        reencoded = encode_polyline(decoded)
+        encode_seconds = time.perf_counter() - started
+
+        timings = (
+            f"50k points ({len(encoded)} chars): decode {reference_decode * 1000:.1f} ms -> "
+            f"{decode_seconds * 1000:.1f} ms ({reference_decode / decode_seconds:.1f}x), "
+            f"encode {reference_encode * 1000:.1f} ms -> "
+            f"{encode_seconds * 1000:.1f} ms ({reference_encode / encode_seconds:.1f}x)"
+        )
+        logger.info(timings)
+        assert decoded.tolist() == [list(c) for c in reference]
+        assert reencoded == encoded
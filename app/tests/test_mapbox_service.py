@@ -2,10 +2,14 @@
 Unit tests for Mapbox service with comprehensive mocking.
 Tests all Mapbox API integration scenarios including error handling.
 """
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import httpx
 
+from app.core.resilience import mapbox_coalescer
+
 from app.services.mapbox_service import (
     MapboxService,
     MapboxServiceError,
@@ -498,3 +502,110 @@ class TestMapboxRouteResult:
         assert result.duration_seconds == 567.8
         assert result.geometry["type"] == "LineString"
         assert len(result.waypoints) == 1
+
+
+class TestMapboxRequestCoalescing:
+    """Tests for deduplicating concurrent identical route requests."""
+
+    @pytest.fixture
+    def route_result(self) -> MapboxRouteResult:
+        return MapboxRouteResult(
+            distance_meters=1000.0,
+            duration_seconds=120.0,
+            geometry={"type": "LineString", "coordinates": [[0, 0], [1, 1]]},
+            waypoints=[],
+        )
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_upstream_call(self, route_result):
+        """Test that identical concurrent requests make one upstream call."""
+        service = MapboxService(access_token="test_token")
+        mapbox_coalescer.reset()
+
+        async def slow_request(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return route_result
+
+        with patch("app.services.mapbox_service.get_cached", AsyncMock(return_value=None)), \
+                patch.object(service, "_request_route", AsyncMock(side_effect=slow_request)) as upstream:
+            results = await asyncio.gather(*[
+                service.get_route(
+                    origin=(2.35221, 48.85661),
+                    # Differs below the ~11m rounding, so it shares the key
+                    destination=(2.29451 + i * 1e-6, 48.85841),
+                    profile=MapboxRoutingProfile.DRIVING_TRAFFIC,
+                )
+                for i in range(4)
+            ])
+
+        assert upstream.await_count == 1
+        assert all(r is route_result for r in results)
+        stats = mapbox_coalescer.stats()
+        assert stats["upstream_calls"] == 1
+        assert stats["coalesced"] == 3
+        assert stats["inflight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_profiles_are_not_coalesced(self, route_result):
+        """Test that requests with different keys each go upstream."""
+        service = MapboxService(access_token="test_token")
+        mapbox_coalescer.reset()
+
+        with patch("app.services.mapbox_service.get_cached", AsyncMock(return_value=None)), \
+                patch.object(service, "_request_route", AsyncMock(return_value=route_result)) as upstream:
+            await asyncio.gather(
+                service.get_route((2.35, 48.85), (2.29, 48.85), MapboxRoutingProfile.WALKING),
+                service.get_route((2.35, 48.85), (2.29, 48.85), MapboxRoutingProfile.CYCLING),
+            )
+
+        assert upstream.await_count == 2
+        assert mapbox_coalescer.stats()["coalesced"] == 0
+
+    @pytest.mark.asyncio
+    async def test_upstream_error_reaches_all_waiters(self):
+        """Test that a failed shared request raises for every caller."""
+        service = MapboxService(access_token="test_token")
+
+        async def failing(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            raise MapboxServiceError("No routes found")
+
+        with patch("app.services.mapbox_service.get_cached", AsyncMock(return_value=None)), \
+                patch.object(service, "_request_route", AsyncMock(side_effect=failing)) as upstream:
+            results = await asyncio.gather(
+                *[service.get_route((1.0, 2.0), (3.0, 4.0)) for _ in range(3)],
+                return_exceptions=True,
+            )
+
+        assert upstream.await_count == 1
+        assert all(isinstance(r, MapboxServiceError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_waiters(self, route_result):
+        """Test that waiters re-issue the request when the leading caller is cancelled."""
+        service = MapboxService(access_token="test_token")
+        mapbox_coalescer.reset()
+
+        async def slow_request(*args, **kwargs):
+            await asyncio.sleep(0.02)
+            return route_result
+
+        with patch("app.services.mapbox_service.get_cached", AsyncMock(return_value=None)), \
+                patch("app.services.mapbox_service.set_cached", AsyncMock()), \
+                patch.object(service, "_request_route", AsyncMock(side_effect=slow_request)) as upstream:
+            leader = asyncio.create_task(service.get_route((1.0, 2.0), (3.0, 4.0)))
+            await asyncio.sleep(0.005)
+            waiters = [asyncio.create_task(service.get_route((1.0, 2.0), (3.0, 4.0))) for _ in range(3)]
+            await asyncio.sleep(0.005)
+            leader.cancel()
+
+            results = await asyncio.gather(*waiters)
+
+        assert leader.cancelled()
+        assert all(r is route_result for r in results)
+        # The cancelled call plus one retry shared by the three waiters
+        assert upstream.await_count == 2
+        stats = mapbox_coalescer.stats()
+        assert stats["upstream_calls"] == 2
+        assert stats["coalesced"] == 2
+        assert stats["inflight"] == 0
@@ -0,0 +1,257 @@
+"""
+Tests for the MCP smart scheduler's incremental scoring engine.
+"""
+import gc
+import logging
+import random
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from mcp_server.schemas.scheduler import AccommodationInput, DayInput, POIInput
+from mcp_server.tools.scheduler import (
+    ScheduleEngine,
+    build_estimated_matrix,
+    calculate_day_travel_time,
+    cluster_pois_by_travel_time,
+    estimate_travel_time,
+    get_travel_time_from_matrix,
+    plan_schedule,
+    score_poi_for_day,
+)
+
+CATEGORIES = ["Sights", "Museums", "Food", "Cafe", "Nature", "Shopping"]
+CONSTRAINTS = {"max_food_per_day": 2, "max_hours_per_day": 8, "max_travel_minutes_in_cluster": 15}
+
+logger = logging.getLogger(__name__)
+
+
+def _make_trip(n_pois: int, n_days: int, seed: int):
+    rng = random.Random(seed)
+    pois = []
+    for i in range(n_pois):
+        located = rng.random() > 0.1
+        pois.append(POIInput(
+            id=i + 1,
+            name=f"POI {i + 1}",
+            category=rng.choice(CATEGORIES),
+            latitude=48.85 + rng.uniform(-0.04, 0.04) if located else None,
+            longitude=2.35 + rng.uniform(-0.06, 0.06) if located else None,
+            dwell_time=rng.choice([30, 45, 60, 90, 120]),
+            is_anchored=i % 17 == 0,
+            anchored_time=f"{9 + i % 8:02d}:00" if i % 17 == 0 else None,
+            scheduled_date=f"2026-05-{1 + i % n_days:02d}" if i % 17 == 0 else None,
+        ))
+    days = [DayInput(date=f"2026-05-{d + 1:02d}", day_number=d + 1) for d in range(n_days)]
+    accommodations = {
+        d + 1: AccommodationInput(
+            day_number=d + 1, name=f"Hotel {d // 3}",
+            latitude=48.85 + 0.01 * (d // 3), longitude=2.35,
+        )
+        for d in range(n_days) if d != 1  # day 2 has no accommodation
+    }
+    return pois, days, accommodations
+
+
+def _legacy_plan(pois, days, accommodations_by_day, constraints, matrix, profile="foot-walking"):
+    """The pre-engine scheduling loop: full day re-walk per (POI, day) score."""
+    schedule: Dict[str, List[POIInput]] = {day.date: [] for day in days}
+    for poi in pois:
+        if poi.is_anchored and poi.anchored_time and poi.scheduled_date in schedule:
+            schedule[poi.scheduled_date].append(poi)
+    for day in days:
+        schedule[day.date].sort(key=lambda p: p.anchored_time or "23:59")
+
+    clusters = cluster_pois_by_travel_time(
+        [p for p in pois if not p.is_anchored],
+        constraints["max_travel_minutes_in_cluster"], matrix, profile,
+    )
+    matrix = matrix or build_estimated_matrix(pois, list(accommodations_by_day.values()), profile)
+    for poi in (p for cluster in clusters for p in cluster):
+        best_day, best_score = None, float("-inf")
+        for day in days:
+            score = score_poi_for_day(
+                poi, schedule[day.date], constraints,
+                accommodations_by_day.get(day.day_number), matrix, profile,
+            )
+            if score > best_score:
+                best_score, best_day = score, day
+        schedule[best_day.date].append(poi)
+    return schedule, matrix
+
+
+def _legacy_clusters(pois, max_minutes, matrix, profile="foot-walking"):
+    """The original all-pairs greedy clustering."""
+    clusters, assigned = [], set()
+    sorted_pois = sorted(pois, key=lambda p: 0 if p.latitude is not None and p.longitude is not None else 1)
+    for poi in sorted_pois:
+        if poi.id in assigned:
+            continue
+        cluster = [poi]
+        assigned.add(poi.id)
+        if poi.latitude is not None and poi.longitude is not None:
+            for other in sorted_pois:
+                if other.id in assigned or other.latitude is None or other.longitude is None:
+                    continue
+                seconds = get_travel_time_from_matrix(f"poi_{poi.id}", f"poi_{other.id}", matrix)
+                if seconds is None:
+                    seconds = estimate_travel_time(
+                        poi.latitude, poi.longitude, other.latitude, other.longitude, profile
+                    )
+                if seconds <= max_minutes * 60:
+                    cluster.append(other)
+                    assigned.add(other.id)
+        clusters.append(cluster)
+    return clusters
+
+
+def _ids(schedule):
+    return {date: [p.id for p in pois] for date, pois in schedule.items()}
+
+
+class TestScheduleEngine:
+    """Tests that the incremental engine reproduces the original scoring."""
+
+    @pytest.mark.parametrize("seed", range(4))
+    def test_matches_legacy_schedule(self, seed):
+        """Test same day assignment and order as the full re-walk scorer."""
+        pois, days, accommodations = _make_trip(40, 5, seed)
+
+        schedule, assignments, engine = plan_schedule(pois, days, accommodations, CONSTRAINTS)
+        legacy, matrix = _legacy_plan(pois, days, accommodations, CONSTRAINTS, None)
+
+        assert _ids(schedule) == _ids(legacy)
+        for d, day in enumerate(days):
+            assert engine.travel_minutes(d) == calculate_day_travel_time(
+                legacy[day.date], accommodations.get(day.day_number), matrix
+            )
+        assert len(assignments) == sum(len(v) for v in schedule.values())
+
+    def test_scores_match_score_poi_for_day(self):
+        """Test per-day scores against score_poi_for_day on a partially filled schedule."""
+        pois, days, accommodations = _make_trip(25, 4, 11)
+        matrix = build_estimated_matrix(pois, list(accommodations.values()))
+        engine = ScheduleEngine(pois, days, accommodations, matrix, CONSTRAINTS)
+        schedule: Dict[str, List[POIInput]] = {day.date: [] for day in days}
+
+        for i, poi in enumerate(pois[:15]):
+            d = i % len(days)
+            schedule[days[d].date].append(poi)
+            engine.add(poi, d)
+
+        for poi in pois[15:]:
+            scores = engine.score_days(poi)
+            for d, day in enumerate(days):
+                expected = score_poi_for_day(
+                    poi, schedule[day.date], CONSTRAINTS,
+                    accommodations.get(day.day_number), matrix,
+                )
+                assert scores[d] == pytest.approx(expected, abs=1e-9)
+
+    def test_provided_matrix_overrides_estimates(self):
+        """Test that provider durations are used for the cells they cover."""
+        pois, days, accommodations = _make_trip(6, 2, 3)
+        located = [p for p in pois if p.latitude is not None]
+        a, b = located[0], located[1]
+        matrix: Dict[str, Any] = {"durations": {f"poi_{a.id}": {f"poi_{b.id}": 1234.0}}}
+
+        engine = ScheduleEngine(pois, days, accommodations, matrix, CONSTRAINTS)
+
+        assert engine.travel[engine.node(a), engine.node(b)] == 1234.0
+        assert engine.travel[engine.node(b), engine.node(a)] != 1234.0
+
+
+def _cluster_ids(clusters):
+    return [[p.id for p in cluster] for cluster in clusters]
+
+
+class TestClusterPOIs:
+    """Tests that grid-based clustering reproduces the all-pairs clusters."""
+
+    @pytest.mark.parametrize("seed", range(5))
+    @pytest.mark.parametrize("profile", ["foot-walking", "driving-car"])
+    def test_matches_all_pairs_clustering(self, seed, profile):
+        """Test identical clusters, in order, on small random inputs."""
+        pois, _, _ = _make_trip(60, 5, seed)
+
+        for max_minutes in (5, 15, 40):
+            assert _cluster_ids(cluster_pois_by_travel_time(pois, max_minutes, None, profile)) == \
+                _cluster_ids(_legacy_clusters(pois, max_minutes, None, profile))
+
+    def test_provided_durations_override_distance(self):
+        """Test that matrix cells join far POIs and split near ones, as before."""
+        pois, _, _ = _make_trip(30, 3, 5)
+        located = [p for p in pois if p.latitude is not None]
+        far = max(located[1:], key=lambda p: abs(p.longitude - located[0].longitude))
+        matrix = {"durations": {
+            f"poi_{located[0].id}": {f"poi_{far.id}": 60.0, f"poi_{located[1].id}": 99999.0},
+            f"poi_{located[2].id}": {f"poi_{located[3].id}": None},
+        }}
+
+        clusters = cluster_pois_by_travel_time(pois, 10, matrix)
+
+        assert _cluster_ids(clusters) == _cluster_ids(_legacy_clusters(pois, 10, matrix))
+        assert far.id in _cluster_ids(clusters)[0]
+
+    def test_duplicate_ids_and_missing_coordinates(self):
+        """Test that repeated ids are clustered once and unlocated POIs stand alone."""
+        pois = [
+            POIInput(id=1, name="A", category="Sights", latitude=48.85, longitude=2.35),
+            POIInput(id=2, name="B", category="Sights"),
+            POIInput(id=1, name="A again", category="Sights", latitude=48.86, longitude=2.36),
+            POIInput(id=3, name="C", category="Sights", latitude=48.8501, longitude=2.3501),
+        ]
+
+        clusters = cluster_pois_by_travel_time(pois, 15, None)
+
+        assert _cluster_ids(clusters) == [[1, 3], [2]]
+        assert _cluster_ids(clusters) == _cluster_ids(_legacy_clusters(pois, 15, None))
+
+
+@pytest.mark.slow
+class TestScheduleEngineBenchmark:
+    """Runtime of the engine against the original scorer: 200 POIs over 14 days."""
+
+    def test_benchmark_200_pois_14_days(self):
+        """Test identical output; the timings are logged, not asserted."""
+        pois, days, accommodations = _make_trip(200, 14, 42)
+        matrix = build_estimated_matrix(pois, list(accommodations.values()))
+
+        started = time.perf_counter()
+        schedule, _, _ = plan_schedule(pois, days, accommodations, CONSTRAINTS, matrix)
+        engine_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        legacy, _ = _legacy_plan(pois, days, accommodations, CONSTRAINTS, matrix)
+        legacy_seconds = time.perf_counter() - started
+
+        timings = (
+            f"200 POIs x 14 days: full re-walk {legacy_seconds * 1000:.1f} ms, "
+            f"incremental engine {engine_seconds * 1000:.1f} ms "
+            f"({legacy_seconds / engine_seconds:.1f}x)"
+        )
+        logger.info(timings)
+        assert _ids(schedule) == _ids(legacy)
+
+    def test_benchmark_clustering_scales(self):
+        """Test grid clustering matches the all-pairs version; timings are logged."""
+        for n_pois in (300, 1200):
+            pois, _, _ = _make_trip(n_pois, 14, n_pois)
+            # Earlier benchmarks leave garbage whose collection would land in this timing
+            gc.collect()
+
+            started = time.perf_counter()
+            clusters = cluster_pois_by_travel_time(pois, 5, None)
+            grid_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            legacy = _legacy_clusters(pois, 5, None)
+            legacy_seconds = time.perf_counter() - started
+
+            timings = (
+                f"{n_pois} POIs clustering: all pairs {legacy_seconds * 1000:.1f} ms, "
+                f"grid {grid_seconds * 1000:.1f} ms"
+            )
+            logger.info(timings)
+            assert _cluster_ids(clusters) == _cluster_ids(legacy)
@@ -8,6 +8,7 @@ from decimal import Decimal
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from geoalchemy2.functions import ST_SetSRID, ST_MakePoint
 
 from app.models.trip import Trip
 from app.models.destination import Destination
@@ -289,6 +290,41 @@ class TestPOIModel:
         assert poi.files == [{"url": "http://example.com/photo1.jpg", "type": "image"}]
         assert poi.metadata_json["opening_hours"] == "9am-5pm"
 
+    @pytest.mark.asyncio
+    async def test_poi_generated_lat_lon(
+        self, db: AsyncSession, created_destination: Destination
+    ):
+        """Test that latitude/longitude follow coordinates without a re-query."""
+        poi = POI(
+            destination_id=created_destination.id,
+            name="Located POI",
+            category="Museum",
+            coordinates=ST_SetSRID(ST_MakePoint(2.3376, 48.8606), 4326),
+        )
+        db.add(poi)
+        await db.flush()
+
+        assert poi.latitude == pytest.approx(48.8606)
+        assert poi.longitude == pytest.approx(2.3376)
+
+        poi.coordinates = ST_SetSRID(ST_MakePoint(2.2945, 48.8584), 4326)
+        await db.flush()
+
+        assert poi.latitude == pytest.approx(48.8584)
+        assert poi.longitude == pytest.approx(2.2945)
+
+    @pytest.mark.asyncio
+    async def test_poi_without_coordinates_has_no_lat_lon(
+        self, db: AsyncSession, created_destination: Destination
+    ):
+        """Test that generated columns are NULL when coordinates are."""
+        poi = POI(destination_id=created_destination.id, name="Unlocated", category="Museum")
+        db.add(poi)
+        await db.flush()
+
+        assert poi.latitude is None
+        assert poi.longitude is None
+
 
 class TestAccommodationModel:
     """Tests for the Accommodation model."""
@@ -0,0 +1,217 @@
+"""
+Tests for NoteService.search_notes (full-text search with a trigram fallback).
+"""
+import logging
+import random
+import time
+
+import pytest
+from sqlalchemy import insert, or_, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.note import Note
+from app.models.trip import Trip
+from app.services.note_service import NoteService
+
+logger = logging.getLogger(__name__)
+
+
+def _compile(stmt) -> tuple[str, dict]:
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    return str(compiled), compiled.params
+
+
+class TestSearchQuery:
+    """Tests for the statement built by NoteService.build_search_query."""
+
+    def test_search_terms_drop_tsquery_syntax(self):
+        """Test that operators and punctuation cannot reach to_tsquery."""
+        assert NoteService.search_terms("Rome & (paint:*) | !café's_map") == ["rome", "paint", "café", "s", "map"]
+        assert NoteService.search_terms("!!") == []
+
+    def test_fulltext_query_uses_prefix_terms_and_index(self):
+        """Test that every word becomes a prefix term matched against search_vector."""
+        sql, params = _compile(NoteService.build_search_query("Rome paint", trip_id=3))
+
+        assert "rome:* & paint:*" in params.values()
+        assert "notes.search_vector @@ to_tsquery" in sql
+        assert "ts_rank(notes.search_vector" in sql
+        # Infix matches on titles only, through the trigram index
+        assert "notes.title ILIKE" in sql
+        assert "notes.content ILIKE" not in sql
+        assert "%Rome paint%" in params.values()
+
+    def test_snippets_only_computed_for_returned_page(self):
+        """Test that ts_headline sits outside the ranked, limited subquery."""
+        sql, params = _compile(NoteService.build_search_query("museum", limit=5))
+
+        outer, ranked = sql.split("JOIN (", 1)
+        assert "ts_headline(" in outer
+        assert "ts_headline" not in ranked
+        assert "LIMIT %(param_1)s" in ranked
+        assert params["param_1"] == 5
+
+    def test_snippet_content_is_escaped(self):
+        """Test that content is stripped of tags and HTML-escaped before ts_headline."""
+        sql, params = _compile(NoteService.build_search_query("museum"))
+
+        # Escaping wraps tag stripping, so it sees what the tag regex left over
+        assert "replace(replace(regexp_replace(regexp_replace(coalesce(notes.content" in sql
+        assert {"<[^>]*>", "&(?!#?[a-z0-9]+;)", "&amp;", "&lt;", "&gt;"} <= set(params.values())
+
+    def test_short_query_uses_trigram_fallback(self):
+        """Test that one or two letter queries rank by title similarity instead."""
+        sql, params = _compile(NoteService.build_search_query("ro", trip_id=3))
+
+        assert "word_similarity(%(word_similarity_1)s::VARCHAR, notes.title)" in sql
+        assert "notes.title ILIKE" in sql
+        assert params["word_similarity_1"] == "ro"
+        assert params["title_1"] == "%ro%"
+        assert "to_tsquery" not in sql
+        assert "NULL AS snippet" in sql
+
+    def test_filters_combine_with_search(self):
+        """Test that trip, destination, type and tag filters apply to both paths."""
+        for query in ("museum", "ro"):
+            sql, params = _compile(NoteService.build_search_query(
+                query, trip_id=3, destination_id=4, note_type="day", tags=["food"],
+            ))
+            assert "notes.trip_id = %(trip_id_1)s" in sql
+            assert "notes.destination_id = %(destination_id_1)s" in sql
+            assert "notes.note_type = %(note_type_1)s" in sql
+            assert "notes.tags && %(tags_1)s" in sql
+            assert (params["trip_id_1"], params["destination_id_1"], params["note_type_1"], params["tags_1"]) == (
+                3, 4, "day", ["food"],
+            )
+
+
+class TestSearchNotes:
+    """Tests for NoteService.search_notes against PostgreSQL."""
+
+    async def _add(self, db: AsyncSession, trip: Trip, **fields) -> Note:
+        note = Note(trip_id=trip.id, note_type="general", **fields)
+        db.add(note)
+        await db.flush()
+        return note
+
+    async def test_ranks_title_matches_first(self, db, trip_with_owner):
+        in_content = await self._add(db, trip_with_owner, title="Day two", content="<p>The Colosseum at dusk</p>")
+        in_title = await self._add(db, trip_with_owner, title="Colosseum tickets", content="Book ahead")
+        await self._add(db, trip_with_owner, title="Dinner", content="Pasta")
+
+        hits = await NoteService.search_notes(db, "colosseum", trip_id=trip_with_owner.id)
+
+        assert [h.note.id for h in hits] == [in_title.id, in_content.id]
+        assert hits[0].rank > hits[1].rank
+
+    async def test_prefix_matching_and_snippets(self, db, trip_with_owner):
+        note = await self._add(
+            db, trip_with_owner, title="Florence",
+            content="<p>We spent the <b>morning</b> looking at paintings in the Uffizi</p>",
+        )
+
+        hits = await NoteService.search_notes(db, "paint uffiz", trip_id=trip_with_owner.id)
+
+        assert [h.note.id for h in hits] == [note.id]
+        assert "<mark>paintings</mark>" in hits[0].snippet
+        assert "<b>" not in hits[0].snippet
+
+    async def test_snippet_escapes_malformed_markup(self, db, trip_with_owner):
+        await self._add(
+            db, trip_with_owner, title="Gallery",
+            content="<p>Tom &amp; Jerry at the gallery, R&D 1 < 2 <img src=x onerror=alert(1)",
+        )
+
+        hits = await NoteService.search_notes(db, "gallery", trip_id=trip_with_owner.id)
+
+        snippet = hits[0].snippet
+        assert "<img" not in snippet
+        assert "&lt;img" in snippet
+        assert "Tom &amp; Jerry" in snippet
+        assert "R&amp;D 1 &lt; 2" in snippet
+        assert "<mark>gallery</mark>" in snippet
+
+    async def test_title_infix_matches_rank_after_word_matches(self, db, trip_with_owner):
+        word = await self._add(db, trip_with_owner, title="Painting class", content=None)
+        infix = await self._add(db, trip_with_owner, title="Repainting the boat", content=None)
+        await self._add(db, trip_with_owner, title="Dinner", content="<p>The repainting took all day</p>")
+
+        hits = await NoteService.search_notes(db, "paint", trip_id=trip_with_owner.id)
+
+        assert [h.note.id for h in hits] == [word.id, infix.id]
+
+    async def test_short_query_falls_back_to_trigrams(self, db, trip_with_owner):
+        note = await self._add(db, trip_with_owner, title="Rome", content=None)
+        await self._add(db, trip_with_owner, title="Paris", content=None)
+
+        hits = await NoteService.search_notes(db, "ro", trip_id=trip_with_owner.id)
+
+        assert [h.note.id for h in hits] == [note.id]
+        assert hits[0].snippet is None
+
+    async def test_filters_still_apply(self, db, trip_with_owner):
+        tagged = await self._add(db, trip_with_owner, title="Gelato spots", tags=["food"])
+        await self._add(db, trip_with_owner, title="Gelato museum", tags=["culture"])
+
+        hits = await NoteService.search_notes(db, "gelato", trip_id=trip_with_owner.id, tags=["food"])
+
+        assert [h.note.id for h in hits] == [tagged.id]
+
+
+VOCABULARY = (
+    "museum beach train station hotel breakfast market castle river bridge "
+    "cathedral ticket walk ferry island sunset dinner wine coffee gallery "
+    "park hike tram bus airport harbour church plaza garden tower"
+).split()
+
+
+@pytest.mark.slow
+class TestNoteSearchBenchmark:
+    """Full-text search against the previous ILIKE scan on 100k notes."""
+
+    async def test_benchmark_100k_notes(self, db, trip_with_owner):
+        """Test identical matches for a whole-word query; the timings are logged."""
+        rng = random.Random(100)
+        rows = []
+        for i in range(100_000):
+            words = rng.choices(VOCABULARY, k=40)
+            if i % 2000 == 0:
+                words[rng.randrange(len(words))] = "zanzibar"
+            rows.append({
+                "trip_id": trip_with_owner.id,
+                "title": " ".join(rng.choices(VOCABULARY, k=3)),
+                "content": "<p>" + " ".join(words) + "</p>",
+                "note_type": "general",
+                "is_pinned": False,
+                "is_private": True,
+            })
+        await db.execute(insert(Note), rows)
+        await db.execute(text("ANALYZE notes"))
+
+        async def timed(stmt, note_id):
+            started = time.perf_counter()
+            ids = {note_id(row) for row in (await db.execute(stmt)).all()}
+            return ids, time.perf_counter() - started
+
+        # The query search_notes used to run
+        reference_ids, reference_seconds = await timed(
+            select(Note.id)
+            .where(Note.trip_id == trip_with_owner.id)
+            .where(or_(Note.title.ilike("%zanzibar%"), Note.content.ilike("%zanzibar%")))
+            .order_by(Note.is_pinned.desc(), Note.updated_at.desc())
+            .limit(100),
+            lambda row: row.id,
+        )
+        search_ids, search_seconds = await timed(
+            NoteService.build_search_query("zanzibar", trip_id=trip_with_owner.id, limit=100),
+            lambda row: row.Note.id,
+        )
+
+        timings = (
+            f"100k notes, {len(search_ids)} matches: ILIKE {reference_seconds * 1000:.1f} ms -> "
+            f"full-text {search_seconds * 1000:.1f} ms ({reference_seconds / search_seconds:.1f}x)"
+        )
+        logger.info(timings)
+        assert search_ids == reference_ids
+        assert len(search_ids) == 50
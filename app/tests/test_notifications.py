@@ -1,5 +1,14 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
 import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.database import Base
 from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
+from app.services import notification_service
 
 
 class TestNotifications:
@@ -128,3 +137,179 @@ class TestNotifications:
         # Unread count must be 0
         count_resp = await client.get("/api/v1/notifications/unread-count", headers=auth_headers)
         assert count_resp.json()["count"] == 0
+
+    async def test_list_notifications_cursor_pages(self, db, client, created_user, auth_headers):
+        start = datetime(2026, 1, 1)
+        for i in range(5):
+            db.add(Notification(
+                user_id=created_user.id, type="test", title=f"Notif {i}",
+                is_read=False, created_at=start + timedelta(minutes=i),
+            ))
+        await db.flush()
+
+        titles, cursor = [], None
+        while True:
+            url = "/api/v1/notifications/?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            data = (await client.get(url, headers=auth_headers)).json()
+            assert data["total"] == 5
+            assert data["unread_count"] == 5
+            titles += [n["title"] for n in data["notifications"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert titles == [f"Notif {i}" for i in reversed(range(5))]
+
+    async def test_list_notifications_rejects_bad_cursor(self, client, auth_headers):
+        resp = await client.get("/api/v1/notifications/?cursor=nope", headers=auth_headers)
+        assert resp.status_code == 400
+
+
+class CounterDB:
+    """In-memory SQLite with the notification tables."""
+
+    def __init__(self):
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+
+    async def __aenter__(self):
+        tables = [Notification.__table__, NotificationCounter.__table__]
+        async with self.engine.begin() as conn:
+            await conn.run_sync(lambda c: Base.metadata.create_all(c, tables=tables))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.engine.dispose()
+
+    def session(self) -> AsyncSession:
+        return AsyncSession(self.engine, expire_on_commit=False)
+
+    async def counters(self) -> dict[int, tuple[int, int]]:
+        async with self.session() as db:
+            rows = (await db.execute(select(NotificationCounter))).scalars().all()
+        return {c.user_id: (c.unread_count, c.total_count) for c in rows}
+
+
+@pytest.fixture
+def pushed_counts():
+    """Messages handed to the connection manager for users' sockets."""
+    sent = []
+
+    async def fake_push(user_id, data):
+        sent.append((user_id, data))
+
+    with patch.object(notification_service.manager, "push_to_user", new=fake_push):
+        yield sent
+
+
+async def _drain_pushes():
+    for task in list(notification_service._push_tasks):
+        await task
+
+
+class TestNotificationCounters:
+    """Unread and total counts are maintained with the notification writes."""
+
+    async def test_orm_writes_maintain_counters(self, pushed_counts):
+        async with CounterDB() as store:
+            async with store.session() as db:
+                db.add_all([
+                    Notification(user_id=1, type="test", title="A"),
+                    Notification(user_id=1, type="test", title="B"),
+                    Notification(user_id=1, type="test", title="Read", is_read=True),
+                    Notification(user_id=2, type="test", title="C"),
+                ])
+                await db.commit()
+            assert await store.counters() == {1: (2, 3), 2: (1, 1)}
+
+            async with store.session() as db:
+                a = (await db.execute(select(Notification).where(Notification.title == "A"))).scalar_one()
+                a.is_read = True
+                await db.flush()
+                read = (await db.execute(select(Notification).where(Notification.title == "Read"))).scalar_one()
+                await db.delete(read)
+                await db.commit()
+            assert await store.counters() == {1: (1, 2), 2: (1, 1)}
+
+    async def test_rewriting_same_read_state_is_not_counted(self, pushed_counts):
+        async with CounterDB() as store:
+            async with store.session() as db:
+                n = Notification(user_id=1, type="test", title="A", is_read=True)
+                db.add(n)
+                await db.flush()
+                n.is_read = True
+                n.title = "A2"
+                await db.commit()
+            assert await store.counters() == {1: (0, 1)}
+
+    async def test_mark_all_read_and_recount(self, pushed_counts):
+        async with CounterDB() as store:
+            async with store.session() as db:
+                db.add_all([Notification(user_id=1, type="test", title=str(i)) for i in range(3)])
+                await db.flush()
+                await notification_service.mark_all_read(db, 1)
+                await db.commit()
+            assert await store.counters() == {1: (0, 3)}
+
+            async with store.session() as db:
+                # Rows removed without the ORM, as a trip's cascade does
+                await db.execute(Notification.__table__.delete().where(Notification.title != "0"))
+                await notification_service.recount_users(db, [1, 5])
+                await db.commit()
+            assert await store.counters() == {1: (0, 1), 5: (0, 0)}
+
+    async def test_mark_all_read_keeps_concurrent_increment(self, pushed_counts):
+        async with CounterDB() as store:
+            async with store.session() as db:
+                db.add_all([Notification(user_id=1, type="test", title=str(i)) for i in range(2)])
+                await db.commit()
+
+            async with store.session() as db:
+                # Counted by a transaction whose row this UPDATE does not see
+                await db.run_sync(notification_service.adjust_counters, {1: (1, 1)})
+                await notification_service.mark_all_read(db, 1)
+                await db.commit()
+            assert await store.counters() == {1: (1, 3)}
+
+    async def test_counts_pushed_after_commit_only(self, pushed_counts):
+        async with CounterDB() as store:
+            async with store.session() as db:
+                db.add(Notification(user_id=1, type="test", title="A"))
+                await db.flush()
+                db.add(Notification(user_id=1, type="test", title="B"))
+                await db.flush()
+                await _drain_pushes()
+                assert pushed_counts == []
+                await db.commit()
+            await _drain_pushes()
+            # Only the latest count of the transaction is sent
+            assert pushed_counts == [(1, {"type": "unread_count", "count": 2})]
+
+            pushed_counts.clear()
+            async with store.session() as db:
+                db.add(Notification(user_id=1, type="test", title="C"))
+                await db.flush()
+                await db.rollback()
+            await _drain_pushes()
+            assert pushed_counts == []
+            assert await store.counters() == {1: (2, 2)}
+
+    async def test_keyset_pages_match_offset_pages(self, pushed_counts):
+        async with CounterDB() as store:
+            start = datetime(2026, 1, 1)
+            async with store.session() as db:
+                # Pairs share a timestamp so the id tie-break matters
+                db.add_all([
+                    Notification(user_id=1, type="test", title=str(i), created_at=start + timedelta(minutes=i // 2))
+                    for i in range(9)
+                ])
+                await db.commit()
+
+                everything = await notification_service.list_notifications(db, 1, limit=100)
+                pages, before = [], None
+                while True:
+                    page = await notification_service.list_notifications(db, 1, limit=4, before=before)
+                    pages += page
+                    if len(page) < 4:
+                        break
+                    before = (page[-1].created_at, page[-1].id)
+            assert [n.id for n in pages] == [n.id for n in everything]
+            assert len(pages) == 9
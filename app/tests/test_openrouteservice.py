@@ -0,0 +1,232 @@
+"""
+Unit tests for the OpenRouteService incremental matrix cache.
+"""
+import asyncio
+
+import pytest
+from unittest.mock import patch
+
+from app.core.cache import cache
+from app.services.openrouteservice import OpenRouteServiceService, ORSMatrixResult, ORSServiceError
+
+
+def _cell(a: tuple[float, float], b: tuple[float, float]) -> tuple[float, float]:
+    """Deterministic asymmetric fake (duration, distance) for a cell."""
+    duration = abs(a[0] - b[0]) * 1000 + abs(a[1] - b[1]) * 100 + (1 if a < b else 0)
+    return duration, duration * 10
+
+
+class FakeMatrixAPI:
+    """Stand-in for OpenRouteServiceService.get_matrix that records requested cells."""
+
+    def __init__(self, fail_sources=(), delay: float = 0.0):
+        self.calls: list[tuple[int, int]] = []
+        self.sent_locations: list[int] = []
+        self.fail_sources = set(fail_sources)  # source coordinates whose tile fails
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, locations, profile="foot-walking", sources=None, destinations=None):
+        src = sources if sources is not None else list(range(len(locations)))
+        dst = destinations if destinations is not None else list(range(len(locations)))
+        self.calls.append((len(src), len(dst)))
+        self.sent_locations.append(len(locations))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if any(locations[i] in self.fail_sources for i in src):
+            raise ORSServiceError("OpenRouteService Matrix API HTTP error: 502")
+        return ORSMatrixResult(
+            durations=[[_cell(locations[i], locations[j])[0] for j in dst] for i in src],
+            distances=[[_cell(locations[i], locations[j])[1] for j in dst] for i in src],
+            sources=[],
+            destinations=[],
+        )
+
+
+@pytest.fixture
+async def ors():
+    await cache.clear("ors_matrix")
+    service = OpenRouteServiceService(api_key="test-key")
+    fake = FakeMatrixAPI()
+    with patch.object(service, "get_matrix", new=fake):
+        yield service, fake
+    await cache.clear("ors_matrix")
+
+
+def _points(n: int) -> list[tuple[float, float]]:
+    return [(40.0 + i * 0.01, -3.0 + i * 0.02) for i in range(n)]
+
+
+def _expected(points):
+    return [[_cell(a, b)[0] for b in points] for a in points]
+
+
+class TestCachedMatrix:
+    """Tests for OpenRouteServiceService.get_cached_matrix."""
+
+    @pytest.mark.asyncio
+    async def test_cold_cache_single_full_request(self, ors):
+        """Test that an empty cache makes one full N x N request."""
+        service, fake = ors
+        points = _points(5)
+
+        result = await service.get_cached_matrix(points, "foot-walking")
+
+        assert fake.calls == [(5, 5)]
+        assert result.durations == _expected(points)
+        assert result.fetched_entries == 25
+        assert result.cached_entries == 0
+
+    @pytest.mark.asyncio
+    async def test_repeat_request_is_served_from_cache(self, ors):
+        """Test that the same locations do not reach ORS again."""
+        service, fake = ors
+        points = _points(4)
+        await service.get_cached_matrix(points)
+        fake.calls.clear()
+
+        result = await service.get_cached_matrix(list(reversed(points)))
+
+        assert fake.calls == []
+        assert result.durations == _expected(list(reversed(points)))
+        assert result.cached_entries == 16
+
+    @pytest.mark.asyncio
+    async def test_adding_one_location_fetches_only_its_row_and_column(self, ors):
+        """Test that one new location costs about 2N cells, not N^2."""
+        service, fake = ors
+        points = _points(6)
+        await service.get_cached_matrix(points[:5])
+        fake.calls.clear()
+
+        result = await service.get_cached_matrix(points)
+
+        assert sorted(fake.calls) == [(1, 6), (5, 1)]
+        assert result.fetched_entries == 11
+        assert result.cached_entries == 25
+        assert result.durations == _expected(points)
+        assert result.distances[5][0] == _cell(points[5], points[0])[1]
+
+    @pytest.mark.asyncio
+    async def test_profiles_are_cached_separately(self, ors):
+        """Test that a cached walking matrix is not reused for driving."""
+        service, fake = ors
+        points = _points(3)
+        await service.get_cached_matrix(points, "foot-walking")
+        fake.calls.clear()
+
+        await service.get_cached_matrix(points, "driving-car")
+
+        assert fake.calls == [(3, 3)]
+
+    @pytest.mark.asyncio
+    async def test_nearby_duplicates_share_rounded_key(self, ors):
+        """Test that locations within rounding precision share cached cells."""
+        service, fake = ors
+        points = _points(3)
+        jittered = points + [(points[0][0] + 0.00001, points[0][1])]
+
+        result = await service.get_cached_matrix(jittered)
+
+        assert fake.calls == [(3, 3)]
+        assert len(result.durations) == 4
+        assert result.durations[3] == result.durations[0]
+
+
+class TestTiledMatrix:
+    """Tests for OpenRouteServiceService.get_matrix_tiled."""
+
+    @pytest.mark.asyncio
+    async def test_small_matrix_is_a_single_request(self):
+        """Test that matrices under the limit are not tiled."""
+        service = OpenRouteServiceService(api_key="test-key")
+        fake = FakeMatrixAPI()
+        with patch.object(service, "get_matrix", new=fake):
+            result = await service.get_matrix_tiled(_points(10))
+
+        assert fake.calls == [(10, 10)]
+        assert result.durations == _expected(_points(10))
+
+    @pytest.mark.asyncio
+    async def test_large_matrix_is_tiled_and_stitched(self):
+        """Test that 100 locations are split under 3500 entries and stitched back."""
+        service = OpenRouteServiceService(api_key="test-key")
+        fake = FakeMatrixAPI(delay=0.01)
+        points = _points(100)
+        with patch.object(service, "get_matrix", new=fake):
+            result = await service.get_matrix_tiled(points)
+
+        assert len(fake.calls) == 3
+        assert all(rows * cols <= service.MATRIX_MAX_ENTRIES for rows, cols in fake.calls)
+        assert fake.max_running <= service.MATRIX_MAX_CONCURRENCY
+        assert result.durations == _expected(points)
+        assert result.failed_cells == []
+
+    @pytest.mark.asyncio
+    async def test_tiles_send_only_their_locations(self):
+        """Test that a tile request carries only its own sources and destinations."""
+        service = OpenRouteServiceService(api_key="test-key")
+        fake = FakeMatrixAPI()
+        points = _points(30)
+        with patch.object(service, "MATRIX_MAX_ENTRIES", 100), \
+                patch.object(service, "get_matrix", new=fake):
+            result = await service.get_matrix_tiled(
+                points, sources=list(range(6)), destinations=list(range(10, 30))
+            )
+
+        assert fake.calls == [(5, 20), (1, 20)]
+        assert fake.sent_locations == [25, 21]
+        assert result.durations == [row[10:] for row in _expected(points)[:6]]
+
+    @pytest.mark.asyncio
+    async def test_failed_tile_is_reported_cell_by_cell(self):
+        """Test that one failed tile leaves other tiles intact."""
+        service = OpenRouteServiceService(api_key="test-key")
+        points = _points(100)
+        fake = FakeMatrixAPI(fail_sources={points[40]})
+        with patch.object(service, "get_matrix", new=fake):
+            result = await service.get_matrix_tiled(points)
+
+        # Rows 35-69 form the failed tile
+        assert len(result.failed_cells) == 35 * 100
+        assert set(i for i, _ in result.failed_cells) == set(range(35, 70))
+        assert result.durations[40][0] is None
+        assert result.durations[0] == _expected(points)[0]
+        assert result.durations[99] == _expected(points)[99]
+        assert len(result.errors) == 1
+
+    @pytest.mark.asyncio
+    async def test_all_tiles_failing_raises(self):
+        """Test that a matrix with no successful tile raises ORSServiceError."""
+        service = OpenRouteServiceService(api_key="test-key")
+        points = _points(100)
+        fake = FakeMatrixAPI(fail_sources=set(points))
+        with patch.object(service, "get_matrix", new=fake):
+            with pytest.raises(ORSServiceError):
+                await service.get_matrix_tiled(points)
+
+    @pytest.mark.asyncio
+    async def test_failed_cells_are_not_cached(self):
+        """Test that cells of a failed tile are refetched on the next request."""
+        await cache.clear("ors_matrix")
+        service = OpenRouteServiceService(api_key="test-key")
+        points = _points(70)
+        fake = FakeMatrixAPI(fail_sources={points[60]})
+        with patch.object(service, "get_matrix", new=fake):
+            first = await service.get_cached_matrix(points)
+            assert (60, 0) in first.failed_cells
+            assert first.durations[0][1] == _expected(points)[0][1]
+
+            fake.fail_sources = set()
+            fake.calls.clear()
+            second = await service.get_cached_matrix(points)
+
+        assert second.failed_cells == []
+        assert second.durations == _expected(points)
+        assert second.cached_entries == 70 * 70 - len(first.failed_cells)
+        await cache.clear("ors_matrix")
@@ -0,0 +1,171 @@
+"""
+Tests for background segment recalculation jobs.
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.trip import Trip
+from app.services import segment_job_queue
+from app.services.segment_job_queue import SegmentJobRunner
+from app.services.travel_segment_service import TravelSegmentService, TripRecalculation
+
+
+class FakeJobSession:
+    """Records the values of UPDATE statements issued by the runner."""
+
+    def __init__(self, updates: list):
+        self.updates = updates
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        self.updates.append({col.key: bind.value for col, bind in stmt._values.items()})
+
+    async def commit(self):
+        pass
+
+
+class TestSegmentJobRunner:
+    """Tests for running claimed jobs (no database required)."""
+
+    def _runner(self):
+        updates = []
+        return SegmentJobRunner(session_factory=lambda: FakeJobSession(updates), name="test"), updates
+
+    @pytest.mark.asyncio
+    async def test_completed_job_reports_progress_and_notifies_trip(self):
+        """Test that a job records progress, its segments and pushes completion."""
+        runner, updates = self._runner()
+        messages = []
+
+        async def fake_recalculate(db, trip_id, on_progress=None):
+            for done in range(1, 4):
+                await on_progress(done, 3)
+            return TripRecalculation(
+                segments=[SimpleNamespace(id=i) for i in (11, 12, 13)], reused=1, rebuilt=2
+            )
+
+        async def fake_broadcast(trip_id, data, exclude_user=None):
+            messages.append((trip_id, data))
+
+        with patch.object(TravelSegmentService, "recalculate_trip_segments", new=fake_recalculate), \
+                patch.object(segment_job_queue.manager, "broadcast_to_trip", new=fake_broadcast):
+            status = await runner.run_job(5, 42)
+
+        assert status == "completed"
+        # First and last progress writes pass the throttle, the middle one does not
+        assert [u.get("segments_done") for u in updates[:-1]] == [1, 3]
+        assert updates[-1]["status"] == "completed"
+        assert updates[-1]["segment_ids"] == [11, 12, 13]
+        assert updates[-1]["segments_reused"] == 1
+        assert messages == [(42, {
+            "type": "segments_recalculated", "job_id": 5, "status": "completed",
+            "segment_ids": [11, 12, 13], "reused": 1, "rebuilt": 2, "error": None,
+        })]
+
+    @pytest.mark.asyncio
+    async def test_failed_job_records_error(self):
+        """Test that routing errors mark the job failed and still notify the trip."""
+        runner, updates = self._runner()
+        messages = []
+
+        async def fake_recalculate(db, trip_id, on_progress=None):
+            raise RuntimeError("routing unavailable")
+
+        async def fake_broadcast(trip_id, data, exclude_user=None):
+            messages.append(data)
+
+        with patch.object(TravelSegmentService, "recalculate_trip_segments", new=fake_recalculate), \
+                patch.object(segment_job_queue.manager, "broadcast_to_trip", new=fake_broadcast):
+            status = await runner.run_job(6, 42)
+
+        assert status == "failed"
+        assert updates[-1]["status"] == "failed"
+        assert updates[-1]["error"] == "routing unavailable"
+        assert messages[0]["status"] == "failed"
+
+    @pytest.mark.asyncio
+    async def test_loop_runs_due_jobs_and_stops(self):
+        """Test that the runner loop drains claimed jobs and stops cleanly."""
+        runner, _ = self._runner()
+        claims = [(1, 10), (2, 20)]
+        ran = []
+
+        async def fake_claim():
+            return claims.pop(0) if claims else None
+
+        async def fake_run_job(job_id, trip_id):
+            ran.append(job_id)
+            return "completed"
+
+        async def fake_due():
+            return 0.01
+
+        async def fake_expire():
+            return 0
+
+        with patch.object(runner, "claim", new=fake_claim), \
+                patch.object(runner, "run_job", new=fake_run_job), \
+                patch.object(runner, "seconds_until_due", new=fake_due), \
+                patch.object(runner, "expire_stale", new=fake_expire):
+            runner.start(2)
+            await asyncio.sleep(0.05)
+            await runner.stop()
+
+        assert sorted(ran) == [1, 2]
+        assert runner._tasks == []
+
+
+class TestSegmentJobQueue:
+    """Tests for enqueueing against the database."""
+
+    @pytest.mark.asyncio
+    async def test_enqueue_is_deduplicated_per_trip(self, db: AsyncSession, created_trip: Trip):
+        """Test that repeat requests fold into the trip's pending job."""
+        first = await segment_job_queue.enqueue_trip(db, created_trip.id)
+        second = await segment_job_queue.enqueue_trip(db, created_trip.id)
+
+        job = await segment_job_queue.get_job(db, created_trip.id)
+        await db.refresh(job)
+
+        assert first == second == job.id
+        assert job.status == "pending"
+        assert job.request_count == 2
+        assert job.run_after >= job.first_requested_at
+
+    @pytest.mark.asyncio
+    async def test_cancel_pending(self, db: AsyncSession, created_trip: Trip):
+        """Test that an inline recalculation cancels the queued job."""
+        job_id = await segment_job_queue.enqueue_trip(db, created_trip.id)
+
+        assert await segment_job_queue.cancel_pending(db, created_trip.id) == 1
+        new_id = await segment_job_queue.enqueue_trip(db, created_trip.id)
+
+        assert new_id != job_id
+
+    @pytest.mark.asyncio
+    async def test_job_endpoints(self, client: AsyncClient, created_trip: Trip):
+        """Test queueing a recalculation and reading its status."""
+        response = await client.post(f"/api/v1/trips/{created_trip.id}/travel-segments/jobs")
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "pending"
+
+        response = await client.get(f"/api/v1/trips/{created_trip.id}/travel-segments/jobs/{job['id']}")
+        assert response.status_code == 200
+        assert response.json()["id"] == job["id"]
+
+        response = await client.get(f"/api/v1/trips/{created_trip.id}/travel-segments/jobs/latest")
+        assert response.json()["id"] == job["id"]
+
+        response = await client.get(f"/api/v1/trips/{created_trip.id}/travel-segments/jobs/999999")
+        assert response.status_code == 404
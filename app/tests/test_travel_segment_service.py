@@ -0,0 +1,434 @@
+"""
+Unit tests for TravelSegmentService routing fan-out and route geometry
+storage (no database required).
+"""
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from geoalchemy2.shape import to_shape
+from sqlalchemy.dialects import postgresql
+
+from app.api.deps import parse_bbox
+from app.schemas.routing_preferences import RoutingPreference
+from app.schemas.travel_segment import GeometryFormat, TravelMode
+from app.services.google_maps_routes_service import decode_polyline
+from app.services.route_geometry import (
+    format_route_legs,
+    geometry_polyline,
+    quantize_tolerance,
+    route_linestring,
+    simplify_coordinates,
+    simplify_leg,
+    tolerance_for_zoom,
+)
+from app.services.travel_segment_service import TravelSegmentService
+
+
+def _dest(lat: float, lon: float) -> SimpleNamespace:
+    return SimpleNamespace(latitude=lat, longitude=lon)
+
+
+def _stop(order_index: int, lat: float, lon: float, mode: str | None) -> SimpleNamespace:
+    return SimpleNamespace(
+        order_index=order_index, latitude=lat, longitude=lon,
+        travel_mode=mode, duration_minutes=10,
+    )
+
+
+class TestPerLegFanOut:
+    """Tests for concurrent per-leg routing in _recalculate_per_leg."""
+
+    @pytest.mark.asyncio
+    async def test_legs_fetched_concurrently_and_assembled_in_order(self):
+        """Test that legs overlap in time but results keep leg order."""
+        running = 0
+        max_running = 0
+
+        async def fake_fetch(lat1, lon1, lat2, lon2, mode, routing_preference=None):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            # Earlier legs finish last to prove ordering is not completion order
+            await asyncio.sleep(0.02 - lat1 * 0.001)
+            running -= 1
+            geometry = {"type": "LineString", "coordinates": [[lon1, lat1], [lon2, lat2]]}
+            return geometry, 10.0, 15, False
+
+        segment = SimpleNamespace(travel_mode="car")
+        from_dest, to_dest = _dest(0.0, 0.0), _dest(4.0, 4.0)
+        stops = [
+            _stop(2, 2.0, 2.0, "walk"),
+            _stop(1, 1.0, 1.0, "bike"),
+            _stop(3, 3.0, 3.0, None),
+        ]
+
+        with patch.object(TravelSegmentService, "_fetch_route_geometry", side_effect=fake_fetch):
+            await TravelSegmentService._recalculate_per_leg(
+                segment, from_dest, to_dest, [], stops, TravelMode.CAR
+            )
+
+        assert max_running == 4
+        assert [leg["travel_mode"] for leg in segment.route_legs] == ["bike", "walk", "car", "car"]
+        assert segment.distance_km == 40.0
+        assert segment.duration_minutes == 4 * 15 + 3 * 10
+        # Collinear junction points are dropped by simplification
+        assert list(to_shape(segment.geometry).coords) == [(0.0, 0.0), (4.0, 4.0)]
+        assert decode_polyline(segment.route_legs[0]["polyline"]) == [(0.0, 0.0), (1.0, 1.0)]
+        assert "geometry" not in segment.route_legs[0]
+
+    @pytest.mark.asyncio
+    async def test_fan_out_is_bounded(self):
+        """Test that no more than ROUTING_FAN_OUT_LIMIT lookups run at once."""
+        running = 0
+        max_running = 0
+
+        async def job(i: int) -> int:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.005)
+            running -= 1
+            return i
+
+        with patch.object(TravelSegmentService, "ROUTING_FAN_OUT_LIMIT", 3):
+            results = await TravelSegmentService._gather_bounded([job(i) for i in range(10)])
+
+        assert results == list(range(10))
+        assert max_running == 3
+
+
+class FakeRecalculationDB:
+    """Serves destinations, waypoints, stops and segments to recalculate_trip_segments."""
+
+    def __init__(self, destinations, segments, waypoints=(), stops=()):
+        self.rows = {
+            "destinations": destinations,
+            "route_waypoints": list(waypoints),
+            "travel_stops": list(stops),
+            "travel_segments": segments,
+        }
+
+    async def execute(self, stmt):
+        table = stmt.get_final_froms()[0].name
+        rows = self.rows[table]
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: rows))
+
+    def add(self, obj):
+        pass
+
+    async def delete(self, obj):
+        pass
+
+    async def flush(self):
+        pass
+
+
+class TestInputFingerprint:
+    """Tests for skipping recalculation of segments whose inputs are unchanged."""
+
+    def _trip(self):
+        destinations = [
+            SimpleNamespace(id=i, trip_id=1, latitude=48.0 + i, longitude=2.0 + i)
+            for i in (1, 2, 3)
+        ]
+        segments = [
+            SimpleNamespace(
+                id=10 + i, from_destination_id=i, to_destination_id=i + 1,
+                travel_mode="car", geometry=object(), input_fingerprint=None,
+            )
+            for i in (1, 2)
+        ]
+        waypoint = SimpleNamespace(travel_segment_id=12, order_index=0, latitude=49.5, longitude=3.5)
+        return destinations, segments, waypoint
+
+    def test_fingerprint_covers_routing_inputs(self):
+        """Test that every routing input changes the fingerprint, and nothing else does."""
+        fingerprint = TravelSegmentService.input_fingerprint
+        stop = _stop(1, 1.0, 1.0, None)
+        base = fingerprint(1.0, 2.0, 3.0, 4.0, "car", [], [stop])
+
+        assert fingerprint(1.0, 2.0, 3.0, 4.0, "car", [], [_stop(1, 1.0, 1.0, None)]) == base
+        assert fingerprint(1.0 + 1e-9, 2.0, 3.0, 4.0, "car", [], [stop]) == base
+        assert fingerprint(1.001, 2.0, 3.0, 4.0, "car", [], [stop]) != base
+        assert fingerprint(1.0, 2.0, 3.0, 4.0, "train", [], [stop]) != base
+        assert fingerprint(1.0, 2.0, 3.0, 4.0, "car", [], [_stop(1, 1.0, 1.0, "walk")]) != base
+        assert fingerprint(1.0, 2.0, 3.0, 4.0, "car", [], []) != base
+        assert fingerprint(1.0, 2.0, 3.0, 4.0, "car", [SimpleNamespace(order_index=0, latitude=1.5, longitude=1.5)], [stop]) != base
+        with patch.object(TravelSegmentService, "_routing_preference", RoutingPreference.GOOGLE_PUBLIC_TRANSPORT):
+            assert fingerprint(1.0, 2.0, 3.0, 4.0, "car", [], [stop]) != base
+
+    @pytest.mark.asyncio
+    async def test_only_changed_segments_are_rebuilt(self):
+        """Test that recalculation routes only segments whose fingerprint changed."""
+        destinations, segments, waypoint = self._trip()
+        routed = []
+
+        async def fake_single_mode(segment, from_dest, to_dest, waypoints, stops, mode):
+            routed.append(segment.id)
+
+        async def fake_trip_segments(db, trip_id):
+            return segments
+
+        db = FakeRecalculationDB(destinations, segments, waypoints=[waypoint])
+        progress = []
+
+        async def on_progress(done, total):
+            progress.append((done, total))
+
+        with patch.object(TravelSegmentService, "_recalculate_single_mode", new=fake_single_mode), \
+                patch.object(TravelSegmentService, "get_trip_segments", new=fake_trip_segments):
+            first = await TravelSegmentService.recalculate_trip_segments(db, 1)
+            assert (first.rebuilt, first.reused) == (2, 0)
+
+            unchanged = await TravelSegmentService.recalculate_trip_segments(db, 1)
+            assert (unchanged.rebuilt, unchanged.reused) == (0, 2)
+
+            waypoint.latitude = 49.6
+            moved = await TravelSegmentService.recalculate_trip_segments(db, 1, on_progress=on_progress)
+            assert (moved.rebuilt, moved.reused) == (1, 1)
+
+            forced = await TravelSegmentService.recalculate_trip_segments(db, 1, force=True)
+            assert (forced.rebuilt, forced.reused) == (2, 0)
+
+        assert routed == [11, 12, 12, 11, 12]
+        assert progress == [(2, 2)]
+        assert [s.id for s in moved.segments] == [11, 12]
+
+    def test_fingerprint_covers_configured_providers(self):
+        """Test that configuring a routing API key changes the fingerprint."""
+        fingerprint = TravelSegmentService.input_fingerprint
+
+        with patch.object(TravelSegmentService, "_available_providers", return_value=[]):
+            without_keys = fingerprint(1.0, 2.0, 3.0, 4.0, "car")
+        with patch.object(TravelSegmentService, "_available_providers", return_value=["mapbox"]):
+            with_mapbox = fingerprint(1.0, 2.0, 3.0, 4.0, "car")
+
+        assert with_mapbox != without_keys
+
+    @pytest.mark.asyncio
+    async def test_heuristic_estimates_are_rebuilt(self):
+        """Test that segments no provider could route are not reused."""
+        destinations, segments, _ = self._trip()
+        routed = []
+
+        async def no_route(lat1, lon1, lat2, lon2, mode, routing_preference=None):
+            routed.append(mode)
+            return None, None, None, False
+
+        async def fake_trip_segments(db, trip_id):
+            return segments
+
+        db = FakeRecalculationDB(destinations, segments)
+        with patch.object(TravelSegmentService, "_fetch_route_geometry", side_effect=no_route), \
+                patch.object(TravelSegmentService, "get_trip_segments", new=fake_trip_segments):
+            await TravelSegmentService.recalculate_trip_segments(db, 1)
+            assert all(s.is_fallback and s.input_fingerprint is None for s in segments)
+
+            again = await TravelSegmentService.recalculate_trip_segments(db, 1)
+            assert (again.rebuilt, again.reused) == (2, 0)
+
+            # Planes are never routed, so their straight line is final
+            for segment in segments:
+                segment.travel_mode = "plane"
+            await TravelSegmentService.recalculate_trip_segments(db, 1)
+            planes = await TravelSegmentService.recalculate_trip_segments(db, 1)
+            assert (planes.rebuilt, planes.reused) == (0, 2)
+            assert not any(s.is_fallback for s in segments)
+
+        assert routed == [TravelMode.CAR] * 4 + [TravelMode.PLANE] * 2
+
+
+class TestRouteGeometry:
+    """Tests for route simplification and polyline formatting."""
+
+    def _zigzag(self, n: int, amplitude: float) -> list[list[float]]:
+        return [[i * 0.001, amplitude if i % 2 else 0.0] for i in range(n)]
+
+    def test_simplify_drops_points_within_tolerance(self):
+        """Test that Douglas-Peucker removes jitter but keeps the endpoints."""
+        coords = self._zigzag(1001, 1e-6)
+
+        simplified = simplify_coordinates(coords, tolerance=1e-5)
+
+        assert simplified == [(0.0, 0.0), (1.0, 0.0)]
+        assert simplify_coordinates(coords, tolerance=0) == [tuple(c) for c in coords]
+
+    def test_simplify_keeps_real_shape(self):
+        """Test that deviations larger than the tolerance survive."""
+        coords = [[0.0, 0.0], [0.5, 0.01], [1.0, 0.0]]
+
+        assert simplify_coordinates(coords, tolerance=1e-3) == [(0.0, 0.0), (0.5, 0.01), (1.0, 0.0)]
+
+    def test_route_linestring(self):
+        """Test that geometry is built from coordinates with SRID 4326."""
+        geometry = route_linestring([[2.35, 48.85], [2.36, 48.86]])
+
+        assert geometry.srid == 4326
+        assert list(to_shape(geometry).coords) == [(2.35, 48.85), (2.36, 48.86)]
+        assert geometry_polyline(geometry) is not None
+        assert route_linestring([[2.35, 48.85]]) is None
+
+    def test_uses_configured_tolerance(self):
+        """Test that the default tolerance comes from settings."""
+        coords = self._zigzag(11, 1e-3)
+
+        with patch("app.services.route_geometry.settings.ROUTE_SIMPLIFY_TOLERANCE_DEG", 1e-2):
+            assert len(simplify_coordinates(coords)) == 2
+        with patch("app.services.route_geometry.settings.ROUTE_SIMPLIFY_TOLERANCE_DEG", 0):
+            assert len(simplify_coordinates(coords)) == 11
+
+    def test_format_route_legs(self):
+        """Test that stored polylines and legacy GeoJSON legs render in both formats."""
+        legacy = {
+            "travel_mode": "walk", "distance_km": 1.0, "duration_minutes": 12,
+            "geometry": {"type": "LineString", "coordinates": [[2.35, 48.85], [2.36, 48.86]]},
+        }
+        stored = {
+            "travel_mode": "car", "distance_km": 2.0, "duration_minutes": 5,
+            "polyline": "_p~iF~ps|U_ulLnnqC",
+        }
+
+        geojson = format_route_legs([legacy, stored])
+        polyline = format_route_legs([legacy, stored], GeometryFormat.POLYLINE)
+
+        assert geojson[0]["geometry"] == legacy["geometry"]
+        assert geojson[1]["geometry"]["coordinates"] == [[-120.2, 38.5], [-120.95, 40.7]]
+        assert all("polyline" not in leg for leg in geojson)
+        assert decode_polyline(polyline[0]["polyline"]) == [(2.35, 48.85), (2.36, 48.86)]
+        assert polyline[1]["polyline"] == stored["polyline"]
+        assert all("geometry" not in leg for leg in polyline)
+        assert format_route_legs(None) is None
+
+    def test_segment_response_formats(self):
+        """Test that the API serializer returns either GeoJSON or a polyline."""
+        from app.api.trips.travel_segments import segment_to_response
+
+        segment = SimpleNamespace(
+            id=1, segment_type="inter_destination", from_destination_id=1, to_destination_id=2,
+            from_name=None, from_latitude=None, from_longitude=None,
+            to_name=None, to_latitude=None, to_longitude=None,
+            travel_mode="car", distance_km=1.5, duration_minutes=4, is_fallback=False,
+            geometry=route_linestring([[-120.2, 38.5], [-120.95, 40.7]]), route_legs=None,
+            estimated_cost=None, cost_currency=None, created_at=None, updated_at=None,
+        )
+        segment.route_geometry = {"type": "LineString", "coordinates": [[-120.2, 38.5], [-120.95, 40.7]]}
+
+        geojson = segment_to_response(segment)
+        polyline = segment_to_response(segment, GeometryFormat.POLYLINE)
+
+        assert geojson["route_geometry"] == segment.route_geometry
+        assert geojson["route_polyline"] is None
+        assert polyline["route_geometry"] is None
+        assert polyline["route_polyline"] == "_p~iF~ps|U_ulLnnqC"
+
+
+class FakeGeometryDB:
+    """Answers the metadata query, then the simplified-geometry query."""
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.statements = []
+
+    async def execute(self, stmt):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        self.statements.append(sql)
+        if "ST_Simplify" not in sql:
+            rows = [SimpleNamespace(**{k: v for k, v in seg.items() if k != "route_legs"}) for seg in self.segments]
+        else:
+            ids = stmt.whereclause.right.value
+            rows = [
+                SimpleNamespace(
+                    id=seg["id"],
+                    geometry=route_linestring([[0.0, 0.0], [1.0, 1.0]]),
+                    route_legs=seg["route_legs"],
+                )
+                for seg in self.segments if seg["id"] in ids
+            ]
+        return SimpleNamespace(all=lambda: rows)
+
+
+class TestTripGeometry:
+    """Tests for level-of-detail trip geometry."""
+
+    def _segment(self, segment_id, updated_at=datetime(2026, 5, 1), route_legs=None):
+        return dict(
+            id=segment_id, segment_type="inter_destination", from_destination_id=1,
+            to_destination_id=2, travel_mode="car", is_fallback=False,
+            updated_at=updated_at, route_legs=route_legs,
+        )
+
+    def test_zoom_tolerance(self):
+        """Test that tolerances are one pixel per zoom level, rounded for caching."""
+        assert tolerance_for_zoom(0) == 1.40625
+        assert tolerance_for_zoom(10) == pytest.approx(0.00137, rel=1e-2)
+        assert quantize_tolerance(tolerance_for_zoom(10)) == 0.0014
+        assert quantize_tolerance(1e-5) == 1e-5
+
+    def test_simplify_leg(self):
+        """Test that stored legs are simplified to the requested tolerance."""
+        coords = [[i * 0.01, 0.0001 if i % 2 else 0.0] for i in range(101)]
+        leg = {"travel_mode": "walk", "geometry": {"type": "LineString", "coordinates": coords}}
+
+        simplified = simplify_leg(leg, 0.001)
+
+        assert simplified["travel_mode"] == "walk"
+        assert decode_polyline(simplified["polyline"]) == [(0.0, 0.0), (1.0, 0.0)]
+        assert simplify_leg({"travel_mode": "walk", "polyline": simplified["polyline"]}, 0.001) == simplified
+
+    def test_parse_bbox(self):
+        """Test bbox parsing and validation."""
+        assert parse_bbox(None) is None
+        assert parse_bbox("2.2,48.8,2.5,48.9") == (2.2, 48.8, 2.5, 48.9)
+        assert parse_bbox("170,-20,-170,-10") == (170.0, -20.0, -170.0, -10.0)
+        for invalid in ("1,2,3", "a,b,c,d", "0,50,1,40", "0,0,200,1"):
+            with pytest.raises(HTTPException):
+                parse_bbox(invalid)
+
+    @pytest.mark.asyncio
+    async def test_cached_per_segment_and_tolerance(self):
+        """Test that only uncached segments are simplified, and edits miss the cache."""
+        store = {}
+
+        async def fake_get(key):
+            return store.get(key)
+
+        async def fake_set(key, value, ttl=None):
+            store[key] = value
+
+        legs = [{"travel_mode": "walk", "polyline": "??_ibE_ibE"}]
+        db = FakeGeometryDB([self._segment(1), self._segment(2, route_legs=legs)])
+
+        with patch("app.services.travel_segment_service.get_cached", new=fake_get), \
+                patch("app.services.travel_segment_service.set_cached", new=fake_set):
+            first = await TravelSegmentService.get_trip_geometry(db, 7, 0.01)
+            again = await TravelSegmentService.get_trip_geometry(db, 7, 0.01)
+            assert len(db.statements) == 3  # Second call only reads metadata
+
+            db.segments[0]["updated_at"] = datetime(2026, 5, 2)
+            await TravelSegmentService.get_trip_geometry(db, 7, 0.01)
+            await TravelSegmentService.get_trip_geometry(db, 7, 0.1)
+
+        assert first == again
+        assert [s["id"] for s in first] == [1, 2]
+        assert decode_polyline(first[0]["polyline"]) == [(0.0, 0.0), (1.0, 1.0)]
+        assert first[0]["legs"] is None
+        assert first[1]["legs"][0]["travel_mode"] == "walk"
+        assert "ST_Simplify" in db.statements[1]
+        assert len(db.statements) == 7
+        assert len(store) == 5
+
+    @pytest.mark.asyncio
+    async def test_bbox_filter(self):
+        """Test that the bbox becomes an envelope filter, split at the antimeridian."""
+        db = FakeGeometryDB([])
+
+        await TravelSegmentService.get_trip_geometry(db, 7, 0.01, bbox=(2.2, 48.8, 2.5, 48.9))
+        await TravelSegmentService.get_trip_geometry(db, 7, 0.01, bbox=(170.0, -20.0, -170.0, -10.0))
+
+        assert db.statements[0].count("ST_MakeEnvelope(") == 1
+        assert db.statements[1].count("ST_MakeEnvelope(") == 2
+        assert "ST_Intersects" in db.statements[0]
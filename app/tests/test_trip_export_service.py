@@ -0,0 +1,179 @@
+"""
+Tests for the batch trip export loader and the markdown it feeds.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.models.accommodation import Accommodation
+from app.models.destination import Destination
+from app.models.poi import POI
+from app.models.trip import Trip
+from app.services.trip_export_service import TripExportGraph, TripExportService
+from app.services.trip_service import TripService
+from mcp_server.tools.hotels_export import iter_trip_markdown
+
+
+def _trip(**overrides):
+    fields = dict(
+        id=1, name="Spain", description=None, start_date=date(2026, 5, 1), end_date=date(2026, 5, 9),
+        location=None, total_budget=Decimal("1000.00"), currency="EUR",
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def _dest(dest_id, city):
+    return SimpleNamespace(
+        id=dest_id, city_name=city, name=city, country="Spain",
+        arrival_date=date(2026, 5, 1), departure_date=date(2026, 5, 4),
+    )
+
+
+def _poi(name, cost, actual=None, scheduled=None):
+    return SimpleNamespace(
+        name=name, category="Sights", estimated_cost=cost, actual_cost=actual,
+        scheduled_date=scheduled, dwell_time=60,
+    )
+
+
+def _acc(name, cost):
+    return SimpleNamespace(
+        name=name, type="hotel", total_cost=cost, currency="EUR", address=None,
+        check_in_date=date(2026, 5, 1), check_out_date=date(2026, 5, 4), booking_reference=None,
+    )
+
+
+class TestTripExportGraph:
+    """Tests for in-memory budget and markdown generation."""
+
+    def _graph(self):
+        return TripExportGraph(
+            trip=_trip(),
+            destinations=[_dest(1, "Madrid"), _dest(2, None)],
+            pois={1: [
+                _poi("Prado", Decimal("15.00"), Decimal("12.00"), date(2026, 5, 2)),
+                _poi("Retiro", None),
+            ]},
+            accommodations={1: [_acc("Hotel Sol", Decimal("300.00"))], 2: [_acc("Hostel", None)]},
+            segments={1: SimpleNamespace(travel_mode="train", duration_minutes=150, distance_km=390.4)},
+        )
+
+    def test_budget_summary_totals(self):
+        """Test that totals and per-destination rows match the aggregate queries."""
+        budget = self._graph().budget_summary()
+
+        assert budget.poi_estimated == Decimal("15.00")
+        assert budget.poi_actual == budget.actual_total == Decimal("12.00")
+        assert budget.accommodation_total == Decimal("300.00")
+        assert budget.estimated_total == Decimal("315.00")
+        assert budget.remaining_budget == Decimal("685.00")
+        assert budget.budget_percentage == pytest.approx(31.5)
+        assert [d.city_name for d in budget.by_destination] == ["Madrid", "Destination 2"]
+        assert budget.by_destination[1].subtotal == Decimal("0")
+
+    def test_budget_without_total_budget(self):
+        """Test that no remaining budget is reported when the trip has none."""
+        graph = self._graph()
+        graph.trip = _trip(total_budget=None)
+        budget = graph.budget_summary()
+
+        assert budget.remaining_budget is None
+        assert budget.budget_percentage is None
+
+    def test_markdown_sections(self):
+        """Test that the export renders each destination from the loaded graph."""
+        content = "\n".join(iter_trip_markdown(self._graph()))
+
+        assert content.startswith("# Spain")
+        assert "- Estimated total: 315.00 EUR" in content
+        assert "**Hotel Sol** (hotel) -- 300.00 EUR" in content
+        assert "- Prado (Sights) -- €15.00 (60min)" in content
+        assert "**Unscheduled:**" in content
+        assert "**Travel:** train -- 2h 30m, 390km" in content
+        assert content.index("Madrid") < content.index("Hostel")
+
+
+class TestTripExportLoader:
+    """Tests for TripExportService.load_graph against the database."""
+
+    async def _add_destination(self, db, trip, index):
+        dest = Destination(
+            trip_id=trip.id, city_name=f"City {index}", country="Spain", order_index=index,
+            arrival_date=date.today() + timedelta(days=index),
+            departure_date=date.today() + timedelta(days=index + 1),
+        )
+        db.add(dest)
+        await db.flush()
+        for n in range(3):
+            db.add(POI(
+                destination_id=dest.id, name=f"POI {index}.{n}", category="Sights",
+                estimated_cost=Decimal("10.00"), currency="EUR", dwell_time=30,
+            ))
+        db.add(Accommodation(
+            destination_id=dest.id, name=f"Hotel {index}", type="hotel",
+            check_in_date=dest.arrival_date, check_out_date=dest.departure_date,
+            total_cost=Decimal("100.00"), currency="EUR",
+        ))
+        await db.flush()
+
+    def _count_queries(self, db):
+        counter = {"n": 0}
+
+        def before_cursor_execute(*args):
+            counter["n"] += 1
+
+        event.listen(db.bind.sync_engine, "before_cursor_execute", before_cursor_execute)
+        return counter, lambda: event.remove(
+            db.bind.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+
+    @pytest.mark.asyncio
+    async def test_query_count_is_constant(self, db, created_trip: Trip):
+        """Test that a larger trip is loaded with the same number of queries."""
+        counts = []
+        for size in (2, 8):
+            for index in range(len(counts) * 2, len(counts) * 2 + size):
+                await self._add_destination(db, created_trip, index)
+            db.expunge_all()
+
+            counter, stop = self._count_queries(db)
+            graph = await TripExportService.load_graph(db, created_trip.id, include_notes=True)
+            stop()
+            counts.append(counter["n"])
+
+            assert all(len(graph.pois_for(d.id)) == 3 for d in graph.destinations)
+
+        assert counts[0] == counts[1] <= 6
+
+    @pytest.mark.asyncio
+    async def test_budget_matches_trip_service(self, db, created_trip: Trip):
+        """Test that the in-memory budget equals get_budget_summary."""
+        for index in range(3):
+            await self._add_destination(db, created_trip, index)
+
+        graph = await TripExportService.load_graph(db, created_trip.id)
+        expected = await TripService.get_budget_summary(db, created_trip.id)
+
+        assert graph.budget_summary() == expected
+
+    @pytest.mark.asyncio
+    async def test_destination_filter(self, db, created_trip: Trip):
+        """Test that children are only loaded for the requested destination."""
+        for index in range(2):
+            await self._add_destination(db, created_trip, index)
+        first, second = (await TripExportService.load_graph(db, created_trip.id)).destinations
+
+        graph = await TripExportService.load_graph(db, created_trip.id, destination_ids=[second.id])
+
+        assert len(graph.destinations) == 2
+        assert graph.pois_for(first.id) == []
+        assert len(graph.pois_for(second.id)) == 3
+
+    @pytest.mark.asyncio
+    async def test_missing_trip(self, db):
+        """Test that an unknown trip returns None."""
+        assert await TripExportService.load_graph(db, 999999) is None
@@ -0,0 +1,168 @@
+"""
+Tests for the local-search TSP solver and the POI optimization fallback.
+"""
+import itertools
+import logging
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.core.geodesic import distance_matrix_km
+from app.services.poi_optimization_service import POIOptimizationService
+from app.services.tsp_solver import nearest_neighbour_order, path_cost, solve_tour
+
+logger = logging.getLogger(__name__)
+
+
+def _random_points(n: int, seed: int) -> np.ndarray:
+    """n points scattered over a ~10 km city area around Paris."""
+    rng = np.random.default_rng(seed)
+    return np.column_stack((
+        48.85 + rng.uniform(-0.05, 0.05, n),
+        2.35 + rng.uniform(-0.07, 0.07, n),
+    ))
+
+
+def _brute_force_cost(dist: np.ndarray, return_to_start: bool) -> float:
+    best = float("inf")
+    for perm in itertools.permutations(range(1, len(dist))):
+        path = [0, *perm, 0] if return_to_start else [0, *perm]
+        best = min(best, path_cost(dist, np.array(path)))
+    return best
+
+
+class TestSolveTour:
+    """Tests for solve_tour."""
+
+    @pytest.mark.parametrize("return_to_start", [True, False])
+    def test_matches_brute_force_on_small_inputs(self, return_to_start):
+        """Test that the solver finds the optimum for 7 stops."""
+        for seed in range(5):
+            dist = distance_matrix_km(_random_points(8, seed), dtype=np.float64)
+            tour = solve_tour(dist, return_to_start=return_to_start, time_budget_ms=1000)
+
+            assert sorted(tour.order) == list(range(1, 8))
+            assert tour.cost == pytest.approx(_brute_force_cost(dist, return_to_start), rel=1e-3)
+
+    def test_never_worse_than_seed(self):
+        """Test that local search only improves the nearest-neighbour tour."""
+        dist = distance_matrix_km(_random_points(40, 7), dtype=np.float64)
+        tour = solve_tour(dist, time_budget_ms=1000)
+
+        seed_path = np.array([0, *nearest_neighbour_order(dist), 0])
+        assert tour.seed_cost == pytest.approx(path_cost(dist, seed_path))
+        assert tour.cost <= tour.seed_cost
+        assert sorted(tour.order) == list(range(1, 40))
+
+    def test_open_path_excludes_return_leg(self):
+        """Test that an open path on a line ends at the far end without returning."""
+        points = [(48.0, 2.0 + 0.01 * i) for i in range(6)]
+        dist = distance_matrix_km(points, dtype=np.float64)
+
+        closed = solve_tour(dist, return_to_start=True)
+        open_path = solve_tour(dist, return_to_start=False)
+
+        assert open_path.order == [1, 2, 3, 4, 5]
+        assert open_path.cost == pytest.approx(dist[0, 5], rel=1e-6)
+        assert closed.cost == pytest.approx(2 * dist[0, 5], rel=1e-6)
+
+    def test_time_budget_is_respected(self):
+        """Test that a zero budget returns the seed immediately."""
+        dist = distance_matrix_km(_random_points(100, 1), dtype=np.float64)
+        tour = solve_tour(dist, time_budget_ms=0)
+
+        assert tour.timed_out
+        assert tour.iterations == 0
+        assert tour.cost == pytest.approx(tour.seed_cost)
+
+    def test_trivial_inputs(self):
+        """Test matrices with only the start node or one stop."""
+        assert solve_tour(np.zeros((1, 1))).order == []
+        assert solve_tour(np.array([[0.0, 1.0], [1.0, 0.0]])).order == [1]
+
+
+class TestPOIOptimizationFallback:
+    """Tests for POIOptimizationService._optimize_with_tsp."""
+
+    def _pois(self, n: int) -> list[dict]:
+        return [
+            {"id": 100 + i, "latitude": lat, "longitude": lon, "dwell_time": 45}
+            for i, (lat, lon) in enumerate(_random_points(n, 3).tolist())
+        ]
+
+    def test_returns_legs_and_dwell(self):
+        """Test that per-leg travel times and dwell totals are reported."""
+        service = POIOptimizationService(api_key=None)
+        pois = self._pois(10)
+        result = service._optimize_with_tsp(pois, {"lat": 48.85, "lon": 2.35})
+
+        assert sorted(result.optimized_order) == [p["id"] for p in pois]
+        assert len(result.leg_durations_minutes) == 10
+        assert result.total_dwell_minutes == 450
+        # Closed tour: total includes the return leg on top of the listed legs
+        assert result.total_duration_minutes >= int(sum(result.leg_durations_minutes)) - 1
+        coords = result.route_geometry["coordinates"]
+        assert coords[0] == coords[-1] == [2.35, 48.85]
+
+    def test_open_path_geometry_does_not_return(self):
+        """Test that return_to_start=False leaves the route open."""
+        service = POIOptimizationService(api_key=None)
+        result = service._optimize_with_tsp(
+            self._pois(6), {"lat": 48.85, "lon": 2.35}, return_to_start=False
+        )
+        coords = result.route_geometry["coordinates"]
+        assert len(coords) == 7
+        assert coords[-1] != [2.35, 48.85]
+
+    async def test_fallback_runs_off_the_event_loop(self):
+        """Test that optimize_route runs the local search in a worker thread."""
+        service = POIOptimizationService(api_key=None)
+        threads = []
+
+        def recording_solve(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return solve_tour(*args, **kwargs)
+
+        with patch("app.services.poi_optimization_service.solve_tour", side_effect=recording_solve):
+            result = await service.optimize_route(self._pois(8), {"lat": 48.85, "lon": 2.35})
+
+        assert len(result.optimized_order) == 8
+        assert threads and threads[0] != threading.get_ident()
+
+
+@pytest.mark.slow
+class TestSolveTourBenchmark:
+    """Tour length and runtime against plain nearest neighbour for 5-100 POIs."""
+
+    @pytest.mark.parametrize("n_pois", [5, 10, 20, 50, 100])
+    def test_benchmark_against_nearest_neighbour(self, n_pois):
+        """Test that local search shortens tours within the time budget."""
+        budget_ms = 200
+        seed_costs, costs, nn_times, solve_times = [], [], [], []
+        for seed in range(5):
+            dist = distance_matrix_km(_random_points(n_pois + 1, seed), dtype=np.float64)
+
+            started = time.perf_counter()
+            nn_path = np.array([0, *nearest_neighbour_order(dist), 0])
+            nn_times.append(time.perf_counter() - started)
+            seed_costs.append(path_cost(dist, nn_path))
+
+            started = time.perf_counter()
+            tour = solve_tour(dist, time_budget_ms=budget_ms)
+            solve_times.append(time.perf_counter() - started)
+            costs.append(tour.cost)
+
+        improvement = 1 - sum(costs) / sum(seed_costs)
+        timings = (
+            f"{n_pois:>3} POIs: nearest neighbour {np.mean(seed_costs):7.2f} km "
+            f"in {np.mean(nn_times) * 1000:6.2f} ms | 2-opt/Or-opt {np.mean(costs):7.2f} km "
+            f"in {np.mean(solve_times) * 1000:6.2f} ms | {improvement:.1%} shorter"
+        )
+        logger.info(timings)
+
+        assert all(c <= s + 1e-9 for c, s in zip(costs, seed_costs)), timings
+        # The budget bounds the search; allow one in-flight pass to finish
+        assert max(solve_times) * 1000 < budget_ms * 2, timings
@@ -1,6 +1,114 @@
+import asyncio
+import json
+import logging
+import time
+
 import pytest
+from app.core.pubsub import InProcessBroker, RedisBroker
 from app.services.connection_manager import ConnectionManager
 
+logger = logging.getLogger(__name__)
+
+
+class FakeWebSocket:
+    """Records the text frames sent to one client; ``gate`` makes it a slow client."""
+
+    def __init__(self, gate: asyncio.Event = None):
+        self.texts = []
+        self.gate = gate
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.texts.append(text)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+    @property
+    def sent(self):
+        return [json.loads(text) for text in self.texts]
+
+    def of_type(self, message_type):
+        return [m for m in self.sent if m.get("type") == message_type]
+
+
+class RespStandIn:
+    """Minimal Redis-protocol server: PING, CLIENT, SUBSCRIBE, UNSUBSCRIBE and PUBLISH."""
+
+    def __init__(self):
+        self.subscribers: dict[str, set] = {}
+        self.commands = []
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"redis://127.0.0.1:{port}/0"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @staticmethod
+    def _bulk(value: str) -> bytes:
+        data = value.encode()
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    def _push(self, kind: str, channel: str, payload) -> bytes:
+        tail = b":%d\r\n" % payload if isinstance(payload, int) else self._bulk(payload)
+        return b"*3\r\n" + self._bulk(kind) + self._bulk(channel) + tail
+
+    async def _read_command(self, reader) -> list[str]:
+        header = await reader.readline()
+        if not header:
+            raise ConnectionError
+        args = []
+        for _ in range(int(header[1:])):
+            length = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2].decode())
+        return args
+
+    async def _handle(self, reader, writer):
+        channels: set[str] = set()
+        try:
+            while True:
+                args = await self._read_command(reader)
+                name = args[0].upper()
+                self.commands.append([name, *args[1:]])
+                if name == "PING":
+                    writer.write(b"+PONG\r\n")
+                elif name == "CLIENT":
+                    writer.write(b"+OK\r\n")
+                elif name == "SUBSCRIBE":
+                    for channel in args[1:]:
+                        channels.add(channel)
+                        self.subscribers.setdefault(channel, set()).add(writer)
+                        writer.write(self._push("subscribe", channel, len(channels)))
+                elif name == "UNSUBSCRIBE":
+                    for channel in args[1:] or list(channels):
+                        channels.discard(channel)
+                        self.subscribers.get(channel, set()).discard(writer)
+                        writer.write(self._push("unsubscribe", channel, len(channels)))
+                elif name == "PUBLISH":
+                    receivers = list(self.subscribers.get(args[1], ()))
+                    for receiver in receivers:
+                        receiver.write(self._push("message", args[1], args[2]))
+                    writer.write(b":%d\r\n" % len(receivers))
+                else:
+                    writer.write(b"-ERR unknown command '%s'\r\n" % name.encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for subscribed in self.subscribers.values():
+                subscribed.discard(writer)
+            writer.close()
+
 
 class TestConnectionManager:
     def test_connection_manager_tracks_users(self):
@@ -12,3 +120,246 @@ class TestConnectionManager:
         # After disconnect with no connections, the trip should be removed
         await mgr.disconnect(1, 42)
         assert mgr.get_online_users(1) == []
+
+
+class TestCrossWorkerFanOut:
+    """Two managers sharing a broker stand in for two uvicorn workers."""
+
+    def _workers(self):
+        broker = InProcessBroker()
+        return broker, ConnectionManager(broker, node_id="a"), ConnectionManager(broker, node_id="b")
+
+    async def test_broadcast_reaches_other_worker(self):
+        """Test that trip broadcasts reach sockets held by another worker, once each."""
+        broker, a, b = self._workers()
+        ws_a, ws_b, ws_other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await a.connect(1, 10, ws_a)
+        await b.connect(1, 20, ws_b)
+        await b.connect(2, 30, ws_other)
+
+        await a.broadcast_to_trip(1, {"type": "poi_added", "id": 5})
+        await a.broadcast_to_trip(1, {"type": "poi_deleted", "id": 5}, exclude_user=20)
+        await a.flush()
+        await b.flush()
+
+        assert ws_a.of_type("poi_added") == [{"type": "poi_added", "id": 5}]
+        assert ws_b.of_type("poi_added") == [{"type": "poi_added", "id": 5}]
+        assert ws_b.of_type("poi_deleted") == []
+        assert ws_other.of_type("poi_added") == []
+
+    async def test_presence_is_shared(self):
+        """Test that presence lists users across workers and drops them on disconnect."""
+        broker, a, b = self._workers()
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        await a.connect(1, 10, ws_a)
+        await b.connect(1, 20, ws_b)
+
+        assert a.get_online_users(1) == [10, 20]
+        assert b.get_online_users(1) == [20, 10]
+        await a.flush()
+        assert ws_a.of_type("presence")[-1]["online_users"] == [10, 20]
+
+        await b.disconnect(1, 20)
+
+        assert a.get_online_users(1) == [10]
+        await a.flush()
+        assert ws_a.of_type("presence")[-1]["online_users"] == [10]
+
+    async def test_presence_of_a_silent_worker_expires(self):
+        """Test that users of a worker that stops announcing drop out after the TTL."""
+        broker = InProcessBroker()
+        a = ConnectionManager(broker, node_id="a", presence_heartbeat=0.02, presence_ttl=0.1)
+        b = ConnectionManager(broker, node_id="b", presence_heartbeat=0.02, presence_ttl=0.1)
+        # Never re-announces, as if the process had died after connecting
+        dead = ConnectionManager(broker, node_id="dead", presence_heartbeat=0)
+        ws_a = FakeWebSocket()
+        await a.connect(1, 10, ws_a)
+        await b.connect(1, 20, FakeWebSocket())
+        await dead.connect(1, 30, FakeWebSocket())
+        assert a.get_online_users(1) == [10, 20, 30]
+
+        await asyncio.sleep(0.3)
+
+        assert a.get_online_users(1) == [10, 20]
+        await a.flush()
+        assert ws_a.of_type("presence")[-1]["online_users"] == [10, 20]
+        await a.close()
+        await b.close()
+
+    async def test_subscribes_only_to_held_trips(self):
+        """Test that a worker listens to a trip only while it holds a socket for it."""
+        broker, a, _ = self._workers()
+        await a.connect(1, 10, FakeWebSocket())
+        await a.connect(2, 10, FakeWebSocket())
+        assert sorted(broker.channels()) == ["ws:trip:1", "ws:trip:2", "ws:user:10"]
+
+        await a.disconnect(1, 10)
+        assert sorted(broker.channels()) == ["ws:trip:2", "ws:user:10"]
+
+        await a.disconnect(2, 10)
+        assert broker.channels() == []
+
+    async def test_notifications_and_direct_messages_cross_workers(self):
+        """Test that a worker without the user's socket still reaches them."""
+        broker, a, b = self._workers()
+        ws_b = FakeWebSocket()
+        await b.connect(1, 20, ws_b)
+
+        await a.push_notification(20, {"id": 7})
+        await a.push_to_user(20, {"type": "unread_count", "count": 3})
+        await a.send_to_user(1, 20, {"type": "direct"})
+        await b.flush()
+
+        assert ws_b.of_type("notification") == [{"type": "notification", "data": {"id": 7}}]
+        assert ws_b.of_type("unread_count") == [{"type": "unread_count", "count": 3}]
+        assert ws_b.of_type("direct") == [{"type": "direct"}]
+
+    async def test_redis_broker_with_stand_in(self):
+        """Test the Redis backend end to end against a local Redis-protocol server."""
+        server = RespStandIn()
+        url = await server.start()
+        a = ConnectionManager(RedisBroker(url, poll_timeout=0.05), node_id="a")
+        b = ConnectionManager(RedisBroker(url, poll_timeout=0.05), node_id="b")
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+
+        async def wait_for(condition):
+            for _ in range(100):
+                if condition():
+                    return
+                await asyncio.sleep(0.01)
+            pytest.fail("message not delivered")
+
+        try:
+            await a.connect(1, 10, ws_a)
+            await b.connect(1, 20, ws_b)
+            await wait_for(lambda: a.get_online_users(1) == [10, 20])
+
+            await a.broadcast_to_trip(1, {"type": "poi_added", "id": 5})
+            await wait_for(lambda: ws_b.of_type("poi_added"))
+
+            await b.disconnect(1, 20)
+            await wait_for(lambda: a.get_online_users(1) == [10])
+            await wait_for(lambda: ["UNSUBSCRIBE", "ws:trip:1"] in server.commands)
+        finally:
+            await a.close()
+            await b.close()
+            await server.stop()
+
+
+class TestSendQueues:
+    """Per-socket writer tasks, presence coalescing and the user index."""
+
+    async def _trip(self, mgr, sockets: int, slow: FakeWebSocket = None):
+        fast = [FakeWebSocket() for _ in range(sockets)]
+        for user_id, ws in enumerate(fast, start=1):
+            await mgr.connect(1, user_id, ws)
+        if slow is not None:
+            await mgr.connect(1, 0, slow)
+        return fast
+
+    async def test_500_sockets_with_a_slow_client(self):
+        """Load test: broadcasts to 500 sockets are not held up by one stalled client."""
+        mgr = ConnectionManager(max_queue=1000)
+        gate = asyncio.Event()
+        slow = FakeWebSocket(gate)
+        fast = await self._trip(mgr, 499, slow)
+
+        start = time.perf_counter()
+        for i in range(100):
+            await mgr.broadcast_to_trip(1, {"type": "update", "seq": i})
+        enqueued = time.perf_counter() - start
+        await asyncio.gather(*(mgr._connections[1][uid].join() for uid in range(1, 500)))
+        delivered = time.perf_counter() - start
+        timings = (
+            f"500 sockets x 100 broadcasts: enqueued in {enqueued * 1000:.1f} ms, "
+            f"fast clients done in {delivered * 1000:.1f} ms, slow client still pending"
+        )
+        logger.info(timings)
+
+        assert all([m["seq"] for m in ws.of_type("update")] == list(range(100)) for ws in fast)
+        assert slow.texts == []
+        # Serialized once per broadcast: every socket got the same string object
+        assert len({id(ws.texts[-1]) for ws in fast}) == 1
+        # 500 joins produced a single presence message per socket
+        assert all(len(ws.of_type("presence")) == 1 for ws in fast)
+        assert len(fast[0].of_type("presence")[0]["online_users"]) == 500
+        assert delivered < 5, timings
+
+        gate.set()
+        await mgr.flush()
+        assert len(slow.of_type("update")) == 100
+        await mgr.close()
+
+    async def test_presence_coalesced_behind_slow_send(self):
+        """Test that queued presence snapshots are replaced, keeping only the latest."""
+        mgr = ConnectionManager()
+        gate = asyncio.Event()
+        slow = FakeWebSocket(gate)
+        await mgr.connect(1, 1, slow)
+        for user_id in range(2, 12):
+            await mgr.connect(1, user_id, FakeWebSocket())
+        await mgr.broadcast_to_trip(1, {"type": "update"})
+
+        gate.set()
+        await mgr.flush()
+
+        presence = slow.of_type("presence")
+        assert len(presence) <= 2
+        assert presence[-1]["online_users"] == list(range(1, 12))
+        assert slow.sent[-1] == {"type": "update"}
+        assert mgr._connections[1][1].coalesced >= 9
+        await mgr.close()
+
+    async def test_full_queue_disconnects_slow_client(self):
+        """Test that a client falling a full queue behind is closed, not waited on."""
+        mgr = ConnectionManager(max_queue=8)
+        slow = FakeWebSocket(asyncio.Event())
+        fast = await self._trip(mgr, 3, slow)
+
+        for i in range(20):
+            await mgr.broadcast_to_trip(1, {"type": "update", "seq": i})
+            await asyncio.sleep(0.001)  # Healthy writers keep up between requests
+        await mgr.flush()
+        await asyncio.sleep(0)
+
+        assert slow.closed_with == 1013
+        assert mgr._connections[1][0].closed
+        assert all(len(ws.of_type("update")) == 20 for ws in fast)
+
+        # The receive loop then reports the disconnect
+        await mgr.disconnect(1, 0, slow)
+        assert 0 not in mgr.get_online_users(1)
+        await mgr.close()
+
+    async def test_notifications_use_user_index(self):
+        """Test that notifications reach each of a user's trips and the index is cleaned up."""
+        mgr = ConnectionManager()
+        ws1, ws2, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await mgr.connect(1, 7, ws1)
+        await mgr.connect(2, 7, ws2)
+        await mgr.connect(2, 8, other)
+
+        await mgr.push_notification(7, {"id": 1})
+        await mgr.flush()
+
+        assert ws1.of_type("notification") == ws2.of_type("notification") == [{"type": "notification", "data": {"id": 1}}]
+        assert other.of_type("notification") == []
+        assert sorted(mgr._user_sockets[7]) == [1, 2]
+
+        await mgr.disconnect(1, 7)
+        await mgr.disconnect(2, 7)
+        assert 7 not in mgr._user_sockets
+        await mgr.close()
+
+    async def test_stale_disconnect_keeps_replacement(self):
+        """Test that the old socket's disconnect does not remove a reconnected one."""
+        mgr = ConnectionManager()
+        old, new = FakeWebSocket(), FakeWebSocket()
+        await mgr.connect(1, 7, old)
+        await mgr.connect(1, 7, new)
+
+        await mgr.disconnect(1, 7, old)
+
+        assert mgr.get_online_users(1) == [7]
+        assert mgr._connections[1][7].websocket is new
+        await mgr.close()
@@ -0,0 +1,45 @@
+"""
+Standalone background worker for segment recalculation jobs.
+
+Run with ``python -m app.worker`` next to API processes started with
+``SEGMENT_JOB_WORKERS=0`` (the worker uses ``SEGMENT_JOB_WORKERS`` tasks,
+at least one). The worker holds no WebSockets: completion messages reach
+clients through the realtime broker, so set ``REALTIME_BROKER=redis``
+(otherwise clients have to poll the job status endpoint).
+"""
+import asyncio
+import logging
+import signal
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.http_client import close_http_client
+from app.services.connection_manager import manager
+from app.services.segment_job_queue import get_segment_job_runner
+
+logging.basicConfig(
+    level=logging.DEBUG if getattr(settings, 'DEBUG', False) else logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    runner = get_segment_job_runner()
+    runner.start(max(1, settings.SEGMENT_JOB_WORKERS))
+    await stop.wait()
+
+    logger.info("Stopping segment job worker")
+    await runner.stop()
+    await manager.close()
+    await close_http_client()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
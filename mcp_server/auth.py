@@ -9,7 +9,6 @@ Provides:
 """
 
 import logging
-from datetime import datetime, timezone
 from typing import Optional
 
 from jose import jwt, JWTError, ExpiredSignatureError
@@ -20,12 +19,16 @@ from mcp.server.auth.provider import AccessToken, TokenVerifier
 from mcp.server.fastmcp import Context
 
 from app.api.permissions import ROLE_HIERARCHY
-from app.models.trip_member import TripMember
-from app.models.trip import Trip
+from app.core.auth_cache import PrincipalCache, RevocationSet, TripRoleCache
 from mcp_server.config import mcp_settings
 
 logger = logging.getLogger(__name__)
 
+# Per-process auth state shared by all verify_token calls
+_principals = PrincipalCache(ttl_seconds=mcp_settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS)
+_revocations = RevocationSet(refresh_seconds=mcp_settings.AUTH_REVOCATION_REFRESH_SECONDS)
+_trip_roles = TripRoleCache(ttl_seconds=mcp_settings.AUTH_TRIP_ROLE_CACHE_TTL_SECONDS)
+
 # Generic message returned for all auth failures to prevent enumeration
 _AUTH_FAILED = "Authentication failed"
 
@@ -34,8 +37,11 @@ class TravelRuterTokenVerifier(TokenVerifier):
     """Validates Bearer JWTs issued by the Travel Ruter backend.
 
     Decodes the token using the shared SECRET_KEY, verifies the user
-    exists and is active in the DB, checks token revocation status,
-    then returns an AccessToken with client_id set to the user_id (as string).
+    exists and is active, checks token revocation status, then returns an
+    AccessToken with client_id set to the user_id (as string). Users are
+    cached for AUTH_PRINCIPAL_CACHE_TTL_SECONDS and revocations are held in
+    memory, refreshed every AUTH_REVOCATION_REFRESH_SECONDS; changes the
+    backend commits arrive sooner through the invalidation relay.
 
     All failure paths return None with the same generic log message
     to prevent information leakage.
@@ -68,88 +74,37 @@ class TravelRuterTokenVerifier(TokenVerifier):
             logger.warning(_AUTH_FAILED)
             return None
 
-        # Verify user exists, is active, and token is not revoked
-        from mcp_server.context import get_db_session
-
+        # Verify user exists, is active, and token is not revoked.
+        # Both checks are served from memory; the DB is only touched when
+        # the revocation set is due for a refresh or the user is not cached.
         try:
-            async with get_db_session() as db:
-                # Check user
-                from app.models.user import User
-
-                stmt = select(User).where(
-                    User.id == int(user_id),
-                    User.is_active == True,
-                )
-                result = await db.execute(stmt)
-                user = result.scalar_one_or_none()
-
-                if not user:
-                    logger.warning(_AUTH_FAILED)
-                    return None
-
-                # Check token revocation
-                is_revoked = await self._is_token_revoked(
-                    db, payload, int(user_id)
-                )
-                if is_revoked:
-                    logger.warning(_AUTH_FAILED)
-                    return None
-
-                logger.info(f"MCP auth: verified user {user_id}")
-                return AccessToken(
-                    token=token,
-                    client_id=str(user_id),
-                    scopes=["mcp"],
-                    expires_at=payload.get("exp"),
-                )
+            uid = int(user_id)
+            cached = _principals.get(uid)
+            is_active = cached["is_active"] if cached is not None else None
+            if is_active is None or _revocations.is_due():
+                from mcp_server.context import get_db_session
+
+                async with get_db_session() as db:
+                    await _revocations.refresh(db)
+                    if is_active is None:
+                        user = await _principals.load(db, uid)
+                        is_active = bool(user and user.is_active)
+
+            if not is_active or _revocations.is_revoked(payload, uid):
+                logger.warning(_AUTH_FAILED)
+                return None
+
+            logger.info(f"MCP auth: verified user {user_id}")
+            return AccessToken(
+                token=token,
+                client_id=str(user_id),
+                scopes=["mcp"],
+                expires_at=payload.get("exp"),
+            )
         except Exception:
             logger.error(_AUTH_FAILED)
             return None
 
-    async def _is_token_revoked(
-        self,
-        db: AsyncSession,
-        payload: dict,
-        user_id: int,
-    ) -> bool:
-        """Check if a token has been revoked (by jti or bulk revoke-all).
-
-        Returns True if the token should be rejected.
-        """
-        from app.models.revoked_token import RevokedToken
-
-        jti = payload.get("jti")
-
-        # If the token has a jti, check direct revocation
-        if jti:
-            stmt = select(RevokedToken).where(RevokedToken.jti == jti)
-            result = await db.execute(stmt)
-            if result.scalar_one_or_none():
-                return True
-
-        # Check bulk revoke-all markers for this user
-        stmt = (
-            select(RevokedToken)
-            .where(
-                RevokedToken.user_id == user_id,
-                RevokedToken.jti.like("revoke-all-%"),
-            )
-            .order_by(RevokedToken.created_at.desc())
-            .limit(1)
-        )
-        result = await db.execute(stmt)
-        marker = result.scalar_one_or_none()
-
-        if marker and marker.revoked_at:
-            # Token issued before the revoke-all marker should be rejected
-            token_iat = payload.get("iat")
-            if token_iat:
-                token_issued = datetime.fromtimestamp(token_iat, tz=timezone.utc)
-                if token_issued < marker.revoked_at.replace(tzinfo=timezone.utc):
-                    return True
-
-        return False
-
 
 async def verify_trip_access(
     db: AsyncSession,
@@ -159,35 +114,20 @@ async def verify_trip_access(
 ) -> bool:
     """Check that a user has at least `min_role` on a trip.
 
-    Checks TripMember table first (collaborative trips), then falls back
-    to Trip.user_id for legacy ownership.
+    Checks accepted TripMember roles first (collaborative trips), then
+    falls back to Trip.user_id for legacy ownership. Membership is cached
+    per trip for AUTH_TRIP_ROLE_CACHE_TTL_SECONDS.
 
     Returns True if access is granted, False otherwise.
     """
-    min_level = ROLE_HIERARCHY.get(min_role, 0)
-
-    # Check TripMember table (collaborative access)
-    stmt = select(TripMember).where(
-        TripMember.trip_id == trip_id,
-        TripMember.user_id == user_id,
-        TripMember.status == "accepted",
-    )
-    result = await db.execute(stmt)
-    member = result.scalar_one_or_none()
-
-    if member:
-        user_level = ROLE_HIERARCHY.get(member.role, -1)
-        return user_level >= min_level
-
-    # Fallback: check legacy Trip.user_id ownership
-    stmt = select(Trip).where(Trip.id == trip_id)
-    result = await db.execute(stmt)
-    trip = result.scalar_one_or_none()
-
-    if trip and trip.user_id == user_id:
-        return True  # Owner has full access
+    roles = await _trip_roles.load(db, trip_id)
+    if roles is None:
+        return False
 
-    return False
+    role = roles.role_for(user_id, include_legacy_owner=True)
+    if role is None:
+        return False
+    return ROLE_HIERARCHY.get(role, -1) >= ROLE_HIERARCHY.get(min_role, 0)
 
 
 async def resolve_trip_id(
@@ -203,30 +143,23 @@ async def resolve_trip_id(
     - Direct: destination_id -> Destination.trip_id
     - Chained: entity_id (POI/Accommodation) -> entity.destination_id -> Destination.trip_id
 
-    Returns the trip_id if found, None otherwise.
+    Both are a single query. Returns the trip_id if found, None otherwise.
     """
     from app.models import Destination
 
     if destination_id:
-        result = await db.execute(
-            select(Destination).where(Destination.id == destination_id)
-        )
-        dest = result.scalar_one_or_none()
-        return dest.trip_id if dest else None
-
-    if entity_id and entity_model:
-        result = await db.execute(
-            select(entity_model).where(entity_model.id == entity_id)
+        stmt = select(Destination.trip_id).where(Destination.id == destination_id)
+    elif entity_id and entity_model:
+        stmt = (
+            select(Destination.trip_id)
+            .join(entity_model, entity_model.destination_id == Destination.id)
+            .where(entity_model.id == entity_id)
         )
-        entity = result.scalar_one_or_none()
-        if entity:
-            result = await db.execute(
-                select(Destination).where(Destination.id == entity.destination_id)
-            )
-            dest = result.scalar_one_or_none()
-            return dest.trip_id if dest else None
+    else:
+        return None
 
-    return None
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
 
 
 def get_user_id_from_context(ctx: Context) -> Optional[int]:
@@ -34,6 +34,9 @@ class MCPSettings(BaseSettings):
     # JWT Authentication (shared SECRET_KEY with backend/orchestrator)
     JWT_SECRET_KEY: Optional[str] = None
     JWT_ALGORITHM: str = "HS256"
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 30  # Active-user cache per token sub (0 disables)
+    AUTH_REVOCATION_REFRESH_SECONDS: float = 5.0  # Max delay before a revocation takes effect
+    AUTH_TRIP_ROLE_CACHE_TTL_SECONDS: int = 15  # Upper bound on staleness if a broker invalidation is missed
 
     # HTTP transport settings (for remote MCP access)
     MCP_HTTP_HOST: str = "0.0.0.0"
@@ -23,6 +23,7 @@ class AppContext:
 
     engine: any
     session_factory: async_sessionmaker
+    broker: any = None  # Receives trip role invalidations from the backend
     _services_cache: dict = None
 
     def __post_init__(self):
@@ -59,9 +60,18 @@ async def init_context() -> AppContext:
         autoflush=False,
     )
 
+    # Membership changes made through the backend reach the trip role cache
+    # right away instead of after its TTL
+    from app.core.auth_cache import start_invalidation_relay
+    from app.core.pubsub import build_broker
+
+    broker = build_broker()
+    await start_invalidation_relay(broker)
+
     _context = AppContext(
         engine=engine,
         session_factory=session_factory,
+        broker=broker,
     )
 
     logger.info("MCP server context initialized successfully")
@@ -74,6 +84,11 @@ async def cleanup_context():
 
     if _context is not None:
         logger.info("Cleaning up MCP server context...")
+        from app.core.auth_cache import stop_invalidation_relay
+
+        await stop_invalidation_relay()
+        if _context.broker is not None:
+            await _context.broker.close()
         await _context.engine.dispose()
         _context = None
         logger.info("MCP server context cleaned up")
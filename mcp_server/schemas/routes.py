@@ -89,7 +89,7 @@ class GetTravelMatrixInput(BaseModel):
         ...,
         description="List of locations for matrix calculation",
         min_length=2,
-        max_length=50,  # ORS limit consideration
+        max_length=100,  # Larger matrices are tiled under the ORS limit
     )
     profile: TransportProfile = Field(
         default=TransportProfile.WALKING,
@@ -110,13 +110,13 @@ class MatrixEntry(BaseModel):
 class TravelMatrixResult(BaseModel):
     """Schema for travel matrix result."""
 
-    durations: List[List[float]] = Field(
+    durations: List[List[Optional[float]]] = Field(
         ...,
-        description="Duration matrix [source][dest] in seconds",
+        description="Duration matrix [source][dest] in seconds (null if unavailable)",
     )
-    distances: List[List[float]] = Field(
+    distances: List[List[Optional[float]]] = Field(
         ...,
-        description="Distance matrix [source][dest] in meters",
+        description="Distance matrix [source][dest] in meters (null if unavailable)",
     )
     locations_count: int = Field(..., description="Number of locations")
     profile: str = Field(..., description="Transport profile used")
@@ -126,3 +126,7 @@ class TravelMatrixResult(BaseModel):
         default_factory=list,
         description="Flat list of all matrix entries for easy reading",
     )
+    failed_cells: List[List[int]] = Field(
+        default_factory=list,
+        description="[source, dest] index pairs whose ORS tile failed",
+    )
@@ -21,16 +21,16 @@ from mcp_server.schemas.accommodations import (
 logger = logging.getLogger(__name__)
 
 
-async def _accommodation_to_result(acc, lat=None, lng=None) -> AccommodationResult:
-    """Convert an Accommodation model to AccommodationResult schema."""
+async def _accommodation_to_result(acc) -> AccommodationResult:
+    """Convert an Accommodation model to AccommodationResult schema (lat/lng from its generated columns)."""
     return AccommodationResult(
         id=acc.id,
         destination_id=acc.destination_id,
         name=acc.name,
         type=acc.type,
         address=acc.address,
-        latitude=lat if lat is not None else acc.latitude,
-        longitude=lng if lng is not None else acc.longitude,
+        latitude=acc.latitude,
+        longitude=acc.longitude,
         check_in_date=str(acc.check_in_date) if acc.check_in_date else None,
         check_out_date=str(acc.check_out_date) if acc.check_out_date else None,
         booking_reference=acc.booking_reference,
@@ -158,7 +158,7 @@ def register_tools(server: FastMCP):
                 ).model_dump()
 
         from sqlalchemy import select, func
-        from geoalchemy2.functions import ST_SetSRID, ST_MakePoint, ST_X, ST_Y
+        from geoalchemy2.functions import ST_SetSRID, ST_MakePoint
         from app.models import Accommodation, Destination
 
         user_id = get_user_id_from_context(ctx)
@@ -278,28 +278,12 @@ def register_tools(server: FastMCP):
                         )
 
                     db.add(db_acc)
-                    await db.flush()
-
-                    # Re-query to extract coordinates
-                    result = await db.execute(
-                        select(
-                            Accommodation,
-                            ST_Y(Accommodation.coordinates).label('lat'),
-                            ST_X(Accommodation.coordinates).label('lng'),
-                        ).where(Accommodation.id == db_acc.id)
-                    )
-                    row = result.one_or_none()
-                    if not row:
-                        return ManageAccommodationOutput(
-                            operation=operation, success=False,
-                            message=f"Failed to retrieve created accommodation (ID {db_acc.id})",
-                        ).model_dump()
-                    created_acc, lat, lng = row
+                    await db.flush()  # Generated latitude/longitude come back from the INSERT
 
-                    acc_result = await _accommodation_to_result(created_acc, lat, lng)
+                    acc_result = await _accommodation_to_result(db_acc)
                     return ManageAccommodationOutput(
                         operation=operation, success=True,
-                        message=f"Accommodation '{name}' created with ID {created_acc.id}",
+                        message=f"Accommodation '{name}' created with ID {db_acc.id}",
                         accommodation=acc_result,
                     ).model_dump()
 
@@ -311,21 +295,16 @@ def register_tools(server: FastMCP):
                         ).model_dump()
 
                     result = await db.execute(
-                        select(
-                            Accommodation,
-                            ST_Y(Accommodation.coordinates).label('lat'),
-                            ST_X(Accommodation.coordinates).label('lng'),
-                        ).where(Accommodation.id == accommodation_id)
+                        select(Accommodation).where(Accommodation.id == accommodation_id)
                     )
-                    row = result.one_or_none()
-                    if not row:
+                    acc = result.scalar_one_or_none()
+                    if not acc:
                         return ManageAccommodationOutput(
                             operation=operation, success=False,
                             message=f"Accommodation with ID {accommodation_id} not found",
                         ).model_dump()
 
-                    acc, lat, lng = row
-                    acc_result = await _accommodation_to_result(acc, lat, lng)
+                    acc_result = await _accommodation_to_result(acc)
                     return ManageAccommodationOutput(
                         operation=operation, success=True,
                         message=f"Accommodation '{acc.name}' retrieved",
@@ -420,28 +399,13 @@ def register_tools(server: FastMCP):
                             ST_MakePoint(resolved_lng, resolved_lat), 4326
                         )
 
+                    # Generated latitude/longitude are returned by the UPDATE itself
                     await db.flush()
 
-                    # Re-query to extract coordinates
-                    result = await db.execute(
-                        select(
-                            Accommodation,
-                            ST_Y(Accommodation.coordinates).label('lat'),
-                            ST_X(Accommodation.coordinates).label('lng'),
-                        ).where(Accommodation.id == accommodation_id)
-                    )
-                    row = result.one_or_none()
-                    if not row:
-                        return ManageAccommodationOutput(
-                            operation=operation, success=False,
-                            message=f"Failed to retrieve updated accommodation (ID {accommodation_id})",
-                        ).model_dump()
-                    updated_acc, lat, lng = row
-
-                    acc_result = await _accommodation_to_result(updated_acc, lat, lng)
+                    acc_result = await _accommodation_to_result(db_acc)
                     return ManageAccommodationOutput(
                         operation=operation, success=True,
-                        message=f"Accommodation '{updated_acc.name}' updated",
+                        message=f"Accommodation '{db_acc.name}' updated",
                         accommodation=acc_result,
                     ).model_dump()
 
@@ -517,20 +481,12 @@ def register_tools(server: FastMCP):
                         ).model_dump()
 
                     result = await db.execute(
-                        select(
-                            Accommodation,
-                            ST_Y(Accommodation.coordinates).label('lat'),
-                            ST_X(Accommodation.coordinates).label('lng'),
-                        )
+                        select(Accommodation)
                         .where(Accommodation.destination_id == destination_id)
                         .order_by(Accommodation.check_in_date.asc(), Accommodation.created_at.asc())
                     )
-                    rows = result.all()
 
-                    acc_results = []
-                    for row in rows:
-                        acc, lat, lng = row
-                        acc_results.append(await _accommodation_to_result(acc, lat, lng))
+                    acc_results = [await _accommodation_to_result(acc) for acc in result.scalars().all()]
 
                     return ManageAccommodationOutput(
                         operation=operation, success=True,
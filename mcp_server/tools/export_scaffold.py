@@ -321,8 +321,7 @@ def register_tools(server: FastMCP):
             f"destination_id={destination_id}, overwrite={overwrite}"
         )
 
-        from sqlalchemy import select
-        from app.models import Trip, Destination, POI, Accommodation, Note
+        from app.services.trip_export_service import TripExportService
 
         user_id = get_user_id_from_context(ctx)
 
@@ -336,25 +335,25 @@ def register_tools(server: FastMCP):
                             message=f"Access denied to trip {trip_id}",
                         ).model_dump()
 
-                # Fetch trip
-                trip = await db.get(Trip, trip_id)
-                if not trip:
+                # Fetch trip, destinations, POIs, accommodations and notes in one batch
+                graph = await TripExportService.load_graph(
+                    db,
+                    trip_id,
+                    include_notes=True,
+                    destination_ids=[destination_id] if destination_id else None,
+                )
+                if not graph:
                     return ScaffoldExportOutput(
                         success=False,
                         message=f"Trip {trip_id} not found",
                     ).model_dump()
+                trip = graph.trip
 
-                # Fetch destinations
-                dest_query = (
-                    select(Destination)
-                    .where(Destination.trip_id == trip_id)
-                    .order_by(Destination.order_index)
-                )
-                if destination_id:
-                    dest_query = dest_query.where(Destination.id == destination_id)
-
-                dest_result = await db.execute(dest_query)
-                destinations = dest_result.scalars().all()
+                all_destinations = graph.destinations
+                destinations = [
+                    d for d in all_destinations
+                    if not destination_id or d.id == destination_id
+                ]
 
                 if destination_id and not destinations:
                     return ScaffoldExportOutput(
@@ -362,17 +361,9 @@ def register_tools(server: FastMCP):
                         message=f"Destination {destination_id} not found in trip {trip_id}",
                     ).model_dump()
 
-                # Fetch all existing export_draft notes for this trip
-                existing_notes_result = await db.execute(
-                    select(Note)
-                    .where(Note.trip_id == trip_id)
-                    .where(Note.note_type == "export_draft")
-                )
-                existing_notes = existing_notes_result.scalars().all()
-
-                # Index by destination_id (None key = overview)
+                # Index existing export_draft notes by destination_id (None key = overview)
                 notes_by_dest = {}
-                for note in existing_notes:
+                for note in graph.export_drafts:
                     notes_by_dest[note.destination_id] = note
 
                 results = []
@@ -380,14 +371,6 @@ def register_tools(server: FastMCP):
                 updated = 0
                 skipped = 0
 
-                # --- All destinations for reference (needed for overview) ---
-                all_dests_result = await db.execute(
-                    select(Destination)
-                    .where(Destination.trip_id == trip_id)
-                    .order_by(Destination.order_index)
-                )
-                all_destinations = all_dests_result.scalars().all()
-
                 # --- Generate trip overview (only when scaffolding all destinations) ---
                 if not destination_id:
                     overview_md = _generate_overview_markdown(trip, all_destinations)
@@ -410,31 +393,9 @@ def register_tools(server: FastMCP):
 
                 # --- Generate per-destination documents ---
                 for dest in destinations:
-                    # Fetch POIs
-                    poi_result = await db.execute(
-                        select(POI)
-                        .where(POI.destination_id == dest.id)
-                        .order_by(POI.scheduled_date, POI.day_order)
-                    )
-                    dest_pois = poi_result.scalars().all()
-
-                    # Fetch accommodations
-                    acc_result = await db.execute(
-                        select(Accommodation)
-                        .where(Accommodation.destination_id == dest.id)
-                        .order_by(Accommodation.check_in_date)
-                    )
-                    dest_accs = acc_result.scalars().all()
-
-                    # Fetch non-export_draft notes
-                    note_result = await db.execute(
-                        select(Note)
-                        .where(Note.destination_id == dest.id)
-                        .where(Note.trip_id == trip_id)
-                        .where(Note.note_type != "export_draft")
-                        .order_by(Note.is_pinned.desc(), Note.created_at.desc())
-                    )
-                    dest_notes = note_result.scalars().all()
+                    dest_pois = graph.pois_for(dest.id)
+                    dest_accs = graph.accommodations_for(dest.id)
+                    dest_notes = graph.notes_for(dest.id)
 
                     # Generate markdown
                     dest_md = _generate_destination_markdown(
@@ -5,7 +5,7 @@ Hotel discovery via Google Places and trip export to markdown.
 """
 
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Iterator, Optional
 
 from mcp.server.fastmcp import FastMCP, Context
 
@@ -13,9 +13,80 @@ from mcp_server.context import get_db_session
 from mcp_server.auth import get_user_id_from_context, verify_trip_access
 from mcp_server.schemas.hotels import HotelSearchResult, HotelSearchOutput, TripExportOutput
 
+if TYPE_CHECKING:
+    from app.services.trip_export_service import TripExportGraph
+
 logger = logging.getLogger(__name__)
 
 
+def iter_trip_markdown(graph: "TripExportGraph") -> Iterator[str]:
+    """Yield the markdown export of a loaded trip graph line by line."""
+    trip = graph.trip
+    yield f"# {trip.name}"
+    yield ""
+    if trip.description:
+        yield f"> {trip.description}"
+        yield ""
+    yield f"**Dates:** {trip.start_date} -> {trip.end_date}"
+    if trip.location:
+        yield f"**Location:** {trip.location}"
+    if trip.total_budget:
+        yield f"**Budget:** {trip.total_budget} {trip.currency or 'USD'}"
+    yield ""
+
+    # Budget summary
+    budget = graph.budget_summary()
+    yield "## Budget Summary"
+    yield f"- Estimated total: {budget.estimated_total} {budget.currency}"
+    yield f"- POIs: {budget.poi_estimated} / Accommodation: {budget.accommodation_total}"
+    if budget.remaining_budget is not None:
+        yield f"- Remaining: {budget.remaining_budget} ({budget.budget_percentage:.0f}% allocated)"
+    yield ""
+
+    for dest in graph.destinations:
+        yield f"## {dest.city_name or dest.name}{', ' + dest.country if dest.country else ''}"
+        yield f"**{dest.arrival_date} -> {dest.departure_date}**"
+        yield ""
+
+        # Accommodations
+        for acc in graph.accommodations_for(dest.id):
+            cost = f" -- {acc.total_cost} {acc.currency}" if acc.total_cost else ""
+            yield f"**{acc.name}** ({acc.type}){cost}"
+            if acc.address:
+                yield f"   {acc.address}"
+            yield f"   Check-in: {acc.check_in_date} / Check-out: {acc.check_out_date}"
+            if acc.booking_reference:
+                yield f"   Ref: {acc.booking_reference}"
+            yield ""
+
+        # POIs grouped by date
+        pois = graph.pois_for(dest.id)
+        if pois:
+            yield "### Activities"
+            current_date = None
+            for poi in pois:
+                date_str = str(poi.scheduled_date) if poi.scheduled_date else "Unscheduled"
+                if date_str != current_date:
+                    current_date = date_str
+                    yield f"\n**{date_str}:**"
+                cost = f"€{poi.estimated_cost}" if poi.estimated_cost else "free"
+                time = f" ({poi.dwell_time}min)" if poi.dwell_time else ""
+                yield f"- {poi.name} ({poi.category}) -- {cost}{time}"
+            yield ""
+
+        # Travel segment from this destination
+        segment = graph.segments.get(dest.id)
+        if segment:
+            hours = (segment.duration_minutes or 0) // 60
+            mins = (segment.duration_minutes or 0) % 60
+            dist = f"{segment.distance_km:.0f}km" if segment.distance_km else "?"
+            yield f"**Travel:** {segment.travel_mode} -- {hours}h {mins}m, {dist}"
+            yield ""
+
+    yield "---"
+    yield "*Generated by Travel Ruter*"
+
+
 def register_tools(server: FastMCP):
     """Register hotel search and trip export tools."""
 
@@ -111,112 +182,31 @@ def register_tools(server: FastMCP):
         """
         logger.info(f"export_trip called: trip_id={trip_id}, format={format}")
 
-        from app.models.trip import Trip
-        from app.models.destination import Destination
-        from app.models.poi import POI
-        from app.models.accommodation import Accommodation
-        from app.models.travel_segment import TravelSegment
-        from app.services.trip_service import TripService
-        from sqlalchemy import select
-        from sqlalchemy.orm import selectinload
+        from app.services.trip_export_service import TripExportService
 
         user_id = get_user_id_from_context(ctx)
 
         async with get_db_session() as db:
             try:
-                trip = await verify_trip_access(db, trip_id, user_id)
-
-                # Get destinations ordered
-                dest_result = await db.execute(
-                    select(Destination)
-                    .where(Destination.trip_id == trip_id)
-                    .order_by(Destination.order_index)
-                )
-                destinations = dest_result.scalars().all()
-
-                lines = []
-                lines.append(f"# {trip.name}")
-                lines.append("")
-                if trip.description:
-                    lines.append(f"> {trip.description}")
-                    lines.append("")
-                lines.append(f"**Dates:** {trip.start_date} -> {trip.end_date}")
-                if trip.location:
-                    lines.append(f"**Location:** {trip.location}")
-                if trip.total_budget:
-                    lines.append(f"**Budget:** {trip.total_budget} {trip.currency or 'USD'}")
-                lines.append("")
-
-                # Budget summary
-                budget = await TripService.get_budget_summary(db, trip_id)
-                if budget:
-                    lines.append("## Budget Summary")
-                    lines.append(f"- Estimated total: {budget.estimated_total} {budget.currency}")
-                    lines.append(f"- POIs: {budget.poi_estimated} / Accommodation: {budget.accommodation_total}")
-                    if budget.remaining_budget is not None:
-                        lines.append(f"- Remaining: {budget.remaining_budget} ({budget.budget_percentage:.0f}% allocated)")
-                    lines.append("")
-
-                for dest in destinations:
-                    lines.append(f"## {dest.city_name or dest.name}{', ' + dest.country if dest.country else ''}")
-                    lines.append(f"**{dest.arrival_date} -> {dest.departure_date}**")
-                    lines.append("")
-
-                    # Accommodations
-                    acc_result = await db.execute(
-                        select(Accommodation)
-                        .where(Accommodation.destination_id == dest.id)
-                        .order_by(Accommodation.check_in_date)
-                    )
-                    accommodations = acc_result.scalars().all()
-                    for acc in accommodations:
-                        cost = f" -- {acc.total_cost} {acc.currency}" if acc.total_cost else ""
-                        lines.append(f"**{acc.name}** ({acc.type}){cost}")
-                        if acc.address:
-                            lines.append(f"   {acc.address}")
-                        lines.append(f"   Check-in: {acc.check_in_date} / Check-out: {acc.check_out_date}")
-                        if acc.booking_reference:
-                            lines.append(f"   Ref: {acc.booking_reference}")
-                        lines.append("")
-
-                    # POIs grouped by date
-                    poi_result = await db.execute(
-                        select(POI)
-                        .where(POI.destination_id == dest.id)
-                        .order_by(POI.scheduled_date, POI.day_order)
-                    )
-                    pois = poi_result.scalars().all()
-
-                    if pois:
-                        lines.append("### Activities")
-                        current_date = None
-                        for poi in pois:
-                            date_str = str(poi.scheduled_date) if poi.scheduled_date else "Unscheduled"
-                            if date_str != current_date:
-                                current_date = date_str
-                                lines.append(f"\n**{date_str}:**")
-                            cost = f"€{poi.estimated_cost}" if poi.estimated_cost else "free"
-                            time = f" ({poi.dwell_time}min)" if poi.dwell_time else ""
-                            lines.append(f"- {poi.name} ({poi.category}) -- {cost}{time}")
-                        lines.append("")
-
-                    # Travel segment from this destination
-                    seg_result = await db.execute(
-                        select(TravelSegment)
-                        .where(TravelSegment.from_destination_id == dest.id)
-                    )
-                    segment = seg_result.scalars().first()
-                    if segment:
-                        hours = (segment.duration_minutes or 0) // 60
-                        mins = (segment.duration_minutes or 0) % 60
-                        dist = f"{segment.distance_km:.0f}km" if segment.distance_km else "?"
-                        lines.append(f"**Travel:** {segment.travel_mode} -- {hours}h {mins}m, {dist}")
-                        lines.append("")
-
-                lines.append("---")
-                lines.append(f"*Generated by Travel Ruter*")
-
-                content = "\n".join(lines)
+                if user_id and not await verify_trip_access(db, trip_id, user_id):
+                    return TripExportOutput(
+                        trip_name="",
+                        format=format,
+                        content="",
+                        message=f"Access denied to trip {trip_id}",
+                    ).model_dump()
+
+                graph = await TripExportService.load_graph(db, trip_id)
+                if not graph:
+                    return TripExportOutput(
+                        trip_name="",
+                        format=format,
+                        content="",
+                        message=f"Trip {trip_id} not found",
+                    ).model_dump()
+                trip = graph.trip
+
+                content = "\n".join(iter_trip_markdown(graph))
 
                 return TripExportOutput(
                     trip_name=trip.name,
@@ -29,8 +29,8 @@ from mcp_server.schemas.pois import (
 logger = logging.getLogger(__name__)
 
 
-async def _poi_to_result(poi, lat=None, lng=None) -> POIResult:
-    """Convert a POI model to POIResult schema."""
+async def _poi_to_result(poi) -> POIResult:
+    """Convert a POI model to POIResult schema (lat/lng from its generated columns)."""
     return POIResult(
         id=poi.id,
         destination_id=poi.destination_id,
@@ -38,8 +38,8 @@ async def _poi_to_result(poi, lat=None, lng=None) -> POIResult:
         category=poi.category,
         description=poi.description,
         address=poi.address,
-        latitude=lat if lat is not None else poi.latitude,
-        longitude=lng if lng is not None else poi.longitude,
+        latitude=poi.latitude,
+        longitude=poi.longitude,
         estimated_cost=float(poi.estimated_cost) if poi.estimated_cost else None,
         currency=poi.currency or "USD",
         dwell_time=poi.dwell_time,
@@ -391,7 +391,7 @@ def register_tools(server: FastMCP):
         logger.info(f"manage_poi called with operation={operation}, poi_id={poi_id}")
 
         from sqlalchemy import select, func
-        from geoalchemy2.functions import ST_SetSRID, ST_MakePoint, ST_X, ST_Y
+        from geoalchemy2.functions import ST_SetSRID, ST_MakePoint
         from app.models import POI, Destination
 
         try:
@@ -551,25 +551,12 @@ def register_tools(server: FastMCP):
                         )
 
                     db.add(db_poi)
-                    await db.flush()
-
-                    # Re-query to extract coordinates
-                    result = await db.execute(
-                        select(POI, ST_Y(POI.coordinates).label('lat'), ST_X(POI.coordinates).label('lng'))
-                        .where(POI.id == db_poi.id)
-                    )
-                    row = result.one_or_none()
-                    if not row:
-                        return ManagePOIOutput(
-                            operation=operation, success=False,
-                            message=f"Failed to retrieve created POI (ID {db_poi.id})",
-                        ).model_dump()
-                    created_poi, lat, lng = row
+                    await db.flush()  # Generated latitude/longitude come back from the INSERT
 
-                    poi_result = await _poi_to_result(created_poi, lat, lng)
+                    poi_result = await _poi_to_result(db_poi)
                     return ManagePOIOutput(
                         operation=operation, success=True,
-                        message=f"POI '{name}' created with ID {created_poi.id}",
+                        message=f"POI '{name}' created with ID {db_poi.id}",
                         poi=poi_result,
                     ).model_dump()
 
@@ -580,19 +567,15 @@ def register_tools(server: FastMCP):
                             message="poi_id is required for read operation",
                         ).model_dump()
 
-                    result = await db.execute(
-                        select(POI, ST_Y(POI.coordinates).label('lat'), ST_X(POI.coordinates).label('lng'))
-                        .where(POI.id == poi_id)
-                    )
-                    row = result.one_or_none()
-                    if not row:
+                    result = await db.execute(select(POI).where(POI.id == poi_id))
+                    poi = result.scalar_one_or_none()
+                    if not poi:
                         return ManagePOIOutput(
                             operation=operation, success=False,
                             message=f"POI with ID {poi_id} not found",
                         ).model_dump()
 
-                    poi, lat, lng = row
-                    poi_result = await _poi_to_result(poi, lat, lng)
+                    poi_result = await _poi_to_result(poi)
                     return ManagePOIOutput(
                         operation=operation, success=True,
                         message=f"POI '{poi.name}' retrieved",
@@ -684,25 +667,13 @@ def register_tools(server: FastMCP):
                             ST_MakePoint(longitude, latitude), 4326
                         )
 
+                    # Generated latitude/longitude are returned by the UPDATE itself
                     await db.flush()
 
-                    # Re-query to extract coordinates
-                    result = await db.execute(
-                        select(POI, ST_Y(POI.coordinates).label('lat'), ST_X(POI.coordinates).label('lng'))
-                        .where(POI.id == poi_id)
-                    )
-                    row = result.one_or_none()
-                    if not row:
-                        return ManagePOIOutput(
-                            operation=operation, success=False,
-                            message=f"Failed to retrieve updated POI (ID {poi_id})",
-                        ).model_dump()
-                    updated_poi, lat, lng = row
-
-                    poi_result = await _poi_to_result(updated_poi, lat, lng)
+                    poi_result = await _poi_to_result(db_poi)
                     return ManagePOIOutput(
                         operation=operation, success=True,
-                        message=f"POI '{updated_poi.name}' updated",
+                        message=f"POI '{db_poi.name}' updated",
                         poi=poi_result,
                     ).model_dump()
 
@@ -776,16 +747,12 @@ def register_tools(server: FastMCP):
                         ).model_dump()
 
                     result = await db.execute(
-                        select(POI, ST_Y(POI.coordinates).label('lat'), ST_X(POI.coordinates).label('lng'))
+                        select(POI)
                         .where(POI.destination_id == destination_id)
                         .order_by(POI.category.asc(), POI.priority.desc(), POI.created_at.asc())
                     )
-                    rows = result.all()
 
-                    poi_results = []
-                    for row in rows:
-                        poi, lat, lng = row
-                        poi_results.append(await _poi_to_result(poi, lat, lng))
+                    poi_results = [await _poi_to_result(poi) for poi in result.scalars().all()]
 
                     return ManagePOIOutput(
                         operation=operation, success=True,
@@ -835,7 +802,6 @@ def register_tools(server: FastMCP):
         logger.info(f"schedule_pois called for destination_id={destination_id}, {len(assignments)} assignments")
 
         from sqlalchemy import select
-        from geoalchemy2.functions import ST_X, ST_Y
         from app.models import POI, Destination
 
         if not assignments:
@@ -915,20 +881,15 @@ def register_tools(server: FastMCP):
 
                 await db.flush()
 
-                # Re-query updated POIs with coordinates
+                # Re-query updated POIs in schedule order
                 poi_ids = [p.id for p in updated_pois]
                 if poi_ids:
                     result = await db.execute(
-                        select(POI, ST_Y(POI.coordinates).label('lat'), ST_X(POI.coordinates).label('lng'))
+                        select(POI)
                         .where(POI.id.in_(poi_ids))
                         .order_by(POI.scheduled_date.nulls_last(), POI.day_order)
                     )
-                    rows = result.all()
-
-                    poi_results = []
-                    for row in rows:
-                        poi, lat, lng = row
-                        poi_results.append(await _poi_to_result(poi, lat, lng))
+                    poi_results = [await _poi_to_result(poi) for poi in result.scalars().all()]
                 else:
                     poi_results = []
 
@@ -178,7 +178,7 @@ def register_tools(server: FastMCP):
         Essential for smart POI scheduling and day planning optimization.
 
         Args:
-            latitudes: List of location latitudes (2-50 locations)
+            latitudes: List of location latitudes (2-100 locations)
             longitudes: List of location longitudes (must match latitudes length)
             profile: Transport mode - one of: foot-walking, cycling-regular, driving-car
 
@@ -187,7 +187,9 @@ def register_tools(server: FastMCP):
             Use this with generate_smart_schedule for optimal POI distribution.
 
         Note:
-            Maximum 50 locations (2500 matrix entries) per request.
+            Maximum 100 locations per request. Matrices above the ORS limit
+            (3500 entries) are fetched in tiles; cells of a failed tile are
+            null and listed in failed_cells.
         """
         logger.info(
             f"get_travel_matrix called with {len(latitudes)} locations, "
@@ -208,9 +210,9 @@ def register_tools(server: FastMCP):
                 "distances": [],
             }
 
-        if len(latitudes) > 50:
+        if len(latitudes) > 100:
             return {
-                "error": "Maximum 50 locations supported per matrix request",
+                "error": "Maximum 100 locations supported per matrix request",
                 "durations": [],
                 "distances": [],
             }
@@ -230,8 +232,8 @@ def register_tools(server: FastMCP):
             # Build locations list
             locations = list(zip(latitudes, longitudes))
 
-            # Calculate matrix
-            result = await ors_service.get_matrix(
+            # Calculate matrix (only cells missing from the shared cache hit ORS)
+            result = await ors_service.get_cached_matrix(
                 locations=locations,
                 profile=profile,
             )
@@ -243,6 +245,8 @@ def register_tools(server: FastMCP):
                     if i != j:
                         duration_seconds = result.durations[i][j]
                         distance_meters = result.distances[i][j]
+                        if duration_seconds is None or distance_meters is None:
+                            continue  # Unreachable or failed tile
                         summary.append(
                             MatrixEntry(
                                 from_index=i,
@@ -259,6 +263,7 @@ def register_tools(server: FastMCP):
                 locations_count=len(locations),
                 profile=profile,
                 summary=summary,
+                failed_cells=[list(cell) for cell in result.failed_cells],
             )
 
             logger.info(
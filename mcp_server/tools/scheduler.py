@@ -6,12 +6,20 @@ Port of the frontend poiScheduler.js algorithm to Python.
 """
 
 import logging
-import math
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass, field
 
+import numpy as np
 from mcp.server.fastmcp import FastMCP
 
+from app.core.geodesic import (
+    NeighbourGrid,
+    estimate_travel_seconds,
+    get_speed_model,
+    haversine_km as haversine_distance,
+    travel_matrix as estimate_travel_matrix,
+)
+
 from mcp_server.schemas.scheduler import (
     GenerateSmartScheduleInput,
     SmartScheduleResult,
@@ -38,35 +46,6 @@ DEFAULT_CONSTRAINTS = {
 FOOD_CATEGORIES = ["Food", "Restaurants", "Restaurant", "Cafe", "Bar", "Dining"]
 
 
-def _to_radians(degrees: float) -> float:
-    """Convert degrees to radians."""
-    return degrees * (math.pi / 180)
-
-
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Calculate the Haversine distance between two coordinates in kilometers.
-
-    Args:
-        lat1, lon1: First point coordinates
-        lat2, lon2: Second point coordinates
-
-    Returns:
-        Distance in kilometers
-    """
-    R = 6371  # Earth's radius in km
-    d_lat = _to_radians(lat2 - lat1)
-    d_lon = _to_radians(lon2 - lon1)
-
-    a = (
-        math.sin(d_lat / 2) ** 2 +
-        math.cos(_to_radians(lat1)) * math.cos(_to_radians(lat2)) *
-        math.sin(d_lon / 2) ** 2
-    )
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
-
-
 def is_food_category(category: Optional[str]) -> bool:
     """Check if a category is food-related."""
     if not category:
@@ -87,16 +66,37 @@ def estimate_travel_time(
         Estimated travel time in seconds
     """
     distance = haversine_distance(lat1, lon1, lat2, lon2) * 1000  # Convert to meters
+    return estimate_travel_seconds(distance, profile)
+
+
+def build_estimated_matrix(
+    pois: List[POIInput],
+    accommodations: List[AccommodationInput],
+    profile: str = "foot-walking",
+) -> Dict[str, Any]:
+    """
+    Estimate a full travel matrix for all located POIs and accommodations.
+
+    Computed in one vectorized pass and shaped like the matrix returned by
+    get_travel_matrix, so the scheduler can use plain lookups instead of
+    re-estimating every pair it scores.
+    """
+    ids: List[str] = []
+    points: List[tuple[float, float]] = []
+    for accom in accommodations:
+        if accom.latitude is not None and accom.longitude is not None:
+            ids.append(f"accom_{accom.day_number}")
+            points.append((accom.latitude, accom.longitude))
+    for poi in pois:
+        if poi.latitude is not None and poi.longitude is not None:
+            ids.append(f"poi_{poi.id}")
+            points.append((poi.latitude, poi.longitude))
 
-    # Average speeds in m/s
-    speeds = {
-        "foot-walking": 1.4,      # ~5 km/h
-        "cycling-regular": 4.2,   # ~15 km/h
-        "driving-car": 8.3,       # ~30 km/h (urban average)
-    }
+    if not points:
+        return {"durations": {}}
 
-    speed = speeds.get(profile, 1.4)
-    return distance / speed
+    durations, _ = estimate_travel_matrix(points, profile, dtype=float).to_nested(ids)
+    return {"durations": durations}
 
 
 def get_travel_time_from_matrix(
@@ -282,7 +282,14 @@ def cluster_pois_by_travel_time(
     matrix: Optional[Dict[str, Any]],
     profile: str = "foot-walking",
 ) -> List[List[POIInput]]:
-    """Cluster POIs by travel time."""
+    """
+    Cluster POIs by travel time.
+
+    Each unassigned POI seeds a cluster of the unassigned POIs reachable
+    within ``max_minutes`` of it. Candidates come from a NeighbourGrid
+    sized to the profile's reachable distance plus the seed's matrix row,
+    so estimated pairs are only tested between nearby POIs.
+    """
     clusters = []
     assigned = set()
     max_seconds = max_minutes * 60
@@ -292,28 +299,41 @@ def cluster_pois_by_travel_time(
         pois,
         key=lambda p: (0 if p.latitude is not None and p.longitude is not None else 1),
     )
+    located = [p for p in sorted_pois if p.latitude is not None and p.longitude is not None]
+    grid = NeighbourGrid(
+        [(p.latitude, p.longitude) for p in located],
+        get_speed_model(profile).max_distance_m(max_seconds),
+    )
+
+    # Provided durations may link POIs the grid considers far apart
+    durations = matrix.get("durations") if matrix and "durations" in matrix else None
+    if not isinstance(durations, dict):
+        durations = {}
+    positions: Dict[str, List[int]] = {}
+    for j, poi in enumerate(located):
+        positions.setdefault(f"poi_{poi.id}", []).append(j)
 
-    for poi in sorted_pois:
+    for i, poi in enumerate(sorted_pois):
         if poi.id in assigned:
             continue
 
         cluster = [poi]
         assigned.add(poi.id)
 
-        if poi.latitude is not None and poi.longitude is not None:
-            for other in sorted_pois:
+        # Located POIs are sorted first, so i indexes the grid
+        if i < len(located):
+            row = durations.get(f"poi_{poi.id}", {})
+            candidates = set(grid.candidates(i))
+            for to_id in row:
+                candidates.update(positions.get(to_id, ()))
+
+            for j in sorted(candidates):
+                other = located[j]
                 if other.id in assigned:
                     continue
-                if other.latitude is None or other.longitude is None:
-                    continue
 
-                from_id = f"poi_{poi.id}"
-                to_id = f"poi_{other.id}"
-
-                matrix_time = get_travel_time_from_matrix(from_id, to_id, matrix)
-                if matrix_time is not None:
-                    travel_seconds = matrix_time
-                else:
+                travel_seconds = row.get(f"poi_{other.id}")
+                if travel_seconds is None:
                     travel_seconds = estimate_travel_time(
                         poi.latitude, poi.longitude,
                         other.latitude, other.longitude,
@@ -329,6 +349,263 @@ def cluster_pois_by_travel_time(
     return clusters
 
 
+class ScheduleEngine:
+    """
+    Incremental scheduling state over an integer-indexed travel-time matrix.
+
+    Nodes are the POIs (in input order) followed by the accommodations.
+    Per-day aggregates (dwell, food count, last POI, travel seconds) are
+    updated as POIs are added, so scoring a POI against every day is a few
+    vector operations instead of re-walking each day. Scores and travel
+    totals match score_poi_for_day / calculate_day_travel_time.
+    """
+
+    def __init__(
+        self,
+        pois: List[POIInput],
+        days: List[DayInput],
+        accommodations_by_day: Dict[int, AccommodationInput],
+        matrix: Optional[Dict[str, Any]],
+        constraints: Dict[str, Any],
+        profile: str = "foot-walking",
+    ):
+        self.constraints = constraints
+        self._node_of = {id(poi): i for i, poi in enumerate(pois)}
+
+        accommodations = list(accommodations_by_day.values())
+        points = [(p.latitude, p.longitude) for p in pois] + [
+            (a.latitude, a.longitude) for a in accommodations
+        ]
+        n = len(points)
+        # "is not None" checks gate accommodation legs and proximity bonuses,
+        # truthiness gates POI-to-POI legs (as in calculate_day_travel_time)
+        self.has_coords = np.array([lat is not None and lon is not None for lat, lon in points], dtype=bool)
+        self.truthy_coords = np.array([bool(lat) and bool(lon) for lat, lon in points], dtype=bool)
+        self.dwell = np.array([p.dwell_time or 60 for p in pois], dtype=np.int64)
+        self.is_food = np.array([is_food_category(p.category) for p in pois], dtype=bool)
+
+        # Estimates for every located pair, overridden by provided matrix cells
+        self.travel = np.full((n, n), np.nan)
+        located = np.flatnonzero(self.has_coords)
+        if located.size:
+            estimate = estimate_travel_matrix(
+                [points[i] for i in located], profile, dtype=np.float64
+            )
+            self.travel[np.ix_(located, located)] = estimate.durations
+        self._apply_matrix(matrix, pois, accommodations)
+
+        accom_node = {a.day_number: len(pois) + i for i, a in enumerate(accommodations)}
+        n_days = len(days)
+        self.day_index = {day.date: d for d, day in enumerate(days)}
+        self.day_accom = np.array([
+            accom_node[day.day_number]
+            if day.day_number in accom_node and self.has_coords[accom_node[day.day_number]]
+            else -1
+            for day in days
+        ], dtype=np.int64)
+        self.day_dwell = np.zeros(n_days, dtype=np.int64)
+        self.day_food = np.zeros(n_days, dtype=np.int64)
+        self.day_count = np.zeros(n_days, dtype=np.int64)
+        self.day_last = np.full(n_days, -1, dtype=np.int64)
+        self.day_travel_seconds = np.zeros(n_days, dtype=np.float64)
+
+    def _apply_matrix(
+        self,
+        matrix: Optional[Dict[str, Any]],
+        pois: List[POIInput],
+        accommodations: List[AccommodationInput],
+    ) -> None:
+        """Copy provided durations (keyed by poi_/accom_ ids) into the matrix."""
+        durations = matrix.get("durations") if matrix else None
+        if not isinstance(durations, dict):
+            return
+        nodes: Dict[str, List[int]] = {}
+        for i, poi in enumerate(pois):
+            nodes.setdefault(f"poi_{poi.id}", []).append(i)
+        for i, accom in enumerate(accommodations):
+            nodes.setdefault(f"accom_{accom.day_number}", []).append(len(pois) + i)
+        for from_id, row in durations.items():
+            if from_id not in nodes or not isinstance(row, dict):
+                continue
+            cols: List[int] = []
+            values: List[float] = []
+            for to_id, value in row.items():
+                if value is None or to_id not in nodes:
+                    continue
+                for j in nodes[to_id]:
+                    cols.append(j)
+                    values.append(value)
+            if cols:
+                # One vectorized row write instead of per-cell indexing
+                self.travel[np.ix_(nodes[from_id], cols)] = np.asarray(values, dtype=np.float64)
+
+    def node(self, poi: POIInput) -> int:
+        """Matrix index of a POI passed to the constructor."""
+        return self._node_of[id(poi)]
+
+    def _added_leg_seconds(self, node: int) -> np.ndarray:
+        """Travel seconds each day would gain by appending ``node``."""
+        leg = np.zeros(len(self.day_count), dtype=np.float64)
+        empty = self.day_count == 0
+        if self.has_coords[node]:
+            mask = empty & (self.day_accom >= 0)
+            leg[mask] = self.travel[self.day_accom[mask], node]
+        if self.truthy_coords[node]:
+            mask = ~empty
+            mask[mask] = self.truthy_coords[self.day_last[mask]]
+            leg[mask] = self.travel[self.day_last[mask], node]
+        return leg
+
+    def score_days(self, poi: POIInput) -> np.ndarray:
+        """Score ``poi`` against every day at once (higher is better)."""
+        node = self.node(poi)
+        max_minutes = self.constraints.get("max_hours_per_day", 8) * 60
+        max_food = self.constraints.get("max_food_per_day", 2)
+        max_travel_minutes = self.constraints.get("max_travel_minutes_in_cluster", 15)
+        empty = self.day_count == 0
+
+        current_travel = np.round(self.day_travel_seconds / 60)
+        projected_travel = np.round((self.day_travel_seconds + self._added_leg_seconds(node)) / 60)
+        added_travel = projected_travel - current_travel
+
+        # Time fitness - penalize if exceeding budget, bonus for good fit
+        projected_total = self.day_dwell + self.dwell[node] + added_travel
+        score = np.full(len(self.day_count), 100.0)
+        score = np.where(
+            projected_total > max_minutes,
+            score - 50,
+            score + (projected_total / max_minutes) * 20,
+        )
+
+        # Penalty for excessive travel time
+        excess = added_travel > 30
+        score[excess] -= np.minimum(30, added_travel[excess] - 30)
+
+        # Category penalty - check food limit
+        if self.is_food[node]:
+            score[self.day_food >= max_food] -= 80
+            score[self.day_food == max_food - 1] -= 20
+
+        if self.has_coords[node]:
+            # Prefer POIs close to accommodation
+            mask = self.day_accom >= 0
+            to_accom = np.full(len(score), np.inf)
+            to_accom[mask] = self.travel[self.day_accom[mask], node] / 60
+            near = to_accom <= 10
+            score[near] += 15 * (1 - to_accom[near] / 10)
+
+            # Proximity to the day's last POI
+            mask = ~empty
+            mask[mask] = self.has_coords[self.day_last[mask]]
+            from_last = self.travel[self.day_last[mask], node] / 60
+            bonus = np.where(
+                from_last <= max_travel_minutes,
+                30 * (1 - from_last / max_travel_minutes),
+                np.where(from_last <= max_travel_minutes * 2, 10.0, -15.0),
+            )
+            score[mask] += bonus
+
+        # Bonus for adding to empty day
+        score[empty] += 5
+        return score
+
+    def add(self, poi: POIInput, day: int) -> None:
+        """Append ``poi`` to day index ``day`` and update its aggregates."""
+        node = self.node(poi)
+        self.day_travel_seconds[day] += self._added_leg_seconds(node)[day]
+        self.day_dwell[day] += self.dwell[node]
+        self.day_food[day] += self.is_food[node]
+        self.day_count[day] += 1
+        self.day_last[day] = node
+
+    def travel_minutes(self, day: int) -> int:
+        """Rounded travel minutes for day index ``day``."""
+        return round(float(self.day_travel_seconds[day]) / 60)
+
+
+def plan_schedule(
+    pois: List[POIInput],
+    days: List[DayInput],
+    accommodations_by_day: Dict[int, AccommodationInput],
+    constraints: Dict[str, Any],
+    matrix: Optional[Dict[str, Any]] = None,
+    profile: str = "foot-walking",
+) -> tuple[Dict[str, List[POIInput]], List[POIAssignment], ScheduleEngine]:
+    """
+    Distribute POIs across days: pin anchored POIs, cluster the rest and
+    place each on its best-scoring day.
+
+    Returns:
+        (schedule by date, assignments with day_order set, engine holding
+        the final per-day aggregates)
+    """
+    engine = ScheduleEngine(pois, days, accommodations_by_day, matrix, constraints, profile)
+
+    # Initialize schedule
+    schedule: Dict[str, List[POIInput]] = {day.date: [] for day in days}
+    assignments: List[POIAssignment] = []
+
+    # Separate anchored from unanchored POIs
+    anchored_pois = [p for p in pois if p.is_anchored and p.anchored_time and p.scheduled_date]
+    unanchored_pois = [p for p in pois if not p.is_anchored]
+
+    # Pre-assign anchored POIs
+    for poi in anchored_pois:
+        if poi.scheduled_date in schedule:
+            schedule[poi.scheduled_date].append(poi)
+            assignments.append(POIAssignment(
+                poi_id=poi.id,
+                poi_name=poi.name,
+                scheduled_date=poi.scheduled_date,
+                day_order=0,  # Will be recalculated
+                is_anchored=True,
+                anchored_time=poi.anchored_time,
+            ))
+
+    # Sort anchored POIs by time within each day
+    for d, day in enumerate(days):
+        schedule[day.date].sort(
+            key=lambda p: p.anchored_time or "23:59"
+        )
+        for poi in schedule[day.date]:
+            engine.add(poi, d)
+
+    if not days:
+        return schedule, assignments, engine
+
+    # Cluster unanchored POIs
+    clusters = cluster_pois_by_travel_time(
+        unanchored_pois,
+        constraints["max_travel_minutes_in_cluster"],
+        matrix,
+        profile,
+    )
+
+    # Assign unanchored POIs to their best-scoring day (first day wins ties)
+    for poi in (poi for cluster in clusters for poi in cluster):
+        best = int(np.argmax(engine.score_days(poi)))
+        best_day = days[best]
+        schedule[best_day.date].append(poi)
+        engine.add(poi, best)
+        assignments.append(POIAssignment(
+            poi_id=poi.id,
+            poi_name=poi.name,
+            scheduled_date=best_day.date,
+            day_order=0,
+            is_anchored=False,
+        ))
+
+    # Recalculate day_order (first assignment per POI id, as before)
+    first_assignment: Dict[int, POIAssignment] = {}
+    for assignment in assignments:
+        first_assignment.setdefault(assignment.poi_id, assignment)
+    for day in days:
+        for idx, poi in enumerate(schedule[day.date]):
+            first_assignment[poi.id].day_order = idx
+
+    return schedule, assignments, engine
+
+
 def generate_saturation_warnings(
     schedule: Dict[str, List[POIInput]],
     days: List[DayInput],
@@ -336,8 +613,14 @@ def generate_saturation_warnings(
     matrix: Optional[Dict[str, Any]],
     accommodations_by_day: Dict[int, AccommodationInput],
     profile: str = "foot-walking",
+    travel_minutes_by_date: Optional[Dict[str, int]] = None,
 ) -> List[ScheduleWarning]:
-    """Generate saturation warnings for a schedule."""
+    """
+    Generate saturation warnings for a schedule.
+
+    Pass ``travel_minutes_by_date`` (e.g. from ScheduleEngine) to reuse
+    already computed day travel times instead of recalculating them.
+    """
     warnings = []
     max_minutes = constraints.get("max_hours_per_day", 8) * 60
     max_food = constraints.get("max_food_per_day", 2)
@@ -351,7 +634,10 @@ def generate_saturation_warnings(
         accommodation = accommodations_by_day.get(day.day_number)
 
         dwell_time = get_day_dwell_time(day_pois)
-        travel_time = calculate_day_travel_time(day_pois, accommodation, matrix, profile)
+        if travel_minutes_by_date is not None and day.date in travel_minutes_by_date:
+            travel_time = travel_minutes_by_date[day.date]
+        else:
+            travel_time = calculate_day_travel_time(day_pois, accommodation, matrix, profile)
         total_time = dwell_time + travel_time
         food_count = count_food_pois(day_pois)
 
@@ -491,84 +777,20 @@ def register_tools(server: FastMCP):
                 constraints_applied=constraints,
             ).model_dump()
 
-        # Initialize schedule
-        schedule: Dict[str, List[POIInput]] = {day.date: [] for day in day_inputs}
-        assignments: List[POIAssignment] = []
-
-        # Separate anchored from unanchored POIs
-        anchored_pois = [p for p in poi_inputs if p.is_anchored and p.anchored_time and p.scheduled_date]
-        unanchored_pois = [p for p in poi_inputs if not p.is_anchored]
-
-        # Pre-assign anchored POIs
-        for poi in anchored_pois:
-            if poi.scheduled_date in schedule:
-                schedule[poi.scheduled_date].append(poi)
-                assignments.append(POIAssignment(
-                    poi_id=poi.id,
-                    poi_name=poi.name,
-                    scheduled_date=poi.scheduled_date,
-                    day_order=0,  # Will be recalculated
-                    is_anchored=True,
-                    anchored_time=poi.anchored_time,
-                ))
-
-        # Sort anchored POIs by time within each day
-        for day in day_inputs:
-            schedule[day.date].sort(
-                key=lambda p: p.anchored_time or "23:59"
-            )
-
-        # Cluster unanchored POIs
-        clusters = cluster_pois_by_travel_time(
-            unanchored_pois,
-            constraints["max_travel_minutes_in_cluster"],
-            travel_matrix,
-            transport_profile,
+        schedule, assignments, engine = plan_schedule(
+            poi_inputs, day_inputs, accommodations_by_day,
+            constraints, travel_matrix, transport_profile,
         )
-
-        # Flatten clusters while preserving order
-        pois_to_assign = [poi for cluster in clusters for poi in cluster]
-
-        # Assign unanchored POIs using scoring
-        for poi in pois_to_assign:
-            best_day = None
-            best_score = float("-inf")
-
-            for day in day_inputs:
-                day_pois = schedule[day.date]
-                accommodation = accommodations_by_day.get(day.day_number)
-
-                score = score_poi_for_day(
-                    poi, day_pois, constraints,
-                    accommodation, travel_matrix, transport_profile
-                )
-
-                if score > best_score:
-                    best_score = score
-                    best_day = day
-
-            if best_day:
-                schedule[best_day.date].append(poi)
-                assignments.append(POIAssignment(
-                    poi_id=poi.id,
-                    poi_name=poi.name,
-                    scheduled_date=best_day.date,
-                    day_order=0,
-                    is_anchored=False,
-                ))
-
-        # Recalculate day_order
-        for day in day_inputs:
-            for idx, poi in enumerate(schedule[day.date]):
-                for assignment in assignments:
-                    if assignment.poi_id == poi.id:
-                        assignment.day_order = idx
-                        break
+        anchored_count = sum(1 for a in assignments if a.is_anchored)
+        travel_minutes_by_date = {
+            day.date: engine.travel_minutes(d) for d, day in enumerate(day_inputs)
+        }
 
         # Generate warnings
         warnings = generate_saturation_warnings(
             schedule, day_inputs, constraints,
-            travel_matrix, accommodations_by_day, transport_profile
+            travel_matrix, accommodations_by_day, transport_profile,
+            travel_minutes_by_date=travel_minutes_by_date,
         )
 
         # Build day summaries
@@ -578,7 +800,7 @@ def register_tools(server: FastMCP):
             accommodation = accommodations_by_day.get(day.day_number)
 
             dwell_time = get_day_dwell_time(day_pois)
-            travel_time = calculate_day_travel_time(day_pois, accommodation, travel_matrix, transport_profile)
+            travel_time = travel_minutes_by_date[day.date]
             total_time = dwell_time + travel_time
             max_minutes = constraints["max_hours_per_day"] * 60
 
@@ -620,7 +842,7 @@ def register_tools(server: FastMCP):
         stats = ScheduleStats(
             total_pois=len(poi_inputs),
             distributed_pois=len(assignments),
-            anchored_count=len(anchored_pois),
+            anchored_count=anchored_count,
             avg_hours_per_day=round(avg_minutes_per_day / 60, 1),
             days_used=len(days_with_pois),
         )